@@ -0,0 +1,44 @@
+"""add model_usage table
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d6e7f8a9b0'
+down_revision: str | None = 'b4c5d6e7f8a9'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'model_usage',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('trace_id', sa.String(), nullable=True),
+        sa.Column('stage', sa.String(), nullable=False),
+        sa.Column('model_id', sa.String(), nullable=True),
+        sa.Column('input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('output_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cache_read_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cache_write_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_ms', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_model_usage_user_id', 'model_usage', ['user_id'])
+    op.create_index('ix_model_usage_user_created', 'model_usage', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_model_usage_user_created', table_name='model_usage')
+    op.drop_index('ix_model_usage_user_id', table_name='model_usage')
+    op.drop_table('model_usage')
@@ -7,6 +7,7 @@ skill-specific environment variables from secrets.yml.
 import json
 import os
 import re
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -659,6 +660,9 @@ def get_skill_env_vars(
 _RUNTIME_SKILL_ENV_CONTEXT: tuple[str, str] | None = None  # (resolved secrets_path, user_id)
 _RUNTIME_SKILL_ENV_KEYS_BY_SKILL: dict[str, set[str]] = {}
 _RUNTIME_SKILL_ENV_MANAGED_KEYS: set[str] = set()
+# Guards os.environ updates from refreshes against snapshots taken by
+# runtime_env_from_secrets.
+_RUNTIME_SKILL_ENV_LOCK = threading.RLock()
 
 
 def refresh_runtime_env_from_secrets(
@@ -667,10 +671,13 @@ def refresh_runtime_env_from_secrets(
     user_id: str | None = None,
     skill_names: list[str] | None = None,
     config: Any | None = None,
+    apply: bool = True,
 ) -> dict[str, Any]:
     """Reload secrets.yml and ensure the process env sees latest skill env vars.
 
-    This supports "no restart" skill execution.
+    This supports "no restart" skill execution. The resolved skill env vars
+    are returned under ``"env"``; with ``apply=False`` they are only returned
+    and ``os.environ`` is left untouched.
     """
     # Track which env vars we injected from the `skills:` section so we can
     # safely prevent cross-user leakage in a long-running, multi-tenant process.
@@ -736,11 +743,12 @@ def refresh_runtime_env_from_secrets(
     skills = merged_secrets.get("skills")
     if not isinstance(skills, dict):
         # Still attempt legacy env export for non-skill sections.
-        try:
-            _flatten_secrets_mapping(merged_secrets)
-        except Exception:
-            pass
-        return {"ok": True, "applied": 0, "skills": []}
+        if apply:
+            try:
+                _flatten_secrets_mapping(merged_secrets)
+            except Exception:
+                pass
+        return {"ok": True, "applied": 0, "skills": [], "env": {}}
 
     # With flat format, we get all env vars at once (no per-skill iteration needed)
     # get_skill_env_vars returns all non-dict values from skills: section
@@ -755,13 +763,6 @@ def refresh_runtime_env_from_secrets(
     # With flat format, always do full refresh (all env vars at once)
     full_refresh = True
 
-    # On full refresh (including any user switch), remove keys we previously
-    # injected that are not desired for the current context.
-    if full_refresh:
-        for k in list(_RUNTIME_SKILL_ENV_MANAGED_KEYS):
-            if k not in desired_env:
-                os.environ.pop(k, None)
-
     # For template materialization, get list of skill directories
     names: list[str] = []
     if user_id is not None and config is not None:
@@ -792,10 +793,6 @@ def refresh_runtime_env_from_secrets(
         if user_id is None or config is None:
             return {}
 
-        import re
-
-        extra_env: dict[str, str] = {}
-
         # Determine the per-user skills directory (source of templates).
         try:
             user_dir = resolve_user_skills_dir(config, user_id, create=True)
@@ -817,225 +814,22 @@ def refresh_runtime_env_from_secrets(
         if not isinstance(skills_block, dict):
             return {}
 
-        # A conservative cap to avoid runaway IO if a skill accidentally includes many example files.
-        max_templates_total = 50
-        rendered_count = 0
-
-        # Track config env vars we set so we can also emit a per-user .env convenience file.
-        config_env_lines: dict[str, str] = {}
-
-        for skill in names:
-            if rendered_count >= max_templates_total:
-                break
-
-            skill_dir = user_dir / str(skill)
-            if not (skill_dir.exists() and skill_dir.is_dir()):
-                continue
-
-            # Merge config values from the skill block. We accept:
-            # - top-level scalar keys (e.g., skills.himalaya.GMAIL)
-            # - env vars (skills.himalaya.env)
-            # - per-user overrides in the merged mapping (already applied)
-            skill_cfg = skills_block.get(skill)
-            if not isinstance(skill_cfg, dict):
-                skill_cfg = {}
-
-            # Build replacement map.
-            replacements: dict[str, str] = {}
-
-            # Include scalar config keys.
-            for k, v in skill_cfg.items():
-                if k in {"env", "users"}:
-                    continue
-                if isinstance(v, (dict, list)):
-                    continue
-                key = str(k).strip()
-                if not key:
-                    continue
-                if v is None:
-                    continue
-                replacements[key.upper()] = str(v)
-
-            # Include env keys.
-            env_block = skill_cfg.get("env")
-            if isinstance(env_block, dict):
-                for k, v in env_block.items():
-                    if v is None:
-                        continue
-                    replacements[str(k).upper()] = str(v)
-
-            # Apply legacy per-user overrides (if present in secrets.yml) for template rendering.
-            if user_id is not None:
-                users_block = skill_cfg.get("users")
-                if isinstance(users_block, dict):
-                    user_block = users_block.get(str(user_id))
-                    if isinstance(user_block, dict):
-                        # Merge scalar keys and env keys from the user block.
-                        for k, v in user_block.items():
-                            if k in {"env", "users"}:
-                                continue
-                            if isinstance(v, (dict, list)):
-                                continue
-                            key = str(k).strip()
-                            if key and v is not None:
-                                replacements[key.upper()] = str(v)
-
-                        user_env = user_block.get("env")
-                        if isinstance(user_env, dict):
-                            for k, v in user_env.items():
-                                if v is None:
-                                    continue
-                                replacements[str(k).upper()] = str(v)
-
-            # Find example templates.
-            example_files: list[Path] = []
-            try:
-                for p in skill_dir.rglob("*_example"):
-                    if p.is_file():
-                        example_files.append(p)
-                for p in skill_dir.rglob("*.example"):
-                    if p.is_file():
-                        example_files.append(p)
-            except Exception:
-                continue
-
-            # De-dup paths.
-            seen_paths: set[str] = set()
-            uniq_example_files: list[Path] = []
-            for p in example_files:
-                s = str(p)
-                if s in seen_paths:
-                    continue
-                seen_paths.add(s)
-                uniq_example_files.append(p)
-
-            for tpl in uniq_example_files:
-                if rendered_count >= max_templates_total:
-                    break
-
-                try:
-                    raw = tpl.read_text(encoding="utf-8")
-                except Exception:
-                    continue
-
-                # Resolve destination path.
-                if tpl.name.endswith("_example"):
-                    dest_name = tpl.name[: -len("_example")]
-                elif tpl.name.endswith(".example"):
-                    dest_name = tpl.name[: -len(".example")]
-                else:
-                    continue
-
-                # Write rendered outputs to workspace/<user>/tmp/.
-                #
-                # This keeps secrets-bearing config files in the user's
-                # private workspace, away from the skills directory tree.
-                #
-                # Naming convention:
-                # - If the rendered filename already starts with the skill name
-                #   (e.g., himalaya.toml), keep it.
-                # - Otherwise, prefix to avoid collisions across skills.
-                #
-                # Examples:
-                # - skill=himalaya, tpl=himalaya.toml_example -> himalaya.toml
-                # - skill=foo, tpl=config.toml_example -> foo__config.toml
-                if dest_name.startswith(f"{skill}.") or dest_name == str(skill):
-                    out_name = dest_name
-                else:
-                    out_name = f"{skill}__{dest_name}"
-                dest = output_dir / out_name
-
-                def _replace(match: re.Match, _replacements: dict[str, str] = replacements) -> str:
-                    key = (match.group(1) or "").strip().upper()
-                    if not key:
-                        return match.group(0)
-                    if key not in _replacements:
-                        return match.group(0)
-                    return _replacements[key]
-
-                rendered = re.sub(r"\[([A-Z0-9_]+)\]", _replace, raw)
-
-                try:
-                    # Ensure the output directory exists (deferred creation).
-                    output_dir.mkdir(parents=True, exist_ok=True)
-
-                    # Only write when changed to reduce churn.
-                    if dest.exists() and dest.is_dir():
-                        # A common mistake is `mkdir -p some-config.toml`, which creates a
-                        # directory where a file is expected. Recover safely when empty.
-                        try:
-                            if any(dest.iterdir()):
-                                # Non-empty: avoid destructive behavior.
-                                continue
-                            dest.rmdir()
-                        except Exception:
-                            continue
-
-                    if dest.exists():
-                        try:
-                            existing = dest.read_text(encoding="utf-8")
-                        except Exception:
-                            existing = None
-                        if existing == rendered:
-                            pass
-                        else:
-                            dest.write_text(rendered, encoding="utf-8")
-                    else:
-                        dest.write_text(rendered, encoding="utf-8")
-                except Exception:
-                    continue
-
-                rendered_count += 1
-
-                # Auto-export <SKILL>_CONFIG for the canonical pattern:
-                #   {skill}.toml_example -> {skill}.toml
-                # This stays generic and applies to any skill following the convention.
-                if dest.name == f"{skill}.toml":
-                    env_key = f"{str(skill).upper()}_CONFIG"
-                    # Always export absolute paths. In container this should look like:
-                    #   /app/skills/<user>/<skill>.toml
-                    # while in local tests it will be an absolute temp dir path.
-                    abs_dest = str(dest.resolve())
-                    extra_env[env_key] = abs_dest
-                    config_env_lines[env_key] = abs_dest
-
-        # Write a per-user .env convenience file containing only *_CONFIG vars.
-        if config_env_lines:
-            try:
-                env_path = output_dir / ".env"
-                existing_lines: list[str] = []
-                if env_path.exists():
-                    try:
-                        existing_lines = env_path.read_text(encoding="utf-8").splitlines()
-                    except Exception:
-                        existing_lines = []
-
-                # Parse existing assignments.
-                kept: list[str] = []
-                for ln in existing_lines:
-                    if not ln.strip() or ln.lstrip().startswith("#"):
-                        kept.append(ln)
-                        continue
-                    if "=" not in ln:
-                        kept.append(ln)
-                        continue
-                    k = ln.split("=", 1)[0].strip()
-                    if k in config_env_lines:
-                        continue
-                    kept.append(ln)
-
-                # Append updated lines.
-                if kept and kept[-1].strip():
-                    kept.append("")
-                kept.append("# Auto-generated by Mordecai. Do not commit.")
-                for k, v in sorted(config_env_lines.items()):
-                    kept.append(f"{k}={v}")
+        # Rendering is cached per user: unchanged templates and secrets cost
+        # a few stat calls, and outputs are only rewritten (atomically) on change.
+        from app.services.skill_templates import get_template_materializer
 
-                env_path.write_text("\n".join(kept).rstrip() + "\n", encoding="utf-8")
-            except Exception:
-                pass
+        materializer = get_template_materializer(user_dir, output_dir)
+        try:
+            return materializer.materialize(names, skills_block, user_id=str(user_id))
+        except Exception:
+            import logging
 
-        return extra_env
+            logging.getLogger(__name__).warning(
+                "Cannot materialize skill templates for user %s; using the last rendered configs",
+                user_id,
+                exc_info=True,
+            )
+            return materializer.last_env()
 
     extra_env = _materialize_skill_templates()
     if extra_env:
@@ -1051,22 +845,33 @@ def refresh_runtime_env_from_secrets(
             desired_env[env_key] = env_val
             applied_skills.append(inferred_skill)
 
-    # Apply desired env vars.
+    if not apply:
+        return {"ok": True, "applied": 0, "skills": applied_skills, "env": dict(desired_env)}
+
     applied = 0
-    for k, v in desired_env.items():
-        os.environ[k] = v
-        applied += 1
-
-    # Update tracking.
-    if full_refresh:
-        _RUNTIME_SKILL_ENV_CONTEXT = context
-        _RUNTIME_SKILL_ENV_KEYS_BY_SKILL = {k: set(v) for k, v in new_keys_by_skill.items()}
-        _RUNTIME_SKILL_ENV_MANAGED_KEYS = set(desired_env.keys())
-    else:
-        # Partial refresh: only update the touched skills; do not wipe other skills.
-        for skill, keys in new_keys_by_skill.items():
-            _RUNTIME_SKILL_ENV_KEYS_BY_SKILL[skill] = set(keys)
-        _RUNTIME_SKILL_ENV_MANAGED_KEYS.update(desired_env.keys())
+    with _RUNTIME_SKILL_ENV_LOCK:
+        # On full refresh (including any user switch), remove keys we previously
+        # injected that are not desired for the current context.
+        if full_refresh:
+            for k in list(_RUNTIME_SKILL_ENV_MANAGED_KEYS):
+                if k not in desired_env:
+                    os.environ.pop(k, None)
+
+        # Apply desired env vars.
+        for k, v in desired_env.items():
+            os.environ[k] = v
+            applied += 1
+
+        # Update tracking.
+        if full_refresh:
+            _RUNTIME_SKILL_ENV_CONTEXT = context
+            _RUNTIME_SKILL_ENV_KEYS_BY_SKILL = {k: set(v) for k, v in new_keys_by_skill.items()}
+            _RUNTIME_SKILL_ENV_MANAGED_KEYS = set(desired_env.keys())
+        else:
+            # Partial refresh: only update the touched skills; do not wipe other skills.
+            for skill, keys in new_keys_by_skill.items():
+                _RUNTIME_SKILL_ENV_KEYS_BY_SKILL[skill] = set(keys)
+            _RUNTIME_SKILL_ENV_MANAGED_KEYS.update(desired_env.keys())
 
     # Best-effort materialization of per-skill config files.
     # Global skill blocks with 'path' are handled by _flatten_secrets_mapping, but
@@ -1090,7 +895,32 @@ def refresh_runtime_env_from_secrets(
     except Exception:
         pass
 
-    return {"ok": True, "applied": applied, "skills": applied_skills}
+    return {"ok": True, "applied": applied, "skills": applied_skills, "env": dict(desired_env)}
+
+
+def runtime_env_from_secrets(
+    *,
+    secrets_path: Path,
+    user_id: str | None = None,
+    config: Any | None = None,
+) -> dict[str, str]:
+    """Return a copy of the process env with *user_id*'s skill env vars applied.
+
+    Unlike :func:`refresh_runtime_env_from_secrets` this never touches
+    ``os.environ``. Skill env vars a refresh injected for another user are
+    left out of the copy, so callers running in parallel for different users
+    each get only their own secrets.
+    """
+    try:
+        desired = refresh_runtime_env_from_secrets(
+            secrets_path=secrets_path, user_id=user_id, config=config, apply=False
+        ).get("env", {})
+    except Exception:
+        desired = {}
+    with _RUNTIME_SKILL_ENV_LOCK:
+        env = {k: v for k, v in os.environ.items() if k not in _RUNTIME_SKILL_ENV_MANAGED_KEYS}
+    env.update(desired)
+    return env
 
 
 class AgentConfig(BaseSettings):
@@ -1172,6 +1002,13 @@ class AgentConfig(BaseSettings):
     memory_description: str = Field(default="Mordecai multi-user memory with strategies")
     memory_retrieval_top_k: int = Field(default=10)
     memory_retrieval_relevance_score: float = Field(default=0.2)
+    memory_ready_timeout_seconds: float = Field(
+        default=5.0,
+        description=(
+            "The memory id is resolved in the background at startup. Until it is known, "
+            "memory operations wait at most this long, then continue without memory."
+        ),
+    )
 
     # Session memory management
     max_conversation_messages: int = Field(
@@ -1239,6 +1076,17 @@ class AgentConfig(BaseSettings):
         default=1.0,
         description="Fraction of traces to log (0.0-1.0).",
     )
+    log_async_enabled: bool = Field(
+        default=False,
+        description=(
+            "Route all log handlers through a bounded queue drained by a background thread, "
+            "so callers (event loop, tool threads) only pay for an enqueue."
+        ),
+    )
+    log_queue_max_records: int = Field(
+        default=10_000,
+        description="Capacity of the async logging queue; records beyond it are dropped and counted.",
+    )
 
     # Runtime safety / watchdog
     shell_default_timeout_seconds: int = Field(
@@ -1278,6 +1126,57 @@ class AgentConfig(BaseSettings):
             "Streaming is implemented by the internal safe runner; enabling this will force the safe runner."
         ),
     )
+    shell_resident_runner_enabled: bool = Field(
+        default=False,
+        description=(
+            "If true, plain `python scripts/x.py ...` shell commands run in a resident per-interpreter "
+            "fork server that keeps the script's imports loaded, instead of a new shell plus interpreter. "
+            "Commands with pipes, redirects, variables or globs still go through the shell. "
+            "Only used when the safe runner is, under the same per-user slots and rlimits."
+        ),
+    )
+    shell_resident_runner_memory_limit_mb: int = Field(
+        default=2048,
+        description="Address-space limit (RLIMIT_AS) per resident script run, in MB. 0 disables the limit.",
+    )
+    shell_resident_runner_idle_seconds: int = Field(
+        default=600,
+        description="Resident runner fork servers unused for this long are shut down.",
+    )
+    shell_output_inline_chars: int = Field(
+        default=16_000,
+        description=(
+            "Shell stdout/stderr up to this size is returned whole. Larger output is "
+            "spooled to <workspace>/<user>/.shell-output and summarized as head + tail."
+        ),
+    )
+    shell_output_head_chars: int = Field(
+        default=4_000,
+        description="Leading chars of spooled shell output shown to the agent.",
+    )
+    shell_output_tail_chars: int = Field(
+        default=8_000,
+        description="Trailing chars of spooled shell output shown to the agent.",
+    )
+    shell_output_retention_seconds: int = Field(
+        default=86_400,
+        description="Spooled shell output older than this is deleted.",
+    )
+    shell_max_concurrent_per_user: int = Field(
+        default=4,
+        description=(
+            "Shell commands one user can run at once; further commands wait for a "
+            "free slot (up to their timeout). 0 disables the cap."
+        ),
+    )
+    shell_memory_limit_mb: int = Field(
+        default=0,
+        description="Address-space limit (RLIMIT_AS) for shell commands in MB. 0 = unlimited.",
+    )
+    shell_cpu_limit_seconds: int = Field(
+        default=0,
+        description="CPU-time limit (RLIMIT_CPU) for shell commands in seconds. 0 = unlimited.",
+    )
     health_stall_seconds: int = Field(
         default=180,
         description=(
@@ -1295,10 +1194,117 @@ class AgentConfig(BaseSettings):
             "If true, a watchdog thread will os._exit(1) when stalled so a supervisor can restart the process."
         ),
     )
+    admin_users: list[str] = Field(
+        default_factory=list,
+        description="Telegram usernames allowed to run admin commands ('profile', 'toolstats').",
+    )
+    admin_api_token: str | None = Field(
+        default=None,
+        description=(
+            "Bearer token for the /admin HTTP endpoints (sampling profiler). "
+            "The endpoints are not mounted when unset."
+        ),
+    )
+    loop_monitor_enabled: bool = Field(
+        default=True,
+        description=(
+            "Measure event-loop scheduling lag and thread-pool saturation; exported in /health and metrics."
+        ),
+    )
+    loop_lag_warn_seconds: float = Field(
+        default=0.5,
+        description=(
+            "When the event loop is blocked this long, log the stack of the code blocking it."
+        ),
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        description=(
+            "If true, expose Prometheus text-format metrics (per-stage latency histograms, "
+            "queue/semaphore gauges, DB session time, outbound 429s) at GET /metrics."
+        ),
+    )
+
+    # Usage ledger / budgets
+    usage_ledger_enabled: bool = Field(
+        default=True,
+        description=(
+            "Record input/output/cache tokens and model latency of every model call in the "
+            "model_usage table (written in batches)."
+        ),
+    )
+    usage_flush_interval_seconds: float = Field(
+        default=5.0,
+        description="How often buffered usage records are written to the database.",
+    )
+    usage_flush_batch_size: int = Field(
+        default=200,
+        description="Flush the usage buffer early once it holds this many records.",
+    )
+    usage_daily_token_budget: int = Field(
+        default=0,
+        description=(
+            "Per-user daily (UTC) budget of input+output tokens; 0 disables budgets. "
+            "Users over budget get the fallback model and/or a smaller conversation window."
+        ),
+    )
+    usage_budget_overrides: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-user daily token budgets (user_id -> tokens) overriding the default.",
+    )
+    usage_budget_fallback_model_id: str | None = Field(
+        default=None,
+        description=(
+            "Cheaper model id (for the configured provider) used once a user exceeds the "
+            "daily token budget. Unset keeps the normal model."
+        ),
+    )
+    usage_budget_window_size: int = Field(
+        default=0,
+        description=(
+            "Conversation window size used once a user exceeds the daily token budget; "
+            "0 keeps conversation_window_size."
+        ),
+    )
 
     # Skills settings (base directory, per-user subdirs created automatically)
     skills_base_dir: str = Field(default="./skills")
     shared_skills_dir: str = Field(default="./skills/shared")
+    skill_catalog_watch_interval_seconds: float = Field(
+        default=2.0,
+        description=(
+            "How often the skill catalog rescans skills directories for edits made "
+            "outside install/uninstall/onboarding. Between rescans, per-message "
+            "skill discovery is served from memory. 0 disables the watcher and "
+            "revalidates file stamps on every lookup instead."
+        ),
+    )
+    skill_download_workers: int = Field(
+        default=8,
+        description="Concurrent file downloads when installing a skill from GitHub",
+    )
+    skill_download_cache_dir: str | None = Field(
+        default=None,
+        description=(
+            "Cache for downloaded GitHub skill files (content-addressed by git blob SHA) "
+            "and ETag-validated API responses. Defaults to <skills_base_dir>/.cache/github."
+        ),
+    )
+    github_api_base_url: str = Field(
+        default="https://api.github.com",
+        description="GitHub REST API base URL used for skill downloads",
+    )
+    github_raw_base_url: str = Field(
+        default="https://raw.githubusercontent.com",
+        description="Base URL serving raw repository files at a commit",
+    )
+    github_token: str | None = Field(
+        default=None,
+        description=(
+            "Optional GitHub token for skill downloads (higher API rate limit, private "
+            "repos). Falls back to the GITHUB_TOKEN environment variable."
+        ),
+    )
 
     user_skills_dir_template: str | None = Field(
         default=None,
@@ -1419,6 +1425,42 @@ class AgentConfig(BaseSettings):
         default=180,
         description="Timeout for pip install during onboarding/preflight (per skill)",
     )
+    pending_skills_onboarding_workers: int = Field(
+        default=4,
+        description=(
+            "Maximum number of pending skills preflighted/onboarded in parallel "
+            "(venv builds, installs and smoke tests). 1 processes skills one by one."
+        ),
+    )
+    pending_skills_scan_processes: int = Field(
+        default=2,
+        description=(
+            "Worker processes for CPU-bound onboarding steps (directory fingerprints, "
+            "import scanning) in background onboarding jobs. 0 scans in-thread."
+        ),
+    )
+    pending_skills_job_state_dir: str | None = Field(
+        default=None,
+        description=(
+            "Directory for resumable onboarding job state (one folder per job with "
+            "per-skill state files). Defaults to <skills_base_dir>/.onboarding-jobs."
+        ),
+    )
+    skill_venv_store_enabled: bool = Field(
+        default=True,
+        description=(
+            "If true, skill dependencies are installed into shared venvs keyed by a hash "
+            "of the normalized requirements and Python version; each skill's .venv is a "
+            "symlink to its shared venv. If false, every skill builds a private .venv."
+        ),
+    )
+    skill_venv_store_dir: str | None = Field(
+        default=None,
+        description=(
+            "Directory for shared skill venvs and the local wheelhouse. "
+            "Defaults to <skills_base_dir>/.venvs."
+        ),
+    )
 
     pending_skills_run_scripts_timeout_seconds: int = Field(
         default=20,
@@ -1437,6 +1479,46 @@ class AgentConfig(BaseSettings):
     enable_file_attachments: bool = Field(default=True)
     max_file_size_mb: int = Field(default=20)
     file_retention_hours: int = Field(default=24)
+    file_cleanup_time_budget_seconds: int = Field(
+        default=60,
+        description=(
+            "Wall-clock budget for one file cleanup pass. Users not reached within the "
+            "budget are handled first on the next pass. 0 disables the budget."
+        ),
+    )
+    attachment_store_enabled: bool = Field(
+        default=True,
+        description=(
+            "Store downloaded attachments once by content hash and give each user a private "
+            "(reflinked where supported) copy. Files whose Telegram file_unique_id was seen "
+            "before are not re-downloaded."
+        ),
+    )
+
+    # Voice/audio transcription (requires openai_api_key or OPENAI_API_KEY)
+    voice_transcription_enabled: bool = Field(
+        default=False,
+        description=(
+            "Transcribe incoming voice notes and audio files before enqueueing so the "
+            "agent receives the text directly. Opt-in: sends users' audio to OpenAI"
+        ),
+    )
+    voice_transcription_model: str = Field(default="whisper-1")
+    voice_transcription_chunk_seconds: int = Field(
+        default=120,
+        description="Audio longer than this is split at silences and transcribed in parallel",
+    )
+    voice_transcription_max_parallel: int = Field(
+        default=4,
+        description="Maximum audio chunks transcribed concurrently per file",
+    )
+    voice_transcription_timeout_seconds: int = Field(
+        default=90,
+        description=(
+            "Upper bound on transcription time in the Telegram handler; on timeout the "
+            "audio is enqueued without a transcript"
+        ),
+    )
     allowed_file_extensions: list[str] = Field(
         default_factory=lambda: [
             # Documents
@@ -1555,6 +1637,8 @@ class AgentConfig(BaseSettings):
         default_factory=lambda: [
             {"name": "new", "description": "Start a new conversation session"},
             {"name": "logs", "description": "View recent activity logs"},
+            {"name": "toolstats", "description": "Show the slowest tools/skills"},
+            {"name": "usage [days]", "description": "Show your model token usage"},
             {"name": "install skill <url>", "description": "Install a skill"},
             {"name": "uninstall skill <name>", "description": "Remove a skill"},
             {
@@ -1586,6 +1670,26 @@ class AgentConfig(BaseSettings):
         description="Maximum number of concurrent message processing tasks per user",
     )
 
+    # Per-user in-process state bounds
+    user_state_idle_ttl_seconds: int = Field(
+        default=6 * 3600,
+        description=(
+            "Evict per-user in-process state (semaphores, cached agents, conversation "
+            "state, browser instances) after this many idle seconds. 0 disables."
+        ),
+    )
+    user_state_max_entries: int = Field(
+        default=5000,
+        description="Maximum users kept in each per-user state registry (LRU beyond this)",
+    )
+    conversation_history_max_messages: int = Field(
+        default=200,
+        description=(
+            "Messages per user kept in memory for extraction. Older messages are dropped "
+            "from memory and reloaded from the conversation database when needed."
+        ),
+    )
+
     @classmethod
     def from_json_file(
         cls,
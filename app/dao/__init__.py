@@ -9,6 +9,7 @@ from .log_dao import LogDAO
 from .memory_dao import MemoryDAO
 from .skill_secret_dao import SkillSecretDAO
 from .task_dao import TaskDAO
+from .usage_dao import UsageDAO
 from .user_dao import UserDAO
 
 __all__ = [
@@ -21,5 +22,6 @@ __all__ = [
     "MemoryDAO",
     "SkillSecretDAO",
     "TaskDAO",
+    "UsageDAO",
     "UserDAO",
 ]
@@ -0,0 +1,120 @@
+"""Model usage ledger data access operations."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.dao.base import BaseDAO
+from app.models.domain import ModelUsage, UsageAggregate
+from app.models.orm import ModelUsageModel
+
+
+class UsageDAO(BaseDAO[ModelUsage]):
+    """Data access object for the ``model_usage`` ledger.
+
+    Writes are batched: :meth:`insert_many` stores a whole buffer of
+    :class:`ModelUsage` records in one statement. Reads return per-day
+    aggregates rather than raw rows.
+    """
+
+    async def insert_many(self, records: Sequence[ModelUsage]) -> int:
+        """Insert ``records`` in a single executemany.
+
+        Args:
+            records: Usage records to store.
+
+        Returns:
+            Number of rows written.
+        """
+        if not records:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": r.user_id,
+                "trace_id": r.trace_id,
+                "stage": r.stage,
+                "model_id": r.model_id,
+                "input_tokens": r.input_tokens,
+                "output_tokens": r.output_tokens,
+                "cache_read_tokens": r.cache_read_tokens,
+                "cache_write_tokens": r.cache_write_tokens,
+                "latency_ms": r.latency_ms,
+                "created_at": r.created_at or now,
+            }
+            for r in records
+        ]
+        async with self._db.session() as session:
+            await session.execute(insert(ModelUsageModel), rows)
+        return len(rows)
+
+    async def daily_aggregates(
+        self,
+        user_id: str,
+        days: int = 1,
+    ) -> list[UsageAggregate]:
+        """Per-day, per-stage, per-model totals for ``user_id``.
+
+        Args:
+            user_id: User identifier.
+            days: Number of UTC days to include, counting today.
+
+        Returns:
+            Aggregates ordered by day (newest first), then stage and model.
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        since = today - timedelta(days=max(1, days) - 1)
+        day = func.date(ModelUsageModel.created_at)
+
+        async with self._db.session() as session:
+            result = await session.execute(
+                select(
+                    day.label("day"),
+                    ModelUsageModel.stage,
+                    ModelUsageModel.model_id,
+                    func.count(ModelUsageModel.id),
+                    func.sum(ModelUsageModel.input_tokens),
+                    func.sum(ModelUsageModel.output_tokens),
+                    func.sum(ModelUsageModel.cache_read_tokens),
+                    func.sum(ModelUsageModel.cache_write_tokens),
+                    func.sum(ModelUsageModel.latency_ms),
+                )
+                .where(ModelUsageModel.user_id == user_id)
+                .where(ModelUsageModel.created_at >= since)
+                .group_by(day, ModelUsageModel.stage, ModelUsageModel.model_id)
+                .order_by(day.desc(), ModelUsageModel.stage, ModelUsageModel.model_id)
+            )
+            return [
+                UsageAggregate(
+                    user_id=user_id,
+                    day=str(row[0]),
+                    stage=row[1],
+                    model_id=row[2],
+                    calls=int(row[3] or 0),
+                    input_tokens=int(row[4] or 0),
+                    output_tokens=int(row[5] or 0),
+                    cache_read_tokens=int(row[6] or 0),
+                    cache_write_tokens=int(row[7] or 0),
+                    latency_ms=int(row[8] or 0),
+                )
+                for row in result.all()
+            ]
+
+    async def tokens_since(self, since: datetime) -> dict[str, int]:
+        """Input + output tokens per user recorded at or after ``since``.
+
+        Used to seed in-memory budget counters after a restart.
+        """
+        async with self._db.session() as session:
+            result = await session.execute(
+                select(
+                    ModelUsageModel.user_id,
+                    func.sum(ModelUsageModel.input_tokens + ModelUsageModel.output_tokens),
+                )
+                .where(ModelUsageModel.created_at >= since)
+                .group_by(ModelUsageModel.user_id)
+            )
+            return {row[0]: int(row[1] or 0) for row in result.all()}
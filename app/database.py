@@ -1,5 +1,6 @@
 """Async SQLAlchemy database setup."""
 
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -11,6 +12,8 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import declarative_base
 
+from app.observability.metrics import DB_SESSION_SECONDS
+
 Base = declarative_base()
 
 
@@ -75,13 +78,19 @@ class Database:
         Yields:
             AsyncSession: An async SQLAlchemy session.
         """
-        async with self._async_session() as session:
-            try:
-                yield session
-                await session.commit()
-            except Exception:
-                await session.rollback()
-                raise
+        start = time.perf_counter()
+        outcome = "commit"
+        try:
+            async with self._async_session() as session:
+                try:
+                    yield session
+                    await session.commit()
+                except Exception:
+                    outcome = "rollback"
+                    await session.rollback()
+                    raise
+        finally:
+            DB_SESSION_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
 
     async def init_db(self) -> None:
         """Initialize database tables from ORM models.
@@ -31,6 +31,9 @@ class CommandType(StrEnum):
     HELP = "help"
     MESSAGE = "message"
     CONVERSATION = "conversation"
+    TOOL_STATS = "tool_stats"
+    PROFILE = "profile"
+    USAGE = "usage"
 
 
 class ConversationStatus(StrEnum):
@@ -14,26 +14,27 @@ import logging
 import os
 import signal
 import sys
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import AsyncGenerator
 
 import boto3
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.exception_handlers import http_exception_handler
 
 # Bypass tool consent prompts for automated execution
 os.environ["BYPASS_TOOL_CONSENT"] = "true"
 
 from app.config import AgentConfig
-from app.dao import LogDAO, TaskDAO, UserDAO
+from app.dao import LogDAO, TaskDAO, UsageDAO, UserDAO
 from app.dao.browser_cookie_dao import BrowserCookieDAO
 from app.dao.conversation_dao import ConversationDAO
 from app.dao.skill_secret_dao import SkillSecretDAO
 from app.dao.cron_dao import CronDAO
 from app.dao.cron_lock_dao import CronLockDAO
 from app.database import Database
-from app.routers import create_task_router, create_webhook_router
+from app.routers import create_admin_router, create_task_router, create_webhook_router
 from app.scheduler.cron_scheduler import CronScheduler
 from app.scheduler.system_scheduler import SystemScheduler
 from app.services.file_service import FileService
@@ -51,6 +52,10 @@ from app.services.memory_service import MemoryService
 from app.services.conversation_manager_agent import ConversationManagerAgent
 from app.services.conversation_service import ConversationService
 from app.services.onboarding_service import OnboardingService
+from app.services.transcription_service import build_transcription_service
+from app.services.agent.skill_catalog import get_skill_catalog
+from app.services.usage_ledger import UsageLedger, set_usage_ledger
+from app.services.user_state_registry import registry_limits, registry_sizes
 from app.sqs.message_processor import MessageProcessor
 from app.sqs.queue_manager import SQSQueueManager
 from app.telegram.bot import TelegramBotInterface
@@ -61,7 +66,18 @@ from app.observability.health_state import (
     snapshot as health_snapshot,
     start_stall_watchdog,
 )
+from app.observability.async_logging import setup_async_logging, stop_async_logging
 from app.observability.error_log_file import setup_error_log_file
+from app.observability.loop_monitor import (
+    health_payload as loop_health_payload,
+    register_executor,
+    start_loop_monitor,
+    stop_loop_monitor,
+)
+from app.observability.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    render_metrics,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -128,6 +144,7 @@ class Application:
         self.conversation_dao: ConversationDAO | None = None
         self.browser_cookie_dao: BrowserCookieDAO | None = None
         self.skill_secret_dao: SkillSecretDAO | None = None
+        self.usage_dao: UsageDAO | None = None
 
         # Services
         self.agent_service: AgentService | None = None
@@ -139,6 +156,7 @@ class Application:
         self.webhook_service: WebhookService | None = None
         self.command_parser: CommandParser | None = None
         self.cron_service: CronService | None = None
+        self.usage_ledger: UsageLedger | None = None
 
         # SQS components
         self.queue_manager: SQSQueueManager | None = None
@@ -188,19 +206,16 @@ class Application:
             - All integration: Initialize Database, DAOs, Services, Routers
         """
         logger.info("Setting up application components...")
+        setup_started = time.monotonic()
 
         # Initialize error log file handler early to capture setup errors
         setup_error_log_file(self.config)
+        # Opt-in: move all handlers (incl. the error log file) off the caller thread.
+        setup_async_logging(self.config)
 
-        # Initialize database
+        # Database schema creation runs concurrently with the other slow
+        # initializers below; DAOs only need the engine.
         self.database = Database(self.config.database_url)
-        if getattr(self.config, "auto_create_tables", False):
-            await self.database.init_db()
-            logger.info("Database initialized (auto_create_tables=true)")
-        else:
-            logger.info(
-                "Database initialized (auto_create_tables=false; relying on Alembic migrations)"
-            )
 
         # Initialize DAOs
         self.user_dao = UserDAO(self.database)
@@ -212,8 +227,14 @@ class Application:
         if self.config.browser_enabled:
             self.browser_cookie_dao = BrowserCookieDAO(self.database)
         self.skill_secret_dao = SkillSecretDAO(self.database)
+        self.usage_dao = UsageDAO(self.database)
         logger.info("DAOs initialized")
 
+        # Usage ledger: token accounting for every model call + daily budgets
+        if getattr(self.config, "usage_ledger_enabled", True) is not False:
+            self.usage_ledger = UsageLedger.from_config(self.config, self.usage_dao)
+            set_usage_ledger(self.usage_ledger)
+
         # Initialize services
         self.command_parser = CommandParser()
         self.logging_service = LoggingService(self.log_dao)
@@ -222,33 +243,33 @@ class Application:
             workspace_base_dir=self.config.working_folder_base_dir,
         )
 
-        # Pending skills: create service and run preflight (bounded, non-fatal)
         self.pending_skill_service = PendingSkillService(self.config)
-        if self.config.pending_skills_preflight_enabled:
-            try:
-                summary = self.pending_skill_service.preflight_all()
-                logger.info(
-                    "Pending skill preflight: processed=%s failures=%s",
-                    summary.get("processed"),
-                    summary.get("failures"),
-                )
-            except Exception as e:
-                logger.warning(
-                    "Pending skill preflight failed (continuing startup): %s",
-                    e,
-                )
 
-        # Initialize memory service if memory is enabled
+        # Initialize memory service if memory is enabled. This exports AWS
+        # credentials for downstream SDKs, so it runs before the SQS client.
         self.memory_service = None
         if self.config.memory_enabled:
             try:
                 self.memory_service = MemoryService(self.config)
+                # list_memories/create_memory_and_wait can take minutes on a
+                # fresh account; resolve in the background, gated per call.
+                self.memory_service.start_memory_id_resolution()
                 logger.info("Memory service initialized")
             except Exception as e:
                 logger.warning(
                     "Failed to initialize memory service: %s. Agent will operate without memory.", e
                 )
 
+        # Independent slow initializers run concurrently: schema creation,
+        # pending-skill preflight (may build venvs) and the SQS client
+        # (botocore loads service models).
+        self.sqs_client, _, _ = await asyncio.gather(
+            asyncio.to_thread(self._create_sqs_client),
+            self._init_database(),
+            asyncio.to_thread(self._run_pending_skill_preflight),
+        )
+        logger.info("SQS client, database and pending skills initialized")
+
         self.agent_service = AgentService(
             self.config,
             self.memory_service,
@@ -264,8 +285,11 @@ class Application:
         logger.info("Services initialized")
 
         # Initialize SQS components
-        self.sqs_client = self._create_sqs_client()
-        self.queue_manager = SQSQueueManager(self.sqs_client, self.config.sqs_queue_prefix)
+        self.queue_manager = SQSQueueManager(
+            self.sqs_client,
+            self.config.sqs_queue_prefix,
+            **registry_limits(self.config),
+        )
         logger.info("SQS components initialized")
 
         # Initialize message processor with response callback
@@ -280,6 +304,7 @@ class Application:
             progress_callback=self._send_telegram_progress,
             typing_action_callback=self._send_telegram_typing_action,
         )
+        register_executor("message_processor", self.message_processor.executor)
         logger.info("Message processor initialized")
 
         # Initialize conversation service
@@ -307,6 +332,7 @@ class Application:
             user_dao=self.user_dao,
             onboarding_service=self.onboarding_service,
             conversation_service=self.conversation_service,
+            transcription_service=build_transcription_service(self.config),
         )
         logger.info("Telegram bot initialized")
 
@@ -351,7 +377,34 @@ class Application:
         )
         logger.info("File service and system scheduler initialized")
 
-        logger.info("Application setup complete")
+        logger.info("Application setup complete in %.2fs", time.monotonic() - setup_started)
+
+    async def _init_database(self) -> None:
+        """Create tables when ``auto_create_tables`` is set (else Alembic owns the schema)."""
+        if getattr(self.config, "auto_create_tables", False):
+            await self.database.init_db()
+            logger.info("Database initialized (auto_create_tables=true)")
+        else:
+            logger.info(
+                "Database initialized (auto_create_tables=false; relying on Alembic migrations)"
+            )
+
+    def _run_pending_skill_preflight(self) -> None:
+        """Preflight pending skills (bounded, non-fatal)."""
+        if not self.config.pending_skills_preflight_enabled or not self.pending_skill_service:
+            return
+        try:
+            summary = self.pending_skill_service.preflight_all()
+            logger.info(
+                "Pending skill preflight: processed=%s failures=%s",
+                summary.get("processed"),
+                summary.get("failures"),
+            )
+        except Exception as e:
+            logger.warning(
+                "Pending skill preflight failed (continuing startup): %s",
+                e,
+            )
 
     async def _resolve_user_chat_id(self, user_id: str) -> int | None:
         """Resolve a username to a Telegram numeric chat_id for DMs.
@@ -529,6 +582,11 @@ class Application:
             self.fastapi_app.include_router(webhook_router)
             logger.info("Webhook router registered")
 
+        admin_token = getattr(self.config, "admin_api_token", None)
+        if isinstance(admin_token, str) and admin_token:
+            self.fastapi_app.include_router(create_admin_router(admin_token=admin_token))
+            logger.info("Admin router registered")
+
         # Health check endpoint
         @self.fastapi_app.get("/health")
         async def health_check():
@@ -539,7 +597,24 @@ class Application:
                 getattr(self.config, "health_fail_on_stall", True)
             ):
                 raise HTTPException(status_code=503, detail=snap.to_dict(mode="json"))
-            return snap.to_dict(mode="json")
+            body = snap.to_dict(mode="json")
+            # Per-user state gauges: should stay flat on a long-running node.
+            body["registries"] = registry_sizes()
+            # Event-loop lag, last blocking stack and thread-pool saturation.
+            body.update(loop_health_payload())
+            # Memory id is resolved in the background after startup.
+            body["memory"] = (
+                self.memory_service.memory_status if self.memory_service else "disabled"
+            )
+            return body
+
+        # Prometheus scrape endpoint (per-stage latency histograms, gauges).
+        if getattr(self.config, "metrics_enabled", True) is not False:
+
+            @self.fastapi_app.get("/metrics", include_in_schema=False)
+            async def metrics() -> Response:
+                """Prometheus text-format metrics."""
+                return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
         return self.fastapi_app
 
@@ -566,6 +641,23 @@ class Application:
             # Never break startup due to watchdog configuration.
             pass
 
+        if getattr(self.config, "loop_monitor_enabled", True) is not False:
+            try:
+                warn_s = getattr(self.config, "loop_lag_warn_seconds", 0.5)
+                start_loop_monitor(
+                    warn_seconds=float(warn_s) if isinstance(warn_s, (int, float)) else 0.5
+                )
+            except Exception:
+                logger.warning("Failed to start event-loop monitor", exc_info=True)
+
+        if self.usage_ledger:
+            await self.usage_ledger.start()
+            logger.info("Usage ledger started")
+
+        interval = getattr(self.config, "skill_catalog_watch_interval_seconds", 2.0)
+        if isinstance(interval, (int, float)):
+            get_skill_catalog().start_watcher(float(interval))
+
         # Start Telegram bot FIRST (before message processor)
         # The typing callback requires the bot to be initialized
         if self.telegram_bot:
@@ -632,12 +724,22 @@ class Application:
                     pass
         logger.info("Background tasks cancelled")
 
+        await stop_loop_monitor()
+        get_skill_catalog().stop_watcher()
+
+        # Write buffered usage records before the database goes away
+        if self.usage_ledger:
+            await self.usage_ledger.stop()
+            set_usage_ledger(None)
+            logger.info("Usage ledger flushed")
+
         # Close database
         if self.database:
             await self.database.close()
             logger.info("Database connection closed")
 
         logger.info("Graceful shutdown complete")
+        stop_async_logging()
 
     def setup_signal_handlers(self) -> None:
         """Setup signal handlers for graceful shutdown.
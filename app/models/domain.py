@@ -216,3 +216,41 @@ class ParameterAnalysis(JsonModel):
     summary: str
     all_aligned: bool = False
     last_updated_iteration: int = 0
+
+
+class ModelUsage(JsonModel):
+    """A single model invocation recorded by the usage ledger."""
+
+    user_id: str
+    stage: str
+    trace_id: str | None = None
+    model_id: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency_ms: int = 0
+    created_at: datetime | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class UsageAggregate(JsonModel):
+    """Token totals for one user, day and stage/model combination."""
+
+    user_id: str
+    day: str  # YYYY-MM-DD (UTC)
+    stage: str
+    model_id: str | None = None
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency_ms: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
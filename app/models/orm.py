@@ -508,3 +508,32 @@ class MultiAgentConversationMessageModel(Base):
         Index("ix_multi_agent_msg_conversation", "conversation_id", "created_at"),
         Index("ix_multi_agent_msg_participant", "participant_user_id"),
     )
+
+
+class ModelUsageModel(Base):
+    """Model usage ledger ORM model.
+
+    One row per model invocation: token counts and model latency, tagged
+    with the user, the job's trace_id and the pipeline stage that called the
+    model. Rows are written in batches by the usage ledger, so there is no
+    foreign key to ``users`` (stages like multi-agent rounds may outlive a
+    user row and must never block on it).
+    """
+
+    __tablename__ = "model_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, nullable=False, index=True)
+    trace_id = Column(String, nullable=True)
+    stage = Column(String, nullable=False)
+    model_id = Column(String, nullable=True)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_tokens = Column(Integer, nullable=False, default=0)
+    cache_write_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_model_usage_user_created", "user_id", "created_at"),
+    )
@@ -1,5 +1,6 @@
 """Observability utilities (structured tracing, redaction, error logging, etc.)."""
 
+from app.observability.async_logging import setup_async_logging, stop_async_logging
 from app.observability.error_log_file import (
     log_tool_error,
     log_tool_warning,
@@ -10,6 +11,8 @@ from app.observability.trace_logging import trace_event
 __all__ = [
     "log_tool_error",
     "log_tool_warning",
+    "setup_async_logging",
     "setup_error_log_file",
+    "stop_async_logging",
     "trace_event",
 ]
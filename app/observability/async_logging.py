@@ -0,0 +1,146 @@
+"""Opt-in non-blocking logging via a bounded queue.
+
+When enabled, every handler installed at setup time (the stdout handler from
+``logging.basicConfig``, the rotating error-log file handler, ...) is moved
+behind a single :class:`logging.handlers.QueueListener` thread. Loggers keep
+one queue handler each in place of their original handlers, so producers
+(the event loop, tool threads) only pay for an enqueue. Formatting, JSON
+serialization of trace events and file I/O/rotation happen on the listener.
+
+The queue is bounded. When it is full, records are dropped and counted in
+``mordecai_log_records_dropped_total`` instead of blocking the caller.
+
+Handlers added after :func:`setup_async_logging` keep running synchronously.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING
+
+from app.observability.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from app.config import AgentConfig
+
+
+LOG_RECORDS_DROPPED_TOTAL = REGISTRY.counter(
+    "mordecai_log_records_dropped_total",
+    "Log records dropped because the async logging queue was full.",
+)
+
+_lock = threading.Lock()
+_listener: _RoutingQueueListener | None = None
+_restore: list[tuple[logging.Logger, list[logging.Handler]]] = []
+
+
+class _BoundedQueueHandler(QueueHandler):
+    """Queue handler that drops (and counts) instead of blocking.
+
+    Records are tagged with the handlers they were originally bound for, so a
+    single listener can serve every logger while preserving which handlers
+    each logger wrote to.
+    """
+
+    def __init__(self, log_queue: queue.Queue, targets: list[logging.Handler]) -> None:
+        super().__init__(log_queue)
+        self.targets = tuple(targets)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stdlib version fully formats the record here, on the producer
+        # thread. Only resolve %-args (which may reference mutable objects);
+        # message objects such as trace_event's deferred JSON stay lazy.
+        record = logging.makeLogRecord(record.__dict__)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        record.log_targets = self.targets
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED_TOTAL.inc()
+
+
+class _RoutingQueueListener(QueueListener):
+    """Dispatch each record to the handlers it was tagged with."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        for handler in getattr(record, "log_targets", self.handlers):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def _loggers_with_handlers() -> list[logging.Logger]:
+    loggers = [logging.getLogger()]
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if isinstance(logger, logging.Logger) and logger.handlers:
+            loggers.append(logger)
+    return loggers
+
+
+def setup_async_logging(config: AgentConfig) -> QueueListener | None:
+    """Route all currently installed handlers through a bounded queue.
+
+    Args:
+        config: Application configuration (``log_async_enabled``,
+            ``log_queue_max_records``).
+
+    Returns:
+        The running listener, or None when disabled.
+    """
+    global _listener
+
+    if getattr(config, "log_async_enabled", False) is not True:
+        return None
+
+    max_records = getattr(config, "log_queue_max_records", 10_000)
+    if not isinstance(max_records, int) or max_records <= 0:
+        max_records = 10_000
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        log_queue: queue.Queue = queue.Queue(maxsize=max_records)
+        for logger in _loggers_with_handlers():
+            original = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+            if not original:
+                continue
+            _restore.append((logger, list(logger.handlers)))
+            keep = [h for h in logger.handlers if isinstance(h, QueueHandler)]
+            logger.handlers = [*keep, _BoundedQueueHandler(log_queue, original)]
+
+        _listener = _RoutingQueueListener(log_queue, respect_handler_level=True)
+        _listener.start()
+
+    logging.getLogger(__name__).info("Async logging enabled (queue max %d records)", max_records)
+    return _listener
+
+
+def stop_async_logging() -> None:
+    """Drain the queue, stop the listener and restore the original handlers."""
+    global _listener
+
+    with _lock:
+        listener, _listener = _listener, None
+        if listener is None:
+            return
+        try:
+            listener.stop()
+        except Exception:
+            pass
+        for logger, handlers in _restore:
+            logger.handlers = handlers
+        _restore.clear()
+
+
+atexit.register(stop_async_logging)
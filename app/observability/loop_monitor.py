@@ -0,0 +1,233 @@
+"""Event-loop lag and thread-pool saturation monitor.
+
+The stall watchdog in :mod:`app.observability.health_state` only notices the
+*absence* of progress. This module catches the other failure mode: the loop
+is alive but blocked by synchronous work, or the executors that run blocking
+calls are saturated.
+
+- A ticker coroutine sleeps ``interval`` seconds and measures how late it
+  wakes up: that lateness is the loop's scheduling lag.
+- A sampler thread watches the ticker's heartbeat. When the loop has not
+  ticked for ``warn_seconds`` it captures the loop thread's current stack
+  (``sys._current_frames``), which is the code blocking the loop *right
+  now*, and logs it once per episode.
+- Registered thread pools (and the loop's default ``to_thread`` executor)
+  report max workers, live threads, busy threads and queued work items.
+
+Everything is exported in ``/health`` and as Prometheus metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "mordecai_event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled to fire now.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+LOOP_BLOCKED_TOTAL = REGISTRY.counter(
+    "mordecai_event_loop_blocked_total",
+    "Episodes where the event loop was blocked longer than the warn threshold.",
+)
+EXECUTOR_THREADS = REGISTRY.gauge(
+    "mordecai_executor_threads",
+    "Thread-pool usage by executor and state (max, threads, busy, queued).",
+    ["executor", "state"],
+)
+
+_executors: weakref.WeakValueDictionary[str, ThreadPoolExecutor] = weakref.WeakValueDictionary()
+_monitor: LoopMonitor | None = None
+
+
+def register_executor(name: str, executor: ThreadPoolExecutor) -> None:
+    """Track ``executor`` under ``name`` (held weakly)."""
+    _executors[name] = executor
+
+
+def executor_stats(executor: ThreadPoolExecutor) -> dict[str, int]:
+    """Best-effort usage numbers for a ThreadPoolExecutor (CPython internals)."""
+    threads = len(getattr(executor, "_threads", ()) or ())
+    idle_sem = getattr(executor, "_idle_semaphore", None)
+    idle = int(getattr(idle_sem, "_value", 0) or 0)
+    work_queue = getattr(executor, "_work_queue", None)
+    queued = work_queue.qsize() if work_queue is not None else 0
+    return {
+        "max": int(getattr(executor, "_max_workers", 0) or 0),
+        "threads": threads,
+        "busy": max(0, threads - idle),
+        "queued": int(queued),
+    }
+
+
+def _tracked_executors() -> dict[str, ThreadPoolExecutor]:
+    tracked = dict(_executors.items())
+    monitor = _monitor
+    loop = monitor.loop if monitor is not None else None
+    default = getattr(loop, "_default_executor", None) if loop is not None else None
+    if isinstance(default, ThreadPoolExecutor):
+        tracked.setdefault("default", default)
+    return tracked
+
+
+def all_executor_stats() -> dict[str, dict[str, int]]:
+    stats = {}
+    for name, executor in _tracked_executors().items():
+        try:
+            stats[name] = executor_stats(executor)
+        except Exception:
+            continue
+    return stats
+
+
+def _executor_gauge_values() -> dict[tuple[str, str], float]:
+    return {
+        (name, state): float(value)
+        for name, stats in all_executor_stats().items()
+        for state, value in stats.items()
+    }
+
+
+EXECUTOR_THREADS.set_function(_executor_gauge_values)
+
+
+class LoopMonitor:
+    """Measure scheduling lag of one event loop and catch blocking stacks.
+
+    Args:
+        interval: Ticker period in seconds.
+        warn_seconds: Lag above which the blocking stack is captured/logged.
+    """
+
+    def __init__(self, *, interval: float = 0.25, warn_seconds: float = 0.5) -> None:
+        self.interval = max(0.01, float(interval))
+        self.warn_seconds = max(self.interval, float(warn_seconds))
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._sampler: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_tick = time.monotonic()
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._blocked_episodes = 0
+        self._last_blocked: dict[str, Any] | None = None
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)."""
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = self.loop.create_task(self._tick(), name="loop-lag-monitor")
+        self._sampler = threading.Thread(target=self._sample, name="loop-lag-sampler", daemon=True)
+        self._sampler.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _tick(self) -> None:
+        while not self._stop.is_set():
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._last_tick = now
+                self._last_lag = lag
+                self._max_lag = max(self._max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _sample(self) -> None:
+        in_episode = False
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                blocked_for = time.monotonic() - self._last_tick - self.interval
+            if blocked_for < self.warn_seconds:
+                in_episode = False
+                continue
+            if in_episode:
+                continue
+            in_episode = True
+            stack = self._loop_stack()
+            LOOP_BLOCKED_TOTAL.inc()
+            with self._lock:
+                self._blocked_episodes += 1
+                self._last_blocked = {
+                    "at": time.time(),
+                    "blocked_for_s": round(blocked_for, 3),
+                    "stack": stack,
+                }
+            logger.warning(
+                "Event loop blocked for %.2fs; current loop stack:\n%s",
+                blocked_for,
+                "".join(stack),
+            )
+
+    def _loop_stack(self) -> list[str]:
+        frame = sys._current_frames().get(self._loop_thread_id or -1)
+        if frame is None:
+            return []
+        return traceback.format_stack(frame, limit=30)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "lag_s": round(self._last_lag, 4),
+                "max_lag_s": round(self._max_lag, 4),
+                "since_last_tick_s": round(time.monotonic() - self._last_tick, 3),
+                "blocked_episodes": self._blocked_episodes,
+                # Innermost frames only; the full stack is in the warning log.
+                "last_blocked": (
+                    {**self._last_blocked, "stack": self._last_blocked["stack"][-8:]}
+                    if self._last_blocked
+                    else None
+                ),
+            }
+
+
+def start_loop_monitor(*, interval: float = 0.25, warn_seconds: float = 0.5) -> LoopMonitor:
+    """Start (once) the loop monitor on the running event loop."""
+    global _monitor
+    if _monitor is not None and _monitor.loop is not asyncio.get_running_loop():
+        _monitor._stop.set()  # left over from a previous (closed) loop
+        _monitor = None
+    if _monitor is None:
+        _monitor = LoopMonitor(interval=interval, warn_seconds=warn_seconds)
+        _monitor.start()
+    return _monitor
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    monitor, _monitor = _monitor, None
+    if monitor is not None:
+        await monitor.stop()
+
+
+def health_payload() -> dict[str, Any]:
+    """Loop lag and executor usage for ``/health``."""
+    monitor = _monitor
+    return {
+        "event_loop": monitor.snapshot() if monitor is not None else None,
+        "executors": all_executor_stats(),
+    }
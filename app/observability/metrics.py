@@ -0,0 +1,423 @@
+"""In-process metrics with Prometheus text exposition.
+
+``/health`` only answers "is the process alive"; this module answers "where
+does the time go". It provides dependency-free counters, gauges and
+histograms (no ``prometheus_client`` required) plus a process-wide registry
+rendered by the ``GET /metrics`` endpoint.
+
+Pipeline stages that already call ``mark_progress`` are timed into
+``mordecai_stage_duration_seconds{stage=...}``:
+
+- ``sqs_pickup``: SQS send -> worker pickup (after the per-user semaphore)
+- ``skills_sync``, ``memory_retrieval``, ``snapshot_load``, ``agent_create``
+- ``model_invoke``: the full agent call (model + tools)
+- ``persistence``: conversation/transcript writes
+- ``telegram_send``: outbound Telegram calls
+
+Like ``health_state``, this module is dependency-light so it can be imported
+from tool wrappers, DAOs and the Telegram layer. Label sets must stay low
+cardinality: never label by user id.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: name, help text, label names and a lock."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(sorted(labels))}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed at scrape time.
+
+    ``set_function`` installs a callback returning either a number (for an
+    unlabelled gauge) or ``{label values tuple: number}``. Callbacks run on
+    every scrape and must be cheap; failures are ignored.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._function: Callable[[], Any] | None = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], Any] | None) -> None:
+        with self._lock:
+            self._function = fn
+
+    def collect(self) -> dict[LabelValues, float]:
+        with self._lock:
+            values = dict(self._values)
+            fn = self._function
+        if fn is not None:
+            try:
+                result = fn()
+            except Exception:
+                result = None
+            if isinstance(result, dict):
+                for key, value in result.items():
+                    label_values = key if isinstance(key, tuple) else (key,)
+                    values[tuple(str(v) for v in label_values)] = float(value)
+            elif isinstance(result, (int, float)):
+                values[()] = float(result)
+        return values
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        value = max(0.0, float(value))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            counts, total = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            snapshot = sorted(
+                (k, list(counts), total[0]) for k, (counts, total) in self._series.items()
+            )
+        lines: list[str] = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=False):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            cumulative += counts[-1]
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, rendered in registration order.
+
+    Factory methods are idempotent by name so modules can declare the metrics
+    they use at import time without coordinating.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type[_Metric], name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls):
+                    raise ValueError(f"Metric {name} already registered as {existing.type_name}")
+                return existing
+            metric = cls(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format 0.0.4."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "mordecai_stage_duration_seconds",
+    "Duration of message pipeline stages.",
+    ["stage"],
+)
+TOOL_CALL_SECONDS = REGISTRY.histogram(
+    "mordecai_tool_call_duration_seconds",
+    "Duration of agent tool calls.",
+    ["tool"],
+)
+DB_SESSION_SECONDS = REGISTRY.histogram(
+    "mordecai_db_session_duration_seconds",
+    "Time a database session (transaction) was held open.",
+    ["outcome"],
+)
+OUTBOUND_429_TOTAL = REGISTRY.counter(
+    "mordecai_outbound_rate_limited_total",
+    "Outbound API calls rejected with HTTP 429 / RetryAfter.",
+    ["target", "method"],
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "mordecai_queue_messages",
+    "Messages reserved from SQS by this process, by state (inflight, waiting).",
+    ["state"],
+)
+USER_SEMAPHORE_SATURATION = REGISTRY.gauge(
+    "mordecai_user_semaphore",
+    "Per-user concurrency: users with a tracked semaphore, saturated users, slots in use.",
+    ["state"],
+)
+USER_STATE_ENTRIES = REGISTRY.gauge(
+    "mordecai_user_state_entries",
+    "Entries held in bounded per-user state registries.",
+    ["registry"],
+)
+
+
+def _registry_sizes() -> dict[LabelValues, float]:
+    from app.services.user_state_registry import registry_sizes
+
+    return {(name,): float(size) for name, size in registry_sizes().items()}
+
+
+USER_STATE_ENTRIES.set_function(_registry_sizes)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record ``seconds`` for a pipeline stage (never raises)."""
+    try:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    except Exception:
+        pass
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the ``with`` block into the stage histogram.
+
+    Works inside coroutines as well: only wall-clock time is measured.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def timed_stage[F: Callable[..., Any]](stage: str, fn: F) -> F:
+    """Wrap a synchronous callable so each call is timed as ``stage``."""
+
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with stage_timer(stage):
+            return fn(*args, **kwargs)
+
+    wrapper.__wrapped__ = fn  # type: ignore[attr-defined]
+    wrapper.__name__ = getattr(fn, "__name__", "timed_stage")
+    wrapper.__doc__ = getattr(fn, "__doc__", None)
+    return wrapper  # type: ignore[return-value]
+
+
+def observe_tool_call(tool: str, seconds: float) -> None:
+    """Record the duration of one tool call (never raises)."""
+    try:
+        TOOL_CALL_SECONDS.observe(seconds, tool=tool)
+    except Exception:
+        pass
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Return True for 429-style errors (Telegram ``RetryAfter``, HTTP 429)."""
+    if getattr(exc, "retry_after", None) is not None:
+        return True
+    if type(exc).__name__ in {"RetryAfter", "TooManyRequests", "RateLimitError"}:
+        return True
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    return status == 429
+
+
+def record_outbound_error(exc: BaseException, *, target: str, method: str) -> None:
+    """Count ``exc`` as an outbound 429 if it is one (never raises)."""
+    try:
+        if is_rate_limited(exc):
+            OUTBOUND_429_TOTAL.inc(target=target, method=method)
+    except Exception:
+        pass
+
+
+def render_metrics() -> str:
+    """Render the process-wide registry in Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,303 @@
+"""On-demand, pure-Python sampling profiler for live diagnosis.
+
+A :class:`SamplingProfiler` runs a daemon thread that periodically walks
+``sys._current_frames()`` for every thread and counts identical stacks. It is
+wall-clock profiling: blocked threads show up where they wait. Nothing runs
+(zero overhead) unless a profile has been requested, and only one profile is
+active at a time.
+
+Two ways to use it:
+
+- :func:`profile_for` samples the whole process for N seconds (admin HTTP
+  endpoint / ``profile`` Telegram command).
+- :func:`request_job_profile` tags a user's next message. The agent service
+  then profiles that job (:func:`begin_job_profile`/:func:`end_job_profile`)
+  and stores the result under the message's trace_id.
+
+Profiles export as collapsed stacks (``flamegraph.pl``/speedscope import) or
+speedscope JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.observability.trace_logging import trace_event
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 120.0
+_MAX_STACK_DEPTH = 128
+_KEEP_JOB_PROFILES = 16
+
+Frame = tuple[str, str, int]  # (filename, function, first line)
+
+
+@dataclass
+class Profile:
+    """Aggregated samples: ``(thread name, stack outer->inner) -> count``."""
+
+    interval: float
+    started_at: float
+    duration: float = 0.0
+    samples: Counter[tuple[str, tuple[Frame, ...]]] = field(default_factory=Counter)
+    label: str = "profile"
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, one stack per line."""
+        lines = []
+        for (thread, stack), count in self.samples.most_common():
+            path = ";".join([_sanitize(thread), *(_frame_label(f) for f in stack)])
+            lines.append(f"{path} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict[str, Any]:
+        """speedscope.app file format: one sampled profile per thread."""
+        frame_index: dict[Frame, int] = {}
+        frames: list[dict[str, Any]] = []
+        per_thread: dict[str, tuple[list[list[int]], list[float]]] = {}
+        for (thread, stack), count in self.samples.items():
+            ids = []
+            for frame in stack:
+                idx = frame_index.get(frame)
+                if idx is None:
+                    idx = frame_index[frame] = len(frames)
+                    frames.append({"name": frame[1], "file": frame[0], "line": frame[2]})
+                ids.append(idx)
+            stacks, weights = per_thread.setdefault(thread, ([], []))
+            stacks.append(ids)
+            weights.append(count * self.interval)
+
+        profiles = []
+        for thread, (stacks, weights) in sorted(per_thread.items()):
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": stacks,
+                    "weights": weights,
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "mordecai",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def export(self, fmt: str = "speedscope") -> tuple[str, str]:
+        """Return ``(body, media type)`` for ``fmt`` (speedscope|collapsed)."""
+        if fmt == "collapsed":
+            return self.collapsed(), "text/plain; charset=utf-8"
+        return json.dumps(self.speedscope(), separators=(",", ":")), "application/json"
+
+    def summary(self, limit: int = 10) -> str:
+        """Short text report: hottest functions by self and inclusive samples."""
+        total = self.sample_count
+        if not total:
+            return f"{self.label}: no samples."
+        own: Counter[Frame] = Counter()
+        inclusive: Counter[Frame] = Counter()
+        for (_thread, stack), count in self.samples.items():
+            if stack:
+                own[stack[-1]] += count
+            for frame in set(stack):
+                inclusive[frame] += count
+
+        def _rows(counter: Counter[Frame]) -> list[str]:
+            return [
+                f"  {count / total:5.1%}  {_frame_label(frame)}"
+                for frame, count in counter.most_common(limit)
+            ]
+
+        return "\n".join(
+            [
+                f"{self.label}: {total} samples over {self.duration:.1f}s "
+                f"({self.interval * 1000:.0f}ms interval, all threads)",
+                "Self:",
+                *_rows(own),
+                "Inclusive:",
+                *_rows(inclusive),
+            ]
+        )
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, func, line = frame
+    short = filename.rsplit("/site-packages/", 1)[-1].rsplit("/app/", 1)[-1]
+    return _sanitize(f"{func} ({short}:{line})")
+
+
+def _sanitize(text: str) -> str:
+    return text.replace(";", ":").replace("\n", " ")
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+_active_lock = threading.Lock()
+_active: SamplingProfiler | None = None
+
+
+class SamplingProfiler:
+    """Sample every thread's stack at ``interval`` seconds until stopped.
+
+    Args:
+        interval: Seconds between samples (clamped to [1ms, 1s]).
+        label: Name stored in the resulting profile.
+    """
+
+    def __init__(self, *, interval: float = 0.01, label: str = "profile") -> None:
+        self.profile = Profile(
+            interval=min(1.0, max(0.001, float(interval))),
+            started_at=time.time(),
+            label=label,
+        )
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._t0 = 0.0
+
+    def start(self) -> SamplingProfiler:
+        global _active
+        with _active_lock:
+            if _active is not None:
+                raise ProfilerBusyError("another profile is already running")
+            _active = self
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        global _active
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.profile.duration = time.perf_counter() - self._t0
+        with _active_lock:
+            if _active is self:
+                _active = None
+        return self.profile
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names: dict[int, str] = {}
+        samples = self.profile.samples
+        deadline = self._t0 + MAX_PROFILE_SECONDS
+        tick = 0
+        while not self._stop.wait(self.profile.interval):
+            if time.perf_counter() > deadline:
+                break
+            if tick % 50 == 0:
+                names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+            tick += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: list[Frame] = []
+                f = frame
+                while f is not None and len(stack) < _MAX_STACK_DEPTH:
+                    code = f.f_code
+                    stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                    f = f.f_back
+                stack.reverse()
+                samples[(names.get(thread_id, f"thread-{thread_id}"), tuple(stack))] += 1
+
+
+def profile_for(seconds: float, *, interval: float = 0.01) -> Profile:
+    """Profile all threads for ``seconds`` (blocking; run it off the event loop)."""
+    seconds = min(MAX_PROFILE_SECONDS, max(0.1, float(seconds)))
+    profiler = SamplingProfiler(interval=interval, label=f"process {seconds:g}s").start()
+    try:
+        time.sleep(seconds)
+    finally:
+        profile = profiler.stop()
+    return profile
+
+
+# ---------------------------------------------------------------------------
+# Per-job profiling
+# ---------------------------------------------------------------------------
+
+_job_lock = threading.Lock()
+_job_requests: set[str] = set()
+_job_profiles: OrderedDict[str, Profile] = OrderedDict()
+
+
+def request_job_profile(user_id: str) -> None:
+    """Profile ``user_id``'s next message."""
+    with _job_lock:
+        _job_requests.add(user_id)
+
+
+def begin_job_profile(user_id: str) -> SamplingProfiler | None:
+    """Start profiling if ``user_id`` was tagged (consumes the tag)."""
+    if not _job_requests:
+        return None
+    with _job_lock:
+        if user_id not in _job_requests:
+            return None
+        _job_requests.discard(user_id)
+    try:
+        return SamplingProfiler(label=f"job {user_id}").start()
+    except ProfilerBusyError:
+        logger.warning("Skipping job profile for %s: another profile is running", user_id)
+        return None
+
+
+def end_job_profile(profiler: SamplingProfiler | None, *, trace_id: str | None) -> Profile | None:
+    """Stop a job profile and keep it under ``trace_id`` (never raises)."""
+    if profiler is None:
+        return None
+    try:
+        profile = profiler.stop()
+        key = trace_id or f"untraced-{int(profile.started_at)}"
+        profile.label = f"{profile.label} trace={key}"
+        with _job_lock:
+            _job_profiles[key] = profile
+            while len(_job_profiles) > _KEEP_JOB_PROFILES:
+                _job_profiles.popitem(last=False)
+        logger.info(
+            "Captured job profile trace_id=%s (%d samples, %.1fs)",
+            key,
+            profile.sample_count,
+            profile.duration,
+        )
+        trace_event(
+            "profile.captured",
+            samples=profile.sample_count,
+            duration_ms=int(profile.duration * 1000),
+            summary=profile.summary(limit=5),
+        )
+        return profile
+    except Exception:
+        logger.debug("Failed to finish job profile", exc_info=True)
+        return None
+
+
+def get_job_profile(trace_id: str) -> Profile | None:
+    with _job_lock:
+        return _job_profiles.get(trace_id)
+
+
+def latest_job_profile() -> tuple[str, Profile] | None:
+    with _job_lock:
+        if not _job_profiles:
+            return None
+        return next(reversed(_job_profiles.items()))
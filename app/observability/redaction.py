@@ -15,7 +15,6 @@ import re
 from collections.abc import Mapping, Sequence
 from typing import Any
 
-
 _REPLACEMENT = "[REDACTED]"
 _TRUNC_SUFFIX = "…(truncated)"
 
@@ -26,10 +25,20 @@ _SECRET_KEY_RE = re.compile(
     flags=re.IGNORECASE,
 )
 
-# Common token formats / sensitive patterns.
+# Common token formats / sensitive patterns, applied in this order. The
+# ``key=value`` forms (which swallow the whole value) come before the bare
+# token formats so a token cannot consume a key name and expose its value.
+# "Bearer" never spans a line break: "scheme: Bearer" at the end of one line
+# must not swallow the next line's key.
 _SENSITIVE_VALUE_RES: list[re.Pattern[str]] = [
-    # Emails
-    re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
+    # Generic 'key=value' patterns. The optional "Bearer " keeps
+    # "token: Bearer abc" fully redacted.
+    re.compile(r"\b(?:password|passwd|pwd)\s*[:=]\s*(?:Bearer[ \t]+)?\S+", flags=re.IGNORECASE),
+    re.compile(r"\b(?:api[_-]?key|apikey)\s*[:=]\s*(?:Bearer[ \t]+)?\S+", flags=re.IGNORECASE),
+    re.compile(r"\b(?:token)\s*[:=]\s*(?:Bearer[ \t]+)?\S+", flags=re.IGNORECASE),
+    re.compile(r"\b(?:secret|private[_-]?key)\s*[:=]\s*(?:Bearer[ \t]+)?\S+", flags=re.IGNORECASE),
+    # Bearer tokens in headers / logs
+    re.compile(r"\bBearer[ \t]+[A-Za-z0-9._\-]+\b", flags=re.IGNORECASE),
     # OpenAI-ish
     re.compile(r"\b(?:sk-|pk-)[A-Za-z0-9]{20,}\b"),
     # AWS access key id
@@ -37,27 +46,80 @@ _SENSITIVE_VALUE_RES: list[re.Pattern[str]] = [
     # contain slightly malformed values; we still prefer to redact aggressively.
     # Common prefixes include: AKIA (long-term), ASIA (temp), plus others.
     re.compile(r"\b(?:AKIA|ASIA|AGPA|AIDA|ANPA|ANVA|AROA|AIPA)[A-Z0-9]{12,32}\b"),
-    # Bearer tokens in headers / logs
-    re.compile(r"\bBearer\s+[A-Za-z0-9._\-]+\b", flags=re.IGNORECASE),
     # Google API keys (e.g. Gemini) commonly start with "AIza".
     re.compile(r"\bAIza[0-9A-Za-z_\-]{20,}\b"),
-    # Generic 'key=value' patterns
-    re.compile(r"\b(?:password|passwd|pwd)\s*[:=]\s*\S+", flags=re.IGNORECASE),
-    re.compile(r"\b(?:api[_-]?key|apikey)\s*[:=]\s*\S+", flags=re.IGNORECASE),
-    re.compile(r"\b(?:token)\s*[:=]\s*\S+", flags=re.IGNORECASE),
-    re.compile(r"\b(?:secret|private[_-]?key)\s*[:=]\s*\S+", flags=re.IGNORECASE),
+    # Emails
+    re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"),
 ]
 
 
+# Literal prefilter: each pattern above needs at least one of these
+# substrings (lowercase; matched against the lowercased text). Clean text,
+# which is nearly all tool output, is rejected with a few C-level substring
+# scans, and text that does trigger only runs the patterns it can match.
+# A replacement never creates a trigger, so skipping the other patterns gives
+# exactly the result of running all of them.
+_PATTERN_TRIGGERS: tuple[tuple[str, ...], ...] = (
+    ("passw", "pwd"),
+    ("api",),
+    ("token",),
+    ("secret", "private"),
+    ("bearer",),
+    ("sk-", "pk-"),
+    ("akia", "asia", "agpa", "aida", "anpa", "anva", "aroa", "aipa"),
+    ("aiza",),
+    ("@",),
+)
+
+
+# Truncating callers only see the first ``max_chars``; redact a window a bit
+# larger than that instead of the whole (possibly 60KB) string. The slack
+# keeps any match that overlaps the visible part inside the window.
+_WINDOW_SLACK = 1024
+
+
 def _looks_sensitive_key(key: str) -> bool:
     return bool(_SECRET_KEY_RE.search(key))
 
 
+def _redact_all(text: str) -> str:
+    lowered = text.lower()
+    for rx, literals in zip(_SENSITIVE_VALUE_RES, _PATTERN_TRIGGERS, strict=True):
+        if any(lit in lowered for lit in literals):
+            text = rx.sub(_REPLACEMENT, text)
+    return text
+
+
 def redact_text(text: str, *, max_chars: int = 4000) -> str:
     """Redact sensitive substrings in a text blob and truncate."""
     if text is None:
         return text
 
+    if max_chars and len(text) > max_chars + _WINDOW_SLACK:
+        end = max_chars + _WINDOW_SLACK
+        while True:
+            out = _redact_all(text[:end])
+            # Replacements shrink text; widen until the visible part is covered.
+            if len(out) >= max_chars + _WINDOW_SLACK or end >= len(text):
+                break
+            end = min(len(text), end * 2)
+    else:
+        out = _redact_all(text)
+
+    if max_chars and len(out) > max_chars:
+        out = out[:max_chars] + _TRUNC_SUFFIX
+
+    return out
+
+
+def _redact_text_multipass(text: str, *, max_chars: int = 4000) -> str:
+    """Reference implementation: every pattern over the full text, no prefilter.
+
+    Kept for equivalence tests and ``benchmarks/redaction_bench.py``.
+    """
+    if text is None:
+        return text
+
     out = text
     for rx in _SENSITIVE_VALUE_RES:
         out = rx.sub(_REPLACEMENT, out)
@@ -68,6 +130,59 @@ def redact_text(text: str, *, max_chars: int = 4000) -> str:
     return out
 
 
+# A secret key name (optionally with its separator) at the very end of a
+# streamed chunk: its value may arrive in the next chunk.
+_DANGLING_KEY_RE = re.compile(
+    r"\b(?:password|passwd|pwd|api[_-]?key|apikey|token|secret|private[_-]?key|bearer)"
+    r"\s*[:=]?\s*(?:bearer\s*)?$",
+    flags=re.IGNORECASE,
+)
+
+
+class StreamRedactor:
+    """Incrementally redact streamed text (e.g. live shell output).
+
+    :meth:`feed` returns the redacted text that is safe to emit now; it holds
+    back the unfinished last line, and a trailing ``password:``-style key
+    whose value has not arrived yet, so a secret split across chunks is
+    still matched as a whole. :meth:`flush` emits the remainder.
+
+    Args:
+        max_pending_chars: Force a cut (at the last whitespace) once this much
+            text is held without a newline.
+    """
+
+    def __init__(self, *, max_pending_chars: int = 8192) -> None:
+        self._pending = ""
+        self._max_pending = max_pending_chars
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        self._pending += chunk
+
+        cut = self._pending.rfind("\n") + 1
+        if cut == 0 and len(self._pending) > self._max_pending:
+            cut = max(self._pending.rfind(" "), self._pending.rfind("\t")) + 1
+            if cut == 0:
+                cut = len(self._pending)
+        if cut == 0:
+            return ""
+
+        dangling = _DANGLING_KEY_RE.search(self._pending, 0, cut)
+        if dangling is not None and dangling.start() > 0:
+            cut = dangling.start()
+        elif dangling is not None and len(self._pending) <= self._max_pending:
+            return ""
+
+        head, self._pending = self._pending[:cut], self._pending[cut:]
+        return _redact_all(head)
+
+    def flush(self) -> str:
+        head, self._pending = self._pending, ""
+        return _redact_all(head)
+
+
 def sanitize(obj: Any, *, max_depth: int = 6, max_chars: int = 4000) -> Any:
     """Sanitize an object for logging.
 
@@ -0,0 +1,198 @@
+"""Rolling per-tool / per-skill latency and outcome statistics.
+
+Every agent tool call is recorded here by the instrumentation hook in
+:mod:`app.services.agent.tool_instrumentation`. Each ``(tool, skill)`` pair
+keeps a bounded window of recent durations (for percentiles) plus lifetime
+counters for calls, errors, timeouts and bytes in/out. The same samples feed
+the Prometheus metrics in :mod:`app.observability.metrics`.
+
+``skill`` is ``""`` for calls that cannot be attributed to a skill (e.g. a
+plain ``file_read`` outside the skills directory).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+
+from app.observability.metrics import REGISTRY, observe_tool_call
+
+TOOL_CALLS_TOTAL = REGISTRY.counter(
+    "mordecai_tool_calls_total",
+    "Agent tool calls by tool, skill and outcome (ok/error/timeout).",
+    ["tool", "skill", "outcome"],
+)
+TOOL_IO_BYTES_TOTAL = REGISTRY.counter(
+    "mordecai_tool_io_bytes_total",
+    "Bytes passed into (in) and returned from (out) agent tool calls.",
+    ["tool", "direction"],
+)
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+OUTCOME_TIMEOUT = "timeout"
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+@dataclass
+class _Window:
+    durations: deque[float]
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+
+@dataclass(frozen=True)
+class ToolStatsRow:
+    """Aggregated statistics for one ``(tool, skill)`` pair."""
+
+    tool: str
+    skill: str
+    calls: int
+    errors: int
+    timeouts: int
+    bytes_in: int
+    bytes_out: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+    total_seconds: float = field(default=0.0)
+
+    @property
+    def label(self) -> str:
+        return f"{self.skill} ({self.tool})" if self.skill else self.tool
+
+
+class ToolStatsRegistry:
+    """Thread-safe rolling tool statistics.
+
+    Args:
+        window: Number of recent durations kept per ``(tool, skill)``.
+        max_keys: Cap on distinct pairs; further new pairs are ignored so a
+            misbehaving MCP server cannot grow this without bound.
+    """
+
+    def __init__(self, *, window: int = 500, max_keys: int = 1000) -> None:
+        self._window = window
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], _Window] = {}
+
+    def record(
+        self,
+        tool: str,
+        *,
+        seconds: float,
+        skill: str = "",
+        outcome: str = OUTCOME_OK,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        key = (tool, skill)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                if len(self._stats) >= self._max_keys:
+                    return
+                entry = self._stats[key] = _Window(durations=deque(maxlen=self._window))
+            entry.durations.append(seconds)
+            entry.calls += 1
+            entry.errors += outcome == OUTCOME_ERROR
+            entry.timeouts += outcome == OUTCOME_TIMEOUT
+            entry.bytes_in += bytes_in
+            entry.bytes_out += bytes_out
+
+    def snapshot(self) -> list[ToolStatsRow]:
+        with self._lock:
+            items = [(k, list(v.durations), v) for k, v in self._stats.items()]
+        rows = []
+        for (tool, skill), durations, entry in items:
+            ordered = sorted(durations)
+            rows.append(
+                ToolStatsRow(
+                    tool=tool,
+                    skill=skill,
+                    calls=entry.calls,
+                    errors=entry.errors,
+                    timeouts=entry.timeouts,
+                    bytes_in=entry.bytes_in,
+                    bytes_out=entry.bytes_out,
+                    p50=_percentile(ordered, 50),
+                    p95=_percentile(ordered, 95),
+                    p99=_percentile(ordered, 99),
+                    max=ordered[-1] if ordered else 0.0,
+                    total_seconds=sum(ordered),
+                )
+            )
+        return rows
+
+    def slowest(self, limit: int = 10) -> list[ToolStatsRow]:
+        """Rows ordered by p95 latency, slowest first."""
+        return sorted(self.snapshot(), key=lambda r: (r.p95, r.total_seconds), reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+TOOL_STATS = ToolStatsRegistry()
+
+
+def record_tool_call(
+    tool: str,
+    *,
+    seconds: float,
+    skill: str = "",
+    outcome: str = OUTCOME_OK,
+    bytes_in: int = 0,
+    bytes_out: int = 0,
+) -> None:
+    """Record one tool call into the rolling stats and metrics (never raises)."""
+    try:
+        TOOL_STATS.record(
+            tool,
+            seconds=seconds,
+            skill=skill,
+            outcome=outcome,
+            bytes_in=bytes_in,
+            bytes_out=bytes_out,
+        )
+        observe_tool_call(tool, seconds)
+        TOOL_CALLS_TOTAL.inc(tool=tool, skill=skill, outcome=outcome)
+        if bytes_in:
+            TOOL_IO_BYTES_TOTAL.inc(bytes_in, tool=tool, direction="in")
+        if bytes_out:
+            TOOL_IO_BYTES_TOTAL.inc(bytes_out, tool=tool, direction="out")
+    except Exception:
+        pass
+
+
+def format_slow_tools_report(limit: int = 10) -> str:
+    """Render the slowest tools/skills as a short Telegram-friendly report."""
+    rows = TOOL_STATS.slowest(limit)
+    if not rows:
+        return "No tool calls recorded since the last restart."
+
+    lines = ["🐢 Slowest tools/skills (p95, since restart):\n"]
+    for row in rows:
+        failures = []
+        if row.errors:
+            failures.append(f"{row.errors} err")
+        if row.timeouts:
+            failures.append(f"{row.timeouts} timeout")
+        suffix = f" ⚠️ {', '.join(failures)}" if failures else ""
+        lines.append(
+            f"• {row.label}: p50 {row.p50:.2f}s · p95 {row.p95:.2f}s · max {row.max:.2f}s"
+            f" · {row.calls} calls{suffix}"
+        )
+    return "\n".join(lines)
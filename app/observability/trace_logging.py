@@ -24,6 +24,27 @@ _logger = logging.getLogger("mordecai.trace")
 _error_logger = logging.getLogger("app.tools.trace")
 
 
+class _JsonLine:
+    """Log message that serializes its record only when formatted.
+
+    With async logging enabled this happens on the listener thread, and not
+    at all when ``mordecai.trace`` is disabled.
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: dict[str, Any]) -> None:
+        self.record = record
+
+    def __str__(self) -> str:
+        try:
+            return json.dumps(self.record, ensure_ascii=False, separators=(",", ":"))
+        except Exception:
+            # Never break the application because of logging.
+            event = self.record.get("event")
+            return json.dumps({"event": str(event), "error": "failed_to_serialize"})
+
+
 def trace_event(
     event: str,
     *,
@@ -50,8 +71,7 @@ def trace_event(
         record[k] = sanitize(v, max_chars=max_chars)
 
     try:
-        json_str = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
-        _logger.info(json_str)
+        _logger.info(_JsonLine(record))
 
         # Also log errors to the error logger for file-based error tracking
         if ".error" in event or "error" in fields:
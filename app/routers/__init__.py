@@ -1,5 +1,6 @@
 """HTTP routers package."""
 
+from .admin_router import create_admin_router
 from .task_router import (
     CreateTaskRequest,
     TaskListResponse,
@@ -14,6 +15,7 @@ from .webhook_router import (
 )
 
 __all__ = [
+    "create_admin_router",
     "create_task_router",
     "create_webhook_router",
     "CreateTaskRequest",
@@ -0,0 +1,100 @@
+"""Admin diagnostics endpoints.
+
+Routers handle HTTP concerns only - no business logic.
+Profiling itself lives in ``app.observability.profiler``.
+
+All routes require ``Authorization: Bearer <admin_api_token>``; the router is
+only mounted when ``admin_api_token`` is configured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.models.base import JsonModel
+from app.observability.profiler import (
+    MAX_PROFILE_SECONDS,
+    ProfilerBusyError,
+    get_job_profile,
+    profile_for,
+    request_job_profile,
+)
+
+ProfileFormat = Literal["speedscope", "collapsed"]
+
+
+class JobProfileRequestResponse(JsonModel):
+    """Response model for tagging a user's next message for profiling."""
+
+    user_id: str
+    status: str
+
+
+def create_admin_router(*, admin_token: str) -> APIRouter:
+    """Create the admin router.
+
+    Args:
+        admin_token: Shared secret expected in the ``Authorization`` header.
+
+    Returns:
+        APIRouter with admin endpoints configured
+    """
+    router = APIRouter(prefix="/admin", tags=["admin"], include_in_schema=False)
+    expected = f"Bearer {admin_token}".encode()
+
+    def require_admin(request: Request) -> None:
+        supplied = request.headers.get("authorization", "").encode()
+        if not hmac.compare_digest(supplied, expected):
+            raise HTTPException(status_code=403, detail="Forbidden")
+
+    def _profile_response(body: str, media_type: str, fmt: ProfileFormat, name: str) -> Response:
+        ext = "txt" if fmt == "collapsed" else "speedscope.json"
+        return Response(
+            content=body,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{name}.{ext}"'},
+        )
+
+    @router.get("/profile", dependencies=[Depends(require_admin)])
+    async def profile_process(
+        seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+        interval_ms: float = Query(10.0, ge=1, le=1000),
+        format: ProfileFormat = Query("speedscope"),
+    ) -> Response:
+        """Sample all threads for ``seconds`` and return the profile."""
+        try:
+            profile = await asyncio.to_thread(
+                profile_for, seconds, interval=interval_ms / 1000.0
+            )
+        except ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e)) from e
+        body, media_type = profile.export(format)
+        return _profile_response(body, media_type, format, "mordecai-profile")
+
+    @router.post(
+        "/profile/next/{user_id}",
+        response_model=JobProfileRequestResponse,
+        dependencies=[Depends(require_admin)],
+    )
+    async def profile_next_message(user_id: str) -> JobProfileRequestResponse:
+        """Profile ``user_id``'s next message; fetch it later by trace_id."""
+        request_job_profile(user_id)
+        return JobProfileRequestResponse(user_id=user_id, status="armed")
+
+    @router.get("/profile/{trace_id}", dependencies=[Depends(require_admin)])
+    async def get_profile(
+        trace_id: str,
+        format: ProfileFormat = Query("speedscope"),
+    ) -> Response:
+        """Return a captured per-job profile by trace_id."""
+        profile = get_job_profile(trace_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="No profile for this trace_id")
+        body, media_type = profile.export(format)
+        return _profile_response(body, media_type, format, f"mordecai-{trace_id}")
+
+    return router
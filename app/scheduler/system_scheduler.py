@@ -24,7 +24,8 @@ class SystemScheduler:
     """Scheduler for system-level periodic tasks.
 
     Runs system tasks on a fixed schedule, separate from user-created
-    cron tasks. Currently handles file cleanup.
+    cron tasks. Currently handles file cleanup and idle per-user state
+    eviction.
 
     Requirements:
         - 10.5: Schedule hourly file cleanup
@@ -119,6 +120,7 @@ class SystemScheduler:
                 await self._execute_file_cleanup()
             except Exception as e:
                 logger.exception("Error in file cleanup loop: %s", e)
+            self._execute_state_sweep()
 
             # Wait for the interval or until stop is signaled
             try:
@@ -157,6 +159,25 @@ class SystemScheduler:
         except Exception as e:
             logger.error("File cleanup failed: %s", e)
 
+    def _execute_state_sweep(self) -> None:
+        """Evict idle per-user in-process state.
+
+        Registries also sweep lazily on writes; this catches registries that
+        have gone quiet entirely.
+        """
+        from app.services.user_state_registry import registry_sizes, sweep_registries
+
+        try:
+            evicted = sweep_registries()
+            if evicted:
+                logger.info(
+                    "State sweep: evicted %d idle entries, sizes=%s",
+                    evicted,
+                    registry_sizes(),
+                )
+        except Exception as e:
+            logger.error("State sweep failed: %s", e)
+
     @property
     def is_running(self) -> bool:
         """Check if the scheduler is currently running.
@@ -19,6 +19,8 @@ from strands.agent.conversation_manager import SlidingWindowConversationManager
 from strands.models.model import Model
 
 from app.models.agent import AttachmentInfo, MemoryContext, SkillInfo
+from app.services.agent.tool_instrumentation import ToolInstrumentationHook
+from app.services.usage_ledger import USAGE_BUDGET_DOWNGRADES_TOTAL, usage_budget
 
 if TYPE_CHECKING:
     from app.config import AgentConfig
@@ -147,8 +149,10 @@ class AgentCreator:
         self.cookie_dao = cookie_dao
         self.skill_secret_dao = skill_secret_dao
 
-    def create_model(self, use_vision: bool = False) -> Model:
-        """Create a model instance."""
+    def create_model(self, use_vision: bool = False, model_id: str | None = None) -> Model:
+        """Create a model instance (``model_id`` overrides the configured model)."""
+        if model_id:
+            return self._model_factory.create(use_vision=use_vision, model_id=model_id)
         return self._model_factory.create(use_vision=use_vision)
 
     def get_or_create_conversation_manager(self, user_id: str) -> SlidingWindowConversationManager:
@@ -192,6 +196,22 @@ class AgentCreator:
         """
         self._user_agents[user_id] = agent
 
+    async def preload_skill_secrets(self, user_id: str) -> None:
+        """Load the user's skill secrets from the DB into the in-memory cache.
+
+        Awaited by the async message flow before ``create_agent`` so shell and
+        tool calls see the secrets without a DB round-trip from a sync context.
+        """
+        if self.skill_secret_dao is None:
+            return
+        try:
+            user_secrets = await self.skill_secret_dao.get_secrets_data(user_id)
+        except Exception:
+            logger.warning("Failed to preload skill secrets for user %s", user_id, exc_info=True)
+            return
+        if isinstance(user_secrets, dict):
+            skill_secrets_module.set_cached_skill_secrets(user_secrets)
+
     def get_or_create_agent(self, user_id: str) -> Agent:
         """Create an agent for user."""
         if user_id in self._user_agents:
@@ -210,6 +230,21 @@ class AgentCreator:
         """
         return self._skill_repo.discover(user_id)
 
+    def _skills_roots(self, user_skills_dir: str) -> list[str]:
+        """Skills directories (as given and resolved) used to attribute tool calls."""
+        roots = [user_skills_dir]
+        shared = getattr(self.config, "shared_skills_dir", None)
+        if isinstance(shared, str) and shared:
+            roots.append(shared)
+        for root in list(roots):
+            try:
+                resolved = str(Path(root).expanduser().resolve())
+            except (OSError, RuntimeError):
+                continue
+            if resolved not in roots:
+                roots.append(resolved)
+        return roots
+
     def get_user_skills_dir(self, user_id: str) -> Path:
         """Get the skills directory for a specific user.
 
@@ -312,7 +347,15 @@ class AgentCreator:
         """
         # Check if any attachment is an image - if so, use vision model when available.
         has_image_attachment = bool(attachments) and any(att.is_image for att in attachments)
-        model = self.create_model(use_vision=has_image_attachment)
+        # Users over their daily token budget get the cheaper model and/or a
+        # smaller conversation window (see app.services.usage_ledger).
+        budget = usage_budget(user_id)
+        # The vision model, when configured, replaces any model id override.
+        uses_vision_model = has_image_attachment and bool(
+            getattr(self.config, "vision_model_id", None)
+        )
+        fallback_model_id = budget.model_id if budget and not uses_vision_model else None
+        model = self.create_model(use_vision=has_image_attachment, model_id=fallback_model_id)
         user_skills_dir = str(self.get_user_skills_dir(user_id))
 
         # Get or create conversation manager for this user
@@ -324,6 +367,12 @@ class AgentCreator:
             )
         else:
             conversation_manager = self.get_or_create_conversation_manager(user_id)
+        if budget is not None:
+            conversation_manager.window_size = (
+                budget.window_size or self.config.conversation_window_size
+            )
+            if fallback_model_id or budget.window_size:
+                USAGE_BUDGET_DOWNGRADES_TOTAL.inc()
 
         # Set up the set_agent_name tool with memory service context
         if self.config.memory_enabled and self.memory_service is not None:
@@ -409,16 +458,6 @@ class AgentCreator:
             dao=self.skill_secret_dao,
         )
 
-        # Pre-load user's skill secrets from DB into the in-memory cache
-        # so shell/tool calls see them immediately without a DB round-trip.
-        if self.skill_secret_dao is not None:
-            try:
-                user_secrets = skill_secrets_module.get_cached_skill_secrets()
-                if user_secrets:
-                    skill_secrets_module.set_cached_skill_secrets(user_secrets)
-            except Exception:
-                pass
-
         # File read/write tool context: allow access to user's skill directories
         file_read_env_module.set_file_read_context(
             user_id=user_id,
@@ -498,6 +537,8 @@ class AgentCreator:
                 [
                     onboard_pending_skills_module.list_pending_skills,
                     onboard_pending_skills_module.onboard_pending_skills,
+                    onboard_pending_skills_module.start_pending_skill_onboarding,
+                    onboard_pending_skills_module.pending_skill_onboarding_status,
                     onboard_pending_skills_module.repair_skill_dependencies,
                 ]
             )
@@ -632,6 +673,8 @@ class AgentCreator:
             system_prompt=self.build_system_prompt(
                 user_id, memory_context, attachments, onboarding_context
             ),
+            # Per-tool latency/outcome stats for every tool, incl. skills dir and MCP tools.
+            hooks=[ToolInstrumentationHook(self._skills_roots(user_skills_dir))],
         )
 
         # Helpful diagnostics: log the registered tool names so we can
@@ -15,7 +15,7 @@ import os
 import random
 import time
 import uuid
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
@@ -24,9 +24,16 @@ from strands.agent.conversation_manager import SlidingWindowConversationManager
 from app.enums import LogSeverity, ModelProvider
 from app.models.agent import AttachmentInfo, MemoryContext
 from app.observability.health_state import inflight_dec, inflight_inc, mark_progress
+from app.observability.metrics import stage_timer, timed_stage
+from app.observability.profiler import begin_job_profile, end_job_profile
 from app.observability.trace_context import new_trace_id, set_trace
 from app.observability.trace_logging import trace_event
 from app.services.agent.response_extractor import extract_response_text
+from app.services.usage_ledger import (
+    STAGE_ATTACHMENTS,
+    STAGE_IMAGE,
+    record_agent_usage,
+)
 
 if TYPE_CHECKING:
     from app.config import AgentConfig
@@ -92,6 +99,7 @@ class MessageProcessor:
         trigger_extraction_and_clear: Callable[..., Any],
         conversation_dao: ConversationDAO | None = None,
         deterministic_skill_runner: Any | None = None,
+        preload_skill_secrets: Callable[[str], Awaitable[None]] | None = None,
     ):
         """Initialize the message processor.
 
@@ -112,6 +120,8 @@ class MessageProcessor:
             maybe_store_explicit_memory: Function to store explicit memory.
             trigger_extraction_and_clear: Function to trigger extraction.
             deterministic_skill_runner: Optional deterministic skill runner for tests.
+            preload_skill_secrets: Optional coroutine function loading the user's
+                skill secrets into the tool cache before an agent is created.
         """
         self.config = config
         self.memory_service = memory_service
@@ -121,15 +131,16 @@ class MessageProcessor:
         self._extraction_lock = extraction_lock
         self._get_session_id = get_session_id
         self._get_user_messages = get_user_messages
-        self._create_agent = create_agent
+        self._create_agent = timed_stage("agent_create", create_agent)
         self._create_model = create_model
         self._add_to_conversation_history = add_to_conversation_history
-        self._sync_shared_skills = sync_shared_skills
+        self._sync_shared_skills = timed_stage("skills_sync", sync_shared_skills)
         self._increment_message_count = increment_message_count
         self._maybe_store_explicit_memory = maybe_store_explicit_memory
         self._trigger_extraction_and_clear = trigger_extraction_and_clear
         self._conversation_dao = conversation_dao
         self._deterministic_skill_runner = deterministic_skill_runner
+        self._preload_skill_secrets = preload_skill_secrets
         self._set_session_id: Callable[[str, str], None] | None = None
 
     def _job_thread_ids(self, *, user_id: str) -> tuple[str, str, str, str]:
@@ -144,11 +155,50 @@ class MessageProcessor:
         job_thread_id = f"{main_thread_id}__job__{short}"
         return main_thread_id, token, short, job_thread_id
 
+    def _retrieve_memory_context(self, *, user_id: str, query: str) -> dict[str, Any]:
+        """Retrieve memory context for a query, timed as ``memory_retrieval``."""
+        if self.memory_service is None:
+            return {}
+        with stage_timer("memory_retrieval"):
+            return self.memory_service.retrieve_memory_context(user_id=user_id, query=query)
+
+    async def _invoke_agent(
+        self,
+        agent: Any,
+        prompt: Any,
+        *,
+        user_id: str | None = None,
+        stage: str | None = None,
+    ) -> Any:
+        """Run a synchronous Strands agent call in a worker thread.
+
+        Strands agent calls can execute blocking tools; running them off the
+        event loop keeps /health responsive. Timed as ``model_invoke``
+        (model round-trips plus tool calls). Token usage is recorded in the
+        usage ledger under ``user_id`` and ``stage``.
+        """
+        with stage_timer("model_invoke"):
+            result = await asyncio.to_thread(agent, prompt)
+        record_agent_usage(result, user_id=user_id, stage=stage, agent=agent)
+        return result
+
     async def _load_main_thread_snapshot(
         self,
         *,
         user_id: str,
         main_thread_id: str,
+    ) -> tuple[list[dict], str]:
+        """Load the main-thread context snapshot, timed as ``snapshot_load``."""
+        with stage_timer("snapshot_load"):
+            return await self._read_main_thread_snapshot(
+                user_id=user_id, main_thread_id=main_thread_id
+            )
+
+    async def _read_main_thread_snapshot(
+        self,
+        *,
+        user_id: str,
+        main_thread_id: str,
     ) -> tuple[list[dict], str]:
         """Load recent messages for context, stripped to **text-only** blocks.
 
@@ -254,14 +304,15 @@ class MessageProcessor:
         if self._conversation_dao is None:
             return
         try:
-            await self._conversation_dao.save_message(
-                user_id=user_id,
-                session_id=main_thread_id,
-                role=role,
-                content=content,
-                is_cron=False,
-                created_at=datetime.utcnow(),
-            )
+            with stage_timer("persistence"):
+                await self._conversation_dao.save_message(
+                    user_id=user_id,
+                    session_id=main_thread_id,
+                    role=role,
+                    content=content,
+                    is_cron=False,
+                    created_at=datetime.utcnow(),
+                )
         except Exception:
             # Never break message processing due to DB persistence.
             return
@@ -278,45 +329,46 @@ class MessageProcessor:
             return
 
         try:
-            # Persist the snapshot first so the job thread is self-contained.
-            for m in snapshot:
-                if isinstance(m, dict):
+            with stage_timer("persistence"):
+                # Persist the snapshot first so the job thread is self-contained.
+                for m in snapshot:
+                    if isinstance(m, dict):
+                        await self._conversation_dao.save_structured_message(
+                            user_id=user_id,
+                            session_id=job_thread_id,
+                            message=m,
+                            is_cron=False,
+                            created_at=datetime.utcnow(),
+                            redact=True,
+                        )
+
+                for m in delta:
+                    msg_dict: dict | None = None
+                    if isinstance(m, dict):
+                        msg_dict = m
+                    else:
+                        for attr in ("model_dump", "dict"):
+                            try:
+                                fn = getattr(m, attr)
+                                if callable(fn):
+                                    dumped = fn()
+                                    if isinstance(dumped, dict):
+                                        msg_dict = dumped
+                                        break
+                            except Exception:
+                                continue
+
+                    if msg_dict is None:
+                        msg_dict = {"role": "assistant", "content": [{"text": str(m)}]}
+
                     await self._conversation_dao.save_structured_message(
                         user_id=user_id,
                         session_id=job_thread_id,
-                        message=m,
+                        message=msg_dict,
                         is_cron=False,
                         created_at=datetime.utcnow(),
                         redact=True,
                     )
-
-            for m in delta:
-                msg_dict: dict | None = None
-                if isinstance(m, dict):
-                    msg_dict = m
-                else:
-                    for attr in ("model_dump", "dict"):
-                        try:
-                            fn = getattr(m, attr)
-                            if callable(fn):
-                                dumped = fn()
-                                if isinstance(dumped, dict):
-                                    msg_dict = dumped
-                                    break
-                        except Exception:
-                            continue
-
-                if msg_dict is None:
-                    msg_dict = {"role": "assistant", "content": [{"text": str(m)}]}
-
-                await self._conversation_dao.save_structured_message(
-                    user_id=user_id,
-                    session_id=job_thread_id,
-                    message=msg_dict,
-                    is_cron=False,
-                    created_at=datetime.utcnow(),
-                    redact=True,
-                )
         except Exception:
             return
 
@@ -348,6 +400,8 @@ class MessageProcessor:
         trace_this: bool = False
         trace_id: str | None = None
         t0: float = 0.0
+        # Set when an admin tagged this user's next message for profiling.
+        job_profiler = begin_job_profile(user_id)
         try:
             if getattr(self.config, "trace_enabled", False):
                 try:
@@ -357,7 +411,8 @@ class MessageProcessor:
                     sample_rate = 1.0
                 trace_this = random.random() <= sample_rate
 
-            if trace_this:
+            # A profiled job always gets a trace_id to file the profile under.
+            if trace_this or job_profiler is not None:
                 trace_id = new_trace_id()
                 set_trace(trace_id=trace_id, actor_id=user_id)
 
@@ -403,7 +458,7 @@ class MessageProcessor:
             memory_context: MemoryContext | None = None
             if self.config.memory_enabled and self.memory_service is not None:
                 try:
-                    ctx_dict = self.memory_service.retrieve_memory_context(
+                    ctx_dict = self._retrieve_memory_context(
                         user_id=user_id, query=message
                     )
                     # Handle agent_name which may be str | None | list[str]
@@ -499,6 +554,8 @@ class MessageProcessor:
                 main_thread_id=main_thread_id,
             )
             job_thread_id = f"{main_thread_id}__job__{_job_short}"
+            if self._preload_skill_secrets is not None:
+                await self._preload_skill_secrets(user_id)
 
             await self._persist_main_plain_message(
                 user_id=user_id,
@@ -524,7 +581,7 @@ class MessageProcessor:
             # the asyncio event loop responsive so /health continues to answer.
             mark_progress("agent.invoke.start")
             try:
-                result = await asyncio.to_thread(agent, message)
+                result = await self._invoke_agent(agent, message, user_id=user_id)
             except Exception as e:
                 # If Bedrock reports a tool transcript mismatch, retry once with
                 # a clean seed history. Retrying the same transcript is unlikely
@@ -545,7 +602,7 @@ class MessageProcessor:
                         for_cron_task=True,
                     )
                     initial_len = 0
-                    result = await asyncio.to_thread(agent, message)
+                    result = await self._invoke_agent(agent, message, user_id=user_id)
                 else:
                     raise
             finally:
@@ -673,6 +730,7 @@ class MessageProcessor:
         finally:
             # Keep inflight accounting accurate even on early returns/exceptions.
             inflight_dec()
+            end_job_profile(job_profiler, trace_id=trace_id)
 
     async def process_message_with_attachments(
         self,
@@ -747,7 +805,7 @@ class MessageProcessor:
         if self.config.memory_enabled and self.memory_service is not None:
             try:
                 query = message if message else "file attachment"
-                ctx_dict = self.memory_service.retrieve_memory_context(user_id=user_id, query=query)
+                ctx_dict = self._retrieve_memory_context(user_id=user_id, query=query)
                 # Handle agent_name which may be str | None | list[str]
                 agent_name_value = ctx_dict.get("agent_name")
                 agent_name: str | None = (
@@ -788,6 +846,8 @@ class MessageProcessor:
             main_thread_id=main_thread_id,
         )
         job_thread_id = f"{main_thread_id}__job__{_job_short}"
+        if self._preload_skill_secrets is not None:
+            await self._preload_skill_secrets(user_id)
 
         await self._persist_main_plain_message(
             user_id=user_id,
@@ -815,7 +875,9 @@ class MessageProcessor:
         try:
             mark_progress("agent.invoke.start")
             try:
-                result = await asyncio.to_thread(agent, prompt)
+                result = await self._invoke_agent(
+                    agent, prompt, user_id=user_id, stage=STAGE_ATTACHMENTS
+                )
             except Exception as e:
                 if _is_bedrock_tool_transcript_validation_error(e):
                     logger.warning(
@@ -834,7 +896,9 @@ class MessageProcessor:
                         for_cron_task=True,
                     )
                     initial_len = 0
-                    result = await asyncio.to_thread(agent, prompt)
+                    result = await self._invoke_agent(
+                        agent, prompt, user_id=user_id, stage=STAGE_ATTACHMENTS
+                    )
                 else:
                     raise
             finally:
@@ -946,7 +1010,7 @@ class MessageProcessor:
         memory_context: MemoryContext | None = None
         if self.config.memory_enabled and self.memory_service is not None:
             try:
-                ctx_dict = self.memory_service.retrieve_memory_context(
+                ctx_dict = self._retrieve_memory_context(
                     user_id=user_id, query=message or "image analysis"
                 )
                 # Handle agent_name which may be str | None | list[str]
@@ -1047,7 +1111,9 @@ class MessageProcessor:
         try:
             mark_progress("agent.invoke.start")
             try:
-                result = await asyncio.to_thread(agent, prompt)
+                result = await self._invoke_agent(
+                    agent, prompt, user_id=user_id, stage=STAGE_IMAGE
+                )
             except Exception as e:
                 if _is_bedrock_tool_transcript_validation_error(e):
                     logger.warning(
@@ -1067,7 +1133,9 @@ class MessageProcessor:
                         tools=[],
                         system_prompt=system_prompt,
                     )
-                    result = await asyncio.to_thread(agent, prompt)
+                    result = await self._invoke_agent(
+                        agent, prompt, user_id=user_id, stage=STAGE_IMAGE
+                    )
                 else:
                     raise
             finally:
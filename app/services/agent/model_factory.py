@@ -1,25 +1,51 @@
 from __future__ import annotations
 
+import importlib
 import os
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, cast
 
 from strands.models import BedrockModel
-from strands.models.gemini import GeminiModel
-from strands.models.openai import OpenAIModel
 
 from app.enums import ModelProvider
 
 if TYPE_CHECKING:
     from strands.models.model import Model
 
+# Optional providers pull in their SDKs (openai, google-genai: ~1s of imports),
+# so they are only imported when a model for that provider is created.
+_LAZY_PROVIDERS = {
+    "OpenAIModel": "strands.models.openai",
+    "GeminiModel": "strands.models.gemini",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_PROVIDERS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def _provider_class(name: str) -> Any:
+    """Return a (possibly lazily imported) provider model class."""
+    return globals().get(name) or __getattr__(name)
+
 
 @dataclass(slots=True)
 class ModelFactory:
     config: Any
 
-    def create(self, *, use_vision: bool = False) -> Model:
-        """Create a Strands model instance based on configured provider."""
+    def create(self, *, use_vision: bool = False, model_id: str | None = None) -> Model:
+        """Create a Strands model instance based on configured provider.
+
+        Args:
+            use_vision: Use the configured vision model (Bedrock) if any.
+            model_id: Override the provider's configured model id (e.g. the
+                cheaper fallback model for users over their usage budget).
+        """
 
         # Use vision model if requested and configured
         if use_vision and getattr(self.config, "vision_model_id", None):
@@ -32,7 +58,7 @@ class ModelFactory:
 
         match self.config.model_provider:
             case ModelProvider.BEDROCK:
-                model_id = self.config.bedrock_model_id
+                model_id = model_id or self.config.bedrock_model_id
                 if getattr(self.config, "bedrock_api_key", None):
                     os.environ["AWS_BEARER_TOKEN_BEDROCK"] = str(self.config.bedrock_api_key)
                 return BedrockModel(
@@ -43,16 +69,16 @@ class ModelFactory:
                 if not getattr(self.config, "openai_api_key", None):
                     raise ValueError("OpenAI API key required")
                 # Some stubs model OpenAIModel as kwargs-only; cast for compatibility.
-                return cast(Any, OpenAIModel)(
-                    model=self.config.openai_model_id,
+                return cast(Any, _provider_class("OpenAIModel"))(
+                    model=model_id or self.config.openai_model_id,
                     api_key=self.config.openai_api_key,
                 )
             case ModelProvider.GOOGLE:
                 if not getattr(self.config, "google_api_key", None):
                     raise ValueError("Google API key required")
-                return GeminiModel(
+                return _provider_class("GeminiModel")(
                     client_args={"api_key": self.config.google_api_key},
-                    model_id=self.config.google_model_id,
+                    model_id=model_id or self.config.google_model_id,
                     params={"max_output_tokens": 4096},
                 )
             case _:
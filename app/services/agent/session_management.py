@@ -128,6 +128,36 @@ class SessionLifecycleManager:
         """
         self._message_counter.reset(user_id)
 
+    async def _history_for_extraction(self, user_id: str, session_id: str) -> list[dict]:
+        """Return the session's messages as dicts for the extraction service.
+
+        If part of the session was spilled out of memory, the full session is
+        reloaded from the conversation database.
+
+        Args:
+            user_id: User's telegram ID.
+            session_id: Session being extracted.
+
+        Returns:
+            List of message dicts with role and content.
+        """
+        convo_dao = getattr(self, "conversation_dao", None)
+        if convo_dao is not None and self._conversation_history.is_spilled(user_id):
+            try:
+                persisted = await convo_dao.get_conversation(
+                    user_id=user_id,
+                    session_id=session_id,
+                    exclude_cron=True,
+                )
+                if persisted:
+                    return persisted
+            except Exception:
+                logger.warning(
+                    "Failed to reload spilled history for user %s; using in-memory tail",
+                    user_id,
+                )
+        return self._conversation_history.to_dict_list(user_id)
+
     async def new_session(self, user_id: str) -> tuple[Agent, str]:
         """Create a fresh session with extraction before clearing.
 
@@ -174,7 +204,9 @@ class SessionLifecycleManager:
                 #
                 # NOTE: `_get_conversation_history()` returns `list[ConversationMessage]`.
                 # Casting those to dicts will crash when downstream code does `.get()`.
-                history_for_extraction = self._conversation_history.to_dict_list(user_id)
+                history_for_extraction = await self._history_for_extraction(
+                    user_id, session_id
+                )
 
                 if self.memory_service is not None:
                     # Wait for extraction with timeout (Requirement 6.4)
@@ -379,8 +411,12 @@ class SessionLifecycleManager:
 
         try:
             session_id = self.get_session_id(user_id)
-            conversation_history = self._get_conversation_history(user_id)
-            history_for_extraction = self._conversation_history.to_dict_list(user_id)
+            history_for_extraction = await self._history_for_extraction(user_id, session_id)
+            # Spilled sessions may have an empty in-memory tail but a full
+            # history in the database.
+            conversation_history = (
+                self._get_conversation_history(user_id) or history_for_extraction
+            )
 
             # Always generate + store a session summary to Obsidian STM before clearing.
             # This is independent from AgentCore memory availability.
@@ -0,0 +1,282 @@
+"""In-memory index of installed skills and their parsed requirements.
+
+Skill discovery used to re-read every ``SKILL.md``, re-parse its YAML
+frontmatter and ``rglob`` each skill for config templates several times per
+message (system prompt, agent creation logging, missing-requirements check).
+:class:`SkillCatalog` keeps one parsed :class:`CatalogEntry` per ``SKILL.md``,
+keyed by ``(path, mtime_ns, size)``. Listing a skills directory re-parses
+only the files whose stamp changed.
+
+When the background watcher is running, lookups skip even the ``stat``
+calls and return the cached listing. The watcher rescans known directories
+every few seconds. Installs, uninstalls, onboarding and shared-skill sync
+call :func:`invalidate_skill_catalog` so their changes are visible at once.
+Without the watcher (tests, scripts) every lookup revalidates stamps.
+
+A single process-wide catalog (:func:`get_skill_catalog`) serves both the
+shared and per-user skill directories.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.models.agent import RequirementSpec, SkillInfo
+from app.observability.metrics import REGISTRY
+from app.services.agent.frontmatter import (
+    extract_required_bins,
+    extract_required_config,
+    extract_required_env,
+    parse_skill_frontmatter,
+)
+
+logger = logging.getLogger(__name__)
+
+# Directories inside skills/ that are not actual skills
+RESERVED_SKILL_DIR_NAMES: set[str] = {
+    "pending",
+    "failed",
+    ".venvs",
+    ".venv",
+    "__pycache__",
+}
+
+_TEMPLATE_SUFFIXES = ("_example", ".example")
+
+_PARSES = REGISTRY.counter(
+    "mordecai_skill_catalog_parses_total",
+    "SKILL.md files (re)parsed by the skill catalog.",
+)
+_LOOKUPS = REGISTRY.counter(
+    "mordecai_skill_catalog_lookups_total",
+    "Skill catalog directory lookups, by whether the cached listing was reused.",
+    ("result",),
+)
+
+# (SKILL.md mtime_ns, SKILL.md size, skill dir mtime_ns)
+_Stamp = tuple[int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogEntry:
+    """Parsed view of one installed skill.
+
+    Attributes:
+        info: Name, description and resolved path of the skill.
+        env: ``requires.env`` specs from the frontmatter.
+        config: ``requires.config`` specs from the frontmatter.
+        bins: ``requires.bins`` specs from the frontmatter.
+        templates: Config template files (``*_example``/``*.example``)
+            found anywhere under the skill directory, as file names.
+    """
+
+    info: SkillInfo
+    env: tuple[RequirementSpec, ...] = ()
+    config: tuple[RequirementSpec, ...] = ()
+    bins: tuple[RequirementSpec, ...] = ()
+    templates: tuple[str, ...] = ()
+
+    @property
+    def has_requirements(self) -> bool:
+        return bool(self.env or self.config or self.bins)
+
+
+def _stamp(skill_md: Path) -> _Stamp | None:
+    try:
+        st = skill_md.stat()
+        dir_st = skill_md.parent.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, dir_st.st_mtime_ns)
+
+
+def _find_templates(skill_dir: Path) -> tuple[str, ...]:
+    names: list[str] = []
+    try:
+        for suffix in _TEMPLATE_SUFFIXES:
+            names.extend(p.name for p in skill_dir.rglob(f"*{suffix}") if p.is_file())
+    except OSError:
+        pass
+    return tuple(names)
+
+
+def _parse_entry(item: Path, skill_md: Path) -> CatalogEntry:
+    frontmatter = parse_skill_frontmatter(skill_md.read_text(encoding="utf-8"))
+    _PARSES.inc()
+    return CatalogEntry(
+        info=SkillInfo(
+            name=str(frontmatter.get("name") or item.name),
+            description=str(frontmatter.get("description") or ""),
+            path=str(item.resolve()),
+        ),
+        env=tuple(extract_required_env(frontmatter)),
+        config=tuple(extract_required_config(frontmatter)),
+        bins=tuple(extract_required_bins(frontmatter)),
+        templates=_find_templates(item),
+    )
+
+
+class SkillCatalog:
+    """Process-wide cache of parsed skills, per skills directory."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        # str(SKILL.md path) -> (stamp, entry or None if unreadable)
+        self._entries: dict[str, tuple[_Stamp, CatalogEntry | None]] = {}
+        # str(skills dir) -> SKILL.md paths of the skills in it, in listing order
+        self._listings: dict[str, tuple[str, ...]] = {}
+        self._bins_found: set[str] = set()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def watching(self) -> bool:
+        return self._watcher is not None and self._watcher.is_alive()
+
+    def entries(self, skills_dir: Path) -> list[CatalogEntry]:
+        """Return the parsed skills in ``skills_dir``.
+
+        Args:
+            skills_dir: A shared or per-user skills directory.
+
+        Returns:
+            Entries in directory listing order. Skills whose ``SKILL.md``
+            cannot be read or parsed are omitted.
+        """
+        key = str(skills_dir)
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is None or not self.watching:
+                _LOOKUPS.inc(result="scan")
+                listing = self._scan(skills_dir)
+            else:
+                _LOOKUPS.inc(result="cached")
+            return [entry for p in listing if (entry := self._entries[p][1]) is not None]
+
+    def _scan(self, skills_dir: Path) -> tuple[str, ...]:
+        """Rescan ``skills_dir``, reparsing only changed ``SKILL.md`` files."""
+        paths: list[str] = []
+        try:
+            items = sorted(skills_dir.iterdir()) if skills_dir.is_dir() else []
+        except OSError as e:
+            logger.warning("Failed to list skills dir %s: %s", skills_dir, e)
+            items = []
+
+        for item in items:
+            if item.name.startswith("__") or item.name in RESERVED_SKILL_DIR_NAMES:
+                continue
+            skill_md = item / "SKILL.md"
+            stamp = _stamp(skill_md)
+            if stamp is None:
+                continue
+            path = str(skill_md)
+            cached = self._entries.get(path)
+            if cached is None or cached[0] != stamp:
+                try:
+                    entry: CatalogEntry | None = _parse_entry(item, skill_md)
+                except Exception as e:
+                    logger.warning("Failed to read skill %s: %s", item, e)
+                    entry = None
+                self._entries[path] = (stamp, entry)
+            paths.append(path)
+
+        listing = tuple(paths)
+        previous = self._listings.get(str(skills_dir), ())
+        for stale in set(previous) - set(listing):
+            self._entries.pop(stale, None)
+        self._listings[str(skills_dir)] = listing
+        return listing
+
+    def refresh(self) -> None:
+        """Revalidate every known skills directory (watcher tick)."""
+        with self._lock:
+            dirs = list(self._listings)
+        for d in dirs:
+            with self._lock:
+                if d in self._listings:
+                    self._scan(Path(d))
+
+    def invalidate(self, path: Path | str | None = None) -> None:
+        """Drop cached listings so the next lookup rescans.
+
+        Args:
+            path: A skills directory, a skill inside one, or a parent of
+                several (e.g. the skills base dir). None drops everything.
+        """
+        with self._lock:
+            self._bins_found.clear()
+            if path is None:
+                self._listings.clear()
+                self._entries.clear()
+                return
+            target = Path(path)
+            for d in list(self._listings):
+                dp = Path(d)
+                if dp == target or dp in target.parents or target in dp.parents:
+                    for p in self._listings.pop(d):
+                        self._entries.pop(p, None)
+
+    def bin_available(self, name: str, skill_dir: Path) -> bool:
+        """True if ``name`` is in the skill's venv or on PATH.
+
+        Only positive PATH lookups are cached, so a binary installed after a
+        miss is picked up on the next check.
+        """
+        if (skill_dir / ".venv" / "bin" / name).exists():
+            return True
+        cache_key = f"{name}\0{os.environ.get('PATH', '')}"
+        if cache_key in self._bins_found:
+            return True
+        if shutil.which(name) is None:
+            return False
+        self._bins_found.add(cache_key)
+        return True
+
+    def start_watcher(self, interval_seconds: float = 2.0) -> bool:
+        """Start the background rescan thread.
+
+        Returns:
+            True if a watcher is running after the call.
+        """
+        if interval_seconds <= 0:
+            return False
+        if self.watching:
+            return True
+        self._stop.clear()
+
+        def _run() -> None:
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.warning("Skill catalog refresh failed", exc_info=True)
+
+        self._watcher = threading.Thread(target=_run, name="skill-catalog-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Skill catalog watcher started (every %.1fs)", interval_seconds)
+        return True
+
+    def stop_watcher(self) -> None:
+        """Stop the background rescan thread, if running."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+_catalog = SkillCatalog()
+
+
+def get_skill_catalog() -> SkillCatalog:
+    """Return the process-wide skill catalog."""
+    return _catalog
+
+
+def invalidate_skill_catalog(path: Path | str | None = None) -> None:
+    """Invalidate the process-wide catalog (see :meth:`SkillCatalog.invalidate`)."""
+    _catalog.invalidate(path)
@@ -11,24 +11,18 @@ from typing import Any
 
 from app.config import _find_repo_root, refresh_runtime_env_from_secrets, resolve_user_skills_dir
 from app.models.agent import MissingSkillRequirements, RequirementSpec, SkillInfo, WhenClause
-from app.services.agent.frontmatter import (
-    extract_required_bins,
-    extract_required_config,
-    extract_required_env,
-    parse_skill_frontmatter,
+from app.services.agent.skill_catalog import (
+    RESERVED_SKILL_DIR_NAMES,
+    CatalogEntry,
+    SkillCatalog,
+    get_skill_catalog,
 )
+from app.services.skill_fingerprint import changed_children, fingerprint_tree
 
 logger = logging.getLogger(__name__)
 
-
-# Directories inside skills/ that are not actual skills
-RESERVED_SKILL_DIR_NAMES: set[str] = {
-    "pending",
-    "failed",
-    ".venvs",
-    ".venv",
-    "__pycache__",
-}
+# Bytecode caches change whenever a skill runs; they are not worth a resync.
+_SYNC_FINGERPRINT_IGNORE = frozenset({"__pycache__"})
 
 
 @dataclass(slots=True)
@@ -37,10 +31,15 @@ class SharedSkillsSynchronizer:
 
     shared_dir: Path
 
-    def sync(self, *, user_dir: Path) -> None:
+    def sync(self, *, user_dir: Path) -> bool:
+        """Mirror shared skills into ``user_dir``.
+
+        Returns:
+            True if any skill was added, updated or removed.
+        """
         if not self.shared_dir.exists():
             logger.debug("Shared skills dir does not exist: %s", self.shared_dir)
-            return
+            return False
 
         manifest_path = user_dir / ".shared_skills_sync.json"
 
@@ -61,44 +60,15 @@ class SharedSkillsSynchronizer:
                 logger.debug("Failed to write shared skills manifest: %s", e)
 
         def fingerprint_path(p: Path) -> dict[str, Any]:
-            """Compute a best-effort fingerprint for p.
+            """Compute a content fingerprint for p (Merkle root + top-level digests).
 
-            For directories, we hash only metadata (mtime_ns + size) of contained
-            files, not file contents.
+            File digests are cached by (inode, mtime_ns, size), so unchanged
+            skills cost one stat per file.
             """
-
             try:
-                if p.is_file():
-                    st = p.stat()
-                    return {
-                        "kind": "file",
-                        "mtime_ns": st.st_mtime_ns,
-                        "size": st.st_size,
-                    }
-                if p.is_dir():
-                    max_mtime_ns = 0
-                    total_size = 0
-                    file_count = 0
-                    for root, _dirs, files in os.walk(p):
-                        for fn in files:
-                            fp = Path(root) / fn
-                            try:
-                                st = fp.stat()
-                            except OSError:
-                                continue
-                            file_count += 1
-                            total_size += int(st.st_size)
-                            max_mtime_ns = max(max_mtime_ns, int(st.st_mtime_ns))
-                    return {
-                        "kind": "dir",
-                        "max_mtime_ns": max_mtime_ns,
-                        "total_size": total_size,
-                        "file_count": file_count,
-                    }
+                return fingerprint_tree(p, ignore=_SYNC_FINGERPRINT_IGNORE).summary()
             except Exception:
-                pass
-
-            return {"kind": "unknown"}
+                return {"kind": "unknown"}
 
         manifest = load_manifest()
         synced: dict[str, Any] = dict(manifest.get("synced", {}))
@@ -144,6 +114,10 @@ class SharedSkillsSynchronizer:
             # Skip if unchanged and destination exists.
             if prev_fp == fp and dest.exists():
                 continue
+            if isinstance(prev_fp, dict) and prev_fp.get("kind") == "tree":
+                logger.debug(
+                    "Shared skill %s changed: %s", name, ", ".join(changed_children(prev_fp, fp))
+                )
 
             # Overwrite destination.
             if dest.exists():
@@ -162,7 +136,9 @@ class SharedSkillsSynchronizer:
 
             try:
                 if src.is_dir():
-                    shutil.copytree(src, dest)
+                    # Keep .venv links into the shared venv store as links
+                    # rather than copying whole environments per user.
+                    shutil.copytree(src, dest, symlinks=True)
                 else:
                     shutil.copy2(src, dest)
                 synced[name] = {
@@ -182,6 +158,7 @@ class SharedSkillsSynchronizer:
             logger.info("Removed stale shared skills for user: %s", ", ".join(removed))
         if updated:
             logger.info("Synced/updated shared skills for user: %s", ", ".join(updated))
+        return bool(removed or updated)
 
 
 @dataclass(slots=True)
@@ -189,6 +166,7 @@ class SkillRepository:
     """Discover skills and evaluate setup requirements."""
 
     config: Any
+    catalog: SkillCatalog = field(default_factory=get_skill_catalog, repr=False)
     _shared_sync: SharedSkillsSynchronizer = field(init=False, repr=False)
 
     def __post_init__(self) -> None:
@@ -196,45 +174,24 @@ class SkillRepository:
 
     def get_user_skills_dir(self, user_id: str, *, create: bool = True) -> Path:
         user_dir = resolve_user_skills_dir(self.config, user_id, create=create)
-        self._shared_sync.sync(user_dir=user_dir)
+        self.sync_shared_skills(user_dir)
         return user_dir
 
     def sync_shared_skills_for_user(self, user_id: str) -> Path:
         return self.get_user_skills_dir(user_id, create=True)
 
     def sync_shared_skills(self, user_dir: Path) -> None:
-        self._shared_sync.sync(user_dir=user_dir)
-
-    def discover(self, user_id: str) -> list[SkillInfo]:
-        skills_by_name: dict[str, SkillInfo] = {}
+        if self._shared_sync.sync(user_dir=user_dir):
+            self.catalog.invalidate(user_dir)
 
+    def _catalog_entries(self, user_id: str) -> list[CatalogEntry]:
+        """Catalog entries for the user's skills, de-duplicated by skill name."""
         user_skills_dir = self.get_user_skills_dir(user_id, create=True)
-        if not user_skills_dir.exists():
-            return []
-
-        for item in user_skills_dir.iterdir():
-            if not item.is_dir() or item.name.startswith("__"):
-                continue
-            if item.name in RESERVED_SKILL_DIR_NAMES:
-                continue
-
-            skill_md = item / "SKILL.md"
-            if not skill_md.exists():
-                continue
-
-            try:
-                content = skill_md.read_text(encoding="utf-8")
-                frontmatter = parse_skill_frontmatter(content)
-                skill_name = str(frontmatter.get("name") or item.name)
-                skills_by_name[skill_name] = SkillInfo(
-                    name=skill_name,
-                    description=str(frontmatter.get("description") or ""),
-                    path=str(item.resolve()),
-                )
-            except Exception as e:
-                logger.warning("Failed to read skill %s: %s", item, e)
+        by_name = {e.info.name: e for e in self.catalog.entries(user_skills_dir)}
+        return list(by_name.values())
 
-        return list(skills_by_name.values())
+    def discover(self, user_id: str) -> list[SkillInfo]:
+        return [entry.info for entry in self._catalog_entries(user_id)]
 
     def load_merged_skill_secrets(self, user_id: str) -> dict[str, Any]:
         """Load skill secrets for a user from the database cache.
@@ -294,77 +251,42 @@ class SkillRepository:
 
             return True
 
-        def check_bin_exists(bin_name: str, skill_dir: Path) -> bool:
-            """Check if a binary exists in PATH or skill venv."""
-            # Check skill venv first
-            venv_bin = skill_dir / ".venv" / "bin" / bin_name
-            if venv_bin.exists():
-                return True
-            # Fallback to PATH
-            return shutil.which(bin_name) is not None
-
-        def get_rendered_config_files(skill_name: str, skill_dir: Path, output_dir: Path) -> list[Path]:
+        def get_rendered_config_files(
+            skill_name: str, templates: tuple[str, ...], output_dir: Path
+        ) -> list[Path]:
             """Get list of config files that should be rendered from *_example templates.
 
             Returns the destination paths where rendered config files should exist
             (in workspace/<user>/tmp/).
             """
             config_files: list[Path] = []
-
-            # Look for *_example and *.example templates in the skill directory
-            try:
-                for tpl in skill_dir.rglob("*_example"):
-                    if tpl.is_file():
-                        # Determine the destination name
-                        if tpl.name.endswith("_example"):
-                            dest_name = tpl.name[: -len("_example")]
-                        else:
-                            continue
-                        # Apply naming convention (skill prefix if not already present)
-                        if dest_name.startswith(f"{skill_name}.") or dest_name == skill_name:
-                            out_name = dest_name
-                        else:
-                            out_name = f"{skill_name}__{dest_name}"
-                        config_files.append(output_dir / out_name)
-
-                for tpl in skill_dir.rglob("*.example"):
-                    if tpl.is_file():
-                        if tpl.name.endswith(".example"):
-                            dest_name = tpl.name[: -len(".example")]
-                        else:
-                            continue
-                        if dest_name.startswith(f"{skill_name}.") or dest_name == skill_name:
-                            out_name = dest_name
-                        else:
-                            out_name = f"{skill_name}__{dest_name}"
-                        config_files.append(output_dir / out_name)
-            except Exception:
-                pass
-
+            for tpl_name in templates:
+                for suffix in ("_example", ".example"):
+                    if tpl_name.endswith(suffix):
+                        dest_name = tpl_name[: -len(suffix)]
+                        break
+                else:
+                    continue
+                # Apply naming convention (skill prefix if not already present)
+                if dest_name.startswith(f"{skill_name}.") or dest_name == skill_name:
+                    out_name = dest_name
+                else:
+                    out_name = f"{skill_name}__{dest_name}"
+                config_files.append(output_dir / out_name)
             return config_files
 
         missing_by_skill: dict[str, MissingSkillRequirements] = {}
 
-        for info in self.discover(user_id):
-            skill_name = (info.name or "").strip()
-            skill_path = (info.path or "").strip()
+        for entry in self._catalog_entries(user_id):
+            skill_name = (entry.info.name or "").strip()
+            skill_path = (entry.info.path or "").strip()
             if not skill_name or not skill_path:
                 continue
 
-            skill_md = Path(skill_path) / "SKILL.md"
-            if not skill_md.exists():
-                continue
-
-            try:
-                content = skill_md.read_text(encoding="utf-8")
-            except Exception:
-                continue
-
-            frontmatter = parse_skill_frontmatter(content)
-            env_reqs = extract_required_env(frontmatter)
-            cfg_reqs = extract_required_config(frontmatter)
-            bins_reqs = extract_required_bins(frontmatter)
-            if not env_reqs and not cfg_reqs and not bins_reqs:
+            env_reqs = list(entry.env)
+            cfg_reqs = list(entry.config)
+            bins_reqs = list(entry.bins)
+            if not entry.has_requirements:
                 continue
 
             # Per-skill config block from merged secrets.
@@ -417,7 +339,7 @@ class SkillRepository:
                     n = (r.name or "").strip()
                     if not n:
                         continue
-                    if not check_bin_exists(n, skill_dir_obj):
+                    if not self.catalog.bin_available(n, skill_dir_obj):
                         missing_bins.append(r)
 
             missing_config_files: list[RequirementSpec] = []
@@ -427,8 +349,7 @@ class SkillRepository:
                 if not work_base.is_absolute():
                     work_base = _find_repo_root(start=Path(__file__)) / work_base
                 workspace_tmp = (work_base / str(user_id) / "tmp").resolve()
-                skill_dir_obj = Path(skill_path)
-                expected_configs = get_rendered_config_files(skill_name, skill_dir_obj, workspace_tmp)
+                expected_configs = get_rendered_config_files(skill_name, entry.templates, workspace_tmp)
                 for config_path in expected_configs:
                     if not config_path.exists() or not config_path.is_file():
                         missing_config_files.append(
@@ -3,6 +3,12 @@
 from collections.abc import MutableMapping
 from typing import cast
 
+from app.services.user_state_registry import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_ENTRIES,
+    BoundedUserRegistry,
+)
+
 
 class AgentNameRegistry(MutableMapping[str, str | None]):
     """Manages cached agent names for users.
@@ -11,11 +17,21 @@ class AgentNameRegistry(MutableMapping[str, str | None]):
     in-memory for performance during active sessions.
 
     Implements MutableMapping for compatibility with existing code
-    that expects dict-like behavior.
+    that expects dict-like behavior. Names of idle users are evicted and
+    reloaded from memory on their next session.
     """
 
-    def __init__(self) -> None:
-        self._names: dict[str, str | None] = {}
+    def __init__(
+        self,
+        *,
+        idle_ttl_seconds: float | None = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self._names: BoundedUserRegistry[str | None] = BoundedUserRegistry(
+            "agent_names",
+            idle_ttl_seconds=idle_ttl_seconds,
+            max_entries=max_entries,
+        )
 
     # MutableMapping abstract methods
     def __getitem__(self, key: str) -> str | None:
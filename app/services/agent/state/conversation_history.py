@@ -1,6 +1,11 @@
 """Conversation history tracker for memory extraction."""
 
 from app.models.agent import ConversationMessage
+from app.services.user_state_registry import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_ENTRIES,
+    BoundedUserRegistry,
+)
 
 
 class ConversationHistory:
@@ -8,10 +13,44 @@ class ConversationHistory:
 
     Tracks messages exchanged during a session for later extraction
     into long-term memory when the session ends or message limit is reached.
+
+    When spilling is enabled (the messages are also persisted to the
+    conversation database), memory is bounded: only the most recent
+    ``max_messages_per_user`` messages are kept per user and idle users are
+    evicted entirely. :meth:`is_spilled` tells extraction to reload the full
+    session from the database instead.
     """
 
-    def __init__(self) -> None:
-        self._history: dict[str, list[ConversationMessage]] = {}
+    def __init__(
+        self,
+        *,
+        max_messages_per_user: int | None = None,
+        spill_enabled: bool = False,
+        idle_ttl_seconds: float | None = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Initialize the history.
+
+        Args:
+            max_messages_per_user: In-memory cap per user when spilling.
+            spill_enabled: Whether messages may be dropped from memory because
+                they can be reloaded from the conversation database.
+            idle_ttl_seconds: Idle time after which a user's history is spilled.
+            max_entries: Maximum users held in memory.
+        """
+        self.max_messages_per_user = max_messages_per_user
+        self.spill_enabled = spill_enabled
+        self._history: BoundedUserRegistry[list[ConversationMessage]] = BoundedUserRegistry(
+            "conversation_history",
+            idle_ttl_seconds=idle_ttl_seconds,
+            max_entries=max_entries,
+            sizeof=_history_bytes,
+            can_evict=lambda _user_id, messages: self.spill_enabled or not messages,
+            on_evict=self._on_evict,
+        )
+        # Not bounded: forgetting a user here would make extraction use the
+        # in-memory tail instead of the full session. One id per spilled user.
+        self._spilled: set[str] = set()
 
     def add_message(self, user_id: str, role: str, content: str) -> None:
         """Add a message to the conversation history.
@@ -21,11 +60,28 @@ class ConversationHistory:
             role: Message role ('user' or 'assistant').
             content: Message content.
         """
-        if user_id not in self._history:
-            self._history[user_id] = []
-        self._history[user_id].append(
-            ConversationMessage(role=role, content=content)
-        )
+        messages = self._history.get(user_id)
+        if messages is None:
+            messages = []
+            self._history[user_id] = messages
+        messages.append(ConversationMessage(role=role, content=content))
+
+        limit = self.max_messages_per_user
+        if self.spill_enabled and limit and len(messages) > limit:
+            del messages[: len(messages) - limit]
+            self._spilled.add(user_id)
+
+    def is_spilled(self, user_id: str) -> bool:
+        """Return True if part of the session is only in the database.
+
+        Args:
+            user_id: User's telegram ID.
+        """
+        return user_id in self._spilled
+
+    def _on_evict(self, user_id: str, messages: list[ConversationMessage]) -> None:
+        if messages:
+            self._spilled.add(user_id)
 
     def get(self, user_id: str) -> list[ConversationMessage]:
         """Get conversation history for a user.
@@ -49,6 +105,7 @@ class ConversationHistory:
             with unit tests that assert the cleared state is [] (not missing/None).
         """
         self._history[user_id] = []
+        self._spilled.discard(user_id)
 
     def remove(self, user_id: str) -> None:
         """Remove conversation history for a user.
@@ -57,10 +114,12 @@ class ConversationHistory:
             user_id: User's telegram ID.
         """
         self._history.pop(user_id, None)
+        self._spilled.discard(user_id)
 
     def clear_all(self) -> None:
         """Clear all history (useful for testing)."""
         self._history.clear()
+        self._spilled.clear()
 
     def to_dict_list(self, user_id: str) -> list[dict]:
         """Convert history to list of dicts for backward compatibility.
@@ -73,3 +132,7 @@ class ConversationHistory:
         """
         messages = self.get(user_id)
         return [msg.model_dump() for msg in messages]
+
+
+def _history_bytes(messages: list[ConversationMessage]) -> int:
+    return sum(len(m.content) for m in messages)
@@ -2,6 +2,12 @@
 
 from collections.abc import MutableMapping
 
+from app.services.user_state_registry import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_ENTRIES,
+    BoundedUserRegistry,
+)
+
 
 class StmCache(MutableMapping[str, str]):
     """Manages cached short-term memory content.
@@ -11,11 +17,22 @@ class StmCache(MutableMapping[str, str]):
     next session's prompt injection.
 
     Implements MutableMapping for compatibility with existing code
-    that expects dict-like behavior.
+    that expects dict-like behavior. Entries of idle users are evicted
+    (the scratchpad file remains the source of truth).
     """
 
-    def __init__(self) -> None:
-        self._cache: dict[str, str] = {}
+    def __init__(
+        self,
+        *,
+        idle_ttl_seconds: float | None = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self._cache: BoundedUserRegistry[str] = BoundedUserRegistry(
+            "stm_cache",
+            idle_ttl_seconds=idle_ttl_seconds,
+            max_entries=max_entries,
+            sizeof=len,
+        )
 
     # MutableMapping abstract methods
     def __getitem__(self, key: str) -> str:
@@ -0,0 +1,150 @@
+"""Uniform latency/outcome instrumentation for every agent tool call.
+
+:class:`ToolInstrumentationHook` is registered on each agent in
+``AgentCreator.create_agent``. Strands fires its before/after tool-call
+events for built-in tools, tools loaded from the skills directory and MCP
+tools alike, so every call is measured the same way without wrapping each
+tool function.
+
+A call is attributed to a skill when any string in the tool input (a shell
+``command``, a file ``path``, ...) points inside one of the skills roots:
+``<root>/<skill>/...``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from strands.hooks import AfterToolCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry
+
+from app.observability.tool_stats import (
+    OUTCOME_ERROR,
+    OUTCOME_OK,
+    OUTCOME_TIMEOUT,
+    record_tool_call,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tools report timeouts in their result text (e.g. shell's "Command timed out after 300s").
+_TIMEOUT_RE = re.compile(r"\btimed out\b", re.IGNORECASE)
+
+
+def _iter_strings(value: Any, *, depth: int = 0) -> Iterable[str]:
+    if depth > 4:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _iter_strings(v, depth=depth + 1)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _iter_strings(v, depth=depth + 1)
+
+
+def _payload_bytes(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="replace"))
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def _result_text(result: Any) -> str:
+    content = result.get("content") if isinstance(result, dict) else None
+    parts = []
+    for block in content or []:
+        if isinstance(block, dict) and isinstance(block.get("text"), str):
+            parts.append(block["text"])
+    return "".join(parts)
+
+
+class ToolInstrumentationHook(HookProvider):
+    """Record wall time, bytes in/out and outcome for every tool call.
+
+    Args:
+        skills_roots: Directories whose immediate children are skills (the
+            user's skills dir and the shared skills dir).
+    """
+
+    def __init__(self, skills_roots: Iterable[str | Path] = ()) -> None:
+        roots = []
+        for root in skills_roots:
+            text = str(root).rstrip("/")
+            if text:
+                roots.append(re.escape(text))
+        self._skill_re = (
+            re.compile(rf"(?:{'|'.join(roots)})/([A-Za-z0-9][\w.-]*)/") if roots else None
+        )
+        self._lock = threading.Lock()
+        self._started: dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolCallEvent, self._before)
+        registry.add_callback(AfterToolCallEvent, self._after)
+
+    def skill_for_input(self, tool_input: Any) -> str:
+        """Return the skill a tool input refers to, or ``""``."""
+        if self._skill_re is None:
+            return ""
+        for text in _iter_strings(tool_input):
+            match = self._skill_re.search(text)
+            if match:
+                return match.group(1)
+        return ""
+
+    def _before(self, event: BeforeToolCallEvent) -> None:
+        tool_use_id = str(event.tool_use.get("toolUseId") or "")
+        with self._lock:
+            self._started[tool_use_id] = time.perf_counter()
+
+    def _after(self, event: AfterToolCallEvent) -> None:
+        try:
+            tool_use = event.tool_use
+            tool_use_id = str(tool_use.get("toolUseId") or "")
+            with self._lock:
+                started = self._started.pop(tool_use_id, None)
+            if started is None:
+                return
+            seconds = time.perf_counter() - started
+
+            tool = str(tool_use.get("name") or "unknown")
+            tool_input = tool_use.get("input")
+            result = event.result
+            text = _result_text(result)
+
+            outcome = OUTCOME_OK
+            if getattr(event, "exception", None) is not None or (
+                isinstance(result, dict) and result.get("status") == "error"
+            ):
+                outcome = OUTCOME_ERROR
+            if outcome == OUTCOME_ERROR and _TIMEOUT_RE.search(text):
+                outcome = OUTCOME_TIMEOUT
+
+            skill = self.skill_for_input(tool_input)
+            bytes_in = _payload_bytes(tool_input)
+            bytes_out = _payload_bytes(text) if text else _payload_bytes(
+                result.get("content") if isinstance(result, dict) else None
+            )
+
+            record_tool_call(
+                tool,
+                seconds=seconds,
+                skill=skill,
+                outcome=outcome,
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+            )
+        except Exception:
+            logger.debug("Tool instrumentation failed", exc_info=True)
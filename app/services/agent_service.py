@@ -56,6 +56,7 @@ from app.services.agent.state import (
 )
 from app.services.agent.test_skill_runner import DeterministicEchoSkillRunner
 from app.services.personality_service import PersonalityService
+from app.services.user_state_registry import BoundedUserRegistry, registry_limits
 
 if TYPE_CHECKING:
     from strands import Agent
@@ -151,15 +152,28 @@ class AgentService:
 
         # State managers for type-safe internal state
         self._session_manager = SessionManager()
-        self._agent_name_registry = AgentNameRegistry()
-        self._conversation_history_state = ConversationHistoryState()
+        # Per-user state is bounded: idle users are evicted after a TTL.
+        limits = registry_limits(config)
+        history_cap = getattr(config, "conversation_history_max_messages", None)
+        self._agent_name_registry = AgentNameRegistry(**limits)
+        self._conversation_history_state = ConversationHistoryState(
+            max_messages_per_user=history_cap if isinstance(history_cap, int) else None,
+            # Main-thread messages are persisted by the conversation DAO, so
+            # memory can be trimmed and reloaded from the database.
+            spill_enabled=conversation_dao is not None,
+            **limits,
+        )
         self._message_counter = MessageCounter()
         self._extraction_lock = ExtractionLockRegistry()
-        self._obsidian_stm_cache = StmCache()
+        self._obsidian_stm_cache = StmCache(**limits)
 
         # Cached agent instances and conversation managers (third-party types)
-        self._user_agents: dict[str, Agent] = {}
-        self._user_conversation_managers: dict[str, SlidingWindowConversationManager] = {}
+        self._user_agents: BoundedUserRegistry[Agent] = BoundedUserRegistry(
+            "user_agents", **limits
+        )
+        self._user_conversation_managers: BoundedUserRegistry[
+            SlidingWindowConversationManager
+        ] = BoundedUserRegistry("conversation_managers", **limits)
 
         # External personality/identity loader (workspace-based scratchpad)
         self.personality_service = PersonalityService(
@@ -247,6 +261,7 @@ class AgentService:
             trigger_extraction_and_clear=self._session_lifecycle.trigger_extraction_and_clear,
             conversation_dao=self.conversation_dao,
             deterministic_skill_runner=self._deterministic_skill_runner,
+            preload_skill_secrets=self._agent_creator.preload_skill_secrets,
         )
         self._message_processor._set_session_id = self._session_manager.set
 
@@ -0,0 +1,222 @@
+"""Content-addressed store for downloaded Telegram attachments.
+
+Attachments are stored once under ``workspace/.attachments/blobs/`` keyed by
+their sha256 digest and each user gets a private copy in their temp directory
+(a reflink where the filesystem supports it, so the copy shares extents but
+not the inode). A small ``file_unique_id -> blob`` index lets repeated
+downloads of the same Telegram file (forwarded media, re-sent documents) skip
+the network entirely.
+
+Layout::
+
+    workspace/.attachments/     # mode 0700
+        blobs/<aa>/<sha256>     # content, read-only, never handed out directly
+        ids/<file_unique_id>    # "<sha256> <size> <mtime_ns>"
+        staging/                # in-flight downloads (same filesystem)
+
+A blob's mtime is refreshed whenever it is copied out; blobs that have not
+been used for the GC grace period are deleted.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import stat
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_STORE_DIRNAME = ".attachments"
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+_SAFE_ID_RE = re.compile(r"[^A-Za-z0-9_\-]")
+# linux/fs.h FICLONE: make dest share src's extents copy-on-write.
+_FICLONE = 0x40049409
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+
+class AttachmentStore:
+    """Content-addressed attachment store handing out per-user copies.
+
+    All operations are synchronous and best-effort; callers on the event loop
+    should run them via ``asyncio.to_thread``.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        """Initialize the store.
+
+        Args:
+            root: Store root. Living on the same filesystem as the user
+                directories lets copies be reflinked instead of duplicated.
+        """
+        self.root = Path(root)
+        self._blobs = self.root / "blobs"
+        self._ids = self.root / "ids"
+        self._staging = self.root / "staging"
+        for d in (self.root, self._blobs, self._ids, self._staging):
+            d.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.root.chmod(0o700)
+
+    def staging_path(self) -> Path:
+        """Return a fresh path for an in-flight download."""
+        return self._staging / uuid.uuid4().hex
+
+    def link_known(self, file_unique_id: str, dest: Path) -> str | None:
+        """Copy a previously stored file to ``dest`` if it is known.
+
+        The blob is verified against the size/mtime recorded at ingest time;
+        a blob that was modified in place is dropped from the store rather
+        than handed to another user.
+
+        Args:
+            file_unique_id: Telegram ``file_unique_id``.
+            dest: Destination path in the user's directory.
+
+        Returns:
+            The blob digest on a hit, None on a miss.
+        """
+        record = self._read_record(file_unique_id)
+        if record is None:
+            return None
+
+        digest, size, mtime_ns = record
+        blob = self._blob_path(digest)
+        try:
+            st = blob.stat()
+        except FileNotFoundError:
+            self._drop_record(file_unique_id)
+            return None
+
+        if st.st_size != size or st.st_mtime_ns != mtime_ns:
+            logger.warning("Attachment blob %s changed since ingest; evicting", digest[:12])
+            blob.unlink(missing_ok=True)
+            self._drop_record(file_unique_id)
+            return None
+
+        self._copy(blob, dest)
+        # Refresh the blob's age so a popular blob is not collected, and
+        # re-record the stat we just produced.
+        os.utime(blob)
+        self._write_record(file_unique_id, digest, blob)
+        return digest
+
+    def ingest(self, staged: Path, dest: Path, *, file_unique_id: str | None = None) -> str:
+        """Move a freshly downloaded file into the store and copy it to ``dest``.
+
+        Args:
+            staged: Path returned by :meth:`staging_path` after download.
+            dest: Destination path in the user's directory.
+            file_unique_id: Optional Telegram ``file_unique_id`` to index.
+
+        Returns:
+            The sha256 hex digest of the content.
+        """
+        digest = sha256_file(staged)
+        blob = self._blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Always replace: a blob that was tampered with can never leak into
+        # this or later downloads.
+        os.chmod(staged, stat.S_IRUSR)
+        os.replace(staged, blob)
+        self._copy(blob, dest)
+        if file_unique_id:
+            self._write_record(file_unique_id, digest, blob)
+        return digest
+
+    def gc(self, max_age_seconds: float) -> int:
+        """Delete unused blobs and dangling index entries.
+
+        Users hold their own copies, so a blob is only needed to serve
+        re-forwarded media without a download. It is kept for
+        ``max_age_seconds`` after it was last stored or copied out.
+
+        Args:
+            max_age_seconds: Grace period since a blob was last used.
+
+        Returns:
+            Number of blobs deleted.
+        """
+        now = time.time()
+        deleted = 0
+        for shard in self._blobs.iterdir():
+            if not shard.is_dir():
+                continue
+            for blob in shard.iterdir():
+                try:
+                    if now - blob.stat().st_mtime > max_age_seconds:
+                        blob.unlink()
+                        deleted += 1
+                except Exception:
+                    logger.debug("Failed to gc attachment blob: %s", blob)
+            try:
+                shard.rmdir()
+            except OSError:
+                pass
+
+        for entry in self._ids.iterdir():
+            record = self._read_record(entry.name)
+            if record is None or not self._blob_path(record[0]).exists():
+                entry.unlink(missing_ok=True)
+
+        # Abandoned downloads (crash mid-transfer).
+        for staged in self._staging.iterdir():
+            try:
+                if now - staged.stat().st_mtime > max_age_seconds:
+                    staged.unlink()
+            except Exception:
+                pass
+
+        return deleted
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._blobs / digest[:2] / digest
+
+    def _id_path(self, file_unique_id: str) -> Path:
+        return self._ids / _SAFE_ID_RE.sub("_", file_unique_id)
+
+    def _read_record(self, file_unique_id: str) -> tuple[str, int, int] | None:
+        try:
+            digest, size, mtime_ns = self._id_path(file_unique_id).read_text().split()
+            return digest, int(size), int(mtime_ns)
+        except (OSError, ValueError):
+            return None
+
+    def _write_record(self, file_unique_id: str, digest: str, blob: Path) -> None:
+        st = blob.stat()
+        path = self._id_path(file_unique_id)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp.write_text(f"{digest} {st.st_size} {st.st_mtime_ns}\n")
+        os.replace(tmp, path)
+
+    def _drop_record(self, file_unique_id: str) -> None:
+        self._id_path(file_unique_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def _copy(blob: Path, dest: Path) -> None:
+        # Replace rather than write through whatever is at ``dest``.
+        dest.unlink(missing_ok=True)
+        with blob.open("rb") as src, dest.open("wb") as dst:
+            try:
+                if fcntl is None:
+                    raise OSError("reflink unsupported")
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            except OSError:
+                # Cross-device or filesystem without reflinks: plain copy.
+                shutil.copyfileobj(src, dst, _HASH_CHUNK_BYTES)
+
+
+def sha256_file(path: Path) -> str:
+    """Return the sha256 hex digest of a file, read in 1 MiB chunks."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_HASH_CHUNK_BYTES):
+            h.update(chunk)
+    return h.hexdigest()
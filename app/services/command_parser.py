@@ -4,6 +4,7 @@ Parses user messages into structured commands using StrEnum types.
 Requirements: 10.1, 10.2, 10.3, 10.4, 10.5
 """
 
+import re
 from dataclasses import dataclass, field
 
 from app.enums import CommandType
@@ -28,6 +29,9 @@ class CommandParser:
     Supports the following commands:
     - new: Start a new session (Requirement 10.1)
     - logs: Display recent activity logs (Requirement 10.2)
+    - toolstats: Show the slowest tools/skills (admins only)
+    - profile [seconds|next|last]: Sampling profiler (admins only)
+    - usage [days]: Model token usage per day, stage and model
     - install skill <url>: Install a skill from URL (Requirement 10.3)
     - uninstall skill <name>: Uninstall a skill (Requirement 10.4)
     - help: Show available commands (Requirement 10.5)
@@ -39,6 +43,9 @@ class CommandParser:
 - new: Start a new conversation session
 - cancel: Cancel the current running request (best-effort)
 - logs: View recent agent activity logs
+- toolstats: Show the slowest tools/skills (latency percentiles, errors, timeouts; admins only)
+- profile [seconds|next|last]: Profile the process, or your next message (admins only)
+- usage [days]: Show your model token usage per day, stage and model
 - install skill <url>: Install a skill from the provided URL
 - uninstall skill <name>: Uninstall the specified skill
 - forget <query>: Preview (dry-run) which long-term memories would be deleted
@@ -94,6 +101,16 @@ Any other input will be processed as a regular message to the agent."""
         if lower_message == "logs":
             return ParsedCommand(CommandType.LOGS)
 
+        if lower_message in ("toolstats", "tool stats"):
+            return ParsedCommand(CommandType.TOOL_STATS)
+
+        # Only the exact admin forms; "profile my code" stays a normal message.
+        if re.fullmatch(r"profile(?:\s+(?:next|last|\d+(?:\.\d+)?))?", lower_message):
+            return ParsedCommand(CommandType.PROFILE, lower_message.split()[1:])
+
+        if re.fullmatch(r"usage(?:\s+\d{1,2})?", lower_message):
+            return ParsedCommand(CommandType.USAGE, lower_message.split()[1:])
+
         # Check for "help" command (Requirement 10.5)
         if lower_message == "help":
             return ParsedCommand(CommandType.HELP)
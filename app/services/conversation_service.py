@@ -22,6 +22,11 @@ from typing import TYPE_CHECKING, Any
 
 from app.enums import ConversationStatus
 from app.models.domain import ParameterAnalysis
+from app.services.usage_ledger import (
+    STAGE_CONVERSATION_MANAGER,
+    STAGE_CONVERSATION_TURN,
+    usage_stage,
+)
 
 if TYPE_CHECKING:
     from app.dao.conversation_dao import ConversationDAO
@@ -393,10 +398,11 @@ class ConversationService:
                 agent_instructions=agent_instructions,
                 agent_names=agent_names,
             )
-            raw_response = await self._agent_service.process_message(
-                user_id="__conversation_manager__",
-                message=prompt,
-            )
+            with usage_stage(STAGE_CONVERSATION_MANAGER):
+                raw_response = await self._agent_service.process_message(
+                    user_id="__conversation_manager__",
+                    message=prompt,
+                )
             state.parameter_analysis = self._manager_agent.parse_parameter_analysis(raw_response)
 
             if state.parameter_analysis:
@@ -701,10 +707,11 @@ class ConversationService:
         context_prompt = await self._build_agent_context(conversation_id, participant)
 
         try:
-            response = await self._agent_service.process_message(
-                user_id=user_id,
-                message=context_prompt,
-            )
+            with usage_stage(STAGE_CONVERSATION_TURN):
+                response = await self._agent_service.process_message(
+                    user_id=user_id,
+                    message=context_prompt,
+                )
         except Exception:
             logger.exception(
                 "Conversation %s: agent for %s failed to respond",
@@ -755,10 +762,11 @@ class ConversationService:
                             conversation_id, participant,
                         )
                         try:
-                            followup = await self._agent_service.process_message(
-                                user_id=user_id,
-                                message=context_prompt,
-                            )
+                            with usage_stage(STAGE_CONVERSATION_TURN):
+                                followup = await self._agent_service.process_message(
+                                    user_id=user_id,
+                                    message=context_prompt,
+                                )
                             await self._conversation_dao.add_conversation_message(
                                 conversation_id=conversation_id,
                                 participant_user_id=user_id,
@@ -932,10 +940,11 @@ class ConversationService:
         )
 
         try:
-            raw_response = await self._agent_service.process_message(
-                user_id="__conversation_manager__",
-                message=prompt,
-            )
+            with usage_stage(STAGE_CONVERSATION_MANAGER):
+                raw_response = await self._agent_service.process_message(
+                    user_id="__conversation_manager__",
+                    message=prompt,
+                )
             updated = self._manager_agent.parse_parameter_analysis(raw_response)
             if updated:
                 state.parameter_analysis = updated
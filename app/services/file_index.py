@@ -0,0 +1,231 @@
+"""Persistent per-user file expiry index for workspace cleanup.
+
+Hourly cleanup used to ``os.walk`` every user's workspace and stat every file.
+This index lets cleanup touch only users that changed and only entries that
+expired.
+
+State lives under ``workspace/.file_index/`` so every process (and every
+``FileService`` instance) sees the same signals:
+
+- ``<user>.json``: last known ``{relative path: mtime}`` map, written by cleanup.
+- ``<user>.journal``: appended ``mtime<TAB>path`` lines for files written by
+  known code paths (attachment downloads). Merged without walking the tree.
+- ``<user>.dirty``: touched when an agent run may have written arbitrary files.
+  Forces a rescan of that user's tree on the next pass.
+
+Users without an index, and users not rescanned for
+``FULL_RESCAN_INTERVAL_SECONDS``, are rescanned as well so writes from paths
+that do not report (cron runs, manual edits) are eventually picked up.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FILE_INDEX_DIRNAME = ".file_index"
+
+# Directories under a user's workspace that cleanup never touches.
+PRESERVED_DIRNAMES = frozenset({"scratchpad"})
+
+
+@dataclass
+class UserFileIndex:
+    """Indexed state of one user's workspace tree.
+
+    Attributes:
+        files: Relative path -> mtime for every file outside preserved dirs.
+        scanned_at: When the tree was last walked (epoch seconds).
+    """
+
+    files: dict[str, float] = field(default_factory=dict)
+    scanned_at: float = 0.0
+
+
+class FileExpiryIndex:
+    """On-disk expiry index shared by all FileService instances."""
+
+    # Upper bound on how stale the index may get for users that never report.
+    FULL_RESCAN_INTERVAL_SECONDS = 24 * 3600
+
+    def __init__(self, root: str | Path) -> None:
+        """Initialize the index.
+
+        Args:
+            root: Directory holding the per-user index files.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._cache: dict[str, UserFileIndex] = {}
+
+    # ------------------------------------------------------------------
+    # Writers (cheap, safe to call from any instance or process)
+    # ------------------------------------------------------------------
+
+    def record(self, user_id: str, path: Path, user_dir: Path) -> None:
+        """Record a file written by a known code path.
+
+        Args:
+            user_id: Owner of the file.
+            path: Absolute path of the file.
+            user_dir: The user's workspace root.
+        """
+        try:
+            rel = path.relative_to(user_dir).as_posix()
+            mtime = path.stat().st_mtime
+            with (self.root / f"{user_id}.journal").open("a", encoding="utf-8") as f:
+                f.write(f"{mtime}\t{rel}\n")
+        except Exception:
+            logger.debug("Failed to record %s in file index", path, exc_info=True)
+
+    def mark_dirty(self, user_id: str) -> None:
+        """Force a rescan of ``user_id``'s tree on the next cleanup pass."""
+        _touch_dirty(self.root, user_id)
+
+    def forget(self, user_id: str) -> None:
+        """Drop all indexed state for ``user_id`` (it will be rescanned)."""
+        self._cache.pop(user_id, None)
+        for suffix in (".json", ".journal", ".dirty"):
+            (self.root / f"{user_id}{suffix}").unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Cleanup-side API
+    # ------------------------------------------------------------------
+
+    def refresh(self, user_id: str, user_dir: Path, *, now: float) -> UserFileIndex:
+        """Return an up-to-date index for ``user_id``, walking only if needed.
+
+        Args:
+            user_id: User to refresh.
+            user_dir: The user's workspace root.
+            now: Current epoch time.
+
+        Returns:
+            The refreshed index.
+        """
+        entry = self._cache.get(user_id) or self._load(user_id)
+        dirty = self.root / f"{user_id}.dirty"
+
+        if (
+            entry is None
+            or dirty.exists()
+            or now - entry.scanned_at > self.FULL_RESCAN_INTERVAL_SECONDS
+        ):
+            # Clear the signals before walking so writes racing with the walk
+            # re-mark the user for the next pass instead of being lost.
+            dirty.unlink(missing_ok=True)
+            (self.root / f"{user_id}.journal").unlink(missing_ok=True)
+            entry = UserFileIndex(files=scan_tree(user_dir), scanned_at=now)
+        else:
+            self._merge_journal(user_id, entry)
+
+        self._cache[user_id] = entry
+        return entry
+
+    def save(self, user_id: str) -> None:
+        """Persist the cached index for ``user_id``."""
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return
+        path = self.root / f"{user_id}.json"
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        try:
+            tmp.write_text(
+                json.dumps({"scanned_at": entry.scanned_at, "files": entry.files}),
+                encoding="utf-8",
+            )
+            os.replace(tmp, path)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            logger.debug("Failed to save file index for %s", user_id, exc_info=True)
+
+    def known_users(self) -> set[str]:
+        """Return user ids that have any on-disk index state."""
+        users: set[str] = set()
+        for p in self.root.iterdir():
+            if p.name.startswith("."):
+                continue
+            users.add(p.name.rsplit(".", 1)[0])
+        return users | set(self._cache)
+
+    def _load(self, user_id: str) -> UserFileIndex | None:
+        try:
+            data = json.loads((self.root / f"{user_id}.json").read_text(encoding="utf-8"))
+            return UserFileIndex(
+                files={str(k): float(v) for k, v in data.get("files", {}).items()},
+                scanned_at=float(data.get("scanned_at", 0.0)),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.debug("Ignoring unreadable file index for %s", user_id, exc_info=True)
+            return None
+
+    def _merge_journal(self, user_id: str, entry: UserFileIndex) -> None:
+        journal = self.root / f"{user_id}.journal"
+        # Rename first so appends racing with the merge land in a new journal.
+        consuming = journal.with_name(f".{journal.name}.{uuid.uuid4().hex}")
+        try:
+            os.replace(journal, consuming)
+        except FileNotFoundError:
+            return
+        try:
+            for line in consuming.read_text(encoding="utf-8").splitlines():
+                mtime, _, rel = line.partition("\t")
+                if rel:
+                    entry.files[rel] = max(float(mtime), entry.files.get(rel, 0.0))
+        except Exception:
+            # A corrupt journal means we no longer know what changed: rescan.
+            self.mark_dirty(user_id)
+        finally:
+            consuming.unlink(missing_ok=True)
+
+
+def mark_user_dirty(work_base: str | Path, user_id: str) -> None:
+    """Force a rescan of ``user_id``'s workspace without an index instance.
+
+    Intended for components that only know the workspace root, e.g. the
+    message processor after an agent run that may have written files.
+    """
+    _touch_dirty(Path(work_base) / FILE_INDEX_DIRNAME, user_id)
+
+
+def _touch_dirty(root: Path, user_id: str) -> None:
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        (root / f"{user_id}.dirty").touch()
+    except Exception:
+        logger.debug("Failed to mark %s dirty in file index", user_id, exc_info=True)
+
+
+def scan_tree(user_dir: Path) -> dict[str, float]:
+    """Walk ``user_dir`` and return ``{relative path: mtime}``.
+
+    Preserved directories (the scratchpad) are skipped entirely.
+    """
+    files: dict[str, float] = {}
+    for root, dirs, names in os.walk(user_dir):
+        dirs[:] = [d for d in dirs if d not in PRESERVED_DIRNAMES]
+        for name in names:
+            p = Path(root) / name
+            try:
+                files[p.relative_to(user_dir).as_posix()] = p.stat().st_mtime
+            except Exception:
+                # Best-effort: ignore unreadable or vanished entries
+                pass
+    return files
+
+
+def newest_mtime(entry: UserFileIndex, user_dir: Path) -> float:
+    """Newest mtime in the indexed tree, falling back to the dir mtime when empty."""
+    if entry.files:
+        return max(entry.files.values())
+    try:
+        return user_dir.stat().st_mtime
+    except Exception:
+        return time.time()
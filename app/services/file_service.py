@@ -13,8 +13,11 @@ Requirements:
 - 9.5: Sanitize filenames before storing
 """
 
+import asyncio
 import logging
 import re
+import shutil
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, UTC
 from pathlib import Path
@@ -24,6 +27,14 @@ if TYPE_CHECKING:
     from telegram import Bot
 
 from app.config import AgentConfig
+from app.services.attachment_store import ATTACHMENT_STORE_DIRNAME, AttachmentStore
+from app.services.file_index import (
+    FILE_INDEX_DIRNAME,
+    FileExpiryIndex,
+    newest_mtime,
+    scan_tree,
+)
+from app.services.transcription_service import TRANSCRIPT_CACHE_DIRNAME
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +92,14 @@ class FileService:
     # Image extensions for detection
     IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
 
+    # Wall-clock budget for a single cleanup pass; the rest is deferred.
+    DEFAULT_CLEANUP_TIME_BUDGET_SECONDS = 60
+
+    # Workspace entries that are not user directories.
+    _RESERVED_DIRNAMES = frozenset(
+        {ATTACHMENT_STORE_DIRNAME, FILE_INDEX_DIRNAME, TRANSCRIPT_CACHE_DIRNAME}
+    )
+
     def __init__(self, config: AgentConfig) -> None:
         """Initialize the file service.
 
@@ -91,6 +110,19 @@ class FileService:
         self._work_base = Path(config.working_folder_base_dir)
         self._work_base.mkdir(parents=True, exist_ok=True)
 
+        # Expiry index so cleanup does not walk every user's tree each pass.
+        self.file_index = FileExpiryIndex(self._work_base / FILE_INDEX_DIRNAME)
+        self._cleanup_cursor: str | None = None
+
+        # Content-addressed attachment store shared by all users. It lives
+        # under the workspace root so user copies can be reflinked.
+        self.attachment_store: AttachmentStore | None = None
+        if getattr(config, "attachment_store_enabled", True) is not False:
+            try:
+                self.attachment_store = AttachmentStore(self._work_base / ATTACHMENT_STORE_DIRNAME)
+            except Exception as e:
+                logger.warning("Attachment store unavailable, downloading directly: %s", e)
+
     def validate_file(
         self,
         file_name: str,
@@ -194,15 +226,21 @@ class FileService:
         user_id: str,
         file_name: str,
         mime_type: str | None,
+        file_unique_id: str | None = None,
     ) -> FileMetadata:
         """Download file from Telegram and store locally.
 
+        When the attachment store is enabled, files are stored once by content
+        hash and copied into the user's temp dir. A file whose
+        ``file_unique_id`` was seen before is copied without downloading.
+
         Args:
             bot: Telegram bot instance.
             file_id: Telegram file ID.
             user_id: User ID for directory isolation.
             file_name: Sanitized filename.
             mime_type: MIME type if known.
+            file_unique_id: Telegram's stable file identifier, used for dedup.
 
         Returns:
             FileMetadata with download information.
@@ -214,23 +252,49 @@ class FileService:
         # Get user's temp directory
         user_dir = self.get_user_temp_dir(user_id)
 
-        # Get file from Telegram
-        tg_file = await bot.get_file(file_id)
-
         # Build local path
         local_path = user_dir / file_name
 
-        # Download to local path
-        await tg_file.download_to_drive(local_path)
+        store = self.attachment_store
+        reused = False
+        if not isinstance(file_unique_id, str):
+            file_unique_id = None
+        if store is not None and file_unique_id:
+            try:
+                reused = (
+                    await asyncio.to_thread(store.link_known, file_unique_id, local_path)
+                ) is not None
+            except Exception as e:
+                logger.warning("Attachment store lookup failed for %s: %s", file_unique_id, e)
+
+        if not reused:
+            # Get file from Telegram
+            tg_file = await bot.get_file(file_id)
+
+            if store is not None:
+                staged = store.staging_path()
+                await tg_file.download_to_drive(staged)
+                try:
+                    await asyncio.to_thread(
+                        store.ingest, staged, local_path, file_unique_id=file_unique_id
+                    )
+                except Exception as e:
+                    logger.warning("Attachment store ingest failed for %s: %s", file_id, e)
+                    local_path.unlink(missing_ok=True)
+                    staged.replace(local_path)
+            else:
+                await tg_file.download_to_drive(local_path)
 
         # Get actual file size
         file_size = local_path.stat().st_size
+        self.file_index.record(user_id, local_path, self._work_base / user_id)
 
         # Determine if image
         is_image = self.is_image_file(local_path)
 
         logger.info(
-            "Downloaded file %s for user %s: %s (%d bytes)",
+            "%s file %s for user %s: %s (%d bytes)",
+            "Reused stored" if reused else "Downloaded",
             file_id,
             user_id,
             local_path,
@@ -306,9 +370,8 @@ class FileService:
                 if item.is_file():
                     item.unlink()
                 elif item.is_dir():
-                    import shutil
-
                     shutil.rmtree(item)
+            self.file_index.forget(user_id)
             logger.info("Cleared working folder for user %s", user_id)
 
     def is_image_file(self, file_path: str | Path) -> bool:
@@ -326,6 +389,11 @@ class FileService:
     async def cleanup_old_files(self, max_age_hours: int) -> int:
         """Delete files older than max_age_hours.
 
+        Runs in a worker thread so large workspaces never block the event loop.
+        Only users whose trees changed since the last pass are walked; others
+        are served from the expiry index. A pass stops after the configured
+        time budget and the next pass resumes where it left off.
+
         Args:
             max_age_hours: Maximum age in hours before deletion.
 
@@ -336,118 +404,92 @@ class FileService:
             - 4.6: Clean up temporary files after retention period
             - 10.5: Delete files older than 24 hours from working folders
         """
-        import os
-        import shutil
-        import time
+        budget = getattr(self.config, "file_cleanup_time_budget_seconds", None)
+        if not isinstance(budget, (int, float)) or isinstance(budget, bool):
+            budget = self.DEFAULT_CLEANUP_TIME_BUDGET_SECONDS
+        return await asyncio.to_thread(self._cleanup_old_files_sync, max_age_hours, float(budget))
 
+    def _cleanup_old_files_sync(self, max_age_hours: int, time_budget_seconds: float) -> int:
+        """Blocking implementation of :meth:`cleanup_old_files`."""
         deleted_count = 0
         max_age_seconds = max_age_hours * 3600
         current_time = time.time()
-
-        def _count_files_in_tree(root: Path) -> int:
-            count = 0
-            for _, _, files in os.walk(root):
-                count += len(files)
-            return count
-
-        def _newest_mtime_in_tree(root: Path) -> float:
-            """Return the newest mtime across root + all descendants.
-
-            We use this to treat the user's temp/working directory as a single
-            unit: if it hasn't changed for > max_age_seconds, delete the whole
-            directory (including nested folders).
-            """
-
-            newest_dir_mtime = 0.0
-            newest_file_mtime = 0.0
-            saw_file = False
-
+        deadline = time.monotonic() + time_budget_seconds if time_budget_seconds > 0 else None
+        base = self._work_base
+
+        if not base.exists() or not base.is_dir():
+            return 0
+
+        # Clean any stray files directly under the base dir and collect user dirs.
+        user_dirs: list[Path] = []
+        for item in base.iterdir():
+            if item.is_dir():
+                if item.name not in self._RESERVED_DIRNAMES:
+                    user_dirs.append(item)
+                continue
             try:
-                newest_dir_mtime = root.stat().st_mtime
+                age = current_time - item.stat().st_mtime
+                if age > max_age_seconds:
+                    item.unlink()
+                    deleted_count += 1
             except Exception:
-                newest_dir_mtime = 0.0
-
-            for dirpath, dirnames, filenames in os.walk(root):
-                # Directory mtimes are only used as a fallback when the tree
-                # contains no files at all.
-                try:
-                    newest_dir_mtime = max(newest_dir_mtime, Path(dirpath).stat().st_mtime)
-                except Exception:
-                    pass
-
-                for name in filenames:
-                    saw_file = True
-                    p = Path(dirpath) / name
-                    try:
-                        newest_file_mtime = max(newest_file_mtime, p.stat().st_mtime)
-                    except Exception:
-                        # Best-effort: ignore unreadable entries
-                        pass
-
-                _ = dirnames
-
-            return newest_file_mtime if saw_file else newest_dir_mtime
-
-        def _cleanup_base_dir(base: Path, *, label: str) -> int:
-            nonlocal deleted_count
-
-            if not base.exists() or not base.is_dir():
-                return 0
-
-            # Clean any stray files directly under the base dir.
-            for item in base.iterdir():
-                if not item.is_file():
-                    continue
-                try:
-                    age = current_time - item.stat().st_mtime
-                    if age > max_age_seconds:
-                        item.unlink()
-                        deleted_count += 1
-                except Exception:
-                    logger.debug("Failed to delete stale file under %s: %s", label, item)
-
-            # Clean per-user directories:
-            # 1. Skip the scratchpad/ subdirectory (persistent personality/memory data)
-            # 2. Delete whole dir if it hasn't changed for > max_age (faster cleanup)
-            # 3. Otherwise, clean individual old files within the directory
-            for user_dir in base.iterdir():
-                if not user_dir.is_dir():
-                    continue
-
-                # Never delete the entire user dir if it contains a scratchpad
-                has_scratchpad = (user_dir / "scratchpad").is_dir()
+                logger.debug("Failed to delete stale file under workspace: %s", item)
+
+        # Resume after the last user handled by a budget-limited pass.
+        user_dirs.sort(key=lambda d: d.name)
+        if self._cleanup_cursor is not None:
+            user_dirs = [d for d in user_dirs if d.name > self._cleanup_cursor] + [
+                d for d in user_dirs if d.name <= self._cleanup_cursor
+            ]
+        self._cleanup_cursor = None
+
+        remaining = len(user_dirs)
+        for user_dir in user_dirs:
+            # Always make progress on at least one user per pass.
+            if (
+                deadline is not None
+                and remaining < len(user_dirs)
+                and time.monotonic() > deadline
+            ):
+                logger.info(
+                    "Cleanup: time budget of %.0fs exhausted, %d user dirs deferred",
+                    time_budget_seconds,
+                    remaining,
+                )
+                break
+            remaining -= 1
+            self._cleanup_cursor = user_dir.name
+            try:
+                deleted_count += self._cleanup_user_dir(user_dir, current_time, max_age_seconds)
+            except Exception:
+                logger.debug("Failed to cleanup workspace dir: %s", user_dir)
+        else:
+            self._cleanup_cursor = None
+
+        # Drop index state for users whose workspace no longer exists.
+        present = {d.name for d in user_dirs}
+        for user_id in self.file_index.known_users() - present:
+            if not (base / user_id).exists():
+                self.file_index.forget(user_id)
+
+        # Blobs not used within the grace period are dropped from the store.
+        if self.attachment_store is not None:
+            try:
+                blobs_removed = self.attachment_store.gc(max_age_seconds)
+                if blobs_removed:
+                    logger.info("Cleanup: removed %d unreferenced attachment blobs", blobs_removed)
+            except Exception:
+                logger.debug("Failed to gc attachment store", exc_info=True)
 
+        # Transcript cache is flat; entries expire like any other file.
+        transcripts = base / TRANSCRIPT_CACHE_DIRNAME
+        if transcripts.is_dir():
+            for entry in transcripts.iterdir():
                 try:
-                    newest_mtime = _newest_mtime_in_tree(user_dir)
-                    age = current_time - newest_mtime
-                    if age > max_age_seconds and not has_scratchpad:
-                        # Entire directory is old and has no scratchpad, delete it all
-                        files_removed = _count_files_in_tree(user_dir)
-                        shutil.rmtree(user_dir, ignore_errors=False)
-                        deleted_count += files_removed
-                    else:
-                        # Clean individual old files, skipping scratchpad/
-                        for root, dirs, files in os.walk(user_dir):
-                            # Skip the scratchpad directory entirely
-                            if "scratchpad" in dirs:
-                                dirs.remove("scratchpad")
-                            for name in files:
-                                try:
-                                    file_path = Path(root) / name
-                                    file_age = current_time - file_path.stat().st_mtime
-                                    if file_age > max_age_seconds:
-                                        file_path.unlink()
-                                        deleted_count += 1
-                                except Exception:
-                                    logger.debug(
-                                        "Failed to delete old file in %s: %s", label, file_path
-                                    )
+                    if current_time - entry.stat().st_mtime > max_age_seconds:
+                        entry.unlink()
                 except Exception:
-                    logger.debug("Failed to cleanup %s dir: %s", label, user_dir)
-
-            return deleted_count
-
-        _cleanup_base_dir(self._work_base, label="workspace")
+                    logger.debug("Failed to delete cached transcript: %s", entry)
 
         logger.info(
             "Cleanup: deleted %d files older than %d hours (workspace=%s)",
@@ -457,3 +499,51 @@ class FileService:
         )
 
         return deleted_count
+
+    def _cleanup_user_dir(self, user_dir: Path, now: float, max_age_seconds: float) -> int:
+        """Clean one user's workspace using the expiry index.
+
+        The whole directory is deleted when its newest file is stale and it has
+        no scratchpad; otherwise only expired index entries are unlinked.
+
+        Returns:
+            Count of deleted files.
+        """
+        user_id = user_dir.name
+        entry = self.file_index.refresh(user_id, user_dir, now=now)
+
+        # Never delete the entire user dir if it contains a scratchpad
+        has_scratchpad = (user_dir / "scratchpad").is_dir()
+
+        if not has_scratchpad and now - newest_mtime(entry, user_dir) > max_age_seconds:
+            # Confirm with a fresh walk before deleting the whole tree: the
+            # index may miss writes from paths that do not report them.
+            files = scan_tree(user_dir)
+            newest = max(files.values()) if files else newest_mtime(entry, user_dir)
+            if now - newest > max_age_seconds:
+                shutil.rmtree(user_dir, ignore_errors=False)
+                self.file_index.forget(user_id)
+                return len(files)
+            entry.files = files
+
+        deleted = 0
+        for rel, mtime in list(entry.files.items()):
+            if now - mtime <= max_age_seconds:
+                continue
+            file_path = user_dir / rel
+            try:
+                # Re-stat: the file may have been rewritten since it was indexed.
+                actual = file_path.stat().st_mtime
+                if now - actual > max_age_seconds:
+                    file_path.unlink()
+                    deleted += 1
+                    del entry.files[rel]
+                else:
+                    entry.files[rel] = actual
+            except FileNotFoundError:
+                del entry.files[rel]
+            except Exception:
+                logger.debug("Failed to delete old file in workspace: %s", file_path)
+
+        self.file_index.save(user_id)
+        return deleted
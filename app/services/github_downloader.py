@@ -0,0 +1,424 @@
+"""Parallel, cached downloads of skill directories from GitHub.
+
+The original installer walked the contents API one directory at a time and
+fetched each file with ``urlretrieve``, one new connection per request. A
+200-file skill took minutes and used 200+ API calls. :class:`GitHubDownloader`
+takes a different approach:
+
+1. Resolves the ref to a commit with ``GET /repos/{o}/{r}/commits/{ref}``.
+   The response's ETag is stored and sent back as ``If-None-Match``, so an
+   unchanged branch answers ``304`` (free against the rate limit).
+2. Lists the whole tree with one ``git/trees/{sha}?recursive=1`` call. Tree
+   listings are immutable per SHA and cached on disk.
+3. Fetches file contents from ``raw.githubusercontent.com`` at the pinned
+   commit, concurrently, over keep-alive connections pooled per thread.
+4. Stores every file in a content-addressed blob cache under its git blob
+   SHA (verified on download). Reinstalling or updating a skill only
+   fetches blobs that changed, and an interrupted download resumes with
+   the blobs it already has.
+
+Base URLs are configurable so tests can point the downloader at a local
+stand-in server.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any
+from urllib.parse import quote, urljoin, urlsplit
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://api.github.com"
+DEFAULT_RAW_BASE = "https://raw.githubusercontent.com"
+
+_REQUESTS = REGISTRY.counter(
+    "mordecai_github_download_requests_total",
+    "HTTP requests made by the GitHub skill downloader, by kind and outcome.",
+    ("kind", "result"),
+)
+_BLOBS = REGISTRY.counter(
+    "mordecai_github_download_blobs_total",
+    "Files materialized by the GitHub skill downloader, by source (cache or fetched).",
+    ("source",),
+)
+
+
+class GitHubDownloadError(Exception):
+    """Raised when a GitHub download fails.
+
+    Attributes:
+        status: HTTP status code, if the failure was an HTTP error.
+    """
+
+    def __init__(self, message: str, *, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class TreeTruncatedError(GitHubDownloadError):
+    """The recursive tree listing was truncated by GitHub (very large repos)."""
+
+
+@dataclass(frozen=True, slots=True)
+class _Response:
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class DownloadResult:
+    """Outcome of :meth:`GitHubDownloader.download_directory`.
+
+    Attributes:
+        commit_sha: Commit the files were taken from.
+        files: Files written to the destination.
+        fetched: Files whose contents were downloaded.
+        cached: Files served from the local blob cache.
+    """
+
+    commit_sha: str
+    files: int
+    fetched: int
+    cached: int
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Git's object id for a blob with contents ``data``."""
+    h = hashlib.sha1(usedforsecurity=False)
+    h.update(f"blob {len(data)}\0".encode())
+    h.update(data)
+    return h.hexdigest()
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per host per thread."""
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns: dict[tuple[str, str], http.client.HTTPConnection] = (
+            getattr(self._local, "conns", None) or {}
+        )
+        self._local.conns = conns
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = cls(netloc, timeout=self.timeout)
+            conns[(scheme, netloc)] = conn
+        return conn
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conns = getattr(self._local, "conns", {})
+        conn = conns.pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, url: str, headers: Mapping[str, str], *, redirects: int = 3) -> _Response:
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn = self._conn(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", target or "/", headers=dict(headers))
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, ConnectionError, TimeoutError, OSError) as e:
+                # Stale keep-alive connection: reconnect once.
+                self._drop(parts.scheme, parts.netloc)
+                if attempt:
+                    raise GitHubDownloadError(f"Network error fetching {url}: {e}") from e
+                continue
+            if resp.will_close:
+                self._drop(parts.scheme, parts.netloc)
+            if resp.status in (301, 302, 303, 307, 308) and redirects > 0:
+                location = resp.getheader("Location")
+                if location:
+                    next_url = urljoin(url, location)
+                    if urlsplit(next_url).netloc != parts.netloc:
+                        # Never forward credentials to another host.
+                        headers = {
+                            k: v for k, v in headers.items() if k.lower() != "authorization"
+                        }
+                    return self.request(next_url, headers, redirects=redirects - 1)
+            return _Response(resp.status, {k.lower(): v for k, v in resp.getheaders()}, body)
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        for conn in (getattr(self._local, "conns", None) or {}).values():
+            conn.close()
+        self._local = threading.local()
+
+
+class GitHubDownloader:
+    """Download directories of a GitHub repository into local folders."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        *,
+        api_base: str = DEFAULT_API_BASE,
+        raw_base: str = DEFAULT_RAW_BASE,
+        token: str | None = None,
+        max_workers: int = 8,
+        timeout: float = 30.0,
+    ) -> None:
+        """Initialize the downloader.
+
+        Args:
+            cache_dir: Root for the blob cache and cached API responses.
+            api_base: GitHub REST API base URL.
+            raw_base: Base URL serving ``/{owner}/{repo}/{sha}/{path}``.
+            token: Optional GitHub token (raises the API rate limit).
+            max_workers: Concurrent file downloads.
+            timeout: Per-request timeout in seconds.
+        """
+        self.cache_dir = cache_dir
+        self.api_base = api_base.rstrip("/")
+        self.raw_base = raw_base.rstrip("/")
+        self.token = token
+        self.max_workers = max(1, max_workers)
+        self._pool = _ConnectionPool(timeout)
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Any) -> GitHubDownloader:
+        """Build a downloader from ``github_*`` / ``skill_download_*`` settings."""
+
+        def _str(name: str, default: str | None) -> str | None:
+            value = getattr(config, name, None)
+            return value if isinstance(value, str) and value.strip() else default
+
+        workers = getattr(config, "skill_download_workers", 8)
+        cache_dir = _str("skill_download_cache_dir", None)
+        return cls(
+            Path(cache_dir).expanduser()
+            if cache_dir
+            else Path(getattr(config, "skills_base_dir", "./skills")) / ".cache" / "github",
+            api_base=_str("github_api_base_url", DEFAULT_API_BASE) or DEFAULT_API_BASE,
+            raw_base=_str("github_raw_base_url", DEFAULT_RAW_BASE) or DEFAULT_RAW_BASE,
+            token=_str("github_token", None) or os.environ.get("GITHUB_TOKEN") or None,
+            max_workers=workers if isinstance(workers, int) else 8,
+        )
+
+    # ---------------------------
+    # API calls
+    # ---------------------------
+
+    def _api_headers(self) -> dict[str, str]:
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "User-Agent": "mordecai",
+            "Connection": "keep-alive",
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _api_cache_path(self, url: str) -> Path:
+        return self.cache_dir / "api" / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def _get_json(self, url: str, *, kind: str, immutable: bool = False) -> Any:
+        """GET a JSON API resource, revalidating the cached copy by ETag."""
+        cache_path = self._api_cache_path(url)
+        cached = _read_json(cache_path)
+        if cached is not None and immutable:
+            _REQUESTS.inc(kind=kind, result="cached")
+            return cached["body"]
+
+        headers = self._api_headers()
+        if cached is not None and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        resp = self._pool.request(url, headers)
+
+        if resp.status == 304 and cached is not None:
+            _REQUESTS.inc(kind=kind, result="not_modified")
+            return cached["body"]
+        if resp.status != 200:
+            _REQUESTS.inc(kind=kind, result="error")
+            raise GitHubDownloadError(
+                f"GitHub API error: {resp.status} for {url}", status=resp.status
+            )
+        _REQUESTS.inc(kind=kind, result="fetched")
+        try:
+            body = json.loads(resp.body.decode("utf-8"))
+        except ValueError as e:
+            raise GitHubDownloadError("Invalid response from GitHub API") from e
+        _write_atomic(
+            cache_path,
+            json.dumps({"url": url, "etag": resp.headers.get("etag"), "body": body}).encode(),
+        )
+        return body
+
+    def resolve_commit(self, owner: str, repo: str, ref: str) -> tuple[str, str]:
+        """Return ``(commit_sha, tree_sha)`` for a branch, tag or SHA."""
+        data = self._get_json(
+            f"{self.api_base}/repos/{quote(owner)}/{quote(repo)}/commits/{quote(ref, safe='')}",
+            kind="commit",
+        )
+        try:
+            return str(data["sha"]), str(data["commit"]["tree"]["sha"])
+        except (KeyError, TypeError) as e:
+            raise GitHubDownloadError("Unexpected commit response from GitHub API") from e
+
+    def list_tree(self, owner: str, repo: str, tree_sha: str) -> list[dict[str, Any]]:
+        """All entries of a tree, recursively (one API call, cached per SHA)."""
+        data = self._get_json(
+            f"{self.api_base}/repos/{quote(owner)}/{quote(repo)}/git/trees/{tree_sha}?recursive=1",
+            kind="tree",
+            immutable=True,
+        )
+        if data.get("truncated"):
+            raise TreeTruncatedError(f"Tree listing for {owner}/{repo} is truncated")
+        return list(data.get("tree") or [])
+
+    # ---------------------------
+    # Blobs
+    # ---------------------------
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.cache_dir / "blobs" / sha[:2] / sha
+
+    def _fetch_blob(self, owner: str, repo: str, commit_sha: str, path: str, sha: str) -> Path:
+        blob = self._blob_path(sha)
+        if blob.exists():
+            _BLOBS.inc(source="cache")
+            return blob
+
+        url = f"{self.raw_base}/{quote(owner)}/{quote(repo)}/{commit_sha}/{quote(path)}"
+        headers = {"User-Agent": "mordecai", "Connection": "keep-alive"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        resp = self._pool.request(url, headers)
+        if resp.status != 200:
+            _REQUESTS.inc(kind="raw", result="error")
+            raise GitHubDownloadError(
+                f"Failed to download {path}: HTTP {resp.status}", status=resp.status
+            )
+        _REQUESTS.inc(kind="raw", result="fetched")
+        if git_blob_sha(resp.body) != sha:
+            raise GitHubDownloadError(f"Checksum mismatch for {path}")
+        _write_atomic(blob, resp.body)
+        _BLOBS.inc(source="fetched")
+        return blob
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+
+    def download_directory(
+        self, owner: str, repo: str, ref: str, path: str, dest_dir: Path
+    ) -> DownloadResult:
+        """Materialize ``path`` of ``owner/repo`` at ``ref`` into ``dest_dir``.
+
+        Raises:
+            GitHubDownloadError: On HTTP/network errors or bad content.
+            TreeTruncatedError: If the repository tree is too large to list
+                in one call.
+        """
+        commit_sha, tree_sha = self.resolve_commit(owner, repo, ref)
+        prefix = path.strip("/")
+        base = f"{prefix}/" if prefix else ""
+
+        files: list[tuple[str, str, str]] = []  # (repo path, relative path, blob sha)
+        for entry in self.list_tree(owner, repo, tree_sha):
+            entry_path = str(entry.get("path") or "")
+            # Regular and executable files only (no symlinks or submodules).
+            if entry.get("type") != "blob" or entry.get("mode") not in ("100644", "100755"):
+                continue
+            if not entry_path.startswith(base):
+                continue
+            rel = PurePosixPath(entry_path[len(base) :])
+            if rel.is_absolute() or ".." in rel.parts:
+                continue
+            files.append((entry_path, str(rel), str(entry["sha"])))
+
+        if not files:
+            return DownloadResult(commit_sha=commit_sha, files=0, fetched=0, cached=0)
+
+        # One fetch per distinct blob that is not cached yet.
+        to_fetch = {sha: repo_path for repo_path, _rel, sha in files}
+        to_fetch = {sha: p for sha, p in to_fetch.items() if not self._blob_path(sha).exists()}
+        if to_fetch:
+            list(
+                self._get_executor().map(
+                    lambda item: self._fetch_blob(owner, repo, commit_sha, item[1], item[0]),
+                    to_fetch.items(),
+                )
+            )
+
+        for _repo_path, rel, sha in files:
+            target = dest_dir / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self._blob_path(sha), target)
+
+        logger.info(
+            "Downloaded %s/%s/%s@%s: %d files (%d fetched, %d cached)",
+            owner,
+            repo,
+            prefix,
+            commit_sha[:12],
+            len(files),
+            len(to_fetch),
+            len(files) - len(to_fetch),
+        )
+        return DownloadResult(
+            commit_sha=commit_sha,
+            files=len(files),
+            fetched=len(to_fetch),
+            cached=len(files) - len(to_fetch),
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Long-lived so worker threads keep their pooled connections warm
+        # across downloads.
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="github-download"
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """Shut down download threads and close this thread's connections."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self._pool.close()
+
+
+def _read_json(path: Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
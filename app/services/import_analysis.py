@@ -0,0 +1,365 @@
+"""Cached import analysis for skill requirement generation.
+
+Requirement generation infers a skill's third-party dependencies from the
+``import`` statements in its Python files. It used to ``ast.parse`` every
+file on every preflight, rebuild the stdlib set each call and look packages
+up in a small inline table. This module splits that work into cached parts:
+
+- :data:`STDLIB_MODULES` is computed once per process.
+- :class:`ImportIndex` maps import roots to PyPI distribution names. It
+  combines a bundled table of well-known mismatches (``yaml`` ->
+  ``PyYAML``) with the installed distributions' metadata
+  (:func:`importlib.metadata.packages_distributions`). The index is
+  persisted per interpreter version and rebuilt only when ``sys.path``
+  directories change.
+- :class:`ImportAnalyzer` caches each file's absolute import roots under the
+  file's content digest: in memory, and optionally on disk so the onboarding
+  process pool and restarts share it. Digests come from the
+  ``(inode, mtime_ns, size)``-keyed
+  :func:`app.services.skill_fingerprint.get_digest_cache`, so unchanged
+  files are neither re-read nor re-parsed. Large skills parse their cache
+  misses in a process pool.
+"""
+
+from __future__ import annotations
+
+import ast
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+from app.services.skill_fingerprint import get_digest_cache
+
+logger = logging.getLogger(__name__)
+
+# Bump when parse_import_roots changes what it extracts.
+_CACHE_VERSION = 1
+
+STDLIB_MODULES: frozenset[str] = frozenset(sys.stdlib_module_names) | {"__future__"}
+
+# Import roots whose distribution name differs from the module name, for
+# packages that are usually not installed in the host environment.
+BUNDLED_DISTRIBUTIONS: dict[str, str] = {
+    "Crypto": "pycryptodome",
+    "Levenshtein": "python-Levenshtein",
+    "OpenSSL": "pyOpenSSL",
+    "PIL": "Pillow",
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "dns": "dnspython",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "PyMuPDF",
+    "git": "GitPython",
+    "gi": "PyGObject",
+    "jose": "python-jose",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "markdown": "Markdown",
+    "mpl_toolkits": "matplotlib",
+    "pptx": "python-pptx",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "slugify": "python-slugify",
+    "telegram": "python-telegram-bot",
+    "tqdm": "tqdm",
+    "usb": "pyusb",
+    "yaml": "PyYAML",
+    "zmq": "pyzmq",
+}
+
+_SKIP_DIRS = frozenset({".venv", "__pycache__", "node_modules", ".git"})
+
+_FILES = REGISTRY.counter(
+    "mordecai_import_analysis_files_total",
+    "Python files visited by import analysis, by where the import set came from.",
+    ("source",),
+)
+
+
+def parse_import_roots(source: str | bytes, filename: str = "<skill>") -> frozenset[str]:
+    """Top-level names of absolute imports in ``source``.
+
+    Relative imports are ignored. Files that do not parse yield an empty set;
+    syntax checking is a separate preflight step.
+    """
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, ValueError):
+        return frozenset()
+
+    roots: set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                name = (alias.name or "").strip()
+                if name:
+                    roots.add(name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            if node.level and node.level > 0:
+                continue
+            mod = (node.module or "").strip()
+            if mod:
+                roots.add(mod.split(".")[0])
+    return frozenset(roots)
+
+
+def _parse_paths(paths: list[str]) -> list[tuple[str, list[str]]]:
+    """Process-pool task: parse a batch of files."""
+    out = []
+    for path in paths:
+        try:
+            roots = parse_import_roots(Path(path).read_bytes(), path)
+        except OSError:
+            roots = frozenset()
+        out.append((path, sorted(roots)))
+    return out
+
+
+def is_local_import(root: str, skill_dir: Path) -> bool:
+    """True if ``root`` is a package or module shipped inside the skill."""
+    if (skill_dir / root).is_dir() and (skill_dir / root / "__init__.py").exists():
+        return True
+    return (skill_dir / f"{root}.py").exists()
+
+
+def python_files(skill_dir: Path) -> list[Path]:
+    """``*.py`` files of a skill, skipping venvs, caches and VCS metadata."""
+    found: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(skill_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+        found.extend(Path(dirpath) / f for f in sorted(filenames) if f.endswith(".py"))
+    return found
+
+
+def interpreter_key() -> str:
+    return f"{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}"
+
+
+class ImportIndex:
+    """Import root -> distribution name lookups."""
+
+    def __init__(self, mapping: dict[str, str]) -> None:
+        self._mapping = mapping
+
+    def __len__(self) -> int:
+        return len(self._mapping)
+
+    def distribution_for(self, import_root: str) -> str:
+        """Distribution providing ``import_root``, or the root itself if unknown."""
+        return self._mapping.get(import_root, import_root)
+
+    @staticmethod
+    def _path_stamp() -> list[list[Any]]:
+        stamp = []
+        for entry in sys.path:
+            try:
+                stamp.append([entry, os.stat(entry or ".").st_mtime_ns])
+            except OSError:
+                continue
+        return stamp
+
+    @classmethod
+    def build(cls) -> ImportIndex:
+        """Index installed distribution metadata, overlaid with the bundled table."""
+        mapping: dict[str, str] = {}
+        try:
+            for root, dists in metadata.packages_distributions().items():
+                unique = sorted(set(dists))
+                # Namespace roots shared by several distributions (``google``)
+                # cannot be mapped reliably.
+                if len(unique) == 1 and not root.startswith("_"):
+                    mapping[root] = unique[0]
+        except Exception:
+            logger.debug("Failed to read installed distribution metadata", exc_info=True)
+        mapping.update(BUNDLED_DISTRIBUTIONS)
+        return cls(mapping)
+
+    @classmethod
+    def load(cls, cache_dir: Path | None = None) -> ImportIndex:
+        """Load the persisted index for this interpreter, rebuilding if stale."""
+        if cache_dir is None:
+            return cls.build()
+        path = cache_dir / f"import-index-{interpreter_key()}.json"
+        stamp = cls._path_stamp()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("stamp") == stamp and isinstance(data.get("index"), dict):
+                return cls({**data["index"], **BUNDLED_DISTRIBUTIONS})
+        except (OSError, ValueError):
+            pass
+        index = cls.build()
+        try:
+            _write_atomic(path, json.dumps({"stamp": stamp, "index": index._mapping}))
+        except OSError:
+            logger.debug("Failed to persist import index to %s", path, exc_info=True)
+        return index
+
+
+@functools.cache
+def get_import_index(cache_dir: Path | None = None) -> ImportIndex:
+    """Process-wide :class:`ImportIndex` (built or loaded once per cache dir)."""
+    return ImportIndex.load(cache_dir)
+
+
+class ImportAnalyzer:
+    """Per-file import sets, cached by content digest."""
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        *,
+        parallel_threshold: int = 200,
+        max_processes: int | None = None,
+    ) -> None:
+        """Initialize the analyzer.
+
+        Args:
+            cache_dir: Directory for the on-disk cache. None keeps the cache
+                in memory only.
+            parallel_threshold: Minimum number of uncached files before
+                parsing moves to a process pool.
+            max_processes: Pool size; defaults to ``os.cpu_count()`` (max 8).
+        """
+        self.cache_dir = cache_dir
+        self.parallel_threshold = parallel_threshold
+        self.max_processes = max_processes or min(8, os.cpu_count() or 1)
+        self._memory: dict[str, frozenset[str]] = {}
+        self._lock = threading.Lock()
+
+    def _disk_path(self, digest: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"v{_CACHE_VERSION}" / digest[:2] / f"{digest}.json"
+
+    def _lookup(self, digest: str) -> frozenset[str] | None:
+        with self._lock:
+            roots = self._memory.get(digest)
+        if roots is not None:
+            _FILES.inc(source="memory")
+            return roots
+        disk = self._disk_path(digest)
+        if disk is None:
+            return None
+        try:
+            roots = frozenset(json.loads(disk.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        _FILES.inc(source="disk")
+        with self._lock:
+            self._memory[digest] = roots
+        return roots
+
+    def _store(self, digest: str, roots: frozenset[str]) -> None:
+        with self._lock:
+            self._memory[digest] = roots
+        disk = self._disk_path(digest)
+        if disk is not None:
+            try:
+                _write_atomic(disk, json.dumps(sorted(roots)))
+            except OSError:
+                logger.debug("Failed to persist import cache entry %s", digest, exc_info=True)
+
+    def file_imports(self, paths: list[Path]) -> tuple[dict[Path, frozenset[str]], list[str]]:
+        """Absolute import roots of each file in ``paths``.
+
+        Returns:
+            ``(imports by path, warnings)``; unreadable files are reported
+            in ``warnings`` and omitted.
+        """
+        digests = get_digest_cache()
+        result: dict[Path, frozenset[str]] = {}
+        warnings: list[str] = []
+        misses: dict[str, tuple[Path, str]] = {}
+
+        for path in paths:
+            try:
+                digest = digests.digest(str(path), path.stat())
+            except OSError as e:
+                warnings.append(f"Failed to read {path}: {e}")
+                continue
+            roots = self._lookup(digest)
+            if roots is None:
+                misses[str(path)] = (path, digest)
+            else:
+                result[path] = roots
+
+        for path_str, roots_list in self._parse(list(misses)):
+            path, digest = misses[path_str]
+            roots = frozenset(roots_list)
+            self._store(digest, roots)
+            result[path] = roots
+        _FILES.inc(len(misses), source="parsed")
+        return result, warnings
+
+    def _parse(self, paths: list[str]) -> list[tuple[str, list[str]]]:
+        # Pool workers (e.g. the onboarding scan pool) must not nest pools.
+        if (
+            self.max_processes <= 1
+            or len(paths) < self.parallel_threshold
+            or multiprocessing.parent_process() is not None
+        ):
+            return _parse_paths(paths)
+        workers = min(self.max_processes, max(1, len(paths) // 50))
+        chunk = -(-len(paths) // (workers * 4))
+        batches = [paths[i : i + chunk] for i in range(0, len(paths), chunk)]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+            ) as pool:
+                return [item for batch in pool.map(_parse_paths, batches) for item in batch]
+        except Exception:
+            logger.warning("Parallel import parsing failed; parsing in-process", exc_info=True)
+            return _parse_paths(paths)
+
+    def analyze(
+        self, skill_dir: Path, stdlib: frozenset[str] | set[str] = STDLIB_MODULES
+    ) -> tuple[set[str], list[str]]:
+        """Third-party import roots of a skill (stdlib and local modules removed).
+
+        Returns:
+            ``(imports, warnings)``.
+        """
+        per_file, warnings = self.file_imports(python_files(skill_dir))
+        roots: set[str] = set().union(*per_file.values()) if per_file else set()
+        return {r for r in roots if r not in stdlib and not is_local_import(r, skill_dir)}, warnings
+
+
+def cache_dir_for(config: Any) -> Path | None:
+    """Import cache directory for ``config``: ``<skills_base_dir>/.cache/imports``."""
+    base = getattr(config, "skills_base_dir", None)
+    return Path(base) / ".cache" / "imports" if isinstance(base, str) else None
+
+
+@functools.cache
+def get_import_analyzer(cache_dir: Path | None = None) -> ImportAnalyzer:
+    """Process-wide :class:`ImportAnalyzer` for ``cache_dir``.
+
+    Shared so the in-memory cache survives across preflights (and across
+    tasks in an onboarding scan-pool worker).
+    """
+    return ImportAnalyzer(cache_dir)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -25,6 +25,8 @@ from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+from app.services.usage_ledger import STAGE_EXTRACTION, STAGE_SUMMARY, record_agent_usage
+
 if TYPE_CHECKING:
     from app.config import AgentConfig
     from app.services.memory_service import MemoryService
@@ -192,7 +194,7 @@ class MemoryExtractionService:
                     success=True,
                 )
             else:
-                result = self._analyze_conversation(conversation_history)
+                result = self._analyze_conversation(conversation_history, user_id=user_id)
 
             # Filter sensitive data
             result = self._filter_sensitive_data(result)
@@ -260,7 +262,7 @@ class MemoryExtractionService:
         if not conversation_history or len(conversation_history) < 2:
             return None
 
-        summary = self._summarize_conversation(conversation_history)
+        summary = self._summarize_conversation(conversation_history, user_id=user_id)
         summary = (summary or "").strip()
         if not summary:
             return None
@@ -324,7 +326,9 @@ class MemoryExtractionService:
 
         return summary
 
-    def _summarize_conversation(self, conversation_history: list[dict]) -> str:
+    def _summarize_conversation(
+        self, conversation_history: list[dict], *, user_id: str | None = None
+    ) -> str:
         """Generate a concise bullet summary of a conversation using the LLM."""
         from strands import Agent
 
@@ -340,6 +344,7 @@ class MemoryExtractionService:
                 ),
             )
             result = agent(prompt)
+            record_agent_usage(result, user_id=user_id, stage=STAGE_SUMMARY, agent=agent)
             return self._extract_response_text(result)
         except Exception as e:
             logger.warning("Summary generation failed: %s", e)
@@ -376,7 +381,9 @@ class MemoryExtractionService:
 
         return False
 
-    def _summarize_conversation(self, conversation_history: list[dict]) -> str:
+    def _summarize_conversation(
+        self, conversation_history: list[dict], *, user_id: str | None = None
+    ) -> str:
         """Generate a concise summary for a conversation."""
         from strands import Agent
 
@@ -389,6 +396,7 @@ class MemoryExtractionService:
             system_prompt=("You are a conversation summarizer. Return only the summary text."),
         )
         result = agent(prompt)
+        record_agent_usage(result, user_id=user_id, stage=STAGE_SUMMARY, agent=agent)
         text = self._extract_response_text(result).strip()
 
         # Normalize whitespace a bit
@@ -458,11 +466,14 @@ class MemoryExtractionService:
     def _analyze_conversation(
         self,
         conversation_history: list[dict],
+        *,
+        user_id: str | None = None,
     ) -> ExtractionResult:
         """Use LLM to analyze conversation and categorize information.
 
         Args:
             conversation_history: List of message dicts with role and content.
+            user_id: User the model usage is accounted to.
 
         Returns:
             ExtractionResult with extracted categories.
@@ -487,6 +498,7 @@ class MemoryExtractionService:
             )
 
             result = agent(prompt)
+            record_agent_usage(result, user_id=user_id, stage=STAGE_EXTRACTION, agent=agent)
 
             # Extract response text
             response_text = self._extract_response_text(result)
@@ -16,6 +16,7 @@ Requirements:
 
 import logging
 import re
+import threading
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
@@ -38,6 +39,10 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class MemoryNotReadyError(RuntimeError):
+    """Raised when the memory id is still being resolved in the background."""
+
+
 _KEY_VALUE_RE = re.compile(r"^(?P<key>[A-Za-z0-9 _\-]{1,32})\s*[:=]\s*(?P<value>.+)$")
 _USER_NAME_RE = re.compile(r"\b(?:my|user)\s+name\s+is\s+(?P<name>[^.\n]{1,80})", re.IGNORECASE)
 _ASSISTANT_NAME_RE = re.compile(
@@ -69,6 +74,13 @@ class MemoryService:
         self._client: MemoryClient | None = None
         self._memory_id: str | None = config.memory_id
         self._env = env_service or RuntimeEnvService()
+        self._memory_id_lock = threading.Lock()
+        self._resolving = threading.Event()
+        self._resolve_error: str | None = None
+        ready_timeout = getattr(config, "memory_ready_timeout_seconds", 5.0)
+        self._ready_timeout = (
+            float(ready_timeout) if isinstance(ready_timeout, (int, float)) else 5.0
+        )
         self._setup_aws_credentials()
 
     def _setup_aws_credentials(self) -> None:
@@ -123,9 +135,75 @@ class MemoryService:
             self._client = MemoryClient(region_name=self.config.aws_region)
         return self._client
 
+    def start_memory_id_resolution(self) -> threading.Thread | None:
+        """Resolve the memory id in a background thread.
+
+        ``list_memories``/``create_memory_and_wait`` can take a long time, so
+        startup does not wait for them. Until the id is known, callers of
+        :meth:`get_or_create_memory_id` wait at most
+        ``memory_ready_timeout_seconds`` and then get
+        :class:`MemoryNotReadyError` (memory features degrade gracefully).
+
+        Returns:
+            The resolver thread, or None if the id is already known.
+        """
+        if self._memory_id:
+            return None
+        self._resolving.set()
+
+        def _resolve() -> None:
+            try:
+                self._get_or_create_memory_id(timeout=None)
+            except Exception as e:
+                self._resolve_error = str(e)
+                logger.warning("Background memory id resolution failed: %s", e)
+            finally:
+                self._resolving.clear()
+
+        thread = threading.Thread(target=_resolve, name="memory-id-resolver", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def memory_status(self) -> str:
+        """``ready``, ``resolving``, ``failed`` or ``pending`` (not started yet)."""
+        if self._memory_id:
+            return "ready"
+        if self._resolving.is_set():
+            return "resolving"
+        return "failed" if self._resolve_error else "pending"
+
     def get_or_create_memory_id(self) -> str:
         """Get existing memory ID or create new memory with strategies.
 
+        Thread-safe: only one caller resolves the id. While the background
+        resolver (:meth:`start_memory_id_resolution`) is running, other
+        callers wait a bounded time instead of racing it.
+
+        Returns:
+            Memory ID string.
+
+        Raises:
+            MemoryNotReadyError: If background resolution is still running.
+            Exception: If memory creation fails.
+        """
+        timeout = self._ready_timeout if self._resolving.is_set() else None
+        return self._get_or_create_memory_id(timeout=timeout)
+
+    def _get_or_create_memory_id(self, *, timeout: float | None) -> str:
+        if self._memory_id:
+            logger.debug("Using existing memory_id=%s", self._memory_id)
+            return self._memory_id
+        if not self._memory_id_lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise MemoryNotReadyError("AgentCore memory id is still being resolved")
+        try:
+            return self._resolve_memory_id()
+        finally:
+            self._memory_id_lock.release()
+
+    def _resolve_memory_id(self) -> str:
+        """Find or create the AgentCore memory (caller holds the id lock).
+
         Creates a memory instance with all three strategies:
         - summaryMemoryStrategy: Session summaries
         - userPreferenceMemoryStrategy: User preferences
@@ -0,0 +1,372 @@
+"""Spooled shell output with bounded in-memory summaries.
+
+Shell commands used to buffer their whole output in memory and then keep an
+arbitrary 60k-char tail for the model. Now each command gets a spool job:
+- stdout and stderr stream into files under the user's workspace
+  (``<workspace>/<user>/.shell-output/<job>/``);
+- only a bounded head and tail of each stream stays in memory, so memory
+  use does not grow with the output size.
+
+Small outputs are returned whole, and their spool is deleted. Larger
+outputs come back as head + tail plus an omission marker pointing at the
+file. The model can page through it with
+``file_read(path=..., mode="page", start_line=N)`` (see :func:`read_page`).
+That page reader uses mmap and a sparse, cached line index.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIRNAME = ".shell-output"
+STDOUT_FILE = "stdout.log"
+STDERR_FILE = "stderr.log"
+
+# Byte offset of every _INDEX_STRIDE-th line start is kept per file.
+_INDEX_STRIDE = 1024
+_PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class OutputSpool:
+    """One output stream: appended to a file, summarized in bounded memory.
+
+    Args:
+        path: Spool file. None keeps only the in-memory summary.
+        inline_chars: Outputs up to this size are kept (and returned) whole.
+        head_chars: Size of the head shown for larger outputs.
+        tail_chars: Size of the tail shown for larger outputs.
+        external: The file is written by someone else (e.g. a child process
+            writing to ``path`` directly); only :meth:`observe` is used.
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        inline_chars: int = 16_000,
+        head_chars: int = 4_000,
+        tail_chars: int = 8_000,
+        external: bool = False,
+    ) -> None:
+        self.path = path
+        self.inline_chars = max(0, inline_chars)
+        self.head_chars = max(0, min(head_chars, self.inline_chars))
+        self.tail_chars = max(0, tail_chars)
+        self.chars = 0
+        self.newlines = 0
+        self._head: list[str] = []
+        self._head_len = 0
+        self._tail = ""
+        self._last = ""
+        self._lock = threading.Lock()
+        self._fh = None
+        if path is not None and not external:
+            self._fh = open(path, "w", encoding="utf-8", errors="replace", newline="")
+
+    def write(self, text: str) -> None:
+        """Append ``text`` to the spool file and the summary."""
+        if not text:
+            return
+        with self._lock:
+            if self._fh is not None:
+                self._fh.write(text)
+            self._observe(text)
+
+    def observe(self, text: str) -> None:
+        """Account for ``text`` that was written to the file elsewhere."""
+        if not text:
+            return
+        with self._lock:
+            self._observe(text)
+
+    def _observe(self, text: str) -> None:
+        self.chars += len(text)
+        self.newlines += text.count("\n")
+        self._last = text[-1]
+        if self._head_len < self.inline_chars:
+            take = text[: self.inline_chars - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+        if self.tail_chars:
+            self._tail = (self._tail + text[-self.tail_chars :])[-self.tail_chars :]
+
+    @property
+    def complete(self) -> bool:
+        """True if the whole output fits in the inline budget."""
+        return self.chars <= self.inline_chars
+
+    @property
+    def lines(self) -> int:
+        return self.newlines + (1 if self.chars and self._last != "\n" else 0)
+
+    def render(self) -> str:
+        """The whole output if small, else head + omission marker + tail."""
+        with self._lock:
+            head = "".join(self._head)
+            if self.complete:
+                return head
+            head = head[: self.head_chars]
+            if "\n" in head:
+                head = head[: head.rfind("\n") + 1]
+            tail = self._tail
+            if "\n" in tail[:-1]:
+                tail = tail[tail.index("\n") + 1 :]
+            head_lines = head.count("\n")
+            tail_lines = tail.count("\n") + (1 if tail and not tail.endswith("\n") else 0)
+            first, last = head_lines + 1, self.lines - tail_lines
+            omitted = self.chars - len(head) - len(tail)
+            if self.path is not None:
+                where = (
+                    f"full output: {self.path}; read more with "
+                    f'file_read(path="{self.path}", mode="page", start_line={first})'
+                )
+            else:
+                where = "full output was not kept"
+            marker = f"[... {omitted} chars omitted (lines {first}-{last}); {where} ...]"
+            return f"{head}\n{marker}\n\n{tail}"
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path) if self.path is not None else None,
+            "chars": self.chars,
+            "lines": self.lines,
+            "complete": self.complete,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except OSError:
+                    pass
+                self._fh = None
+
+
+@dataclass
+class SpoolJob:
+    """The stdout/stderr spools of one shell command."""
+
+    job_id: str
+    directory: Path | None
+    stdout: OutputSpool
+    stderr: OutputSpool
+    _closed: bool = field(default=False, repr=False)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.stdout.close()
+            self.stderr.close()
+
+    def discard(self) -> None:
+        """Close both spools and delete their files."""
+        self.close()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def finish(self) -> dict[str, Any] | None:
+        """Close both spools.
+
+        Returns:
+            A handle describing the spooled files, or None if both outputs
+            were small enough to return inline (their files are deleted).
+        """
+        self.close()
+        if self.stdout.complete and self.stderr.complete:
+            self.discard()
+            return None
+        return {
+            "job_id": self.job_id,
+            "stdout": self.stdout.describe(),
+            "stderr": self.stderr.describe(),
+        }
+
+
+_last_prune: dict[Path, float] = {}
+_prune_lock = threading.Lock()
+
+
+def _prune(root: Path, retention_seconds: float) -> None:
+    """Delete spool jobs older than ``retention_seconds`` (throttled per root)."""
+    now = time.time()
+    with _prune_lock:
+        if now - _last_prune.get(root, 0.0) < _PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune[root] = now
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if (
+                entry.is_dir(follow_symlinks=False)
+                and now - entry.stat().st_mtime > retention_seconds
+            ):
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def open_job(
+    root: Path | None,
+    *,
+    inline_chars: int = 16_000,
+    head_chars: int = 4_000,
+    tail_chars: int = 8_000,
+    retention_seconds: float = 86_400,
+    external_stdout: bool = False,
+) -> SpoolJob:
+    """Create a spool job under ``root``.
+
+    If the directory cannot be created, the job keeps in-memory summaries
+    only, so a full disk never fails the command itself.
+
+    Args:
+        root: Spool root; jobs older than ``retention_seconds`` are pruned.
+        inline_chars: See :class:`OutputSpool`.
+        head_chars: See :class:`OutputSpool`.
+        tail_chars: See :class:`OutputSpool`.
+        retention_seconds: How long finished jobs are kept for paging.
+        external_stdout: stdout is written to the spool file by another
+            process (see :class:`OutputSpool`).
+    """
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    directory: Path | None = None
+    if root is not None:
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            _prune(root, retention_seconds)
+            directory = root / job_id
+            directory.mkdir()
+        except OSError:
+            logger.warning("Cannot create shell output spool under %s", root, exc_info=True)
+            directory = None
+    sizes = {"inline_chars": inline_chars, "head_chars": head_chars, "tail_chars": tail_chars}
+    try:
+        stdout = OutputSpool(
+            directory / STDOUT_FILE if directory else None, external=external_stdout, **sizes
+        )
+        stderr = OutputSpool(directory / STDERR_FILE if directory else None, **sizes)
+    except OSError:
+        logger.warning("Cannot open shell output spool in %s", directory, exc_info=True)
+        directory = None
+        stdout = OutputSpool(None, **sizes)
+        stderr = OutputSpool(None, **sizes)
+    return SpoolJob(job_id=job_id, directory=directory, stdout=stdout, stderr=stderr)
+
+
+class _LineIndex:
+    """Byte offsets of every ``_INDEX_STRIDE``-th line start, extended lazily."""
+
+    def __init__(self) -> None:
+        self.offsets = [0]  # offsets[i] = start of line i * _INDEX_STRIDE + 1
+        self.scanned_line = 1  # first line not yet scanned
+        self.scanned_pos = 0
+
+
+_indexes: OrderedDict[tuple[str, int, int], _LineIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+_MAX_INDEXES = 64
+
+
+def _index_for(path: str, st: os.stat_result) -> _LineIndex:
+    key = (path, st.st_size, st.st_mtime_ns)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = _LineIndex()
+            while len(_indexes) > _MAX_INDEXES:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(key)
+        return index
+
+
+def _seek_line(mm: mmap.mmap, index: _LineIndex, line: int) -> int | None:
+    """Byte offset where 1-based ``line`` starts, or None past the end."""
+    slot = (line - 1) // _INDEX_STRIDE
+    if slot < len(index.offsets):
+        pos, cur = index.offsets[slot], slot * _INDEX_STRIDE + 1
+    else:
+        pos, cur = index.scanned_pos, index.scanned_line
+    size = len(mm)
+    while cur < line:
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            return None
+        pos, cur = nl + 1, cur + 1
+        if cur > index.scanned_line:
+            index.scanned_line, index.scanned_pos = cur, pos
+            if (cur - 1) % _INDEX_STRIDE == 0:
+                index.offsets.append(pos)
+    return pos if pos < size else None
+
+
+def read_page(
+    path: str | Path, *, start_line: int = 1, max_lines: int = 200, max_chars: int = 20_000
+) -> dict[str, Any]:
+    """Read a bounded page of lines from a (possibly huge) text file.
+
+    Only the requested page is decoded; earlier lines are skipped with
+    ``mmap.find`` from the nearest indexed offset.
+
+    Returns:
+        ``{"text", "start_line", "end_line", "next_start_line",
+        "truncated_line", "size"}``. ``next_start_line`` is None at the end
+        of the file; ``truncated_line`` means a single line longer than
+        ``max_chars`` was cut.
+    """
+    p = str(path)
+    start_line = max(1, int(start_line))
+    max_lines = max(1, int(max_lines))
+    st = os.stat(p)
+    empty = {
+        "text": "",
+        "start_line": start_line,
+        "end_line": start_line - 1,
+        "truncated_line": False,
+    }
+    if st.st_size == 0:
+        return {**empty, "next_start_line": None, "size": 0}
+
+    index = _index_for(p, st)
+    with open(p, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        begin = _seek_line(mm, index, start_line)
+        if begin is None:
+            return {**empty, "next_start_line": None, "size": st.st_size}
+        size = len(mm)
+        pos, lines, after = begin, 0, None
+        while lines < max_lines and pos < size:
+            nl = mm.find(b"\n", pos)
+            end = size if nl < 0 else nl + 1
+            if end - begin > max_chars:
+                if lines == 0:
+                    # One overlong line: show its start and skip the rest.
+                    pos, lines, after = begin + max_chars, 1, end
+                break
+            pos, lines = end, lines + 1
+        text = mm[begin:pos].decode("utf-8", errors="replace")
+        more = (after if after is not None else pos) < size
+    end_line = start_line + lines - 1
+    return {
+        "text": text,
+        "start_line": start_line,
+        "end_line": end_line,
+        "next_start_line": end_line + 1 if more else None,
+        "truncated_line": after is not None,
+        "size": st.st_size,
+    }
@@ -22,14 +22,12 @@ Design goals:
 from __future__ import annotations
 
 import json
-import os
 import shutil
 import subprocess
 import sys
-import ast
 import re
-import hashlib
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
@@ -37,21 +35,127 @@ from typing import Literal
 
 from app.config import (
     AgentConfig,
-    refresh_runtime_env_from_secrets,
+    runtime_env_from_secrets,
     resolve_user_pending_skills_dir,
     resolve_user_skills_dir,
 )
 
 from app.services.agent.frontmatter import parse_skill_frontmatter
+from app.services.agent.skill_catalog import invalidate_skill_catalog
+from app.services.import_analysis import (
+    STDLIB_MODULES,
+    cache_dir_for as import_cache_dir_for,
+    get_import_analyzer,
+    get_import_index,
+    is_local_import,
+)
+from app.services.skill_fingerprint import EMPTY_DIGEST, fingerprint_tree
+from app.services.skill_venv_store import SkillVenvStore
 
 
 _RESERVED_DIR_NAMES = {"pending", "failed", ".venvs", ".venv", "__pycache__"}
 
 
+_FINGERPRINT_IGNORE_NAMES = {
+    ".venv",
+    "__pycache__",
+    "FAILED.json",
+    "onboarding_report.json",
+    "ONBOARDING_REPORT.md",
+}
+
 def _utc_now_iso() -> str:
     return datetime.now(UTC).isoformat()
 
 
+def dir_fingerprint(root: Path) -> str:
+    """Compute a stable fingerprint of a skill directory.
+
+    Used to decide whether onboarding should re-run when a skill already
+    exists. This is the Merkle root from
+    :func:`app.services.skill_fingerprint.fingerprint_tree`, so unchanged
+    files are not re-read.
+
+    Excludes common runtime artifacts.
+    """
+    if not root.is_dir():
+        return EMPTY_DIGEST
+    return fingerprint_tree(root, ignore=_FINGERPRINT_IGNORE_NAMES).digest
+
+
+def _is_local_import(module: str, skill_dir: Path) -> bool:
+    """Return True if the import looks like a module provided by the skill itself."""
+    root = module.split(".")[0]
+    return bool(root) and is_local_import(root, skill_dir)
+
+
+def extract_python_import_roots(
+    skill_dir: Path,
+    stdlib: set[str] | frozenset[str] = STDLIB_MODULES,
+    *,
+    import_cache_dir: Path | None = None,
+) -> tuple[set[str], list[str]]:
+    """Extract third-party top-level import roots from a skill's *.py files.
+
+    Per-file results are cached by content digest (see
+    :mod:`app.services.import_analysis`), so only new or edited files are
+    parsed again.
+
+    Returns (imports, warnings).
+    """
+    return get_import_analyzer(import_cache_dir).analyze(skill_dir, stdlib)
+
+
+@dataclass(frozen=True)
+class SkillScan:
+    """CPU-bound facts about a pending skill, computed before preflight.
+
+    Attributes:
+        fingerprint: :func:`dir_fingerprint` of the pending skill directory.
+        active_fingerprint: Fingerprint of the installed copy, or None if the
+            skill is not installed yet.
+        imports: Third-party import roots found in the skill's Python files.
+        warnings: Files that could not be read while scanning imports.
+    """
+
+    fingerprint: str
+    active_fingerprint: str | None
+    imports: frozenset[str]
+    warnings: tuple[str, ...] = ()
+
+
+def scan_skill(
+    skill_dir: Path, dest: Path | None = None, import_cache_dir: Path | None = None
+) -> SkillScan:
+    """Fingerprint and import-scan a pending skill.
+
+    Module-level and free of side effects (beyond the import cache) so it can
+    run in a process pool.
+
+    Args:
+        skill_dir: The pending skill directory.
+        dest: Where the skill would be installed; fingerprinted if it exists.
+        import_cache_dir: On-disk import cache shared with the service.
+    """
+    imports, warnings = extract_python_import_roots(skill_dir, import_cache_dir=import_cache_dir)
+    return SkillScan(
+        fingerprint=dir_fingerprint(skill_dir),
+        active_fingerprint=dir_fingerprint(dest) if dest is not None and dest.exists() else None,
+        imports=frozenset(imports),
+        warnings=tuple(warnings),
+    )
+
+
+def _map_bounded[T, R](fn: Callable[[T], R], items: Sequence[T], workers: int) -> list[R]:
+    """``list(map(fn, items))`` across at most ``workers`` threads, in order."""
+    if workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(items)), thread_name_prefix="pending-skill"
+    ) as pool:
+        return list(pool.map(fn, items))
+
+
 @dataclass(frozen=True)
 class PendingSkillCandidate:
     scope: Literal["shared", "user"]
@@ -71,47 +175,21 @@ class PendingSkillService:
 
         # Ensure pending + venv roots exist
         (self.shared_skills_dir / "pending").mkdir(parents=True, exist_ok=True)
-        # NOTE: Per-skill venvs are created on demand during onboarding.
+        # NOTE: Skill venvs are created on demand during onboarding. With the
+        # shared store enabled, a skill's .venv is a symlink into the store.
+        self.venv_store = SkillVenvStore.from_config(config)
+        self.import_cache_dir = import_cache_dir_for(config)
 
     # ---------------------------
     # Utilities
     # ---------------------------
 
     def _dir_fingerprint(self, root: Path) -> str:
-        """Compute a stable fingerprint of a skill directory.
+        return dir_fingerprint(root)
 
-        Used to decide whether onboarding should re-run when a skill already
-        exists.
-
-        Excludes common runtime artifacts.
-        """
-        ignore_names = {
-            ".venv",
-            "__pycache__",
-            "FAILED.json",
-            "onboarding_report.json",
-            "ONBOARDING_REPORT.md",
-        }
-
-        h = hashlib.sha256()
-        if not root.exists() or not root.is_dir():
-            return h.hexdigest()
-
-        for p in sorted(root.rglob("*")):
-            rel = p.relative_to(root)
-            if any(part in ignore_names for part in rel.parts):
-                continue
-            # Avoid hashing extremely large files accidentally.
-            if p.is_file():
-                h.update(str(rel).encode("utf-8"))
-                try:
-                    h.update(p.read_bytes())
-                except Exception:
-                    # If unreadable, include metadata so fingerprint still changes.
-                    h.update(str(p.stat().st_size).encode("utf-8"))
-            elif p.is_dir():
-                h.update((str(rel) + "/").encode("utf-8"))
-        return h.hexdigest()
+    def _onboarding_workers(self) -> int:
+        raw = getattr(self.config, "pending_skills_onboarding_workers", 1)
+        return max(1, raw) if isinstance(raw, int) else 1
 
     def _backup_existing_skill_dir(self, dest: Path) -> Path:
         """Move an existing active skill directory to a backup location."""
@@ -422,8 +500,8 @@ class PendingSkillService:
     # ---------------------------
 
     def _venv_dir(self, candidate: PendingSkillCandidate) -> Path:
-        # Keep the venv inside the skill directory so a move/copy of the skill
-        # also moves/copies its dependencies.
+        # Keep the venv (or the link to the shared one) inside the skill
+        # directory so a move/copy of the skill keeps its dependencies.
         return candidate.skill_dir / ".venv"
 
     def _venv_python(self, venv_dir: Path) -> Path:
@@ -515,6 +593,17 @@ class PendingSkillService:
             deduped.append(r)
         return deduped
 
+    def _runtime_env(self, runtime_user_id: str | None) -> dict[str, str]:
+        """Return the subprocess env for *runtime_user_id* with fresh skill secrets.
+
+        Skills of different users are onboarded in parallel, so this builds a
+        per-call dict instead of refreshing and reading the shared ``os.environ``.
+        """
+        return runtime_env_from_secrets(
+            secrets_path=Path(getattr(self.config, "secrets_path", "secrets.yml")),
+            user_id=runtime_user_id,
+        )
+
     def validate_required_env(
         self, candidate: PendingSkillCandidate, *, runtime_user_id: str | None
     ) -> dict:
@@ -522,16 +611,9 @@ class PendingSkillService:
 
         This does NOT print secret values; it only reports missing keys.
         """
-        # Always refresh from secrets.yml so newly-provided values are visible
+        # Always reload secrets.yml so newly-provided values are visible
         # immediately without server restart.
-        try:
-            refresh_runtime_env_from_secrets(
-                secrets_path=Path(getattr(self.config, "secrets_path", "secrets.yml")),
-                user_id=runtime_user_id,
-            )
-        except Exception:
-            # Never crash validation.
-            pass
+        env = self._runtime_env(runtime_user_id)
 
         data = self._read_skill_frontmatter_data(candidate.skill_dir)
         reqs = self._extract_required_env_from_frontmatter_data(data)
@@ -543,7 +625,7 @@ class PendingSkillService:
             name = r.get("name")
             if not name:
                 continue
-            val = os.environ.get(name)
+            val = env.get(name)
             if val is None or str(val).strip() == "":
                 missing.append(r)
 
@@ -568,14 +650,8 @@ class PendingSkillService:
         if runtime_user_id is None:
             return {"ok": True, "checked": 0, "reason": "no user_id provided"}
 
-        # First, refresh to trigger template rendering
-        try:
-            refresh_runtime_env_from_secrets(
-                secrets_path=Path(getattr(self.config, "secrets_path", "secrets.yml")),
-                user_id=runtime_user_id,
-            )
-        except Exception:
-            pass
+        # First, reload secrets to trigger template rendering
+        self._runtime_env(runtime_user_id)
 
         try:
             user_root = resolve_user_skills_dir(self.config, runtime_user_id, create=True)
@@ -778,132 +854,52 @@ class PendingSkillService:
                 out.append(b)
         return out
 
-    def _stdlib_module_names(self) -> set[str]:
-        # Python 3.10+ provides sys.stdlib_module_names
-        stdlib = getattr(sys, "stdlib_module_names", None)
-        if stdlib:
-            return set(stdlib)
-
-        # Best-effort fallback if running on older Python
-        # (Not expected for this project, but keep it safe.)
-        return {
-            "os",
-            "sys",
-            "json",
-            "re",
-            "pathlib",
-            "typing",
-            "datetime",
-            "time",
-            "subprocess",
-            "shutil",
-            "itertools",
-            "functools",
-            "collections",
-            "math",
-            "statistics",
-            "random",
-            "uuid",
-            "logging",
-            "asyncio",
-        }
+    def _stdlib_module_names(self) -> frozenset[str]:
+        return STDLIB_MODULES
 
     def _is_local_import(self, module: str, skill_dir: Path) -> bool:
         """Return True if the import looks like a module provided by the skill itself."""
-        parts = module.split(".")
-        if not parts:
-            return False
-        root = parts[0]
-
-        # A directory/package in the skill folder
-        if (skill_dir / root).is_dir() and (skill_dir / root / "__init__.py").exists():
-            return True
-
-        # A plain .py module in the skill folder
-        if (skill_dir / f"{root}.py").exists():
-            return True
-
-        return False
+        return _is_local_import(module, skill_dir)
 
     def _extract_python_import_roots(self, skill_dir: Path) -> tuple[set[str], list[str]]:
         """Extract top-level import roots from *.py files.
 
         Returns (imports, warnings).
         """
-        stdlib = self._stdlib_module_names()
-        roots: set[str] = set()
-        warnings: list[str] = []
-
-        for py_file in self._python_files(skill_dir):
-            try:
-                src = py_file.read_text(encoding="utf-8")
-            except Exception as e:
-                warnings.append(f"Failed to read {py_file}: {e}")
-                continue
-
-            try:
-                tree = ast.parse(src, filename=str(py_file))
-            except SyntaxError:
-                # Syntax check is handled elsewhere; don't duplicate here.
-                continue
-
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        name = (alias.name or "").strip()
-                        if not name:
-                            continue
-                        roots.add(name.split(".")[0])
-                elif isinstance(node, ast.ImportFrom):
-                    if node.level and node.level > 0:
-                        # relative import
-                        continue
-                    mod = (node.module or "").strip()
-                    if not mod:
-                        continue
-                    roots.add(mod.split(".")[0])
-
-        # Filter out stdlib and local modules
-        filtered: set[str] = set()
-        for r in roots:
-            if r in stdlib:
-                continue
-            if self._is_local_import(r, skill_dir):
-                continue
-            filtered.add(r)
-
-        return filtered, warnings
+        return extract_python_import_roots(
+            skill_dir, self._stdlib_module_names(), import_cache_dir=self.import_cache_dir
+        )
 
     def _map_import_to_package(self, import_root: str) -> str:
         """Map common import roots to their pip package names.
 
-        This is necessarily heuristic; unknown modules return unchanged.
+        Uses the import index built from installed distribution metadata and
+        a bundled table of well-known mismatches. This is necessarily
+        heuristic; unknown modules return unchanged.
         """
-        mapping = {
-            "yaml": "PyYAML",
-            "PIL": "Pillow",
-            "bs4": "beautifulsoup4",
-            "cv2": "opencv-python",
-            "sklearn": "scikit-learn",
-            "dateutil": "python-dateutil",
-            "Crypto": "pycryptodome",
-            "tqdm": "tqdm",
-        }
-        return mapping.get(import_root, import_root)
+        return get_import_index(self.import_cache_dir).distribution_for(import_root)
 
-    def generate_requirements(self, candidate: PendingSkillCandidate) -> dict:
+    def generate_requirements(
+        self, candidate: PendingSkillCandidate, *, scan: SkillScan | None = None
+    ) -> dict:
         """Generate or refresh requirements.txt by analyzing imports.
 
         Conservative rules:
         - If requirements.txt already exists, we do NOT overwrite by default.
           Instead, we append missing inferred packages under a marker.
         - If no third-party imports are detected, we do not create the file.
+
+        ``scan`` reuses imports found by :func:`scan_skill` instead of
+        re-parsing the skill's Python files.
         """
         enabled = bool(getattr(self.config, "pending_skills_generate_requirements", True))
         if not enabled:
             return {"ok": True, "enabled": False}
 
-        inferred_imports, warnings = self._extract_python_import_roots(candidate.skill_dir)
+        if scan is not None:
+            inferred_imports, warnings = set(scan.imports), list(scan.warnings)
+        else:
+            inferred_imports, warnings = self._extract_python_import_roots(candidate.skill_dir)
         inferred_pkgs = sorted({self._map_import_to_package(x) for x in inferred_imports})
 
         # Also honor declared installs in SKILL.md frontmatter
@@ -1027,6 +1023,9 @@ class PendingSkillService:
 
     def ensure_venv(self, candidate: PendingSkillCandidate) -> dict:
         venv_dir = self._venv_dir(candidate)
+        if venv_dir.is_symlink():
+            # Linked to a read-only shared venv the skill no longer qualifies for.
+            venv_dir.unlink()
         py = self._venv_python(venv_dir)
 
         if py.exists():
@@ -1077,6 +1076,13 @@ class PendingSkillService:
         if not req.exists():
             return {"ok": True, "installed": False, "reason": "no requirements.txt"}
 
+        # Requirements that point into the skill dir (``-e .``, ``./pkg``) are
+        # not shareable and get a private venv.
+        if self.venv_store is not None and self.venv_store.key_for_file(req) is not None:
+            return self._install_into_shared_venv(
+                self.venv_store, candidate, req, runtime_user_id=runtime_user_id
+            )
+
         ensure = self.ensure_venv(candidate)
         if not ensure.get("ok"):
             return {
@@ -1095,15 +1101,7 @@ class PendingSkillService:
 
         timeout = int(getattr(self.config, "pending_skills_pip_timeout_seconds", 180))
 
-        try:
-            refresh_runtime_env_from_secrets(
-                secrets_path=Path(getattr(self.config, "secrets_path", "secrets.yml")),
-                user_id=runtime_user_id,
-            )
-        except Exception:
-            pass
-
-        env = os.environ.copy()
+        env = self._runtime_env(runtime_user_id)
         env.setdefault("PIP_DISABLE_PIP_VERSION_CHECK", "1")
         env.setdefault("PIP_NO_INPUT", "1")
 
@@ -1155,6 +1153,41 @@ class PendingSkillService:
         except Exception as e:
             return {"ok": False, "error": str(e)}
 
+    def _install_into_shared_venv(
+        self,
+        store: SkillVenvStore,
+        candidate: PendingSkillCandidate,
+        req: Path,
+        *,
+        runtime_user_id: str | None,
+    ) -> dict:
+        """Install deps via the shared venv store and link the skill's .venv to it."""
+        timeout = int(getattr(self.config, "pending_skills_pip_timeout_seconds", 180))
+
+        env = self._runtime_env(runtime_user_id)
+        env.setdefault("PIP_DISABLE_PIP_VERSION_CHECK", "1")
+        env.setdefault("PIP_NO_INPUT", "1")
+
+        try:
+            rep = store.acquire(req, env=env, timeout=timeout)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        if not rep.get("ok"):
+            return rep
+
+        venv_dir = self._venv_dir(candidate)
+        try:
+            store.link(venv_dir, Path(rep["venv_dir"]))
+        except Exception as e:
+            return {"ok": False, "error": f"Failed to link shared venv: {e}"}
+        return {
+            "ok": True,
+            "installed": True,
+            "venv_dir": str(venv_dir),
+            "shared_venv": rep["venv_dir"],
+            "reused": rep.get("reused", False),
+        }
+
     # ---------------------------
     # Script smoke test (execution)
     # ---------------------------
@@ -1228,15 +1261,7 @@ class PendingSkillService:
         timeout = int(getattr(self.config, "pending_skills_run_scripts_timeout_seconds", 20))
         py = self._runtime_python(candidate)
 
-        try:
-            refresh_runtime_env_from_secrets(
-                secrets_path=Path(getattr(self.config, "secrets_path", "secrets.yml")),
-                user_id=runtime_user_id,
-            )
-        except Exception:
-            pass
-
-        env = os.environ.copy()
+        env = self._runtime_env(runtime_user_id)
         env.setdefault("PYTHONUNBUFFERED", "1")
         env["STRANDS_PENDING_SKILL_ONBOARDING"] = "1"
 
@@ -1296,6 +1321,7 @@ class PendingSkillService:
         install_deps: bool,
         run_scripts: bool = False,
         runtime_user_id: str | None = None,
+        scan: SkillScan | None = None,
     ) -> dict:
         """Preflight a pending skill.
 
@@ -1346,7 +1372,9 @@ class PendingSkillService:
                 self._write_preflight_reports(candidate, report)
                 return report
 
-            report["steps"]["generate_requirements"] = self.generate_requirements(candidate)
+            report["steps"]["generate_requirements"] = self.generate_requirements(
+                candidate, scan=scan
+            )
             if not report["steps"]["generate_requirements"].get("ok", True):
                 report["ok"] = False
                 self.write_failed(
@@ -1477,29 +1505,25 @@ class PendingSkillService:
         )
 
     def preflight_all(self) -> dict:
-        """Preflight all pending skills found (shared + all users)."""
+        """Preflight all pending skills found (shared + all users).
+
+        Skills are preflighted in parallel, bounded by
+        ``pending_skills_onboarding_workers``.
+        """
         install_deps = bool(getattr(self.config, "pending_skills_preflight_install_deps", True))
         max_skills = int(getattr(self.config, "pending_skills_preflight_max_skills", 200))
 
-        processed = []
-        failures = 0
-
-        # Shared
-        for c in self.list_pending(user_id=None, include_shared=True):
-            if len(processed) >= max_skills:
-                break
-            processed.append(self.preflight(c, install_deps=install_deps, run_scripts=False))
-            if not processed[-1].get("ok"):
-                failures += 1
-
-        # Users
+        candidates = self.list_pending(user_id=None, include_shared=True)
         for uid in self._iter_user_ids():
-            for c in self.list_pending(user_id=uid, include_shared=False):
-                if len(processed) >= max_skills:
-                    break
-                processed.append(self.preflight(c, install_deps=install_deps, run_scripts=False))
-                if not processed[-1].get("ok"):
-                    failures += 1
+            candidates.extend(self.list_pending(user_id=uid, include_shared=False))
+        candidates = candidates[:max_skills]
+
+        processed = _map_bounded(
+            lambda c: self.preflight(c, install_deps=install_deps, run_scripts=False),
+            candidates,
+            self._onboarding_workers(),
+        )
+        failures = sum(1 for rep in processed if not rep.get("ok"))
 
         return {
             "ok": failures == 0,
@@ -1508,6 +1532,35 @@ class PendingSkillService:
             "reports": processed,
         }
 
+    def select_pending(
+        self,
+        *,
+        user_id: str,
+        scope: Literal["user", "shared", "all"] = "all",
+        skill_names: list[str] | None = None,
+    ) -> list[PendingSkillCandidate]:
+        """Pending skills that an onboarding run for ``user_id`` would process."""
+        candidates: list[PendingSkillCandidate] = []
+        if scope in ("shared", "all"):
+            candidates.extend(self.list_pending(user_id=None, include_shared=True))
+        if scope in ("user", "all"):
+            candidates.extend(self.list_pending(user_id=user_id, include_shared=False))
+
+        if skill_names:
+            wanted = {s.strip() for s in skill_names if (s or "").strip()}
+            if wanted:
+                candidates = [c for c in candidates if c.skill_name in wanted]
+        return candidates
+
+    def destination_for(self, candidate: PendingSkillCandidate, user_id: str) -> Path:
+        """Active skill directory a pending skill is promoted into."""
+        if candidate.scope == "shared":
+            return self.shared_skills_dir / candidate.skill_name
+        target_user_id = candidate.user_id or user_id
+        return resolve_user_skills_dir(self.config, target_user_id, create=True) / (
+            candidate.skill_name
+        )
+
     def onboard_pending(
         self,
         *,
@@ -1523,166 +1576,155 @@ class PendingSkillService:
         - scope=user: only {user_id}/pending
         - scope=shared: only shared/pending
         - scope=all: both
+
+        Skills are onboarded in parallel, bounded by
+        ``pending_skills_onboarding_workers``. For a non-blocking, resumable
+        run with progress updates see
+        :class:`app.services.skill_onboarding_jobs.SkillOnboardingEngine`.
         """
-        include_shared = scope in ("shared", "all")
-        include_user = scope in ("user", "all")
+        candidates = self.select_pending(user_id=user_id, scope=scope, skill_names=skill_names)
+        results = _map_bounded(
+            lambda c: self.onboard_candidate(
+                c,
+                user_id=user_id,
+                dry_run=dry_run,
+                install_deps=install_deps,
+                run_scripts=run_scripts,
+            ),
+            candidates,
+            self._onboarding_workers(),
+        )
+        return self.summarize_onboarding(results)
 
-        candidates: list[PendingSkillCandidate] = []
-        if include_shared:
-            candidates.extend(self.list_pending(user_id=None, include_shared=True))
-        if include_user:
-            candidates.extend(self.list_pending(user_id=user_id, include_shared=False))
+    @staticmethod
+    def summarize_onboarding(results: list[dict]) -> dict:
+        """Aggregate per-skill results from :meth:`onboard_candidate`."""
+        counts = {"onboarded": 0, "failed": 0, "skipped": 0}
+        for r in results:
+            if r.get("status") in counts:
+                counts[r["status"]] += 1
 
-        if skill_names:
-            wanted = {s.strip() for s in skill_names if (s or "").strip()}
-            if wanted:
-                candidates = [c for c in candidates if c.skill_name in wanted]
+        if counts["onboarded"]:
+            # Shared promotions reach users via sync; user promotions land
+            # directly in their skills dir. Either way, rescan everything.
+            invalidate_skill_catalog()
 
-        results = []
-        onboarded = 0
-        failed = 0
-        skipped = 0
+        return {
+            "ok": counts["failed"] == 0,
+            **counts,
+            "total": len(results),
+            "results": results,
+        }
 
-        for c in candidates:
-            # Determine destination early; if it already exists, skip without
-            # writing FAILED.json (already-installed is not a failure).
-            if c.scope == "shared":
-                dest = self.shared_skills_dir / c.skill_name
+    def onboard_candidate(
+        self,
+        c: PendingSkillCandidate,
+        *,
+        user_id: str,
+        dry_run: bool = False,
+        install_deps: bool = True,
+        run_scripts: bool = True,
+        scan: SkillScan | None = None,
+    ) -> dict:
+        """Preflight and promote one pending skill.
+
+        Args:
+            c: The pending skill.
+            user_id: User running the onboarding (runtime env for preflight).
+            dry_run: Validate only; no installs, script runs or promotion.
+            install_deps: Install the skill's requirements.
+            run_scripts: Smoke-test the skill's scripts.
+            scan: Precomputed :func:`scan_skill` result, if available.
+
+        Returns:
+            Result dict with ``candidate`` and ``status`` (``onboarded``,
+            ``skipped``, ``failed`` or ``dry-run``) plus details.
+        """
+        # Determine destination early; if it already exists, skip without
+        # writing FAILED.json (already-installed is not a failure).
+        dest = self.destination_for(c, user_id)
+        updating = dest.exists()
+
+        if updating:
+            # If the pending skill differs from the installed one, re-onboard
+            # and replace (with backup). Otherwise, skip as up-to-date.
+            if scan is not None and scan.active_fingerprint is not None:
+                pending_fp, active_fp = scan.fingerprint, scan.active_fingerprint
             else:
-                target_user_id = c.user_id or user_id
-                dest = (
-                    resolve_user_skills_dir(self.config, target_user_id, create=True) / c.skill_name
-                )
-
-            if dest.exists():
-                # If the pending skill differs from the installed one, re-onboard
-                # and replace (with backup). Otherwise, skip as up-to-date.
                 pending_fp = self._dir_fingerprint(c.skill_dir)
                 active_fp = self._dir_fingerprint(dest)
 
-                if pending_fp == active_fp:
-                    # Best-effort: don't leave stale failure markers behind
-                    self.clear_failed(c)
-                    results.append(
-                        {
-                            "candidate": c.skill_name,
-                            "status": "skipped",
-                            "reason": "already up-to-date",
-                            "path": str(dest),
-                        }
-                    )
-                    skipped += 1
-                    continue
-
-                # Changed skill -> run onboarding again
-                pf = self.preflight(
-                    c,
-                    install_deps=(install_deps and (not dry_run)),
-                    run_scripts=(run_scripts and (not dry_run)),
-                    runtime_user_id=user_id,
-                )
-                if not pf.get("ok"):
-                    results.append({"candidate": c.skill_name, "status": "failed", "report": pf})
-                    failed += 1
-                    continue
-
-                if dry_run:
-                    results.append(
-                        {
-                            "candidate": c.skill_name,
-                            "status": "dry-run",
-                            "would_update": str(dest),
-                        }
-                    )
-                    continue
-
-                try:
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    backup = self._backup_existing_skill_dir(dest)
-                    shutil.move(str(c.skill_dir), str(dest))
-                    onboarded += 1
-                    results.append(
-                        {
-                            "candidate": c.skill_name,
-                            "status": "onboarded",
-                            "path": str(dest),
-                            "updated": True,
-                            "backup": str(backup),
-                        }
-                    )
-                except Exception as e:
-                    failed += 1
-                    if c.skill_dir.exists():
-                        self.write_failed(c, stage="promotion", error=str(e))
-                    results.append({"candidate": c.skill_name, "status": "failed", "error": str(e)})
-                continue
+            if pending_fp == active_fp:
+                # Best-effort: don't leave stale failure markers behind
+                self.clear_failed(c)
+                return {
+                    "candidate": c.skill_name,
+                    "status": "skipped",
+                    "reason": "already up-to-date",
+                    "path": str(dest),
+                }
 
-            # Preflight.
-            # - dry_run should avoid side effects like dependency installation and script execution.
-            # - real onboarding performs deps install + script smoke test.
-            pf = self.preflight(
-                c,
-                install_deps=(install_deps and (not dry_run)),
-                run_scripts=(run_scripts and (not dry_run)),
-                runtime_user_id=user_id,
-            )
-            if not pf.get("ok"):
-                results.append({"candidate": c.skill_name, "status": "failed", "report": pf})
-                failed += 1
-                continue
+        # Preflight (changed or new skill).
+        # - dry_run should avoid side effects like dependency installation and script execution.
+        # - real onboarding performs deps install + script smoke test.
+        pf = self.preflight(
+            c,
+            install_deps=(install_deps and (not dry_run)),
+            run_scripts=(run_scripts and (not dry_run)),
+            runtime_user_id=user_id,
+            scan=scan,
+        )
+        if not pf.get("ok"):
+            return {"candidate": c.skill_name, "status": "failed", "report": pf}
 
-            if dry_run:
-                results.append(
-                    {"candidate": c.skill_name, "status": "dry-run", "would_move_to": str(dest)}
-                )
-                continue
+        if dry_run:
+            if updating:
+                return {"candidate": c.skill_name, "status": "dry-run", "would_update": str(dest)}
+            return {"candidate": c.skill_name, "status": "dry-run", "would_move_to": str(dest)}
 
-            try:
-                dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if updating:
+                backup = self._backup_existing_skill_dir(dest)
                 shutil.move(str(c.skill_dir), str(dest))
-                onboarded += 1
-                results.append(
-                    {"candidate": c.skill_name, "status": "onboarded", "path": str(dest)}
+                return {
+                    "candidate": c.skill_name,
+                    "status": "onboarded",
+                    "path": str(dest),
+                    "updated": True,
+                    "backup": str(backup),
+                }
+            shutil.move(str(c.skill_dir), str(dest))
+            return {"candidate": c.skill_name, "status": "onboarded", "path": str(dest)}
+        except Exception as e:
+            # write FAILED.json in the *source* if it still exists, else create failure marker in dest parent
+            if c.skill_dir.exists():
+                self.write_failed(c, stage="promotion", error=str(e))
+            elif not updating:
+                # best-effort: recreate marker in a fallback location
+                fallback = (
+                    self._pending_dir_shared()
+                    if c.scope == "shared"
+                    else self._pending_dir_user(user_id)
+                ) / c.skill_name
+                fallback.mkdir(parents=True, exist_ok=True)
+                self._failed_path(fallback).write_text(
+                    json.dumps(
+                        {
+                            "status": "failed",
+                            "stage": "promotion",
+                            "error": str(e),
+                            "timestamp": _utc_now_iso(),
+                            "scope": c.scope,
+                            "user_id": c.user_id,
+                            "skill_name": c.skill_name,
+                        },
+                        indent=2,
+                        sort_keys=True,
+                    ),
+                    encoding="utf-8",
                 )
-            except Exception as e:
-                failed += 1
-                # write FAILED.json in the *source* if it still exists, else create failure marker in dest parent
-                if c.skill_dir.exists():
-                    self.write_failed(c, stage="promotion", error=str(e))
-                else:
-                    # best-effort: recreate marker in a fallback location
-                    fallback = (
-                        self._pending_dir_shared()
-                        if c.scope == "shared"
-                        else self._pending_dir_user(user_id)
-                    ) / c.skill_name
-                    fallback.mkdir(parents=True, exist_ok=True)
-                    self._failed_path(fallback).write_text(
-                        json.dumps(
-                            {
-                                "status": "failed",
-                                "stage": "promotion",
-                                "error": str(e),
-                                "timestamp": _utc_now_iso(),
-                                "scope": c.scope,
-                                "user_id": c.user_id,
-                                "skill_name": c.skill_name,
-                            },
-                            indent=2,
-                            sort_keys=True,
-                        ),
-                        encoding="utf-8",
-                    )
-                results.append({"candidate": c.skill_name, "status": "failed", "error": str(e)})
-
-        return {
-            "ok": failed == 0,
-            "onboarded": onboarded,
-            "failed": failed,
-            "skipped": skipped,
-            "total": len(candidates),
-            "results": results,
-        }
+            return {"candidate": c.skill_name, "status": "failed", "error": str(e)}
 
     # ---------------------------
     # Repair installed skills
@@ -1735,4 +1777,5 @@ class PendingSkillService:
         )
         rep["repaired"] = bool(rep.get("ok"))
         rep["skill_dir"] = str(skill_dir)
+        invalidate_skill_catalog(skill_dir)
         return rep
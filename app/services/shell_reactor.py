@@ -0,0 +1,509 @@
+"""Shared reactor for shell tool subprocesses.
+
+The shell tool used to start two reader threads per command and poll
+``proc.poll()`` until the deadline, then escalate a timeout kill with
+blocking ``wait(timeout=2)`` calls. With tens of concurrent tool calls that
+is a lot of threads waking up for nothing. :class:`ShellReactor` runs every
+command on one background thread:
+
+- one selector multiplexes all stdout/stderr pipes and, through
+  ``pidfd_open``, process exits (on systems without pidfds, exits are polled
+  on the same thread);
+- deadlines and SIGTERM -> SIGKILL escalation are timers on that thread, so
+  nothing blocks while a process group dies;
+- each command runs in its own session/process group, which is what gets
+  signalled, so children started by the command go down with it;
+- per-user process groups are tracked so :meth:`ShellReactor.cancel_user`
+  only sends signals and returns;
+- commands can be capped per user and get optional CPU/memory rlimits.
+
+Output callbacks run on the reactor thread inside a copy of the caller's
+context (trace ids etc.), so they must be quick: append to a spool, emit a
+trace event.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 65_536
+# Without pidfds, exits are detected by polling at this interval.
+_POLL_INTERVAL = 0.2
+
+_COMMANDS = REGISTRY.counter(
+    "mordecai_shell_commands_total",
+    "Shell commands run through the shell reactor, by outcome.",
+    ("result",),
+)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX
+    resource = None  # type: ignore[assignment]
+
+
+class ShellBusy(RuntimeError):
+    """The user already runs the maximum number of shell commands."""
+
+
+@dataclass(eq=False)
+class ShellJob:
+    """A command running on the reactor.
+
+    ``returncode`` is set (124 on timeout) before :attr:`done` is set.
+    ``error`` describes why the reactor gave up on the command, if it did.
+    """
+
+    pid: int
+    user_id: str | None
+    deadline: float
+    proc: subprocess.Popen[bytes] = field(repr=False)
+    on_output: Callable[[str, bytes], None] = field(repr=False)
+    context: contextvars.Context = field(repr=False)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    returncode: int | None = None
+    timed_out: bool = False
+    error: str | None = None
+    _exited: bool = field(default=False, repr=False)
+    _streams: dict[int, Any] = field(default_factory=dict, repr=False)
+    _pidfd: int | None = field(default=None, repr=False)
+    _deadline_timer: list[Any] | None = field(default=None, repr=False)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class ShellReactor:
+    """Runs shell commands with one selector thread for all of them.
+
+    Args:
+        kill_grace_seconds: Time between SIGTERM and SIGKILL for a timed-out
+            or cancelled process group.
+        drain_seconds: How long pipes are still read after the command has
+            exited. Pipes held open past that by a background child are
+            closed, as before.
+    """
+
+    def __init__(self, *, kill_grace_seconds: float = 2.0, drain_seconds: float = 1.0) -> None:
+        self.kill_grace_seconds = kill_grace_seconds
+        self.drain_seconds = drain_seconds
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._active: dict[str, int] = {}
+        self._groups: dict[str, set[int]] = {}
+        self._pending: list[Callable[[], None]] = []
+        # Heap of [when, seq, fn]; cancelled timers have fn set to None.
+        self._timers: list[list[Any]] = []
+        self._seq = itertools.count()
+        self._polled: set[ShellJob] = set()
+        self._thread: threading.Thread | None = None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    # -- caller side ---------------------------------------------------------
+
+    def spawn(
+        self,
+        command: str,
+        *,
+        on_output: Callable[[str, bytes], None],
+        timeout_seconds: float,
+        executable: str | None = None,
+        cwd: str | None = None,
+        env: dict[str, str] | None = None,
+        user_id: str | None = None,
+        max_per_user: int = 0,
+        slot_timeout: float | None = None,
+        rlimits: dict[int, int] | None = None,
+    ) -> ShellJob:
+        """Start ``command`` through the shell and return its job.
+
+        Args:
+            command: Shell command line.
+            on_output: Called as ``on_output(stream, data)`` with ``"stdout"``
+                or ``"stderr"`` and raw bytes; ``data == b""`` marks the end
+                of that stream.
+            timeout_seconds: The process group is killed after this long.
+            executable: Shell to run the command with.
+            cwd: Working directory.
+            env: Environment.
+            user_id: Owner, for :meth:`cancel_user` and ``max_per_user``.
+            max_per_user: Concurrent commands allowed per user (0 = no cap).
+            slot_timeout: How long to wait for a free slot.
+            rlimits: ``{resource.RLIMIT_*: limit}`` applied to the shell
+                (and inherited by what it starts).
+
+        Raises:
+            ShellBusy: No slot became free within ``slot_timeout``.
+        """
+        uid = user_id or None
+        if uid:
+            self.acquire_slot(uid, max_per_user, slot_timeout)
+        try:
+            proc = subprocess.Popen(
+                command,
+                shell=True,
+                executable=executable,
+                cwd=cwd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,  # own process group, killed as a whole
+            )
+        except BaseException:
+            if uid:
+                self.release_slot(uid)
+            raise
+        _apply_rlimits(proc.pid, rlimits)
+
+        job = ShellJob(
+            pid=proc.pid,
+            user_id=uid,
+            deadline=time.monotonic() + max(0.001, float(timeout_seconds)),
+            proc=proc,
+            on_output=on_output,
+            context=contextvars.copy_context(),
+        )
+        if uid:
+            self.track(uid, proc.pid)
+        self._call_soon(lambda: self._start(job))
+        return job
+
+    def track(self, user_id: str, pgid: int) -> None:
+        """Record a process group of ``user_id`` for :meth:`cancel_user`.
+
+        Jobs started by :meth:`spawn` are tracked automatically; this is for
+        process groups started elsewhere (e.g. the resident script runner).
+        """
+        with self._lock:
+            self._groups.setdefault(user_id, set()).add(pgid)
+
+    def untrack(self, user_id: str, pgid: int) -> None:
+        with self._lock:
+            groups = self._groups.get(user_id)
+            if groups is not None:
+                groups.discard(pgid)
+                if not groups:
+                    del self._groups[user_id]
+
+    def cancel_user(self, user_id: str) -> bool:
+        """SIGTERM all of ``user_id``'s process groups; SIGKILL follows later.
+
+        Returns:
+            True if a signal was delivered to at least one process group.
+        """
+        with self._lock:
+            pgids = list(self._groups.get(user_id, ()))
+        sent = False
+        for pgid in pgids:
+            sent = self.terminate(pgid) or sent
+        return sent
+
+    def terminate(self, pgid: int) -> bool:
+        """SIGTERM a process group and schedule SIGKILL if it survives."""
+        try:
+            os.killpg(pgid, signal.SIGTERM)
+        except OSError:
+            return False
+        try:
+            os.killpg(pgid, 0)
+        except OSError:
+            return True  # already gone
+        self._call_soon(lambda: self._at(time.monotonic() + self.kill_grace_seconds, _kill(pgid)))
+        return True
+
+    def acquire_slot(self, uid: str, limit: int, timeout: float | None) -> None:
+        """Take one of ``uid``'s ``limit`` concurrent-command slots (0 = no cap).
+
+        :meth:`spawn` does this itself; this is for commands run elsewhere
+        (e.g. the resident script runner). Pair with :meth:`release_slot`.
+
+        Raises:
+            ShellBusy: No slot became free within ``timeout``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._slots:
+            while limit > 0 and self._active.get(uid, 0) >= limit:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ShellBusy(f"{limit} shell commands are already running for this user")
+                self._slots.wait(remaining)
+            self._active[uid] = self._active.get(uid, 0) + 1
+
+    def release_slot(self, uid: str) -> None:
+        with self._slots:
+            left = self._active.get(uid, 0) - 1
+            if left > 0:
+                self._active[uid] = left
+            else:
+                self._active.pop(uid, None)
+            self._slots.notify_all()
+
+    def _call_soon(self, fn: Callable[[], None]) -> None:
+        with self._lock:
+            self._pending.append(fn)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="shell-reactor", daemon=True
+                )
+                self._thread.start()
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+
+    # -- reactor thread ------------------------------------------------------
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self._tick()
+            except Exception:
+                logger.exception("Shell reactor iteration failed")
+
+    def _tick(self) -> None:
+        timeout = None
+        if self._timers:
+            timeout = max(0.0, self._timers[0][0] - time.monotonic())
+        if self._polled:
+            timeout = _POLL_INTERVAL if timeout is None else min(timeout, _POLL_INTERVAL)
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                try:
+                    while os.read(self._wake_r, 4096):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            job, which = key.data
+            if which == "exit":
+                self._reap(job)
+            else:
+                self._read(job, which, key.fd)
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        # One failing callback must not drop the rest of the batch.
+        for fn in pending:
+            self._run_callback(fn)
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            fn = heapq.heappop(self._timers)[2]
+            if fn is not None:
+                self._run_callback(fn)
+        for job in list(self._polled):
+            self._reap(job)
+
+    @staticmethod
+    def _run_callback(fn: Callable[[], None]) -> None:
+        try:
+            fn()
+        except Exception:
+            logger.exception("Shell reactor callback failed")
+
+    def _at(self, when: float, fn: Callable[[], None]) -> list[Any]:
+        entry = [when, next(self._seq), fn]
+        heapq.heappush(self._timers, entry)
+        return entry
+
+    def _start(self, job: ShellJob) -> None:
+        try:
+            self._register(job)
+        except Exception as e:
+            # Unwatched, the job would never finish and would hold its slot.
+            logger.exception("Cannot watch shell command pid %s; killing it", job.pid)
+            self._abort(job, f"shell reactor failed to watch the command: {e}")
+
+    def _abort(self, job: ShellJob, error: str) -> None:
+        job.error = error
+        self._polled.discard(job)
+        for fd in (*job._streams, job._pidfd):
+            if fd is None:
+                continue
+            try:
+                self._selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+        if job._pidfd is not None:
+            os.close(job._pidfd)
+            job._pidfd = None
+        try:
+            os.killpg(job.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        try:
+            job.proc.wait(timeout=self.kill_grace_seconds)
+        except subprocess.TimeoutExpired:
+            pass
+        job._exited = True
+        for fd, stream in list(job._streams.items()):
+            del job._streams[fd]
+            stream.close()
+            self._deliver(job, "stdout" if stream is job.proc.stdout else "stderr", b"")
+        for stream in (job.proc.stdout, job.proc.stderr):
+            if stream is not None:
+                stream.close()
+        self._finish(job)
+
+    def _register(self, job: ShellJob) -> None:
+        for which, stream in (("stdout", job.proc.stdout), ("stderr", job.proc.stderr)):
+            assert stream is not None
+            fd = stream.fileno()
+            os.set_blocking(fd, False)
+            job._streams[fd] = stream
+            self._selector.register(fd, selectors.EVENT_READ, (job, which))
+        try:
+            job._pidfd = os.pidfd_open(job.pid)
+            self._selector.register(job._pidfd, selectors.EVENT_READ, (job, "exit"))
+        except (AttributeError, OSError):
+            self._polled.add(job)
+        job._deadline_timer = self._at(job.deadline, lambda: self._expire(job))
+
+    def _read(self, job: ShellJob, which: str, fd: int) -> None:
+        try:
+            data = os.read(fd, _CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if data:
+            self._deliver(job, which, data)
+        else:
+            self._close_stream(job, fd, which)
+            if job._exited and not job._streams:
+                self._finish(job)
+
+    def _deliver(self, job: ShellJob, which: str, data: bytes) -> None:
+        try:
+            job.context.run(job.on_output, which, data)
+        except Exception:
+            logger.exception("Shell output callback failed for pid %s", job.pid)
+
+    def _close_stream(self, job: ShellJob, fd: int, which: str) -> None:
+        stream = job._streams.pop(fd, None)
+        if stream is None:
+            return
+        self._selector.unregister(fd)
+        stream.close()
+        self._deliver(job, which, b"")
+
+    def _reap(self, job: ShellJob) -> None:
+        if job._exited or job.proc.poll() is None:
+            return
+        job._exited = True
+        self._polled.discard(job)
+        if job._pidfd is not None:
+            self._selector.unregister(job._pidfd)
+            os.close(job._pidfd)
+            job._pidfd = None
+        if job._streams:
+            # Read what is left; a background child keeping the pipes open
+            # does not hold up the result for longer than drain_seconds.
+            self._at(time.monotonic() + self.drain_seconds, lambda: self._finish(job))
+        else:
+            self._finish(job)
+
+    def _expire(self, job: ShellJob) -> None:
+        if job._exited:
+            return
+        job.timed_out = True
+        try:
+            os.killpg(job.pid, signal.SIGTERM)
+        except OSError:
+            pass
+        self._at(time.monotonic() + self.kill_grace_seconds, _kill(job.pid))
+
+    def _finish(self, job: ShellJob) -> None:
+        if job.done.is_set():
+            return
+        if job._deadline_timer is not None:
+            job._deadline_timer[2] = None
+        for fd, stream in list(job._streams.items()):
+            self._close_stream(job, fd, "stdout" if stream is job.proc.stdout else "stderr")
+        if not job._exited:
+            # Only reached via the drain timer, which runs after exit.
+            job.proc.poll()
+        rc = job.proc.returncode
+        if job.timed_out:
+            job.returncode = 124
+        else:
+            job.returncode = 1 if job.error or rc is None else int(rc)
+        _COMMANDS.inc(
+            result="timeout" if job.timed_out else "ok" if job.returncode == 0 else "error"
+        )
+        if job.user_id:
+            self.untrack(job.user_id, job.pid)
+            self.release_slot(job.user_id)
+        job.done.set()
+
+
+def _kill(pgid: int) -> Callable[[], None]:
+    def _sigkill() -> None:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    return _sigkill
+
+
+def _apply_rlimits(pid: int, rlimits: dict[int, int] | None) -> None:
+    """Best-effort ``prlimit`` on a freshly started shell.
+
+    Set from the parent (``preexec_fn`` is not safe with threads); the shell
+    normally has not forked yet, and whatever it starts inherits the limits.
+    """
+    if not rlimits or resource is None or not hasattr(resource, "prlimit"):
+        return
+    for which, limit in rlimits.items():
+        try:
+            resource.prlimit(pid, which, (limit, limit))
+        except (OSError, ValueError):
+            logger.debug("Cannot apply rlimit %s=%s to pid %s", which, limit, pid, exc_info=True)
+
+
+def rlimits_from_config(config: Any) -> dict[int, int]:
+    """``{RLIMIT_*: value}`` from ``shell_memory_limit_mb`` / ``shell_cpu_limit_seconds``."""
+    if resource is None:
+        return {}
+    limits: dict[int, int] = {}
+    memory_mb = getattr(config, "shell_memory_limit_mb", 0)
+    if isinstance(memory_mb, int) and memory_mb > 0:
+        limits[resource.RLIMIT_AS] = memory_mb * 1024 * 1024
+    cpu_seconds = getattr(config, "shell_cpu_limit_seconds", 0)
+    if isinstance(cpu_seconds, int) and cpu_seconds > 0:
+        limits[resource.RLIMIT_CPU] = cpu_seconds
+    return limits
+
+
+_reactor: ShellReactor | None = None
+_reactor_lock = threading.Lock()
+
+
+def get_shell_reactor() -> ShellReactor:
+    """Process-wide :class:`ShellReactor`."""
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = ShellReactor()
+        return _reactor
@@ -0,0 +1,255 @@
+"""Incremental, content-based fingerprints of skill directories.
+
+Onboarding compares a pending skill with its installed copy, and shared-skill
+sync decides whether a user's mirror is stale. Both used to walk the whole
+tree on every call, one of them reading every file fully into memory. Skills
+that ship models, PDFs or ``node_modules`` made that slow and memory-hungry.
+
+:func:`fingerprint_tree` builds a Merkle tree of a directory:
+
+- A file's digest is the SHA-256 of its contents. Contents are streamed in
+  fixed-size blocks; large files are hashed through ``mmap``, so memory use
+  does not grow with file size.
+- Per-file digests are cached in a :class:`FileDigestCache` keyed by
+  ``(inode, mtime_ns, size)``. Unchanged files are never re-hashed, so a
+  repeat fingerprint costs one ``stat`` per file.
+- A directory's digest hashes its sorted ``(kind, name, digest)`` entries.
+  Identical trees under different roots get identical digests, and
+  :func:`diff_trees` walks two trees to report which subtrees changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Collection, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1 << 20
+MMAP_THRESHOLD = 8 << 20
+
+_FILES = REGISTRY.counter(
+    "mordecai_fingerprint_files_total",
+    "Files visited while fingerprinting directories, by whether the digest was cached.",
+    ("result",),
+)
+_BYTES = REGISTRY.counter(
+    "mordecai_fingerprint_bytes_hashed_total",
+    "File bytes read and hashed while fingerprinting directories.",
+)
+
+EMPTY_DIGEST = hashlib.sha256().hexdigest()
+
+# (st_ino, st_mtime_ns, st_size)
+_FileStamp = tuple[int, int, int]
+
+
+def hash_file(path: Path | str, *, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+    """SHA-256 of a file's contents, without loading it whole.
+
+    Files of at least ``mmap_threshold`` bytes are mapped and hashed in
+    place; smaller files are read in :data:`BLOCK_SIZE` blocks into one
+    reused buffer.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size and size >= mmap_threshold:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, BLOCK_SIZE):
+                        h.update(view[offset : offset + BLOCK_SIZE])
+                finally:
+                    view.release()
+        else:
+            buf = bytearray(min(BLOCK_SIZE, max(size, 1)))
+            view = memoryview(buf)
+            while n := fh.readinto(buf):
+                h.update(view[:n])
+        _BYTES.inc(size)
+    return h.hexdigest()
+
+
+class FileDigestCache:
+    """Thread-safe LRU of file digests keyed by path and ``(inode, mtime_ns, size)``."""
+
+    def __init__(self, max_entries: int = 200_000) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[_FileStamp, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def digest(self, path: str, st: os.stat_result, *, mmap_threshold: int = MMAP_THRESHOLD) -> str:
+        """Digest of ``path`` whose current ``stat`` is ``st``, hashing only on a miss."""
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._entries.move_to_end(path)
+                _FILES.inc(result="cached")
+                return cached[1]
+
+        digest = hash_file(path, mmap_threshold=mmap_threshold)
+        _FILES.inc(result="hashed")
+        with self._lock:
+            self._entries[path] = (stamp, digest)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return digest
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache = FileDigestCache()
+
+
+def get_digest_cache() -> FileDigestCache:
+    """Return the process-wide file digest cache."""
+    return _default_cache
+
+
+@dataclass(frozen=True, slots=True)
+class TreeNode:
+    """One node of a directory Merkle tree.
+
+    Attributes:
+        kind: ``file``, ``dir`` or ``link`` (symlinks are not followed; their
+            target string is hashed).
+        digest: Hex SHA-256 of the file contents, link target or directory
+            listing.
+        children: Child nodes by name (directories only).
+    """
+
+    kind: Literal["file", "dir", "link"]
+    digest: str
+    children: dict[str, TreeNode] = field(default_factory=dict)
+
+    def walk(self, prefix: str = "") -> Iterator[tuple[str, TreeNode]]:
+        """Yield ``(relative path, node)`` for every descendant."""
+        for name, child in self.children.items():
+            rel = f"{prefix}{name}"
+            yield rel, child
+            yield from child.walk(f"{rel}/")
+
+    def summary(self) -> dict[str, Any]:
+        """Root digest plus top-level child digests, for storing in manifests."""
+        return {
+            "kind": "tree",
+            "digest": self.digest,
+            "children": {name: child.digest for name, child in self.children.items()},
+        }
+
+
+def _dir_digest(children: dict[str, TreeNode]) -> str:
+    h = hashlib.sha256()
+    for name in sorted(children):
+        child = children[name]
+        h.update(f"{child.kind}\0{name}\0{child.digest}\n".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+def fingerprint_tree(
+    root: Path,
+    *,
+    ignore: Collection[str] = (),
+    cache: FileDigestCache | None = None,
+    mmap_threshold: int = MMAP_THRESHOLD,
+) -> TreeNode:
+    """Build the Merkle tree of ``root``.
+
+    Args:
+        root: Directory (or single file) to fingerprint.
+        ignore: Entry names skipped at any depth (e.g. ``.venv``).
+        cache: Digest cache; defaults to the process-wide one.
+        mmap_threshold: Files at least this large are hashed via ``mmap``.
+
+    Returns:
+        The root node. A missing root yields an empty directory node.
+    """
+    cache = cache if cache is not None else _default_cache
+    try:
+        st = root.stat()
+    except OSError:
+        return TreeNode("dir", _dir_digest({}))
+    if not root.is_dir():
+        return TreeNode("file", cache.digest(str(root), st, mmap_threshold=mmap_threshold))
+    return _fingerprint_dir(str(root), frozenset(ignore), cache, mmap_threshold)
+
+
+def _fingerprint_dir(
+    path: str, ignore: frozenset[str], cache: FileDigestCache, mmap_threshold: int
+) -> TreeNode:
+    children: dict[str, TreeNode] = {}
+    try:
+        entries = list(os.scandir(path))
+    except OSError as e:
+        logger.debug("Cannot list %s while fingerprinting: %s", path, e)
+        entries = []
+
+    for entry in entries:
+        if entry.name in ignore:
+            continue
+        try:
+            if entry.is_symlink():
+                children[entry.name] = TreeNode(
+                    "link", hashlib.sha256(os.fsencode(os.readlink(entry.path))).hexdigest()
+                )
+            elif entry.is_dir():
+                children[entry.name] = _fingerprint_dir(entry.path, ignore, cache, mmap_threshold)
+            elif entry.is_file():
+                digest = cache.digest(entry.path, entry.stat(), mmap_threshold=mmap_threshold)
+                children[entry.name] = TreeNode("file", digest)
+        except OSError:
+            # Unreadable entry: record its presence so the tree still changes
+            # when it appears or disappears.
+            children[entry.name] = TreeNode("file", hashlib.sha256(b"\0unreadable").hexdigest())
+
+    return TreeNode("dir", _dir_digest(children), children)
+
+
+def diff_trees(old: TreeNode | None, new: TreeNode | None, prefix: str = "") -> list[str]:
+    """Relative paths of the smallest subtrees that differ between two trees.
+
+    Added, removed and changed entries are reported; a changed directory is
+    descended into rather than reported whole.
+    """
+    if old is None or new is None:
+        return [prefix.rstrip("/") or "."] if old is not new else []
+    if old.digest == new.digest and old.kind == new.kind:
+        return []
+    if old.kind != "dir" or new.kind != "dir":
+        return [prefix.rstrip("/") or "."]
+
+    changed: list[str] = []
+    for name in sorted(old.children.keys() | new.children.keys()):
+        a, b = old.children.get(name), new.children.get(name)
+        if a is None or b is None:
+            changed.append(f"{prefix}{name}")
+        else:
+            changed.extend(diff_trees(a, b, f"{prefix}{name}/"))
+    return changed
+
+
+def changed_children(old: dict[str, Any] | None, new: dict[str, Any]) -> list[str]:
+    """Top-level entries that differ between two :meth:`TreeNode.summary` dicts."""
+    before = (old or {}).get("children") or {}
+    after = new.get("children") or {}
+    return sorted(
+        name for name in before.keys() | after.keys() if before.get(name) != after.get(name)
+    )
@@ -0,0 +1,482 @@
+"""Background, resumable onboarding jobs for pending skills.
+
+:meth:`PendingSkillService.onboard_pending` blocks its caller until every
+skill has been validated, installed, smoke-tested and promoted. From an agent
+tool that ties up the agent's thread for minutes. :class:`SkillOnboardingEngine`
+runs the same per-skill pipeline
+(:meth:`PendingSkillService.onboard_candidate`) as a job:
+
+- CPU-bound scanning (directory fingerprints, import AST scans) runs in a
+  small process pool, outside the GIL.
+- Skills are onboarded concurrently on a bounded thread pool that is shared
+  by all jobs, so venv builds, installs and smoke tests overlap.
+- Each skill's progress is persisted to
+  ``<state_dir>/<job_id>/skills/<scope>--<owner>--<skill>.json``. A job
+  interrupted by a restart can be resumed; skills whose previous attempt
+  failed (or was a dry run) and whose files have not changed since are not
+  retried.
+- Progress lines go to an ``on_progress`` callback (the tools wire this to
+  ``send_progress``), and callers poll :meth:`SkillOnboardingEngine.status`
+  or await :meth:`SkillOnboardingEngine.run`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from app.observability.loop_monitor import register_executor
+from app.observability.metrics import REGISTRY
+from app.services.pending_skill_service import (
+    PendingSkillCandidate,
+    PendingSkillService,
+    SkillScan,
+    dir_fingerprint,
+    scan_skill,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_FILE = "job.json"
+
+# Per-skill outcomes that are reused when a job is resumed and the skill's
+# files are unchanged. Onboarded skills have left pending/ and up-to-date
+# skips are cheap to recompute.
+_REUSABLE_STATUSES = frozenset({"failed", "dry-run"})
+
+_SKILLS = REGISTRY.counter(
+    "mordecai_skill_onboarding_skills_total",
+    "Skills processed by background onboarding jobs, by outcome.",
+    ("status",),
+)
+
+ProgressCallback = Callable[[str], Any]
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def _write_json(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    try:
+        tmp.write_text(json.dumps(payload, indent=2, sort_keys=True, default=str), "utf-8")
+        os.replace(tmp, path)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        logger.warning("Failed to write onboarding state %s", path, exc_info=True)
+
+
+def _read_json(path: Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def skill_key(candidate: PendingSkillCandidate) -> str:
+    """Stable, filename-safe identifier of a pending skill within a job."""
+    return f"{candidate.scope}--{candidate.user_id or '_'}--{candidate.skill_name}"
+
+
+@dataclass
+class OnboardingJob:
+    """One onboarding run and its per-skill state.
+
+    Attributes:
+        job_id: Identifier used for status lookups and resume.
+        user_id: User the job runs for (runtime env, user-scope skills).
+        options: ``scope``, ``dry_run``, ``skill_names``, ``install_deps`` and
+            ``run_scripts``, as for :meth:`PendingSkillService.onboard_pending`.
+        state_dir: Directory holding ``job.json`` and the skill state files.
+        status: ``running``, ``done`` or ``error``.
+        skills: Skill key -> persisted state (``status``, ``fingerprint``,
+            ``result``).
+        summary: :meth:`PendingSkillService.summarize_onboarding` output once
+            the job has finished.
+    """
+
+    job_id: str
+    user_id: str
+    options: dict[str, Any]
+    state_dir: Path
+    status: str = "running"
+    created_at: str = field(default_factory=_now)
+    finished_at: str | None = None
+    error: str | None = None
+    skills: dict[str, dict[str, Any]] = field(default_factory=dict)
+    summary: dict[str, Any] | None = None
+    future: Future | None = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-safe view of the job (what ``job.json`` holds)."""
+        with self._lock:
+            counts: dict[str, int] = {}
+            for state in self.skills.values():
+                counts[state["status"]] = counts.get(state["status"], 0) + 1
+            return {
+                "job_id": self.job_id,
+                "user_id": self.user_id,
+                "options": self.options,
+                "status": self.status,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "counts": counts,
+                "skills": {
+                    key: {"skill": state.get("skill"), "status": state.get("status")}
+                    for key, state in self.skills.items()
+                },
+                "summary": self.summary,
+            }
+
+    def set_skill(self, key: str, **state: Any) -> dict[str, Any]:
+        with self._lock:
+            merged = {**self.skills.get(key, {}), **state, "updated_at": _now()}
+            self.skills[key] = merged
+        _write_json(self.state_dir / "skills" / f"{key}.json", merged)
+        return merged
+
+    def persist(self) -> None:
+        _write_json(self.state_dir / JOB_FILE, self.snapshot())
+
+
+class SkillOnboardingEngine:
+    """Runs onboarding jobs for one :class:`PendingSkillService`."""
+
+    def __init__(
+        self,
+        service: PendingSkillService,
+        *,
+        workers: int = 4,
+        scan_processes: int = 2,
+        state_dir: Path | None = None,
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+            service: Service whose per-skill pipeline the jobs run.
+            workers: Skills onboarded concurrently, across all jobs.
+            scan_processes: Processes for fingerprinting and import scanning;
+                0 scans on the job thread.
+            state_dir: Root for job state. Defaults to
+                ``<skills_base_dir>/.onboarding-jobs``.
+        """
+        self.service = service
+        self.state_dir = state_dir or service.skills_base_dir / ".onboarding-jobs"
+        self.scan_processes = max(0, scan_processes)
+        self._workers = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="skill-onboard"
+        )
+        self._drivers = ThreadPoolExecutor(max_workers=2, thread_name_prefix="skill-onboard-job")
+        register_executor("skill_onboarding", self._workers)
+        self._scan_pool: ProcessPoolExecutor | None = None
+        self._scan_pool_broken = False
+        self._jobs: dict[str, OnboardingJob] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_service(cls, service: PendingSkillService) -> SkillOnboardingEngine:
+        """Build an engine from the service's ``pending_skills_*`` settings."""
+        config = service.config
+        workers = getattr(config, "pending_skills_onboarding_workers", 4)
+        procs = getattr(config, "pending_skills_scan_processes", 2)
+        raw_dir = getattr(config, "pending_skills_job_state_dir", None)
+        return cls(
+            service,
+            workers=workers if isinstance(workers, int) else 4,
+            scan_processes=procs if isinstance(procs, int) else 2,
+            state_dir=Path(raw_dir).expanduser() if isinstance(raw_dir, str) and raw_dir else None,
+        )
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+
+    def start(
+        self,
+        *,
+        user_id: str,
+        scope: Literal["user", "shared", "all"] = "all",
+        dry_run: bool = False,
+        skill_names: list[str] | None = None,
+        install_deps: bool = True,
+        run_scripts: bool = True,
+        on_progress: ProgressCallback | None = None,
+    ) -> OnboardingJob:
+        """Start onboarding in the background and return the job.
+
+        If ``user_id`` already has a running job, that job is returned
+        instead of starting a second one over the same pending folders.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.user_id == user_id and not job.done:
+                    return job
+            job_id = uuid.uuid4().hex[:12]
+            job = OnboardingJob(
+                job_id=job_id,
+                user_id=user_id,
+                options={
+                    "scope": scope,
+                    "dry_run": dry_run,
+                    "skill_names": skill_names,
+                    "install_deps": install_deps,
+                    "run_scripts": run_scripts,
+                },
+                state_dir=self.state_dir / job_id,
+            )
+            self._jobs[job.job_id] = job
+        job.persist()
+        job.future = self._drivers.submit(self._execute, job, on_progress)
+        return job
+
+    def resume(self, job_id: str, *, on_progress: ProgressCallback | None = None) -> OnboardingJob:
+        """Re-run an interrupted or finished job with its original options.
+
+        Skills whose recorded attempt failed (or was a dry run) and whose
+        files are unchanged keep that result; everything else runs again.
+
+        Raises:
+            KeyError: No state exists for ``job_id``.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not job.done:
+                return job
+            state_dir = self.state_dir / job_id
+            data = _read_json(state_dir / JOB_FILE)
+            if data is None:
+                raise KeyError(job_id)
+            skills = {}
+            for path in sorted((state_dir / "skills").glob("*.json")):
+                state = _read_json(path)
+                if state is not None:
+                    skills[path.stem] = state
+            job = OnboardingJob(
+                job_id=job_id,
+                user_id=str(data.get("user_id") or ""),
+                options=dict(data.get("options") or {}),
+                state_dir=state_dir,
+                created_at=str(data.get("created_at") or _now()),
+                skills=skills,
+            )
+            self._jobs[job_id] = job
+        job.persist()
+        job.future = self._drivers.submit(self._execute, job, on_progress)
+        return job
+
+    def get(self, job_id: str) -> OnboardingJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> dict[str, Any] | None:
+        """Snapshot of a job, from memory or (after a restart) from disk.
+
+        A job that was running when the process stopped is reported with
+        status ``interrupted``.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        data = _read_json(self.state_dir / job_id / JOB_FILE)
+        if data is not None and data.get("status") == "running":
+            data["status"] = "interrupted"
+        return data
+
+    async def run(self, **kwargs: Any) -> dict[str, Any]:
+        """Start a job (see :meth:`start`) and await its summary."""
+        job = self.start(**kwargs)
+        assert job.future is not None
+        return await asyncio.wrap_future(job.future)
+
+    def shutdown(self, *, wait: bool = False) -> None:
+        """Stop accepting work and release pools."""
+        self._drivers.shutdown(wait=wait, cancel_futures=True)
+        self._workers.shutdown(wait=wait, cancel_futures=True)
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown(wait=wait, cancel_futures=True)
+            self._scan_pool = None
+
+    # ---------------------------
+    # Execution
+    # ---------------------------
+
+    def _execute(self, job: OnboardingJob, on_progress: ProgressCallback | None) -> dict:
+        def progress(message: str) -> None:
+            if on_progress is None:
+                return
+            try:
+                on_progress(message)
+            except Exception:
+                logger.debug("Onboarding progress callback failed", exc_info=True)
+
+        try:
+            summary = self._run_job(job, progress)
+        except Exception as e:
+            logger.exception("Onboarding job %s failed", job.job_id)
+            with job._lock:
+                job.status = "error"
+                job.error = str(e)
+                job.finished_at = _now()
+            job.persist()
+            progress(f"Skill onboarding failed: {e}")
+            raise
+
+        with job._lock:
+            job.summary = summary
+            job.status = "done"
+            job.finished_at = _now()
+        job.persist()
+        progress(
+            f"Skill onboarding done: {summary['onboarded']} onboarded, "
+            f"{summary['skipped']} skipped, {summary['failed']} failed"
+        )
+        return summary
+
+    def _run_job(self, job: OnboardingJob, progress: Callable[[str], None]) -> dict:
+        opts = job.options
+        candidates = self.service.select_pending(
+            user_id=job.user_id,
+            scope=opts.get("scope", "all"),
+            skill_names=opts.get("skill_names"),
+        )
+        total = len(candidates)
+        if not total:
+            return self.service.summarize_onboarding([])
+        progress(f"Scanning {total} pending skill(s)...")
+
+        dests = [self.service.destination_for(c, job.user_id) for c in candidates]
+        scans = self._scan_all(candidates, dests)
+
+        results: list[dict | None] = [None] * total
+        futures: dict[Future, int] = {}
+        for i, (candidate, scan) in enumerate(zip(candidates, scans, strict=True)):
+            key = skill_key(candidate)
+            prior = job.skills.get(key)
+            if (
+                prior is not None
+                and prior.get("status") in _REUSABLE_STATUSES
+                and prior.get("fingerprint") == scan.fingerprint
+                and isinstance(prior.get("result"), dict)
+            ):
+                results[i] = {**prior["result"], "resumed": True}
+                continue
+            job.set_skill(key, skill=candidate.skill_name, status="queued", result=None)
+            futures[self._workers.submit(self._onboard_one, job, candidate, scan)] = i
+
+        finished = total - len(futures)
+        if finished:
+            progress(f"Resumed job {job.job_id}: {finished}/{total} skill(s) unchanged")
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                logger.exception("Onboarding %s crashed", candidates[i].skill_name)
+                results[i] = {
+                    "candidate": candidates[i].skill_name,
+                    "status": "failed",
+                    "error": str(e),
+                }
+                job.set_skill(skill_key(candidates[i]), status="failed", result=results[i])
+            finished += 1
+            progress(
+                f"Onboarding skills {finished}/{total}: "
+                f"{results[i]['candidate']} {results[i]['status']}"
+            )
+
+        return self.service.summarize_onboarding([r for r in results if r is not None])
+
+    def _onboard_one(
+        self, job: OnboardingJob, candidate: PendingSkillCandidate, scan: SkillScan
+    ) -> dict:
+        key = skill_key(candidate)
+        job.set_skill(key, status="running")
+        opts = job.options
+        result = self.service.onboard_candidate(
+            candidate,
+            user_id=job.user_id,
+            dry_run=bool(opts.get("dry_run", False)),
+            install_deps=bool(opts.get("install_deps", True)),
+            run_scripts=bool(opts.get("run_scripts", True)),
+            scan=scan,
+        )
+        status = str(result.get("status"))
+        # Fingerprint what a resume will compare against: preflight may have
+        # rewritten SKILL.md or generated requirements.txt.
+        fingerprint = dir_fingerprint(candidate.skill_dir) if candidate.skill_dir.exists() else None
+        job.set_skill(key, status=status, fingerprint=fingerprint, result=result)
+        _SKILLS.inc(status=status)
+        return result
+
+    def _scan_all(
+        self, candidates: list[PendingSkillCandidate], dests: list[Path]
+    ) -> list[SkillScan]:
+        pool = self._get_scan_pool()
+        cache_dirs = [getattr(self.service, "import_cache_dir", None)] * len(candidates)
+        if pool is not None:
+            try:
+                return list(
+                    pool.map(scan_skill, [c.skill_dir for c in candidates], dests, cache_dirs)
+                )
+            except Exception:
+                logger.warning("Skill scan pool failed; scanning in-thread", exc_info=True)
+                self._scan_pool_broken = True
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._scan_pool = None
+        return [
+            scan_skill(c.skill_dir, d, cache_dir)
+            for c, d, cache_dir in zip(candidates, dests, cache_dirs, strict=True)
+        ]
+
+    def _get_scan_pool(self) -> ProcessPoolExecutor | None:
+        if self.scan_processes <= 0 or self._scan_pool_broken:
+            return None
+        with self._lock:
+            if self._scan_pool is None:
+                try:
+                    # forkserver: never fork() this multi-threaded process.
+                    self._scan_pool = ProcessPoolExecutor(
+                        max_workers=self.scan_processes,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                    )
+                except Exception:
+                    logger.warning("Process pool unavailable; scanning in-thread", exc_info=True)
+                    self._scan_pool_broken = True
+            return self._scan_pool
+
+
+_engines: weakref.WeakKeyDictionary[PendingSkillService, SkillOnboardingEngine] = (
+    weakref.WeakKeyDictionary()
+)
+_engines_lock = threading.Lock()
+
+
+def get_onboarding_engine(service: PendingSkillService) -> SkillOnboardingEngine:
+    """Return the engine for ``service``, creating it on first use."""
+    with _engines_lock:
+        engine = _engines.get(service)
+        if engine is None:
+            engine = SkillOnboardingEngine.from_service(service)
+            _engines[service] = engine
+        return engine
@@ -0,0 +1,319 @@
+"""Fork server for the resident skill script runner.
+
+Started by :mod:`app.services.skill_script_runner` under a skill's own Python
+interpreter (usually ``<skill>/.venv/bin/python``), so this file must only
+use the standard library and must not import ``app``.
+
+The zygote keeps third-party modules imported and forks one child per script
+run. Each child gets a fresh process of its own: a new session/process group,
+the task's cwd, environment and ``sys.argv``, stdout/stderr redirected to
+spool files, and optionally resource limits (``rlimits`` as
+``[[RLIMIT_*, value], ...]``; ``memory_limit_mb`` caps ``RLIMIT_AS``). The script runs as
+``__main__``, as ``python script.py`` would. After each run the child
+reports the top-level modules it imported, and the zygote preloads them so
+later forks skip that import cost. A preloaded module that a file in the
+script's directory would shadow is dropped from the child before the script
+runs, so skills sharing an interpreter still import their own local modules.
+
+Protocol: JSON lines. Requests arrive on stdin, events go to stdout:
+
+- ``{"event": "ready", "pid", "path"}`` once started
+- ``{"op": "run", "id", "script", "argv0", "argv", "cwd", "env", "stdout",
+  "stderr", "report", "memory_limit_mb", "rlimits"}`` ->
+  ``{"event": "started", "id", "pid"}`` then
+  ``{"event": "exit", "id", "returncode"}``
+- ``{"event": "retire", "reason"}`` when preloading started threads, which
+  makes further forks unsafe; the parent then stops sending work.
+
+The zygote exits when stdin closes and all children have been reaped.
+"""
+
+from __future__ import annotations
+
+import atexit
+import builtins
+import errno
+import importlib
+import importlib.machinery
+import json
+import os
+import select
+import signal
+import sys
+import threading
+import traceback
+import types
+
+_code_cache: dict = {}
+
+
+def _send(msg: dict) -> None:
+    data = (json.dumps(msg) + "\n").encode("utf-8")
+    while data:
+        n = os.write(1, data)
+        data = data[n:]
+
+
+def _compile(script: str):
+    """Compile ``script``, cached by ``(path, mtime_ns, size)``; None on error."""
+    try:
+        st = os.stat(script)
+        key = (script, st.st_mtime_ns, st.st_size)
+        code = _code_cache.get(key)
+        if code is None:
+            with open(script, "rb") as fh:
+                code = compile(fh.read(), script, "exec", dont_inherit=True)
+            _code_cache.clear()
+            _code_cache[key] = code
+        return code
+    except Exception:
+        # Let the child compile again and report the error on its stderr.
+        return None
+
+
+def _under(path: str | None, roots: list[str]) -> bool:
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    return any(path == r or path.startswith(r.rstrip(os.sep) + os.sep) for r in roots)
+
+
+def _exit_code(exc: SystemExit) -> int:
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _drop_shadowed(path_dir: str, names: set[str]) -> None:
+    """Forget preloaded modules that a module or package in ``path_dir`` shadows."""
+    try:
+        entries = set(os.listdir(path_dir))
+    except OSError:
+        return
+    suffixes = importlib.machinery.all_suffixes()
+    for name in names:
+        if name not in sys.modules:
+            continue
+        package = name in entries and os.path.isfile(os.path.join(path_dir, name, "__init__.py"))
+        if package or any(name + suffix in entries for suffix in suffixes):
+            for mod in [m for m in sys.modules if m == name or m.startswith(name + ".")]:
+                del sys.modules[mod]
+
+
+def _child(req: dict, code, wakeup_fds: tuple[int, int], preloaded: set[str]) -> None:
+    """Run one script in the forked child; never returns."""
+    rc = 1
+    script = req["script"]
+    script_dir = os.path.dirname(script)
+    try:
+        os.setsid()
+        signal.set_wakeup_fd(-1)
+        for fd in wakeup_fds:
+            os.close(fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        null = os.open(os.devnull, os.O_RDONLY)
+        out = os.open(req["stdout"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        err = os.open(req["stderr"], os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        for src, dst in ((null, 0), (out, 1), (err, 2)):
+            os.dup2(src, dst)
+            os.close(src)
+
+        import resource
+
+        limits = {int(which): int(limit) for which, limit in req.get("rlimits") or ()}
+        memory = int(req.get("memory_limit_mb") or 0) << 20
+        if memory > 0:
+            limits[resource.RLIMIT_AS] = min(limits.get(resource.RLIMIT_AS, memory), memory)
+        for which, limit in limits.items():
+            try:
+                resource.setrlimit(which, (limit, limit))
+            except (OSError, ValueError):
+                pass  # best effort, like prlimit on shell commands
+
+        os.chdir(req["cwd"])
+        os.environ.clear()
+        os.environ.update(req["env"])
+        sys.argv = [req["argv0"], *req["argv"]]
+        sys.path[0] = script_dir
+        _drop_shadowed(script_dir, preloaded)
+    except BaseException:
+        traceback.print_exc()
+        os._exit(1)
+
+    before = set(sys.modules)
+    try:
+        if code is None:
+            with open(script, "rb") as fh:
+                code = compile(fh.read(), script, "exec", dont_inherit=True)
+        main = types.ModuleType("__main__")
+        main.__dict__.update({"__file__": script, "__builtins__": builtins, "__cached__": None})
+        sys.modules["__main__"] = main
+        exec(code, main.__dict__)
+        rc = 0
+    except SystemExit as e:
+        rc = _exit_code(e)
+    except KeyboardInterrupt:
+        traceback.print_exc()
+        rc = 130
+    except BaseException:
+        traceback.print_exc()
+        rc = 1
+
+    # Interpreter shutdown, as ``python script.py`` would do it.
+    try:
+        threading._shutdown()  # type: ignore[attr-defined]
+        atexit._run_exitfuncs()
+    except BaseException:
+        traceback.print_exc()
+
+    try:
+        local = [script_dir, os.getcwd()]
+        new = set()
+        for name in set(sys.modules) - before:
+            root = name.split(".")[0]
+            mod = sys.modules.get(root)
+            if root == "__main__" or mod is None or _under(getattr(mod, "__file__", None), local):
+                continue
+            new.add(root)
+        with open(req["report"], "w", encoding="utf-8") as fh:
+            json.dump(sorted(new), fh)
+    except BaseException:
+        pass
+
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except BaseException:
+            pass
+    os._exit(rc & 0xFF if rc >= 0 else 1)
+
+
+class Zygote:
+    def __init__(self, preload: list[str], skip: list[str]) -> None:
+        self.skip = set(skip)
+        self.loaded: set[str] = set()
+        self.running: dict[int, dict] = {}
+        self.retired = False
+        self.preload(preload)
+
+    def preload(self, names: list[str]) -> None:
+        if self.retired:
+            return
+        for name in names:
+            if name in self.loaded or name in self.skip:
+                continue
+            self.loaded.add(name)
+            threads = threading.active_count()
+            # Imports may print; keep that off the protocol stream.
+            saved = os.dup(1)
+            null = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(null, 1)
+            os.close(null)
+            try:
+                importlib.import_module(name)
+            except BaseException:
+                continue
+            finally:
+                try:
+                    sys.stdout.flush()
+                except BaseException:
+                    pass
+                os.dup2(saved, 1)
+                os.close(saved)
+            if threading.active_count() > threads:
+                self.retired = True
+                _send({"event": "retire", "module": name, "reason": "import started threads"})
+                return
+
+    def handle(self, req: dict, wakeup_fds: tuple[int, int]) -> None:
+        if req.get("op") != "run":
+            return
+        code = _compile(req["script"])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            pid = os.fork()
+        except OSError as e:
+            _send({"event": "error", "id": req["id"], "error": str(e)})
+            return
+        if pid == 0:
+            _child(req, code, wakeup_fds, self.loaded)
+        self.running[pid] = req
+        _send({"event": "started", "id": req["id"], "pid": pid})
+
+    def reap(self) -> None:
+        while self.running:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            req = self.running.pop(pid, None)
+            if req is None:
+                continue
+            # The parent removes the report once it sees ``exit``: read it first.
+            try:
+                with open(req["report"], encoding="utf-8") as fh:
+                    learned = json.load(fh)
+            except (OSError, ValueError):
+                learned = []
+            _send(
+                {"event": "exit", "id": req["id"], "returncode": os.waitstatus_to_exitcode(status)}
+            )
+            self.preload(learned)
+
+
+def main(argv: list[str]) -> int:
+    # Started as a script: keep app/services off the import path.
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    opts = json.loads(argv[1]) if len(argv) > 1 else {}
+    zygote = Zygote(list(opts.get("preload", [])), list(opts.get("skip", [])))
+
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    _send({"event": "ready", "pid": os.getpid(), "path": [p for p in sys.path if p]})
+
+    buf = b""
+    eof = False
+    while not (eof and not zygote.running):
+        try:
+            ready, _, _ = select.select([wake_r] if eof else [0, wake_r], [], [])
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            raise
+        if wake_r in ready:
+            try:
+                while os.read(wake_r, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+        if 0 in ready:
+            data = os.read(0, 1 << 16)
+            if not data:
+                eof = True
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if line.strip():
+                    zygote.handle(json.loads(line), (wake_r, wake_w))
+        zygote.reap()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,589 @@
+"""Resident runner for ``python scripts/x.py ...`` skill commands.
+
+Each skill invocation through the ``shell`` tool used to start a shell, then
+a new Python interpreter, then re-import the script's heavy dependencies
+(openpyxl, httpx, ...). The resident runner keeps one fork server
+("zygote", see :mod:`app.services.skill_runner_zygote`) per Python
+interpreter. The zygote learns which modules the scripts import and keeps
+them imported. Each run is a fresh fork with its own process group, cwd,
+environment and ``sys.argv``. So scripts keep ``python script.py``
+semantics (``__main__``, ``sys.exit``, atexit, child processes) without
+paying interpreter startup and import time again.
+
+Only plain invocations are routed here (:func:`parse_python_invocation`).
+Commands with pipes, redirects, variables, globs or interpreter flags other
+than ``-u`` still go through the shell.
+"""
+
+from __future__ import annotations
+
+import atexit
+import codecs
+import itertools
+import json
+import logging
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ZYGOTE_SCRIPT = Path(__file__).with_name("skill_runner_zygote.py")
+
+_INTERPRETER = re.compile(r"python(3(\.\d+)?)?")
+# Characters the shell would interpret outside quotes / inside double quotes.
+_UNQUOTED_SPECIAL = set("|&;<>()$`\\*?[]{}~#!\n")
+_DQUOTED_SPECIAL = set("$`\\!")
+_READ_CHUNK = 1 << 20
+_MAX_PARTIAL_LINE = 65_536
+
+_RUNS = REGISTRY.counter(
+    "mordecai_resident_runner_runs_total",
+    "Skill script runs handled by the resident runner, by outcome.",
+    ("result",),
+)
+_ZYGOTES = REGISTRY.counter(
+    "mordecai_resident_runner_zygote_starts_total",
+    "Resident runner fork servers started, by reason.",
+    ("reason",),
+)
+
+
+class ResidentRunnerUnavailable(RuntimeError):
+    """The script could not be started in a resident interpreter.
+
+    Nothing ran; callers should fall back to a regular subprocess.
+    """
+
+
+@dataclass(frozen=True)
+class PythonInvocation:
+    """A ``python <script.py> [args...]`` command, resolved.
+
+    Attributes:
+        python: Interpreter path (not resolved through symlinks, so venv
+            interpreters keep their ``sys.prefix``).
+        script: Absolute path of the script.
+        argv0: The script argument as written (becomes ``sys.argv[0]``).
+        argv: Remaining arguments.
+        cwd: Working directory.
+    """
+
+    python: str
+    script: str
+    argv0: str
+    argv: tuple[str, ...]
+    cwd: str
+
+
+def _plain_words(command: str) -> bool:
+    """True if ``command`` is only words and quotes, with nothing for the shell to expand."""
+    quote: str | None = None
+    for ch in command:
+        if quote == "'":
+            if ch == "'":
+                quote = None
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+            elif ch in _DQUOTED_SPECIAL:
+                return False
+        elif ch in "'\"":
+            quote = ch
+        elif ch in _UNQUOTED_SPECIAL:
+            return False
+    return quote is None
+
+
+def parse_python_invocation(
+    command: str, *, cwd: str | None = None, env: dict[str, str] | None = None
+) -> PythonInvocation | None:
+    """Recognize a plain ``python script.py args...`` command.
+
+    Args:
+        command: The shell command.
+        cwd: Directory the shell would run in (defaults to the process cwd).
+        env: Environment whose ``PATH`` resolves bare ``python``/``python3``.
+
+    Returns:
+        The resolved invocation, or None if the command needs a real shell.
+    """
+    if not command or not _plain_words(command):
+        return None
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return None
+    if len(words) < 2:
+        return None
+
+    interp, rest = words[0], words[1:]
+    if not _INTERPRETER.fullmatch(os.path.basename(interp)):
+        return None
+    while rest and rest[0] == "-u":
+        rest = rest[1:]
+    if not rest or not rest[0].endswith(".py"):
+        return None
+
+    base = cwd or os.getcwd()
+    if "/" in interp:
+        python = os.path.join(base, interp)
+    else:
+        path = (env or os.environ).get("PATH", os.defpath)
+        python = shutil.which(interp, path=path) or ""
+    if not python or not os.access(python, os.X_OK):
+        return None
+
+    script = os.path.normpath(os.path.join(base, rest[0]))
+    if not os.path.isfile(script):
+        return None
+    return PythonInvocation(
+        python=python, script=script, argv0=rest[0], argv=tuple(rest[1:]), cwd=base
+    )
+
+
+@dataclass
+class ScriptResult:
+    """Outcome of a resident run.
+
+    Attributes:
+        returncode: Exit status; 124 on timeout, negative if killed by a signal.
+        stdout: Captured standard output.
+        stderr: Captured standard error.
+        timed_out: True if the run was killed at its deadline.
+        duration_ms: Wall time.
+    """
+
+    returncode: int
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    duration_ms: int = 0
+
+
+@dataclass
+class _Task:
+    id: int
+    started: threading.Event = field(default_factory=threading.Event)
+    done: threading.Event = field(default_factory=threading.Event)
+    pid: int | None = None
+    returncode: int | None = None
+    error: str | None = None
+
+
+class _Zygote:
+    """Parent-side handle on one fork server."""
+
+    def __init__(self, python: str, *, preload: list[str], skip: list[str], timeout: float):
+        self.python = python
+        self.tasks: dict[int, _Task] = {}
+        self.retiring = False
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._path: list[str] = []
+        self.retired_module: str | None = None
+        try:
+            self.proc = subprocess.Popen(
+                [python, str(ZYGOTE_SCRIPT), json.dumps({"preload": preload, "skip": skip})],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=tempfile.gettempdir(),
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise ResidentRunnerUnavailable(f"cannot start {python}: {e}") from e
+        self._reader = threading.Thread(
+            target=self._read_events, name="resident-runner-zygote", daemon=True
+        )
+        self._reader.start()
+        if not self._ready.wait(timeout) or self.proc.poll() is not None:
+            self.close(kill=True)
+            raise ResidentRunnerUnavailable(f"fork server for {python} did not start")
+        self.stamp = self._stamp()
+
+    def _stamp(self) -> list[int]:
+        """mtimes of the zygote's import path; a change means packages moved."""
+        out = []
+        for p in self._path:
+            try:
+                out.append(os.stat(p).st_mtime_ns)
+            except OSError:
+                out.append(0)
+        return out
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    @property
+    def stale(self) -> bool:
+        return self._stamp() != self.stamp
+
+    def _read_events(self) -> None:
+        assert self.proc.stdout is not None
+        for raw in self.proc.stdout:
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            event = msg.get("event")
+            if event == "ready":
+                self._path = [str(p) for p in msg.get("path", [])]
+                self._ready.set()
+                continue
+            if event == "retire":
+                self.retired_module = msg.get("module")
+                logger.info(
+                    "Retiring resident runner for %s: %s %s",
+                    self.python,
+                    self.retired_module,
+                    msg.get("reason"),
+                )
+                self.retiring = True
+                continue
+            with self._lock:
+                task = self.tasks.get(msg.get("id"))
+            if task is None:
+                continue
+            if event == "started":
+                task.pid = int(msg["pid"])
+                task.started.set()
+            elif event == "exit":
+                task.returncode = int(msg["returncode"])
+                task.done.set()
+            elif event == "error":
+                task.error = str(msg.get("error"))
+                task.started.set()
+                task.done.set()
+        # EOF: the zygote exited. Fail whatever it still owed us.
+        with self._lock:
+            pending = list(self.tasks.values())
+        for task in pending:
+            task.error = task.error or "resident runner exited"
+            task.started.set()
+            task.done.set()
+
+    def submit(self, request: dict[str, Any], task: _Task) -> None:
+        with self._lock:
+            self.tasks[task.id] = task
+        self.last_used = time.monotonic()
+        try:
+            assert self.proc.stdin is not None
+            with self._lock:
+                self.proc.stdin.write((json.dumps({"op": "run", **request}) + "\n").encode())
+                self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.forget(task)
+            raise ResidentRunnerUnavailable(str(e)) from e
+
+    def forget(self, task: _Task) -> None:
+        with self._lock:
+            self.tasks.pop(task.id, None)
+        self.last_used = time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self.tasks)
+
+    def close(self, *, kill: bool = False) -> None:
+        """Stop accepting work; the zygote exits once its children are reaped."""
+        try:
+            if self.proc.stdin is not None:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        if kill:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+
+
+class _Tail:
+    """Incrementally read a growing spool file and emit complete lines.
+
+    With ``keep_text=False`` nothing is accumulated, so memory stays bounded
+    however much the script writes; a line without a newline is cut at
+    ``_MAX_PARTIAL_LINE`` chars.
+    """
+
+    def __init__(
+        self, path: Path, on_line: Callable[[str], None] | None, *, keep_text: bool = True
+    ):
+        self.path = path
+        self.on_line = on_line
+        self.keep_text = keep_text
+        self.parts: list[str] = []
+        self._pos = 0
+        self._partial = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def poll(self, *, final: bool = False) -> None:
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(self._pos)
+                while data := fh.read(_READ_CHUNK):
+                    self._pos += len(data)
+                    self._feed(self._decoder.decode(data))
+        except OSError:
+            pass
+        if final:
+            self._feed(self._decoder.decode(b"", final=True), final=True)
+
+    def _feed(self, text: str, *, final: bool = False) -> None:
+        if text and self.keep_text:
+            self.parts.append(text)
+        if self.on_line is None:
+            return
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            self.on_line(line + "\n")
+        if self._partial and (final or len(self._partial) > _MAX_PARTIAL_LINE):
+            self.on_line(self._partial)
+            self._partial = ""
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class ResidentScriptRunner:
+    """Runs skill scripts in resident, per-interpreter fork servers."""
+
+    def __init__(
+        self,
+        *,
+        memory_limit_mb: int = 0,
+        idle_seconds: float = 600.0,
+        start_timeout: float = 30.0,
+        spool_dir: Path | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            memory_limit_mb: Address-space limit per run (0 disables).
+            idle_seconds: Fork servers unused for this long are shut down.
+            start_timeout: How long to wait for a fork server to come up.
+            spool_dir: Where run output is spooled (defaults to a temp dir).
+        """
+        self.memory_limit_mb = max(0, int(memory_limit_mb))
+        self.idle_seconds = idle_seconds
+        self.start_timeout = start_timeout
+        self.spool_dir = spool_dir or Path(tempfile.mkdtemp(prefix="mordecai-runner-"))
+        self._zygotes: dict[str, _Zygote] = {}
+        self._retired: list[_Zygote] = []
+        self._learned: dict[str, set[str]] = {}
+        self._skip: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _zygote_for(self, python: str) -> _Zygote:
+        with self._lock:
+            self._reap_idle()
+            zygote = self._zygotes.get(python)
+            reason = "start"
+            if zygote is not None:
+                if zygote.alive and not zygote.retiring and not zygote.stale:
+                    return zygote
+                reason = "died" if not zygote.alive else "retired" if zygote.retiring else "stale"
+                if zygote.retired_module:
+                    # Never preload it again: forking with its threads is unsafe.
+                    self._skip.setdefault(python, set()).add(zygote.retired_module)
+                self._retire(zygote)
+            zygote = _Zygote(
+                python,
+                preload=sorted(self._learned.get(python, ())),
+                skip=sorted(self._skip.get(python, ())),
+                timeout=self.start_timeout,
+            )
+            self._zygotes[python] = zygote
+            _ZYGOTES.inc(reason=reason)
+            return zygote
+
+    def _retire(self, zygote: _Zygote) -> None:
+        self._zygotes.pop(zygote.python, None)
+        if zygote.busy:
+            self._retired.append(zygote)
+        else:
+            zygote.close()
+
+    def _reap_idle(self) -> None:
+        now = time.monotonic()
+        for zygote in list(self._zygotes.values()):
+            if not zygote.busy and now - zygote.last_used > self.idle_seconds:
+                self._retire(zygote)
+        still = []
+        for zygote in self._retired:
+            if zygote.busy:
+                still.append(zygote)
+            else:
+                zygote.close()
+        self._retired = still
+
+    def _learn(self, python: str, report: Path) -> None:
+        try:
+            names = json.loads(report.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._learned.setdefault(python, set()).update(str(n) for n in names)
+
+    def run(
+        self,
+        inv: PythonInvocation,
+        *,
+        env: dict[str, str],
+        timeout_seconds: float,
+        on_start: Callable[[int], None] | None = None,
+        on_stdout: Callable[[str], None] | None = None,
+        on_stderr: Callable[[str], None] | None = None,
+        poll_interval: float = 0.05,
+        stdout_path: Path | None = None,
+        keep_output: bool = True,
+        rlimits: dict[int, int] | None = None,
+    ) -> ScriptResult:
+        """Run ``inv`` and wait for it.
+
+        Args:
+            inv: The invocation to run.
+            env: Complete environment for the script.
+            timeout_seconds: Hard deadline; the run's process group is killed
+                when it expires.
+            on_start: Called with the run's pid (also its process group id).
+            on_stdout: Called with each stdout line as it is written.
+            on_stderr: Called with each stderr line as it is written.
+            poll_interval: How often output is tailed while waiting.
+            stdout_path: Write stdout to this file (left in place) instead of a
+                temporary spool file.
+            keep_output: Collect stdout/stderr into the result. With False the
+                output is only passed to the callbacks and the result's
+                ``stdout``/``stderr`` are empty.
+            rlimits: ``{resource.RLIMIT_*: limit}`` applied to the run; the
+                address-space limit is the lower of this and
+                ``memory_limit_mb``.
+
+        Raises:
+            ResidentRunnerUnavailable: The script could not be started.
+        """
+        t0 = time.perf_counter()
+        zygote = self._zygote_for(inv.python)
+        task = _Task(next(self._ids))
+        base = self.spool_dir / f"run-{os.getpid()}-{task.id}"
+        out, err, report = (base.with_suffix(s) for s in (".out", ".err", ".json"))
+        if stdout_path is not None:
+            out = Path(stdout_path)
+        request = {
+            "id": task.id,
+            "script": inv.script,
+            "argv0": inv.argv0,
+            "argv": list(inv.argv),
+            "cwd": inv.cwd,
+            "env": env,
+            "stdout": str(out),
+            "stderr": str(err),
+            "report": str(report),
+            "memory_limit_mb": self.memory_limit_mb,
+            "rlimits": sorted((rlimits or {}).items()),
+        }
+        tails = (
+            _Tail(out, on_stdout, keep_text=keep_output),
+            _Tail(err, on_stderr, keep_text=keep_output),
+        )
+        try:
+            zygote.submit(request, task)
+            task.started.wait(self.start_timeout)
+            if task.pid is None:
+                raise ResidentRunnerUnavailable(task.error or "script did not start")
+            if on_start is not None:
+                on_start(task.pid)
+
+            deadline = time.monotonic() + max(0.001, float(timeout_seconds))
+            timed_out = False
+            while not task.done.wait(poll_interval):
+                for tail in tails:
+                    tail.poll()
+                if time.monotonic() >= deadline:
+                    timed_out = True
+                    self._kill(task)
+                    break
+            for tail in tails:
+                tail.poll(final=True)
+        finally:
+            zygote.forget(task)
+
+        self._learn(inv.python, report)
+        for path in (err, report) if stdout_path is not None else (out, err, report):
+            path.unlink(missing_ok=True)
+
+        stderr = tails[1].text
+        if task.error and not timed_out:
+            stderr += f"\n[resident runner] {task.error}"
+        returncode = 124 if timed_out else task.returncode if task.returncode is not None else 1
+        _RUNS.inc(result="timeout" if timed_out else "ok" if returncode == 0 else "error")
+        return ScriptResult(
+            returncode=returncode,
+            stdout=tails[0].text,
+            stderr=stderr,
+            timed_out=timed_out,
+            duration_ms=int((time.perf_counter() - t0) * 1000),
+        )
+
+    @staticmethod
+    def _kill(task: _Task) -> None:
+        """SIGTERM the run's process group, then SIGKILL after a grace period."""
+        assert task.pid is not None
+        for sig, grace in ((signal.SIGTERM, 2.0), (signal.SIGKILL, 2.0)):
+            try:
+                os.killpg(task.pid, sig)
+            except OSError:
+                return
+            if task.done.wait(grace):
+                return
+
+    def shutdown(self) -> None:
+        """Stop all fork servers and remove spooled output."""
+        with self._lock:
+            zygotes = [*self._zygotes.values(), *self._retired]
+            self._zygotes.clear()
+            self._retired.clear()
+        for zygote in zygotes:
+            zygote.close(kill=True)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+_runner: ResidentScriptRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def get_resident_runner(config: Any = None) -> ResidentScriptRunner:
+    """Process-wide :class:`ResidentScriptRunner`, configured on first use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            limit = getattr(config, "shell_resident_runner_memory_limit_mb", 0)
+            idle = getattr(config, "shell_resident_runner_idle_seconds", 600)
+            _runner = ResidentScriptRunner(
+                memory_limit_mb=limit if isinstance(limit, int) else 0,
+                idle_seconds=float(idle) if isinstance(idle, int | float) else 600.0,
+            )
+            atexit.register(_runner.shutdown)
+        return _runner
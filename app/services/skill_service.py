@@ -19,6 +19,7 @@ Requirements:
 """
 
 import json
+import logging
 import re
 import shutil
 import urllib.request
@@ -34,6 +35,14 @@ from app.config import (
     resolve_user_skills_dir,
 )
 from app.models.domain import SkillMetadata
+from app.services.agent.skill_catalog import invalidate_skill_catalog
+from app.services.github_downloader import (
+    GitHubDownloader,
+    GitHubDownloadError,
+    TreeTruncatedError,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class SkillInstallError(Exception):
@@ -72,6 +81,7 @@ class SkillService:
         self.skills_base_dir.mkdir(parents=True, exist_ok=True)
         self.shared_skills_dir = Path(config.shared_skills_dir)
         self.shared_skills_dir.mkdir(parents=True, exist_ok=True)
+        self.github = GitHubDownloader.from_config(config)
 
     def migrate_user_skills_dir(self, *, legacy_user_id: str, user_id: str) -> bool:
         """One-way migration: move the per-user skills directory.
@@ -114,6 +124,7 @@ class SkillService:
 
         # Use shutil.move for robustness across filesystems.
         shutil.move(str(legacy_dir), str(new_dir))
+        invalidate_skill_catalog(legacy_dir.parent)
         return True
 
     def _get_user_skills_dir(self, user_id: str) -> Path:
@@ -196,7 +207,7 @@ class SkillService:
             dest_skill_dir.mkdir(parents=True)
 
             try:
-                files_downloaded = self._download_github_directory(
+                files_downloaded = self._download_github_skill(
                     owner, repo, branch, path, dest_skill_dir
                 )
                 if files_downloaded == 0:
@@ -293,6 +304,30 @@ class SkillService:
             )
         return None
 
+    def _download_github_skill(
+        self, owner: str, repo: str, branch: str, path: str, dest_dir: Path
+    ) -> int:
+        """Download a GitHub directory via the tree API and blob cache.
+
+        Falls back to walking the contents API when the repository tree is
+        too large to list in one call.
+
+        Returns:
+            Number of files downloaded.
+
+        Raises:
+            SkillInstallError: If download fails.
+        """
+        try:
+            return self.github.download_directory(owner, repo, branch, path, dest_dir).files
+        except TreeTruncatedError:
+            logger.info("Tree of %s/%s is truncated; walking contents API", owner, repo)
+            return self._download_github_directory(owner, repo, branch, path, dest_dir)
+        except GitHubDownloadError as e:
+            if e.status == 404:
+                raise SkillInstallError(f"GitHub path not found: {path}") from e
+            raise SkillInstallError(str(e)) from e
+
     def _fetch_github_contents(self, owner: str, repo: str, branch: str, path: str) -> list[dict]:
         """Fetch directory contents from GitHub API.
 
@@ -546,6 +581,7 @@ class SkillService:
         if skill_dir.exists() and skill_dir.is_dir():
             shutil.rmtree(skill_dir)
             removed = True
+        invalidate_skill_catalog(user_skills_dir)
 
         if not removed:
             raise SkillNotFoundError(f"Skill '{skill_name}' not found")
@@ -0,0 +1,387 @@
+"""Cached, atomic materialization of skill config templates.
+
+Skills can ship ``*_example`` / ``*.example`` templates with ``[PLACEHOLDER]``
+markers. Before each shell command,
+:func:`app.config.refresh_runtime_env_from_secrets` renders them with the
+user's skill secrets into ``<workspace>/<user>/tmp/``. It also exports
+``<SKILL>_CONFIG`` for the canonical ``<skill>.toml_example``. That used to
+mean walking every skill directory, re-reading and re-rendering every
+template, and rewriting ``.env`` on every call.
+
+:class:`TemplateMaterializer` keeps a per-user manifest
+(``tmp/.templates.json``) of what it rendered. Each output is keyed by the
+template's content hash and a hash of that skill's placeholder values
+(its "secrets version"). The manifest also stamps the scanned directories,
+the templates and the outputs with ``(mtime_ns, size)``. When neither the
+secrets nor any stamp changed, a call only stats those paths: nothing is
+read, rendered or written. Otherwise the skills are rescanned and only
+outputs whose key changed are re-rendered, written to a temp file and
+renamed into place.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".templates.json"
+_MANIFEST_VERSION = 1
+# A conservative cap to avoid runaway IO if a skill accidentally includes many example files.
+MAX_TEMPLATES = 50
+_TEMPLATE_SUFFIXES = ("_example", ".example")
+# Dependency/tooling trees never hold skill templates and can be huge.
+_SKIP_DIRS = frozenset({".venv", "venv", "node_modules", "__pycache__", ".git"})
+# Stamps this recent are not trusted: a same-size edit within the filesystem's
+# timestamp granularity would otherwise go unnoticed.
+_RACY_SECONDS = 2.0
+_PLACEHOLDER = re.compile(r"\[([A-Z0-9_]+)\]")
+_ENV_HEADER = "# Auto-generated by Mordecai. Do not commit."
+
+_REFRESHES = REGISTRY.counter(
+    "mordecai_skill_template_refresh_total",
+    "Skill template refreshes, by whether the manifest was current or skills were rescanned.",
+    ("result",),
+)
+
+
+def template_replacements(skill_cfg: dict[str, Any], user_id: str | None) -> dict[str, str]:
+    """``[PLACEHOLDER]`` values for one skill block of the merged secrets.
+
+    Scalar keys and the ``env`` block apply first, then the legacy per-user
+    ``users.<user_id>`` overrides. Keys are upper-cased.
+    """
+    replacements: dict[str, str] = {}
+
+    def _scalars(block: dict[str, Any]) -> None:
+        for k, v in block.items():
+            if k in {"env", "users"} or isinstance(v, (dict, list)) or v is None:
+                continue
+            key = str(k).strip()
+            if key:
+                replacements[key.upper()] = str(v)
+
+    def _env(block: Any) -> None:
+        if isinstance(block, dict):
+            for k, v in block.items():
+                if v is not None:
+                    replacements[str(k).upper()] = str(v)
+
+    _scalars(skill_cfg)
+    _env(skill_cfg.get("env"))
+    if user_id is not None:
+        users_block = skill_cfg.get("users")
+        user_block = users_block.get(str(user_id)) if isinstance(users_block, dict) else None
+        if isinstance(user_block, dict):
+            _scalars(user_block)
+            _env(user_block.get("env"))
+    return replacements
+
+
+def render(raw: str, replacements: dict[str, str]) -> str:
+    """Substitute known ``[KEY]`` placeholders; unknown ones are left as is."""
+
+    def _replace(match: re.Match[str]) -> str:
+        return replacements.get(match.group(1).strip().upper(), match.group(0))
+
+    return _PLACEHOLDER.sub(_replace, raw)
+
+
+def output_name(skill: str, template_name: str) -> str | None:
+    """Rendered file name for a template, or None if it is not a template.
+
+    Names that already start with the skill name are kept
+    (``himalaya.toml_example`` -> ``himalaya.toml``); others are prefixed to
+    avoid collisions across skills (``config.toml_example`` for skill ``foo``
+    -> ``foo__config.toml``).
+    """
+    for suffix in _TEMPLATE_SUFFIXES:
+        if template_name.endswith(suffix):
+            dest_name = template_name[: -len(suffix)]
+            break
+    else:
+        return None
+    if dest_name.startswith(f"{skill}.") or dest_name == skill:
+        return dest_name
+    return f"{skill}__{dest_name}"
+
+
+def _sha256(data: str | bytes) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stamp(path: str, *, now: float | None = None) -> list[int] | None:
+    """``[mtime_ns, size]``, or None if missing or (with ``now``) too recent to trust."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if now is not None and now - st.st_mtime < _RACY_SECONDS:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class TemplateMaterializer:
+    """Renders one user's skill templates into their workspace tmp dir.
+
+    Args:
+        user_dir: The user's skills directory (templates are read from here).
+        output_dir: Where rendered files, ``.env`` and the manifest go.
+    """
+
+    def __init__(self, user_dir: Path, output_dir: Path) -> None:
+        self.user_dir = user_dir
+        self.output_dir = output_dir
+        self.manifest_path = output_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._manifest: dict[str, Any] | None = None
+
+    def materialize(
+        self, skills: list[str], skills_block: dict[str, Any], *, user_id: str | None
+    ) -> dict[str, str]:
+        """Bring rendered outputs up to date.
+
+        Args:
+            skills: Skill directory names under ``user_dir``.
+            skills_block: The merged ``skills:`` section of the secrets.
+            user_id: For legacy per-user overrides in ``skills_block``.
+
+        Returns:
+            ``{<SKILL>_CONFIG: absolute path}`` for rendered ``<skill>.toml``.
+        """
+        secrets = {}
+        for skill in skills:
+            skill_cfg = skills_block.get(skill)
+            replacements = template_replacements(
+                skill_cfg if isinstance(skill_cfg, dict) else {}, user_id
+            )
+            secrets[skill] = (replacements, _sha256(json.dumps(replacements, sort_keys=True)))
+
+        with self._lock:
+            manifest = self._load()
+            if self._current(manifest, {s: sha for s, (_, sha) in secrets.items()}):
+                _REFRESHES.inc(result="cached")
+                return dict(manifest["env"])
+            _REFRESHES.inc(result="scanned")
+            manifest = self._refresh(manifest, skills, secrets)
+            self._manifest = manifest
+            return dict(manifest["env"])
+
+    def last_env(self) -> dict[str, str]:
+        """The ``env`` from the last saved manifest (empty if there is none)."""
+        with self._lock:
+            env = self._load().get("env")
+            return dict(env) if isinstance(env, dict) else {}
+
+    # -- manifest ------------------------------------------------------------
+
+    def _load(self) -> dict[str, Any]:
+        if self._manifest is not None:
+            return self._manifest
+        manifest: dict[str, Any] = {}
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if isinstance(data, dict) and data.get("version") == _MANIFEST_VERSION:
+                manifest = data
+        except (OSError, ValueError):
+            pass
+        self._manifest = manifest
+        return manifest
+
+    def _current(self, manifest: dict[str, Any], secrets_shas: dict[str, str]) -> bool:
+        """True if nothing the manifest depends on changed (stat calls only)."""
+        if not manifest or manifest.get("secrets") != secrets_shas:
+            return False
+        for path, stamp in manifest["dirs"].items():
+            if stamp is None or _stamp(path) != stamp:
+                return False
+        for path, entry in manifest["templates"].items():
+            if entry["stamp"] is None or _stamp(path) != entry["stamp"]:
+                return False
+        for path, entry in manifest["outputs"].items():
+            if _stamp(path) != entry["stamp"]:
+                return False
+        return True
+
+    def _refresh(
+        self,
+        previous: dict[str, Any],
+        skills: list[str],
+        secrets: dict[str, tuple[dict[str, str], str]],
+    ) -> dict[str, Any]:
+        now = time.time()
+        old_templates = previous.get("templates", {})
+        old_outputs = previous.get("outputs", {})
+        dirs: dict[str, list[int] | None] = {}
+        templates: dict[str, dict[str, Any]] = {}
+        outputs: dict[str, dict[str, Any]] = {}
+        env: dict[str, str] = {}
+
+        for skill in skills:
+            skill_dir = self.user_dir / skill
+            if len(templates) >= MAX_TEMPLATES or not skill_dir.is_dir():
+                continue
+            replacements, secrets_sha = secrets[skill]
+            for tpl in self._scan(skill_dir, dirs, now):
+                if len(templates) >= MAX_TEMPLATES:
+                    break
+                out_name = output_name(skill, tpl.name)
+                if out_name is None:
+                    continue
+                tpl_key, dest = str(tpl), self.output_dir / out_name
+                stamp = _stamp(tpl_key, now=now)
+                known = old_templates.get(tpl_key)
+                old_out = old_outputs.get(str(dest))
+                raw = None
+                if stamp is not None and known is not None and known["stamp"] == stamp:
+                    tpl_sha = known["sha"]
+                else:
+                    try:
+                        raw = tpl.read_text(encoding="utf-8")
+                    except (OSError, UnicodeDecodeError):
+                        continue
+                    tpl_sha = _sha256(raw)
+                templates[tpl_key] = {"stamp": stamp, "sha": tpl_sha}
+
+                key = {"template_sha": tpl_sha, "secrets_sha": secrets_sha}
+                if (
+                    old_out is not None
+                    and all(old_out.get(k) == v for k, v in key.items())
+                    and _stamp(str(dest)) == old_out["stamp"]
+                ):
+                    outputs[str(dest)] = old_out
+                else:
+                    try:
+                        if raw is None:
+                            raw = tpl.read_text(encoding="utf-8")
+                        written = self._write_output(dest, render(raw, replacements))
+                    except (OSError, UnicodeDecodeError):
+                        logger.debug("Cannot render skill template %s", tpl, exc_info=True)
+                        continue
+                    if not written:
+                        continue
+                    outputs[str(dest)] = {**key, "template": tpl_key, "stamp": _stamp(str(dest))}
+
+                # Auto-export <SKILL>_CONFIG for the canonical pattern:
+                #   {skill}.toml_example -> {skill}.toml
+                if dest.name == f"{skill}.toml":
+                    env[f"{skill.upper()}_CONFIG"] = str(dest.resolve())
+
+        if env and env != previous.get("env"):
+            self._write_env_file(env)
+
+        manifest = {
+            "version": _MANIFEST_VERSION,
+            "secrets": {s: sha for s, (_, sha) in secrets.items()},
+            "dirs": dirs,
+            "templates": templates,
+            "outputs": outputs,
+            "env": env,
+        }
+        if manifest != previous and (outputs or previous):
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                _write_atomic(self.manifest_path, json.dumps(manifest, sort_keys=True))
+            except OSError:
+                logger.debug("Cannot save template manifest %s", self.manifest_path, exc_info=True)
+        return manifest
+
+    @staticmethod
+    def _scan(skill_dir: Path, dirs: dict[str, list[int] | None], now: float) -> list[Path]:
+        """Templates under ``skill_dir``, recording each directory's stamp."""
+        found: list[Path] = []
+        for root, subdirs, files in os.walk(skill_dir):
+            subdirs[:] = sorted(d for d in subdirs if d not in _SKIP_DIRS)
+            dirs[root] = _stamp(root, now=now)
+            found.extend(
+                Path(root, name) for name in sorted(files) if name.endswith(_TEMPLATE_SUFFIXES)
+            )
+        return [p for p in found if p.is_file()]
+
+    def _write_output(self, dest: Path, rendered: str) -> bool:
+        """Atomically write ``dest`` if its content differs. False if blocked."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if dest.is_dir():
+            # A common mistake is `mkdir -p some-config.toml`, which creates a
+            # directory where a file is expected. Recover safely when empty.
+            if any(dest.iterdir()):
+                return False
+            dest.rmdir()
+        try:
+            if dest.read_text(encoding="utf-8") == rendered:
+                return True
+        except (OSError, UnicodeDecodeError):
+            pass
+        _write_atomic(dest, rendered)
+        return True
+
+    def _write_env_file(self, env: dict[str, str]) -> None:
+        """Update the per-user ``.env`` convenience file with the ``*_CONFIG`` vars."""
+        env_path = self.output_dir / ".env"
+        try:
+            existing_lines = env_path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            existing_lines = []
+
+        # Keep unrelated lines, drop the assignments being rewritten (and our
+        # own header, so it is not repeated on every rewrite).
+        kept = [
+            ln
+            for ln in existing_lines
+            if ln.strip() != _ENV_HEADER
+            and (
+                not ln.strip()
+                or ln.lstrip().startswith("#")
+                or "=" not in ln
+                or ln.split("=", 1)[0].strip() not in env
+            )
+        ]
+        if kept and kept[-1].strip():
+            kept.append("")
+        kept.append(_ENV_HEADER)
+        kept.extend(f"{k}={v}" for k, v in sorted(env.items()))
+        text = "\n".join(kept).rstrip() + "\n"
+        if existing_lines and "\n".join(existing_lines).rstrip() + "\n" == text:
+            return
+        try:
+            _write_atomic(env_path, text)
+        except OSError:
+            logger.debug("Cannot write %s", env_path, exc_info=True)
+
+
+_materializers: dict[tuple[str, str], TemplateMaterializer] = {}
+_materializers_lock = threading.Lock()
+
+
+def get_template_materializer(user_dir: Path, output_dir: Path) -> TemplateMaterializer:
+    """Process-wide :class:`TemplateMaterializer` per (skills dir, output dir)."""
+    key = (str(user_dir), str(output_dir))
+    with _materializers_lock:
+        materializer = _materializers.get(key)
+        if materializer is None:
+            materializer = _materializers[key] = TemplateMaterializer(user_dir, output_dir)
+        return materializer
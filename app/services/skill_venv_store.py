@@ -0,0 +1,412 @@
+"""Shared, content-addressed virtualenvs for skill dependencies.
+
+Onboarding used to build a private ``.venv`` inside every skill directory,
+so N users onboarding the same skill meant N venv builds and N downloads.
+:class:`SkillVenvStore` keys a venv by a hash of the skill's *normalized*
+``requirements.txt`` plus the interpreter version and platform. It builds
+each venv once under ``<store>/<key>`` and links it into skills as a
+``.venv`` symlink.
+
+Installs go through a local wheelhouse (``<store>/wheelhouse``). Each
+install tries offline first (``--no-index``/``--offline`` against the
+wheelhouse or uv cache) and only reaches the network when that fails, so
+rebuilding a known requirement set works without network access.
+
+Venvs are not relocatable (console-script shebangs embed their path), so a
+venv is built in place under a per-key file lock. A completion marker is
+written last; a directory without the marker is a crashed build and is
+rebuilt.
+
+A shared venv is used by every skill linked to it, so once built it is made
+read-only: a skill (or a user's shell) can no longer ``pip install`` into
+another user's environment. Requirements that point at local paths
+(``-e .``, ``./pkg``, ``file:`` URLs) depend on the skill directory rather
+than on the file's text, so such skills are not shared and keep a private
+``.venv``. ``-r``/``-c`` includes are resolved against the including file
+and their content is part of the key.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import stat
+import subprocess
+import sys
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from app.observability.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MARKER_NAME = ".skill-venv.json"
+
+_BUILDS = REGISTRY.counter(
+    "mordecai_skill_venv_store_total",
+    "Shared skill venv requests, by outcome (reused, built, failed).",
+    ("result",),
+)
+
+_NAME_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+_INCLUDE_RE = re.compile(r"^(-r|-c|--requirement|--constraint)(?:\s*=\s*|\s+)(\S.*)$")
+
+
+def normalize_requirements(text: str) -> list[str]:
+    """Canonical form of a requirements file, used for hashing.
+
+    Comments, blank lines and duplicates are dropped. Project names are
+    lower-cased with ``-``/``_``/``.`` runs folded to ``-`` (PEP 503).
+    Specifiers are kept with whitespace removed, and lines are sorted.
+    """
+    lines: set[str] = set()
+    for raw in text.splitlines():
+        line = raw.split(" #", 1)[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _NAME_RE.match(line)
+        if match and not line.startswith("-"):
+            name, rest = match.groups()
+            line = re.sub(r"[-_.]+", "-", name).lower() + re.sub(r"\s+", "", rest)
+        lines.add(line)
+    return sorted(lines)
+
+
+def _is_local_reference(line: str) -> bool:
+    if line.startswith(("-e", "--editable")):
+        return True
+    if line.startswith("-"):
+        # Options such as ``--find-links ./wheels``: check the argument.
+        parts = re.split(r"[\s=]+", line, maxsplit=1)
+        if len(parts) < 2:
+            return False
+        line = parts[1]
+    if line.startswith((".", "/", "~", "file:")) or re.search(r"@\s*file:", line):
+        return True
+    # A bare path such as ``vendor/pkg.whl``.
+    return ("/" in line or "\\" in line) and "://" not in line
+
+
+def _resolve_requirements(path: Path, seen: set[Path]) -> list[str] | None:
+    try:
+        resolved = path.resolve()
+        text = resolved.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    if resolved in seen:
+        return []
+    seen.add(resolved)
+
+    lines: list[str] = []
+    for line in normalize_requirements(text):
+        include = _INCLUDE_RE.match(line)
+        if include:
+            flag, target = include.groups()
+            nested = _resolve_requirements(resolved.parent / target.strip(), seen)
+            if nested is None:
+                return None
+            prefix = "-c " if flag in ("-c", "--constraint") else ""
+            lines.extend(prefix + entry for entry in nested)
+        elif _is_local_reference(line):
+            return None
+        else:
+            lines.append(line)
+    return lines
+
+
+def resolve_requirements(requirements_path: Path) -> list[str] | None:
+    """Normalized requirements of a file with ``-r``/``-c`` includes inlined.
+
+    Includes are resolved relative to the file that names them, as pip does.
+
+    Returns:
+        Sorted, de-duplicated lines, or None when the file (or an include)
+        references a local path or editable install, or cannot be read.
+    """
+    lines = _resolve_requirements(requirements_path, set())
+    return None if lines is None else sorted(set(lines))
+
+
+def interpreter_tag() -> str:
+    """Interpreter identity that goes into the venv key (e.g. ``cpython-3.13-x86_64-linux``)."""
+    return (
+        f"{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}"
+        f"-{platform.machine()}-{sys.platform}"
+    )
+
+
+class SkillVenvStore:
+    """Builds and shares skill venvs keyed by their requirements."""
+
+    def __init__(self, root: Path, *, python: str | None = None):
+        """Initialize the store.
+
+        Args:
+            root: Store directory (venvs, wheelhouse and lock files).
+            python: Interpreter new venvs are created from. Defaults to the
+                running interpreter, which is what :func:`interpreter_tag`
+                describes.
+        """
+        self.root = root
+        self.wheelhouse = root / "wheelhouse"
+        self.python = python or sys.executable
+
+    @classmethod
+    def from_config(cls, config: Any) -> SkillVenvStore | None:
+        """Build the store from ``skill_venv_store_*`` settings, or None if disabled."""
+        if getattr(config, "skill_venv_store_enabled", True) is False:
+            return None
+        raw = getattr(config, "skill_venv_store_dir", None)
+        if isinstance(raw, str) and raw.strip():
+            root = Path(raw).expanduser()
+        else:
+            root = Path(getattr(config, "skills_base_dir", "./skills")) / ".venvs"
+        return cls(root)
+
+    def key_for(self, requirements_text: str) -> str:
+        """Content hash of the normalized requirements plus interpreter tag."""
+        return self._key(normalize_requirements(requirements_text))
+
+    def key_for_file(self, requirements_path: Path) -> str | None:
+        """Key for a requirements file, or None if it cannot use a shared venv.
+
+        See :func:`resolve_requirements` for what makes a file unshareable.
+        """
+        lines = resolve_requirements(requirements_path)
+        return None if lines is None else self._key(lines)
+
+    @staticmethod
+    def _key(lines: list[str]) -> str:
+        payload = "\n".join([interpreter_tag(), *lines])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def venv_path(self, key: str) -> Path:
+        return self.root / key
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / f"{key}.lock", "a+") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    def acquire(
+        self,
+        requirements_path: Path,
+        *,
+        env: Mapping[str, str] | None = None,
+        timeout: int = 180,
+    ) -> dict[str, Any]:
+        """Return a ready venv for ``requirements_path``, building it if needed.
+
+        Args:
+            requirements_path: The skill's ``requirements.txt``.
+            env: Environment for the installer subprocesses.
+            timeout: Per-command timeout in seconds.
+
+        Returns:
+            Report dict with ``ok``, ``venv_dir``, ``key`` and ``reused``. On
+            failure it has ``ok=False`` plus ``error`` and installer output.
+            Files :meth:`key_for_file` rejects fail with ``shareable=False``.
+        """
+        lines = resolve_requirements(requirements_path)
+        if lines is None:
+            return {
+                "ok": False,
+                "shareable": False,
+                "error": "requirements reference local paths; use a private venv",
+            }
+        key = self._key(lines)
+        venv_dir = self.venv_path(key)
+        marker = venv_dir / MARKER_NAME
+
+        with self._locked(key):
+            if marker.exists():
+                _BUILDS.inc(result="reused")
+                return {"ok": True, "venv_dir": str(venv_dir), "key": key, "reused": True}
+
+            if venv_dir.exists():
+                logger.info("Removing incomplete shared venv %s", venv_dir)
+                _rmtree(venv_dir)
+
+            run_env = dict(env if env is not None else os.environ)
+            run_env.setdefault("UV_CACHE_DIR", str(self.wheelhouse / "uv-cache"))
+            report = self._build(venv_dir, requirements_path, env=run_env, timeout=timeout)
+            if not report.get("ok"):
+                _BUILDS.inc(result="failed")
+                _rmtree(venv_dir)
+                return {**report, "venv_dir": str(venv_dir), "key": key, "reused": False}
+
+            marker.write_text(
+                json.dumps(
+                    {
+                        "key": key,
+                        "interpreter": interpreter_tag(),
+                        "requirements": lines,
+                        "created_at": datetime.now(UTC).isoformat(),
+                    },
+                    indent=2,
+                ),
+                encoding="utf-8",
+            )
+            _make_read_only(venv_dir)
+            _BUILDS.inc(result="built")
+            logger.info("Built shared skill venv %s (offline=%s)", key, report.get("offline"))
+            return {
+                "ok": True,
+                "venv_dir": str(venv_dir),
+                "key": key,
+                "reused": False,
+                "offline": report.get("offline", False),
+            }
+
+    def _build(
+        self, venv_dir: Path, requirements_path: Path, *, env: dict[str, str], timeout: int
+    ) -> dict[str, Any]:
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
+        py = venv_dir / "bin" / "python"
+
+        try:
+            proc = subprocess.run(
+                ["uv", "venv", str(venv_dir), "--python", self.python],
+                cwd=str(self.root),
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            if proc.returncode != 0:
+                return _failed("uv venv failed", proc)
+            return self._install_uv(py, requirements_path, env=env, timeout=timeout)
+        except FileNotFoundError:
+            pass
+        except subprocess.TimeoutExpired as e:
+            return {"ok": False, "error": f"{e.cmd[0]} timed out after {e.timeout}s"}
+
+        # Fallback for environments without uv installed
+        try:
+            import venv
+
+            venv.EnvBuilder(with_pip=True, clear=False).create(str(venv_dir))
+            return self._install_pip(py, requirements_path, env=env, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            return {"ok": False, "error": f"pip timed out after {e.timeout}s"}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _install_uv(
+        self, py: Path, requirements_path: Path, *, env: dict[str, str], timeout: int
+    ) -> dict[str, Any]:
+        # Bytecode is compiled up front: the venv is read-only once built.
+        base = [
+            "uv", "pip", "install", "--python", str(py), "--compile-bytecode",
+            "--find-links", str(self.wheelhouse),
+        ]  # fmt: skip
+        offline = self._run([*base, "--offline", "-r", str(requirements_path)], env, timeout)
+        if offline.returncode == 0:
+            return {"ok": True, "offline": True}
+        proc = self._run([*base, "-r", str(requirements_path)], env, timeout)
+        if proc.returncode != 0:
+            return _failed("pip install failed", proc)
+        return {"ok": True, "offline": False}
+
+    def _install_pip(
+        self, py: Path, requirements_path: Path, *, env: dict[str, str], timeout: int
+    ) -> dict[str, Any]:
+        install = [
+            str(py), "-m", "pip", "install", "--no-index",
+            "--find-links", str(self.wheelhouse), "-r", str(requirements_path),
+        ]  # fmt: skip
+        if self._run(install, env, timeout).returncode == 0:
+            return {"ok": True, "offline": True}
+        # Populate the wheelhouse from the index, then install from it.
+        fetch = self._run(
+            [
+                str(py), "-m", "pip", "wheel", "-r", str(requirements_path),
+                "-w", str(self.wheelhouse), "--find-links", str(self.wheelhouse),
+            ],  # fmt: skip
+            env,
+            timeout,
+        )
+        if fetch.returncode != 0:
+            return _failed("pip wheel failed", fetch)
+        proc = self._run(install, env, timeout)
+        if proc.returncode != 0:
+            return _failed("pip install failed", proc)
+        return {"ok": True, "offline": False}
+
+    def _run(self, cmd: list[str], env: dict[str, str], timeout: int) -> Any:
+        return subprocess.run(
+            cmd,
+            cwd=str(self.root),
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+
+    @staticmethod
+    def link(link_path: Path, venv_dir: Path) -> None:
+        """Point ``link_path`` (a skill's ``.venv``) at a shared venv.
+
+        Replaces an existing link or a legacy private venv directory.
+        """
+        if link_path.is_symlink():
+            if Path(os.readlink(link_path)) == venv_dir.resolve():
+                return
+            link_path.unlink()
+        elif link_path.exists():
+            shutil.rmtree(link_path)
+        link_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = link_path.with_name(f"{link_path.name}.{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        tmp.symlink_to(venv_dir.resolve(), target_is_directory=True)
+        os.replace(tmp, link_path)
+
+
+def _make_read_only(root: Path) -> None:
+    """Drop write permission from every file and directory under ``root``."""
+    write = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        for name in [*filenames, *dirnames]:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            if not stat.S_ISLNK(st.st_mode):
+                os.chmod(path, stat.S_IMODE(st.st_mode) & ~write)
+    os.chmod(root, stat.S_IMODE(os.stat(root).st_mode) & ~write)
+
+
+def _rmtree(path: Path) -> None:
+    """``rmtree`` that first restores write permission where deletion needs it."""
+
+    def _retry(func, target, _exc):
+        os.chmod(os.path.dirname(target), stat.S_IRWXU)
+        if os.path.isdir(target) and not os.path.islink(target):
+            os.chmod(target, stat.S_IRWXU)
+        func(target)
+
+    try:
+        shutil.rmtree(path, onexc=_retry)
+    except OSError:
+        logger.warning("Failed to remove shared venv %s", path, exc_info=True)
+
+
+def _failed(error: str, proc: Any) -> dict[str, Any]:
+    return {
+        "ok": False,
+        "error": error,
+        "stdout": (proc.stdout or "")[-8000:],
+        "stderr": (proc.stderr or "")[-8000:],
+    }
@@ -0,0 +1,401 @@
+"""Voice/audio transcription stage for incoming Telegram media.
+
+Voice notes and audio files are transcribed between download and enqueue so
+the agent receives text directly instead of spending a tool round-trip on the
+``openai-whisper-api`` skill.
+
+Pipeline:
+1. Hash the audio and return a cached transcript when the content was seen.
+2. Short audio is sent to the backend as-is.
+3. Long audio is probed with ffmpeg ``silencedetect``, split at silences into
+   chunks of at most ``max_chunk_seconds``, and the chunks are transcribed
+   concurrently (bounded by ``max_parallel``).
+4. Chunk texts are stitched in order with ``[mm:ss]`` timestamps.
+
+The backend is pluggable (:class:`TranscriptionBackend`) so tests and local
+development can use a stub instead of the OpenAI API.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+from app.services.attachment_store import sha256_file
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_CACHE_DIRNAME = ".transcripts"
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(\d+(?:\.\d+)?)")
+
+
+class TranscriptionError(Exception):
+    """Raised when audio cannot be transcribed."""
+
+
+class TranscriptionBackend(Protocol):
+    """Speech-to-text backend for a single audio file."""
+
+    async def transcribe(self, audio_path: Path) -> str:
+        """Return the transcript text for ``audio_path``."""
+        ...
+
+
+class OpenAIWhisperBackend:
+    """Backend using OpenAI's ``/v1/audio/transcriptions`` endpoint."""
+
+    def __init__(self, api_key: str, model: str = "whisper-1") -> None:
+        """Initialize the backend.
+
+        Args:
+            api_key: OpenAI API key.
+            model: Transcription model name.
+        """
+        self.model = model
+        self._api_key = api_key
+        self._client: Any = None
+
+    async def transcribe(self, audio_path: Path) -> str:
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=self._api_key)
+        with audio_path.open("rb") as f:
+            result = await self._client.audio.transcriptions.create(
+                model=self.model,
+                file=f,
+                response_format="text",
+            )
+        return str(result).strip()
+
+
+@dataclass
+class TranscriptSegment:
+    """Transcript of one audio chunk.
+
+    Attributes:
+        start: Chunk start offset in seconds.
+        end: Chunk end offset in seconds (None when unknown).
+        text: Transcribed text.
+    """
+
+    start: float
+    end: float | None
+    text: str
+
+
+@dataclass
+class Transcript:
+    """Stitched transcript of an audio file.
+
+    Attributes:
+        segments: Per-chunk transcripts in order.
+        duration: Audio duration in seconds, if known.
+        cached: Whether the result came from the transcript cache.
+    """
+
+    segments: list[TranscriptSegment] = field(default_factory=list)
+    duration: float | None = None
+    cached: bool = False
+
+    def render(self) -> str:
+        """Render as text; multi-chunk transcripts get ``[mm:ss]`` prefixes."""
+        parts = [s for s in self.segments if s.text]
+        if len(parts) <= 1:
+            return parts[0].text if parts else ""
+        return "\n".join(f"[{_format_timestamp(s.start)}] {s.text}" for s in parts)
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    *,
+    max_chunk_seconds: float,
+    min_chunk_seconds: float = 10.0,
+) -> list[tuple[float, float]]:
+    """Split ``[0, duration]`` into chunks that end inside silences.
+
+    Each chunk is at most ``max_chunk_seconds`` long. A chunk ends at the
+    midpoint of the latest silence that leaves it at least
+    ``min_chunk_seconds`` long; when there is none, it is cut hard at the limit.
+
+    Args:
+        duration: Total audio duration in seconds.
+        silences: ``(start, end)`` silence intervals in seconds.
+        max_chunk_seconds: Maximum chunk length.
+        min_chunk_seconds: Minimum chunk length when cutting at a silence.
+
+    Returns:
+        Ordered ``(start, end)`` chunk boundaries covering the whole duration.
+    """
+    if duration <= max_chunk_seconds:
+        return [(0.0, duration)]
+
+    midpoints = sorted((a + b) / 2 for a, b in silences if b > a)
+    chunks: list[tuple[float, float]] = []
+    start = 0.0
+    while duration - start > max_chunk_seconds:
+        limit = start + max_chunk_seconds
+        cut = limit
+        for m in midpoints:
+            if m > limit:
+                break
+            if m - start >= min_chunk_seconds:
+                cut = m
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, duration))
+    return chunks
+
+
+class TranscriptionService:
+    """Chunked, concurrent, cached audio transcription."""
+
+    def __init__(
+        self,
+        backend: TranscriptionBackend,
+        cache_dir: str | Path,
+        *,
+        max_chunk_seconds: float = 120,
+        max_parallel: int = 4,
+        ffmpeg_bin: str = "ffmpeg",
+        silence_noise_db: int = -30,
+        silence_min_seconds: float = 0.5,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            backend: Speech-to-text backend.
+            cache_dir: Directory for transcripts keyed by audio sha256.
+            max_chunk_seconds: Audio longer than this is split into chunks.
+            max_parallel: Maximum chunks transcribed concurrently.
+            ffmpeg_bin: ffmpeg executable used for probing and splitting.
+            silence_noise_db: Silence threshold for ``silencedetect``.
+            silence_min_seconds: Minimum silence length for ``silencedetect``.
+        """
+        self.backend = backend
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_chunk_seconds = max(1.0, float(max_chunk_seconds))
+        self.max_parallel = max(1, int(max_parallel))
+        self.ffmpeg_bin = ffmpeg_bin
+        self.silence_noise_db = silence_noise_db
+        self.silence_min_seconds = silence_min_seconds
+
+    async def transcribe_file(
+        self,
+        audio_path: str | Path,
+        *,
+        duration_hint: float | None = None,
+    ) -> Transcript:
+        """Transcribe an audio file.
+
+        Args:
+            audio_path: Local audio file.
+            duration_hint: Duration reported by Telegram, if any. Audio known
+                to be shorter than one chunk skips ffmpeg probing entirely.
+
+        Returns:
+            The stitched transcript.
+
+        Raises:
+            TranscriptionError: If the backend fails on any chunk.
+        """
+        audio_path = Path(audio_path)
+        digest = await asyncio.to_thread(sha256_file, audio_path)
+        cached = self._load_cached(digest)
+        if cached is not None:
+            return cached
+
+        short = duration_hint is not None and duration_hint <= self.max_chunk_seconds
+        if short or shutil.which(self.ffmpeg_bin) is None:
+            if not short:
+                logger.warning("ffmpeg not found; transcribing %s without chunking", audio_path)
+            text = await self._transcribe_chunk(audio_path)
+            transcript = Transcript(
+                segments=[TranscriptSegment(0.0, duration_hint, text)],
+                duration=duration_hint,
+            )
+        else:
+            transcript = await self._transcribe_chunked(audio_path, duration_hint)
+
+        self._store_cached(digest, transcript)
+        return transcript
+
+    async def _transcribe_chunked(
+        self, audio_path: Path, duration_hint: float | None
+    ) -> Transcript:
+        duration, silences = await self._probe(audio_path)
+        duration = duration or duration_hint
+        if not duration or duration <= self.max_chunk_seconds:
+            text = await self._transcribe_chunk(audio_path)
+            return Transcript(segments=[TranscriptSegment(0.0, duration, text)], duration=duration)
+
+        chunks = plan_chunks(duration, silences, max_chunk_seconds=self.max_chunk_seconds)
+        logger.info(
+            "Transcribing %s in %d chunks (duration=%.1fs, parallel=%d)",
+            audio_path.name,
+            len(chunks),
+            duration,
+            self.max_parallel,
+        )
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        with tempfile.TemporaryDirectory(prefix="transcribe-") as tmp:
+
+            async def _one(index: int, start: float, end: float) -> TranscriptSegment:
+                async with semaphore:
+                    chunk_path = Path(tmp) / f"chunk_{index:04d}.flac"
+                    await self._extract_chunk(audio_path, chunk_path, start, end)
+                    return TranscriptSegment(start, end, await self._transcribe_chunk(chunk_path))
+
+            segments = await asyncio.gather(
+                *(_one(i, start, end) for i, (start, end) in enumerate(chunks))
+            )
+
+        return Transcript(segments=list(segments), duration=duration)
+
+    async def _transcribe_chunk(self, audio_path: Path) -> str:
+        try:
+            return (await self.backend.transcribe(audio_path)).strip()
+        except Exception as e:
+            raise TranscriptionError(f"Transcription failed for {audio_path.name}: {e}") from e
+
+    async def _probe(self, audio_path: Path) -> tuple[float | None, list[tuple[float, float]]]:
+        """Return ``(duration, silences)`` using ffmpeg's ``silencedetect`` filter."""
+        stderr = await self._run_ffmpeg(
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            str(audio_path),
+            "-af",
+            f"silencedetect=noise={self.silence_noise_db}dB:d={self.silence_min_seconds}",
+            "-f",
+            "null",
+            "-",
+        )
+        return parse_silencedetect(stderr)
+
+    async def _extract_chunk(
+        self, audio_path: Path, chunk_path: Path, start: float, end: float
+    ) -> None:
+        await self._run_ffmpeg(
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-ss",
+            f"{start:.3f}",
+            "-t",
+            f"{end - start:.3f}",
+            "-i",
+            str(audio_path),
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            str(chunk_path),
+        )
+
+    async def _run_ffmpeg(self, *args: str) -> str:
+        proc = await asyncio.create_subprocess_exec(
+            self.ffmpeg_bin,
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        text = stderr.decode("utf-8", errors="replace")
+        if proc.returncode != 0:
+            raise TranscriptionError(f"ffmpeg failed ({proc.returncode}): {text[-500:]}")
+        return text
+
+    def _load_cached(self, digest: str) -> Transcript | None:
+        try:
+            data = json.loads((self.cache_dir / f"{digest}.json").read_text(encoding="utf-8"))
+            return Transcript(
+                segments=[TranscriptSegment(**s) for s in data.get("segments", [])],
+                duration=data.get("duration"),
+                cached=True,
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.debug("Ignoring unreadable transcript cache entry %s", digest, exc_info=True)
+            return None
+
+    def _store_cached(self, digest: str, transcript: Transcript) -> None:
+        path = self.cache_dir / f"{digest}.json"
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        try:
+            payload = {
+                "segments": [asdict(s) for s in transcript.segments],
+                "duration": transcript.duration,
+            }
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            logger.debug("Failed to cache transcript %s", digest, exc_info=True)
+
+
+def parse_silencedetect(stderr: str) -> tuple[float | None, list[tuple[float, float]]]:
+    """Parse ffmpeg ``silencedetect`` output into ``(duration, silences)``."""
+    duration: float | None = None
+    m = _DURATION_RE.search(stderr)
+    if m:
+        h, mi, s = m.groups()
+        duration = int(h) * 3600 + int(mi) * 60 + float(s)
+
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in stderr.splitlines():
+        if (m := _SILENCE_START_RE.search(line)) is not None:
+            start = max(0.0, float(m.group(1)))
+        elif (m := _SILENCE_END_RE.search(line)) is not None and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    return duration, silences
+
+
+def build_transcription_service(config: Any) -> TranscriptionService | None:
+    """Create the transcription service from config, or None when unavailable.
+
+    Transcription requires an explicit ``voice_transcription_enabled`` opt-in
+    (off by default, since audio is sent to OpenAI) and an OpenAI API key
+    (``openai_api_key`` in config or ``OPENAI_API_KEY`` in the environment).
+    """
+    if getattr(config, "voice_transcription_enabled", False) is not True:
+        return None
+    api_key = getattr(config, "openai_api_key", None)
+    if not isinstance(api_key, str) or not api_key:
+        api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        logger.info("Voice transcription disabled: no OpenAI API key configured")
+        return None
+
+    work_base = Path(getattr(config, "working_folder_base_dir", "./workspace"))
+    return TranscriptionService(
+        OpenAIWhisperBackend(api_key, model=config.voice_transcription_model),
+        work_base / TRANSCRIPT_CACHE_DIRNAME,
+        max_chunk_seconds=config.voice_transcription_chunk_seconds,
+        max_parallel=config.voice_transcription_max_parallel,
+    )
+
+
+def _format_timestamp(seconds: float) -> str:
+    total = int(seconds)
+    h, rem = divmod(total, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
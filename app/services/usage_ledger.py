@@ -0,0 +1,511 @@
+"""Model usage ledger: per-user, per-job and per-stage token accounting.
+
+Every Strands ``AgentResult`` carries accumulated token usage and model
+latency in ``result.metrics``. Call sites hand the result to
+:func:`record_agent_usage` with the user and the pipeline stage (``message``,
+``extraction``, ``summary``, ``conversation_turn``, ...); the trace_id of the
+current job is taken from the trace context.
+
+Records are buffered in memory (thread-safe: extraction runs in worker
+threads) and written to the ``model_usage`` table in batches by a background
+flush task, so the hot path never waits on the database.
+
+The ledger also keeps a running per-user token total for the current UTC day.
+When a daily budget is configured, :func:`usage_budget` tells
+``AgentCreator`` to downgrade a user who is over budget to the fallback model
+and/or a smaller conversation window.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from app.models.domain import ModelUsage
+from app.observability.metrics import REGISTRY
+from app.observability.trace_context import get_trace_id
+
+if TYPE_CHECKING:
+    from app.dao.usage_dao import UsageDAO
+
+logger = logging.getLogger(__name__)
+
+STAGE_MESSAGE = "message"
+STAGE_ATTACHMENTS = "attachments"
+STAGE_IMAGE = "image"
+STAGE_EXTRACTION = "extraction"
+STAGE_SUMMARY = "summary"
+STAGE_CONVERSATION_TURN = "conversation_turn"
+STAGE_CONVERSATION_MANAGER = "conversation_manager"
+
+_MAX_BUFFERED = 10_000
+
+_stage_var: ContextVar[str | None] = ContextVar("usage_stage", default=None)
+
+MODEL_TOKENS_TOTAL = REGISTRY.counter(
+    "mordecai_model_tokens_total",
+    "Model tokens by pipeline stage and kind (input, output, cache_read, cache_write).",
+    ["stage", "kind"],
+)
+MODEL_CALLS_TOTAL = REGISTRY.counter(
+    "mordecai_model_invocations_total",
+    "Agent invocations with recorded usage, by pipeline stage.",
+    ["stage"],
+)
+MODEL_LATENCY_SECONDS = REGISTRY.histogram(
+    "mordecai_model_latency_seconds",
+    "Accumulated model latency per agent invocation, by pipeline stage.",
+    ["stage"],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0),
+)
+USAGE_BUDGET_DOWNGRADES_TOTAL = REGISTRY.counter(
+    "mordecai_usage_budget_downgrades_total",
+    "Agents created in downgraded mode because the user exceeded the daily token budget.",
+)
+USAGE_RECORDS_DROPPED_TOTAL = REGISTRY.counter(
+    "mordecai_usage_records_dropped_total",
+    "Usage records dropped because the ledger buffer was full.",
+)
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def extract_usage(result: Any) -> dict[str, int] | None:
+    """Token counts and latency from a Strands ``AgentResult``.
+
+    Returns:
+        Dict with ``input_tokens``, ``output_tokens``, ``cache_read_tokens``,
+        ``cache_write_tokens`` and ``latency_ms``, or None when the result
+        carries no usage (e.g. a mocked agent).
+    """
+    metrics = getattr(result, "metrics", None)
+    usage = getattr(metrics, "accumulated_usage", None)
+    if not isinstance(usage, dict):
+        return None
+    timings = getattr(metrics, "accumulated_metrics", None)
+    return {
+        "input_tokens": _as_int(usage.get("inputTokens")),
+        "output_tokens": _as_int(usage.get("outputTokens")),
+        "cache_read_tokens": _as_int(usage.get("cacheReadInputTokens")),
+        "cache_write_tokens": _as_int(usage.get("cacheWriteInputTokens")),
+        "latency_ms": _as_int(timings.get("latencyMs") if isinstance(timings, dict) else 0),
+    }
+
+
+def model_id_of(agent: Any) -> str | None:
+    """Best-effort model id of a Strands agent (``agent.model.config``)."""
+    try:
+        config = agent.model.get_config()
+    except Exception:
+        config = getattr(getattr(agent, "model", None), "config", None)
+    if isinstance(config, dict):
+        value = config.get("model_id") or config.get("model")
+        if isinstance(value, str):
+            return value
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetDecision:
+    """How an agent for a budgeted user should be built.
+
+    Attributes:
+        over_budget: The user has used at least ``budget`` tokens today.
+        tokens_today: Input + output tokens recorded today (UTC).
+        budget: The user's daily token budget.
+        model_id: Fallback model id to use, or None for the normal model.
+        window_size: Conversation window to use, or None for the default.
+    """
+
+    over_budget: bool
+    tokens_today: int
+    budget: int
+    model_id: str | None = None
+    window_size: int | None = None
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+class UsageLedger:
+    """Buffer usage records, flush them in batches and track daily totals.
+
+    Args:
+        usage_dao: DAO used to persist records; None keeps totals in memory only.
+        flush_interval: Seconds between background flushes.
+        batch_size: Buffer size that triggers an early flush.
+        daily_budget: Default per-user daily token budget (0 = unlimited).
+        budget_overrides: Per-user budgets overriding ``daily_budget``.
+        fallback_model_id: Model used for users over budget.
+        budget_window_size: Conversation window for users over budget.
+    """
+
+    def __init__(
+        self,
+        usage_dao: UsageDAO | None = None,
+        *,
+        flush_interval: float = 5.0,
+        batch_size: int = 200,
+        daily_budget: int = 0,
+        budget_overrides: dict[str, int] | None = None,
+        fallback_model_id: str | None = None,
+        budget_window_size: int = 0,
+    ) -> None:
+        self._dao = usage_dao
+        self.flush_interval = max(0.1, float(flush_interval))
+        self.batch_size = max(1, int(batch_size))
+        self.daily_budget = max(0, int(daily_budget))
+        self.budget_overrides = {str(k): int(v) for k, v in (budget_overrides or {}).items()}
+        self.fallback_model_id = fallback_model_id or None
+        self.budget_window_size = max(0, int(budget_window_size))
+
+        self._lock = threading.Lock()
+        self._buffer: list[ModelUsage] = []
+        self._day = _today()
+        self._tokens_today: dict[str, int] = {}
+        self._downgraded_today: set[str] = set()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_lock: asyncio.Lock | None = None
+
+    @classmethod
+    def from_config(cls, config: Any, usage_dao: UsageDAO | None) -> UsageLedger:
+        """Build a ledger from ``AgentConfig`` ``usage_*`` settings.
+
+        Non-conforming values (e.g. MagicMock configs in tests) fall back to
+        the defaults.
+        """
+
+        def _setting(name: str, kind: type | tuple[type, ...], default: Any) -> Any:
+            value = getattr(config, name, default)
+            return value if isinstance(value, kind) and not isinstance(value, bool) else default
+
+        return cls(
+            usage_dao,
+            flush_interval=_setting("usage_flush_interval_seconds", (int, float), 5.0),
+            batch_size=_setting("usage_flush_batch_size", int, 200),
+            daily_budget=_setting("usage_daily_token_budget", int, 0),
+            budget_overrides=_setting("usage_budget_overrides", dict, None),
+            fallback_model_id=_setting("usage_budget_fallback_model_id", str, None),
+            budget_window_size=_setting("usage_budget_window_size", int, 0),
+        )
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _roll_day(self) -> None:
+        # Caller holds self._lock.
+        today = _today()
+        if today != self._day:
+            self._day = today
+            self._tokens_today.clear()
+            self._downgraded_today.clear()
+
+    def record(self, record: ModelUsage) -> None:
+        """Buffer ``record`` and add it to the user's daily total (thread-safe)."""
+        if record.created_at is None:
+            record.created_at = datetime.utcnow()
+        stage = record.stage
+        MODEL_CALLS_TOTAL.inc(stage=stage)
+        for kind, value in (
+            ("input", record.input_tokens),
+            ("output", record.output_tokens),
+            ("cache_read", record.cache_read_tokens),
+            ("cache_write", record.cache_write_tokens),
+        ):
+            if value:
+                MODEL_TOKENS_TOTAL.inc(value, stage=stage, kind=kind)
+        MODEL_LATENCY_SECONDS.observe(record.latency_ms / 1000.0, stage=stage)
+
+        with self._lock:
+            self._roll_day()
+            self._tokens_today[record.user_id] = (
+                self._tokens_today.get(record.user_id, 0) + record.total_tokens
+            )
+            if self._dao is None:
+                return
+            if len(self._buffer) >= _MAX_BUFFERED:
+                USAGE_RECORDS_DROPPED_TOTAL.inc()
+                return
+            self._buffer.append(record)
+            flush_now = len(self._buffer) >= self.batch_size
+        if flush_now:
+            self._wake()
+
+    def record_result(
+        self,
+        result: Any,
+        *,
+        user_id: str,
+        stage: str,
+        model_id: str | None = None,
+        trace_id: str | None = None,
+    ) -> ModelUsage | None:
+        """Record the usage carried by an ``AgentResult`` (never raises)."""
+        try:
+            usage = extract_usage(result)
+            if usage is None:
+                return None
+            record = ModelUsage(
+                user_id=user_id,
+                stage=stage,
+                trace_id=trace_id or get_trace_id(),
+                model_id=model_id,
+                **usage,
+            )
+            self.record(record)
+            return record
+        except Exception:
+            logger.debug("Failed to record model usage", exc_info=True)
+            return None
+
+    # ------------------------------------------------------------------
+    # Budgets
+    # ------------------------------------------------------------------
+
+    def tokens_today(self, user_id: str) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._tokens_today.get(user_id, 0)
+
+    def tokens_by_user(self) -> dict[str, int]:
+        """Snapshot of today's input + output tokens per user."""
+        with self._lock:
+            self._roll_day()
+            return dict(self._tokens_today)
+
+    def budget_for(self, user_id: str) -> int:
+        return self.budget_overrides.get(user_id, self.daily_budget)
+
+    def budget_decision(self, user_id: str) -> BudgetDecision | None:
+        """Budget state for ``user_id``; None when the user has no budget."""
+        budget = self.budget_for(user_id)
+        if budget <= 0:
+            return None
+        used = self.tokens_today(user_id)
+        if used < budget:
+            return BudgetDecision(over_budget=False, tokens_today=used, budget=budget)
+
+        with self._lock:
+            first = user_id not in self._downgraded_today
+            self._downgraded_today.add(user_id)
+        if first:
+            logger.warning(
+                "User %s exceeded daily token budget (%d >= %d); downgrading (model=%s, window=%s)",
+                user_id,
+                used,
+                budget,
+                self.fallback_model_id or "unchanged",
+                self.budget_window_size or "unchanged",
+            )
+        return BudgetDecision(
+            over_budget=True,
+            tokens_today=used,
+            budget=budget,
+            model_id=self.fallback_model_id,
+            window_size=self.budget_window_size or None,
+        )
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    async def flush(self) -> int:
+        """Write buffered records in one batch; returns the number written."""
+        if self._dao is None:
+            return 0
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                return await self._dao.insert_many(batch)
+            except Exception:
+                logger.warning("Failed to write %d usage records; will retry", len(batch), exc_info=True)
+                with self._lock:
+                    room = max(0, _MAX_BUFFERED - len(self._buffer))
+                    dropped = max(0, len(batch) - room)
+                    self._buffer[:0] = batch[dropped:]
+                if dropped:
+                    USAGE_RECORDS_DROPPED_TOTAL.inc(dropped)
+                return 0
+
+    async def _run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        """Seed today's totals from the database and start the flush task."""
+        if self.daily_budget or self.budget_overrides:
+            await self._seed_today()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        if self._dao is not None and self._task is None:
+            self._task = self._loop.create_task(self._run(self._wakeup), name="usage-ledger-flush")
+
+    async def _seed_today(self) -> None:
+        if self._dao is None:
+            return
+        midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            totals = await self._dao.tokens_since(midnight)
+        except Exception:
+            logger.warning("Failed to load today's usage totals", exc_info=True)
+            return
+        with self._lock:
+            self._roll_day()
+            for user_id, tokens in totals.items():
+                self._tokens_today[user_id] = self._tokens_today.get(user_id, 0) + tokens
+
+    async def stop(self) -> None:
+        """Stop the flush task and write whatever is still buffered."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    async def format_report(self, user_id: str, *, days: int = 1) -> str:
+        """Per-day usage for ``user_id`` (flushes pending records first)."""
+        if self._dao is None:
+            return f"Tokens today: {self.tokens_today(user_id):,}"
+        await self.flush()
+        aggregates = await self._dao.daily_aggregates(user_id, days=days)
+        budget = self.budget_for(user_id)
+        lines = []
+        if budget > 0:
+            used = self.tokens_today(user_id)
+            state = "over budget - downgraded" if used >= budget else "within budget"
+            lines.append(f"Daily budget: {used:,} / {budget:,} tokens ({state})")
+        if not aggregates:
+            lines.append("No model usage recorded.")
+            return "\n".join(lines)
+
+        current_day = None
+        for agg in aggregates:
+            if agg.day != current_day:
+                current_day = agg.day
+                day_total = sum(a.total_tokens for a in aggregates if a.day == agg.day)
+                lines.append(f"{agg.day}: {day_total:,} tokens")
+            cache = ""
+            if agg.cache_read_tokens or agg.cache_write_tokens:
+                cache = f", cache r/w {agg.cache_read_tokens:,}/{agg.cache_write_tokens:,}"
+            lines.append(
+                f"  {agg.stage} [{agg.model_id or 'unknown'}]: {agg.calls} calls, "
+                f"in {agg.input_tokens:,} / out {agg.output_tokens:,}{cache}, "
+                f"model {agg.latency_ms / 1000:.1f}s"
+            )
+        return "\n".join(lines)
+
+
+_ledger: UsageLedger | None = None
+
+
+def set_usage_ledger(ledger: UsageLedger | None) -> None:
+    """Install the process-wide ledger (None disables recording)."""
+    global _ledger
+    _ledger = ledger
+
+
+def get_usage_ledger() -> UsageLedger | None:
+    return _ledger
+
+
+@contextmanager
+def usage_stage(stage: str) -> Iterator[None]:
+    """Account model calls made inside the block to ``stage``.
+
+    Lets callers that go through ``process_message`` (e.g. multi-agent
+    conversation rounds) tag their usage without threading a parameter.
+    An explicit ``stage`` passed to :func:`record_agent_usage` still wins.
+    """
+    token = _stage_var.set(stage)
+    try:
+        yield
+    finally:
+        _stage_var.reset(token)
+
+
+def record_agent_usage(
+    result: Any,
+    *,
+    user_id: str | None,
+    stage: str | None = None,
+    agent: Any = None,
+) -> ModelUsage | None:
+    """Record an agent invocation's usage in the installed ledger, if any.
+
+    Args:
+        result: Strands ``AgentResult``.
+        user_id: User the usage is accounted to.
+        stage: Pipeline stage; defaults to the enclosing :func:`usage_stage`
+            or ``message``.
+        agent: Agent that produced ``result`` (for the model id).
+    """
+    ledger = _ledger
+    if ledger is None or not user_id:
+        return None
+    return ledger.record_result(
+        result,
+        user_id=user_id,
+        stage=stage or _stage_var.get() or STAGE_MESSAGE,
+        model_id=model_id_of(agent) if agent is not None else None,
+    )
+
+
+def usage_budget(user_id: str) -> BudgetDecision | None:
+    """Budget decision for ``user_id``; None without a ledger or budget."""
+    ledger = _ledger
+    if ledger is None:
+        return None
+    try:
+        return ledger.budget_decision(user_id)
+    except Exception:
+        logger.debug("Budget check failed", exc_info=True)
+        return None
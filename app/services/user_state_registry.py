@@ -0,0 +1,274 @@
+"""Bounded, evicting per-user state registries.
+
+Long-running multi-tenant nodes accumulate one entry per user ever seen in a
+number of in-process caches (semaphores, queue URLs, agents, conversation
+state, browser instances). :class:`BoundedUserRegistry` is a drop-in
+``MutableMapping`` that bounds them:
+
+- **Idle TTL**: entries not touched for ``idle_ttl_seconds`` are evicted.
+- **Budget**: at most ``max_entries`` entries (and optionally ``max_bytes``
+  as estimated by ``sizeof``); the least recently used go first.
+- **Pinning**: ``can_evict`` lets a registry keep entries that are in use
+  (e.g. a semaphore with holders) regardless of age or budget.
+- **Spill**: ``on_evict`` is called for every evicted entry so owners can
+  persist or close it.
+
+Sweeps are lazy (on mutation, at most every ``sweep_interval_seconds``) so no
+background task is required; :func:`sweep_registries` forces one everywhere.
+Every registry is tracked weakly by name for :func:`registry_sizes`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, MutableMapping
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60.0
+
+# Keyed by id(): mappings compare by content, so they cannot live in a WeakSet.
+_REGISTRIES: weakref.WeakValueDictionary[int, BoundedUserRegistry[Any]] = (
+    weakref.WeakValueDictionary()
+)
+_REGISTRIES_LOCK = threading.Lock()
+
+
+class BoundedUserRegistry[V](MutableMapping[str, V]):
+    """LRU + idle-TTL bounded mapping keyed by user (or queue) id.
+
+    Reads through ``[]``/``get`` refresh an entry's idle clock. Iteration and
+    ``in`` do not. All operations are thread-safe; eviction callbacks run
+    outside the lock.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        idle_ttl_seconds: float | None = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+        max_bytes: int | None = None,
+        sizeof: Callable[[V], int] | None = None,
+        can_evict: Callable[[str, V], bool] | None = None,
+        on_evict: Callable[[str, V], None] | None = None,
+        sweep_interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            name: Gauge name reported by :func:`registry_sizes`.
+            idle_ttl_seconds: Evict entries idle for longer than this
+                (None or <= 0 disables TTL eviction).
+            max_entries: Maximum number of entries (None disables).
+            max_bytes: Maximum total ``sizeof`` (requires ``sizeof``).
+            sizeof: Approximate size of a value in bytes.
+            can_evict: Return False to pin an entry that is in use.
+            on_evict: Called with ``(key, value)`` for each evicted entry.
+            sweep_interval_seconds: Minimum spacing of lazy TTL sweeps.
+            clock: Monotonic clock (injectable for tests).
+        """
+        self.name = name
+        self.idle_ttl_seconds = (
+            idle_ttl_seconds if idle_ttl_seconds and idle_ttl_seconds > 0 else None
+        )
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self.max_bytes = max_bytes if sizeof is not None and max_bytes else None
+        self._sizeof = sizeof
+        self._can_evict = can_evict
+        self._on_evict = on_evict
+        self._sweep_interval = sweep_interval_seconds
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[V, float]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = clock()
+        self.evictions = 0
+
+        with _REGISTRIES_LOCK:
+            _REGISTRIES[id(self)] = self
+
+    # MutableMapping abstract methods
+    def __getitem__(self, key: str) -> V:
+        with self._lock:
+            value, _ = self._data[key]
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: str, value: V) -> None:
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+        self._maybe_evict(protect=key)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def touch(self, key: str) -> None:
+        """Refresh ``key``'s idle clock without reading it."""
+        with self._lock:
+            if key in self._data:
+                self._data[key] = (self._data[key][0], self._clock())
+                self._data.move_to_end(key)
+
+    def peek_all(self) -> dict[str, V]:
+        """Return a copy of all entries without refreshing idle clocks."""
+        with self._lock:
+            return {k: v for k, (v, _) in self._data.items()}
+
+    def approx_bytes(self) -> int | None:
+        """Return the estimated total size, or None without a ``sizeof``."""
+        if self._sizeof is None:
+            return None
+        with self._lock:
+            values = [v for v, _ in self._data.values()]
+        return sum(self._safe_sizeof(v) for v in values)
+
+    def sweep(self) -> int:
+        """Evict idle and over-budget entries now.
+
+        Returns:
+            Number of entries evicted.
+        """
+        return self._evict(force_ttl=True, protect=None)
+
+    def _maybe_evict(self, *, protect: str | None) -> None:
+        self._evict(force_ttl=False, protect=protect)
+
+    def _evict(self, *, force_ttl: bool, protect: str | None) -> int:
+        evicted: list[tuple[str, V]] = []
+        with self._lock:
+            now = self._clock()
+            if self.idle_ttl_seconds is not None and (
+                force_ttl or now - self._last_sweep >= self._sweep_interval
+            ):
+                self._last_sweep = now
+                cutoff = now - self.idle_ttl_seconds
+                # Oldest first; stop at the first entry still within the TTL.
+                for key, (value, last_used) in list(self._data.items()):
+                    if last_used > cutoff:
+                        break
+                    if key != protect and self._evictable(key, value):
+                        del self._data[key]
+                        evicted.append((key, value))
+
+            over_count = (
+                self.max_entries is not None and len(self._data) > self.max_entries
+            )
+            total = None
+            if self.max_bytes is not None:
+                total = sum(self._safe_sizeof(v) for v, _ in self._data.values())
+            if over_count or (total is not None and total > self.max_bytes):
+                for key, (value, _) in list(self._data.items()):
+                    within_count = (
+                        self.max_entries is None or len(self._data) <= self.max_entries
+                    )
+                    within_bytes = total is None or total <= self.max_bytes
+                    if within_count and within_bytes:
+                        break
+                    if key == protect or not self._evictable(key, value):
+                        continue
+                    del self._data[key]
+                    evicted.append((key, value))
+                    if total is not None:
+                        total -= self._safe_sizeof(value)
+
+            self.evictions += len(evicted)
+
+        for key, value in evicted:
+            if self._on_evict is not None:
+                try:
+                    self._on_evict(key, value)
+                except Exception:
+                    logger.debug("on_evict failed for %s[%s]", self.name, key, exc_info=True)
+        if evicted:
+            logger.debug("Evicted %d idle entries from %s", len(evicted), self.name)
+        return len(evicted)
+
+    def _evictable(self, key: str, value: V) -> bool:
+        if self._can_evict is None:
+            return True
+        try:
+            return bool(self._can_evict(key, value))
+        except Exception:
+            return False
+
+    def _safe_sizeof(self, value: V) -> int:
+        try:
+            return int(self._sizeof(value)) if self._sizeof is not None else 0
+        except Exception:
+            return 0
+
+
+def registry_sizes() -> dict[str, int]:
+    """Return ``{registry name: entry count}`` summed over live registries."""
+    with _REGISTRIES_LOCK:
+        registries = list(_REGISTRIES.values())
+    sizes: dict[str, int] = {}
+    for registry in registries:
+        sizes[registry.name] = sizes.get(registry.name, 0) + len(registry)
+    return dict(sorted(sizes.items()))
+
+
+def sweep_registries() -> int:
+    """Run a TTL/budget sweep on every live registry.
+
+    Returns:
+        Total number of entries evicted.
+    """
+    with _REGISTRIES_LOCK:
+        registries = list(_REGISTRIES.values())
+    total = 0
+    for registry in registries:
+        try:
+            total += registry.sweep()
+        except Exception:
+            logger.debug("Sweep failed for registry %s", registry.name, exc_info=True)
+    return total
+
+
+def registry_limits(config: Any) -> dict[str, Any]:
+    """Return ``idle_ttl_seconds``/``max_entries`` kwargs from config.
+
+    Falls back to module defaults for missing or non-numeric values (e.g. a
+    ``MagicMock`` config in tests).
+    """
+    ttl = getattr(config, "user_state_idle_ttl_seconds", None)
+    max_entries = getattr(config, "user_state_max_entries", None)
+    return {
+        "idle_ttl_seconds": ttl if _is_number(ttl) else DEFAULT_IDLE_TTL_SECONDS,
+        "max_entries": max_entries if _is_number(max_entries) else DEFAULT_MAX_ENTRIES,
+    }
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
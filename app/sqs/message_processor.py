@@ -16,18 +16,31 @@ Requirements:
 import asyncio
 import json
 import logging
+import time
+import weakref
 from collections.abc import Callable
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Protocol
 
 from app.models.agent import AttachmentInfo
+from app.observability.metrics import (
+    QUEUE_DEPTH,
+    USER_SEMAPHORE_SATURATION,
+    observe_stage,
+    record_outbound_error,
+    stage_timer,
+)
+from app.services.file_index import mark_user_dirty
+from app.services.user_state_registry import BoundedUserRegistry, registry_limits
 from app.sqs.typing_indicator import (
+    ChatPresenceManager,
+    ChatRateLimiter,
     ProgressUpdateLoop,
     ProgressUpdateSender,
-    TypingIndicatorLoop,
     TypingIndicatorSender,
 )
 from app.tools import send_file as send_file_module
@@ -69,6 +82,47 @@ class QueueMessage:
     onboarding: dict[str, str | None] | None = None
 
 
+class _SlotSemaphore(asyncio.Semaphore):
+    """Semaphore that counts its holders and waiters itself.
+
+    ``asyncio.Semaphore`` exposes neither, and reading its private
+    ``_value``/``_waiters`` ties us to CPython internals.
+    """
+
+    def __init__(self, value: int = 1) -> None:
+        super().__init__(value)
+        self.capacity = value
+        self.in_use = 0
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        self.waiting += 1
+        try:
+            await super().acquire()
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        return True
+
+    def release(self) -> None:
+        self.in_use = max(0, self.in_use - 1)
+        super().release()
+
+    @property
+    def idle(self) -> bool:
+        """True if no task holds or waits on this semaphore."""
+        return self.in_use == 0 and self.waiting == 0
+
+
+def _sqs_pickup_delay(message: dict) -> float | None:
+    """Seconds between the SQS send and now, from the ``SentTimestamp`` attribute."""
+    try:
+        sent_ms = int((message.get("Attributes") or {})["SentTimestamp"])
+    except Exception:
+        return None
+    return max(0.0, time.time() - sent_ms / 1000.0)
+
+
 def _parse_attachments(raw: Any) -> list[AttachmentInfo] | None:
     """Parse attachment payloads from SQS into typed models.
 
@@ -193,13 +247,31 @@ class MessageProcessor:
         self._processing_task: asyncio.Task | None = None
         self._heartbeat_tasks: dict[str, asyncio.Task] = {}
         # Per-user semaphores for parallel message processing (replaces _queue_locks)
-        self._user_semaphores: dict[str, asyncio.Semaphore] = {}
+        # Per-user/per-queue state is evicted once idle (and never while in use)
+        # so a long-running node does not keep one entry per user ever seen.
+        limits = registry_limits(config)
+        self._user_semaphores: BoundedUserRegistry[_SlotSemaphore] = BoundedUserRegistry(
+            "sqs_user_semaphores",
+            can_evict=lambda _user_id, sem: sem.idle,
+            **limits,
+        )
         self._semaphore_lock = asyncio.Lock()
-        self._queue_prefetch_semaphores: dict[str, asyncio.Semaphore] = {}
-        self._inflight_total_semaphore = asyncio.Semaphore(max_inflight_total)
+        self._queue_prefetch_semaphores: BoundedUserRegistry[_SlotSemaphore] = (
+            BoundedUserRegistry(
+                "sqs_prefetch_semaphores",
+                can_evict=lambda _url, sem: sem.idle,
+                **limits,
+            )
+        )
+        self._inflight_total_semaphore = _SlotSemaphore(max_inflight_total)
         self._max_prefetch_per_queue = max_prefetch_per_queue
         self._message_tasks: set[asyncio.Task] = set()
 
+        # One coalesced typing loop per chat, shared by all in-flight jobs and
+        # paced together with real outbound messages.
+        self._rate_limiter = ChatRateLimiter()
+        self._presence: ChatPresenceManager | None = None
+
         # Get max concurrent tasks per user from config (default to 5 for backward compatibility)
         self._max_concurrent_per_user = config.max_concurrent_tasks_per_user if config else 5
 
@@ -211,7 +283,19 @@ class MessageProcessor:
         )
 
         # Diagnostics: log background polling mode once per queue.
-        self._logged_background_queues: set[str] = set()
+        self._logged_background_queues: BoundedUserRegistry[bool] = BoundedUserRegistry(
+            "sqs_logged_queues", **limits
+        )
+
+        # Scrape-time gauges. A weak reference so the metrics registry never
+        # keeps a stopped processor alive.
+        self._inflight_messages = 0
+        self._waiting_messages = 0
+        self_ref = weakref.ref(self)
+        QUEUE_DEPTH.set_function(lambda: p._queue_depth() if (p := self_ref()) else {})
+        USER_SEMAPHORE_SATURATION.set_function(
+            lambda: p._semaphore_saturation() if (p := self_ref()) else {}
+        )
 
     async def start(self) -> None:
         """Start processing messages from all user queues.
@@ -227,7 +311,7 @@ class MessageProcessor:
         logger.info(
             "Message processor mode: background_polling=true max_prefetch_per_queue=%s max_inflight_total=%s",
             self._max_prefetch_per_queue,
-            getattr(self._inflight_total_semaphore, "_value", "?"),
+            self._inflight_total_semaphore.capacity,
         )
         self.running = True
 
@@ -262,6 +346,9 @@ class MessageProcessor:
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
 
+        if self._presence is not None:
+            await self._presence.close()
+
         # Cancel any orphaned heartbeat tasks (normally cleaned up by message tasks).
         for heartbeat in list(self._heartbeat_tasks.values()):
             heartbeat.cancel()
@@ -269,7 +356,68 @@ class MessageProcessor:
             await asyncio.gather(*self._heartbeat_tasks.values(), return_exceptions=True)
         self._heartbeat_tasks.clear()
 
-    async def _get_user_semaphore(self, user_id: str) -> asyncio.Semaphore:
+    def _get_presence(self) -> ChatPresenceManager | None:
+        """Return the shared typing indicator manager, if chat actions are enabled."""
+        if self._presence is None and self.typing_action_callback:
+            typing_cbk = self.typing_action_callback
+
+            async def typing_action_cb(c_id: int, action: str) -> None:
+                result = typing_cbk(c_id, action)
+                if asyncio.iscoroutine(result):
+                    await result
+
+            self._presence = ChatPresenceManager(
+                TypingIndicatorSender(typing_action_cb),
+                rate_limiter=self._rate_limiter,
+            )
+        return self._presence
+
+    def _queue_depth(self) -> dict[tuple[str, ...], float]:
+        """Gauge values for messages reserved from SQS by this process."""
+        return {
+            ("inflight",): float(self._inflight_messages),
+            ("waiting",): float(self._waiting_messages),
+        }
+
+    def _semaphore_saturation(self) -> dict[tuple[str, ...], float]:
+        """Gauge values for per-user concurrency slots (aggregated over users)."""
+        capacity = self._max_concurrent_per_user
+        in_use = [sem.in_use for sem in self._user_semaphores.peek_all().values()]
+        return {
+            ("users",): float(len(in_use)),
+            ("saturated_users",): float(sum(1 for n in in_use if n >= capacity)),
+            ("slots_in_use",): float(sum(in_use)),
+        }
+
+    async def _send_outbound(
+        self, chat_id: int, callback: Callable[..., Any], *args: Any
+    ) -> Any:
+        """Invoke a send callback with the chat's typing indicator paused.
+
+        Args:
+            chat_id: Telegram chat ID the message goes to.
+            callback: Sync or async send callback taking ``(chat_id, *args)``.
+            *args: Remaining callback arguments.
+
+        Returns:
+            The callback's (awaited) result.
+        """
+        presence = self._presence
+        paused = presence.sending(chat_id) if presence is not None else nullcontext()
+        async with paused:
+            with stage_timer("telegram_send"):
+                try:
+                    result = callback(chat_id, *args)
+                    if asyncio.iscoroutine(result):
+                        result = await result
+                except Exception as e:
+                    record_outbound_error(
+                        e, target="telegram", method=getattr(callback, "__name__", "send")
+                    )
+                    raise
+            return result
+
+    async def _get_user_semaphore(self, user_id: str) -> _SlotSemaphore:
         """Get or create a semaphore for the given user.
 
         The semaphore limits the number of concurrent messages processed
@@ -278,13 +426,13 @@ class MessageProcessor:
         """
         async with self._semaphore_lock:
             if user_id not in self._user_semaphores:
-                self._user_semaphores[user_id] = asyncio.Semaphore(self._max_concurrent_per_user)
+                self._user_semaphores[user_id] = _SlotSemaphore(self._max_concurrent_per_user)
             return self._user_semaphores[user_id]
 
-    def _get_queue_prefetch_semaphore(self, queue_url: str) -> asyncio.Semaphore:
+    def _get_queue_prefetch_semaphore(self, queue_url: str) -> _SlotSemaphore:
         sem = self._queue_prefetch_semaphores.get(queue_url)
         if sem is None:
-            sem = asyncio.Semaphore(self._max_prefetch_per_queue)
+            sem = _SlotSemaphore(self._max_prefetch_per_queue)
             self._queue_prefetch_semaphores[queue_url] = sem
         return sem
 
@@ -331,7 +479,7 @@ class MessageProcessor:
         queue_prefetch_sem = self._get_queue_prefetch_semaphore(queue_url)
 
         if queue_url not in self._logged_background_queues:
-            self._logged_background_queues.add(queue_url)
+            self._logged_background_queues[queue_url] = True
             logger.info(
                 "Queue poller active (background=true) queue=%s max_prefetch_per_queue=%s max_concurrent_per_user=%s",
                 queue_url,
@@ -399,7 +547,7 @@ class MessageProcessor:
                 self._inflight_total_semaphore.release()
 
     async def _maybe_send_busy_ack(
-        self, body: dict[str, Any], *, user_semaphore: asyncio.Semaphore
+        self, body: dict[str, Any], *, user_semaphore: _SlotSemaphore
     ) -> None:
         """Send a busy acknowledgment if the user's semaphore is at capacity.
 
@@ -411,7 +559,7 @@ class MessageProcessor:
             return
 
         # Check if semaphore is at capacity (all slots taken)
-        if user_semaphore._value > 0:
+        if user_semaphore.in_use < user_semaphore.capacity:
             # There's still capacity, no need for busy ack
             return
 
@@ -425,9 +573,7 @@ class MessageProcessor:
             return
 
         try:
-            res = response_cb(chat_id, self._busy_ack_text)
-            if asyncio.iscoroutine(res):
-                await res
+            await self._send_outbound(chat_id, response_cb, self._busy_ack_text)
         except Exception:
             logger.exception("Failed sending busy ack")
 
@@ -462,32 +608,31 @@ class MessageProcessor:
         # but skip the busy ack and semaphore acquisition.
         if not user_id:
             logger.warning("No user_id in message %s, processing without semaphore", message_id)
+        else:
+            # Traffic keeps the user's queue registered for polling.
+            self.queue_manager.get_queue_url_for_user(user_id)
 
         heartbeat_task = asyncio.create_task(
             self._start_heartbeat(queue_url, receipt_handle, message_id)
         )
         self._heartbeat_tasks[message_id] = heartbeat_task
 
-        # Typing indicator loop (will be started if typing_action_callback is available)
-        typing_loop: TypingIndicatorLoop | None = None
+        # Shared typing indicator (held if typing_action_callback is available)
+        presence: ChatPresenceManager | None = None
 
         # Progress update loop (will be started if progress_callback is available)
         progress_loop: ProgressUpdateLoop | None = None
 
         # Start typing indicator IMMEDIATELY (before semaphore acquisition)
         # This ensures the user sees visual feedback as soon as SQS starts processing
-        if self.typing_action_callback and chat_id:
-            typing_cbk = self.typing_action_callback
-
-            async def typing_action_cb(c_id: int, action: str) -> None:
-                result = typing_cbk(c_id, action)
-                if asyncio.iscoroutine(result):
-                    await result
-
-            sender = TypingIndicatorSender(typing_action_cb)
-            typing_loop = TypingIndicatorLoop(sender, chat_id)
-            await typing_loop.start()
-
+        if chat_id:
+            presence = self._get_presence()
+            if presence is not None:
+                await presence.acquire(chat_id)
+
+        self._inflight_messages += 1
+        self._waiting_messages += 1
+        waiting = True
         try:
             # Get the user's semaphore and potentially send busy ack if at capacity
             if user_id and body:
@@ -498,15 +643,20 @@ class MessageProcessor:
             if user_id:
                 user_semaphore = await self._get_user_semaphore(user_id)
                 async with user_semaphore:
+                    self._waiting_messages -= 1
+                    waiting = False
+                    pickup_delay = _sqs_pickup_delay(message)
+                    if pickup_delay is not None:
+                        observe_stage("sqs_pickup", pickup_delay)
+
                     # Set up progress callback if available
                     if self.progress_callback and chat_id:
                         progress_cbk = self.progress_callback
 
                         async def progress_cb(message: str) -> bool:
-                            result = progress_cbk(chat_id, message)
-                            if asyncio.iscoroutine(result):
-                                return await result
-                            return bool(result)
+                            return bool(
+                                await self._send_outbound(chat_id, progress_cbk, message)
+                            )
 
                         send_progress_module.set_progress_callback(progress_cb)
 
@@ -514,15 +664,15 @@ class MessageProcessor:
                         # gets a fast acknowledgment even if the agent/tools take
                         # minutes (e.g., transcript fetching).
                         try:
-                            initial = progress_cbk(chat_id, "Working on it…")
-                            if asyncio.iscoroutine(initial):
-                                await initial
+                            await self._send_outbound(chat_id, progress_cbk, "Working on it…")
                         except Exception:
                             logger.debug("Failed to send initial progress ack", exc_info=True)
 
                         # Start progress update loop AFTER callback is set
                         # Pass a lambda that captures the current context
-                        progress_update_sender = ProgressUpdateSender(progress_cbk)
+                        progress_update_sender = ProgressUpdateSender(
+                            lambda c_id, text: self._send_outbound(c_id, progress_cbk, text)
+                        )
                         progress_loop = ProgressUpdateLoop(
                             progress_update_sender,
                             chat_id,
@@ -533,12 +683,17 @@ class MessageProcessor:
                     return await self._handle_message(queue_url, message, body=body)
             else:
                 # No user_id, process directly (shouldn't happen in normal flow)
+                self._waiting_messages -= 1
+                waiting = False
                 return await self._handle_message(queue_url, message, body=body)
         finally:
+            self._inflight_messages -= 1
+            if waiting:
+                self._waiting_messages -= 1
             self._stop_heartbeat(message_id)
-            # Stop typing indicator loop
-            if typing_loop:
-                await typing_loop.stop()
+            # Release the shared typing indicator (stops it if this was the last job)
+            if presence is not None and chat_id:
+                await presence.release(chat_id)
             # Stop progress update loop
             if progress_loop:
                 await progress_loop.stop()
@@ -679,17 +834,15 @@ class MessageProcessor:
             if file_send_cbk is not None:
 
                 async def send_file_cb(path: str, caption: str | None) -> bool:
-                    result = file_send_cbk(parsed.chat_id, path, caption)
-                    if asyncio.iscoroutine(result):
-                        return await result
-                    return bool(result)
+                    return bool(
+                        await self._send_outbound(parsed.chat_id, file_send_cbk, path, caption)
+                    )
 
                 async def send_photo_cb(path: str, caption: str | None) -> bool:
                     # Use same callback - TelegramBot handles photo vs doc
-                    result = file_send_cbk(parsed.chat_id, path, caption)
-                    if asyncio.iscoroutine(result):
-                        return await result
-                    return bool(result)
+                    return bool(
+                        await self._send_outbound(parsed.chat_id, file_send_cbk, path, caption)
+                    )
 
                 send_file_module.set_send_callbacks(send_file_cb, send_photo_cb)
 
@@ -725,10 +878,7 @@ class MessageProcessor:
                             "Empty or None response for message %s; sending fallback message",
                             message_id,
                         )
-                    callback_result = self.response_callback(parsed.chat_id, response)
-                    # Handle async callbacks
-                    if asyncio.iscoroutine(callback_result):
-                        await callback_result
+                    await self._send_outbound(parsed.chat_id, self.response_callback, response)
                 except Exception as e:
                     logger.error(
                         "Response callback failed for message %s: %s",
@@ -736,6 +886,12 @@ class MessageProcessor:
                         e,
                     )
 
+            # Agent tools may have written anywhere in the workspace; have the
+            # next cleanup pass rescan this user's tree instead of every tree.
+            work_base = getattr(self.config, "working_folder_base_dir", None)
+            if isinstance(work_base, str) and work_base:
+                mark_user_dirty(work_base, parsed.user_id)
+
             # Detect and send new files (Requirements 5.1, 5.2)
             await self._send_generated_files(
                 parsed.user_id,
@@ -789,8 +945,9 @@ class MessageProcessor:
                         except Exception:
                             chat_id = None
                         if chat_id is not None:
-                            await self.response_callback(
+                            await self._send_outbound(
                                 chat_id,
+                                self.response_callback,
                                 "I hit an internal tool-streaming error while processing that request. Please resend your last message.",
                             )
                 except Exception as callback_err:
@@ -886,14 +1043,12 @@ class MessageProcessor:
             for file_path in sorted(new_files):
                 try:
                     caption = f"📎 Generated file: {file_path.name}"
-                    callback_result = self.file_send_callback(
+                    callback_result = await self._send_outbound(
                         chat_id,
+                        self.file_send_callback,
                         file_path,
                         caption,
                     )
-                    # Handle async callbacks
-                    if asyncio.iscoroutine(callback_result):
-                        callback_result = await callback_result
 
                     if callback_result:
                         logger.info(
@@ -949,13 +1104,12 @@ class MessageProcessor:
                     logger.warning("Pending file not found: %s", file_path)
                     continue
 
-                callback_result = self.file_send_callback(
+                callback_result = await self._send_outbound(
                     chat_id,
+                    self.file_send_callback,
                     file_path,
                     caption,
                 )
-                if asyncio.iscoroutine(callback_result):
-                    callback_result = await callback_result
 
                 if callback_result:
                     logger.info("Sent pending file: %s", file_path.name)
@@ -10,6 +10,12 @@ Requirements:
 import logging
 from typing import TYPE_CHECKING
 
+from app.services.user_state_registry import (
+    DEFAULT_IDLE_TTL_SECONDS,
+    DEFAULT_MAX_ENTRIES,
+    BoundedUserRegistry,
+)
+
 if TYPE_CHECKING:
     from mypy_boto3_sqs import SQSClient
 
@@ -21,6 +27,8 @@ class SQSQueueManager:
 
     Each user gets a dedicated queue for message processing.
     Queues are created on-demand when a user first sends a message.
+    Queues without traffic for ``idle_ttl_seconds`` stop being tracked (and
+    polled); the next enqueue re-registers them.
 
     Requirements:
         - 12.1: Create a dedicated SQS_Queue for each user
@@ -30,16 +38,26 @@ class SQSQueueManager:
         self,
         sqs_client: "SQSClient",
         queue_prefix: str = "agent-user-",
+        *,
+        idle_ttl_seconds: float | None = DEFAULT_IDLE_TTL_SECONDS,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
     ) -> None:
         """Initialize the queue manager.
 
         Args:
             sqs_client: Boto3 SQS client (configured for LocalStack in dev).
             queue_prefix: Prefix for queue names (default: "agent-user-").
+            idle_ttl_seconds: Stop tracking queues idle for this long.
+            max_entries: Maximum number of tracked queues.
         """
         self.sqs_client = sqs_client
         self.queue_prefix = queue_prefix
-        self.user_queues: dict[str, str] = {}  # user_id -> queue_url
+        # user_id -> queue_url
+        self.user_queues: BoundedUserRegistry[str] = BoundedUserRegistry(
+            "sqs_user_queues",
+            idle_ttl_seconds=idle_ttl_seconds,
+            max_entries=max_entries,
+        )
 
     def get_or_create_queue(self, user_id: str) -> str:
         """Get existing queue or create new one for user.
@@ -1,12 +1,18 @@
 """Typing indicator for Telegram bot.
 
-This module provides a background task that sends typing actions periodically
-to show the user that the bot is working on their request.
+This module provides background tasks that send typing actions periodically
+to show the user that the bot is working on their request, and a per-chat
+presence manager that coalesces them across concurrent jobs.
 """
 
 import asyncio
 import logging
-from typing import Any, Awaitable, Callable
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
 
 logger = logging.getLogger(__name__)
 
@@ -95,7 +101,7 @@ class TypingIndicatorLoop:
                             timeout=self.interval_seconds,
                         )
                         break  # Stop event was set
-                    except asyncio.TimeoutError:
+                    except TimeoutError:
                         # Timeout elapsed, send another action
                         await self._send_action()
             except asyncio.CancelledError:
@@ -134,6 +140,216 @@ class TypingIndicatorLoop:
         logger.debug("Typing indicator stopped for chat %s", self.chat_id)
 
 
+class ChatRateLimiter:
+    """Non-blocking outbound pacing for Telegram chats.
+
+    Telegram throttles bots at roughly one message per second per chat and
+    about 30 per second overall. Real messages record their sends here;
+    best-effort traffic (chat actions) asks :meth:`try_acquire` and is simply
+    skipped when the budget is used up.
+    """
+
+    DEFAULT_PER_CHAT_INTERVAL_SECONDS = 1.0
+    DEFAULT_GLOBAL_PER_SECOND = 30
+
+    def __init__(
+        self,
+        per_chat_interval_seconds: float = DEFAULT_PER_CHAT_INTERVAL_SECONDS,
+        global_per_second: int = DEFAULT_GLOBAL_PER_SECOND,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            per_chat_interval_seconds: Minimum spacing between sends to one chat.
+            global_per_second: Maximum sends per second across all chats.
+        """
+        self.per_chat_interval_seconds = per_chat_interval_seconds
+        self.global_per_second = global_per_second
+        self._last_send: dict[int, float] = {}
+        self._window: deque[float] = deque()
+
+    def try_acquire(self, chat_id: int) -> bool:
+        """Reserve a send slot for ``chat_id`` if one is free right now."""
+        now = time.monotonic()
+        self._expire(now)
+        last = self._last_send.get(chat_id)
+        if last is not None and now - last < self.per_chat_interval_seconds:
+            return False
+        if len(self._window) >= self.global_per_second:
+            return False
+        self._note(chat_id, now)
+        return True
+
+    def delay_for(self, chat_id: int) -> float:
+        """Seconds until ``chat_id``'s per-chat slot is free again (0 if free now)."""
+        last = self._last_send.get(chat_id)
+        if last is None:
+            return 0.0
+        return max(0.0, last + self.per_chat_interval_seconds - time.monotonic())
+
+    def record(self, chat_id: int) -> None:
+        """Record a send that bypassed :meth:`try_acquire` (a real message)."""
+        now = time.monotonic()
+        self._expire(now)
+        self._note(chat_id, now)
+
+    def _note(self, chat_id: int, now: float) -> None:
+        self._last_send[chat_id] = now
+        self._window.append(now)
+
+    def _expire(self, now: float) -> None:
+        while self._window and now - self._window[0] >= 1.0:
+            self._window.popleft()
+        if len(self._last_send) > 1024:
+            cutoff = now - self.per_chat_interval_seconds
+            self._last_send = {c: t for c, t in self._last_send.items() if t >= cutoff}
+
+
+@dataclass
+class _ChatPresence:
+    action: str
+    refcount: int = 0
+    paused: int = 0
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+
+
+class ChatPresenceManager:
+    """One coalesced chat-action loop per chat, shared by all in-flight jobs.
+
+    Jobs call :meth:`active` (or :meth:`acquire`/:meth:`release`) around their
+    work; the first job for a chat starts the loop and the last one stops it,
+    so five concurrent jobs still produce one ``typing`` action per interval.
+
+    Real messages should be sent inside :meth:`sending`: the loop stays quiet
+    while the send is in flight (Telegram clears the indicator when a message
+    arrives) and re-sends the action as soon as the rate limiter allows
+    another send to the chat, if work is still running.
+    """
+
+    def __init__(
+        self,
+        sender: TypingIndicatorSender,
+        interval_seconds: float = TypingIndicatorLoop.DEFAULT_INTERVAL_SECONDS,
+        rate_limiter: ChatRateLimiter | None = None,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            sender: Object that can send chat actions via send_chat_action method.
+            interval_seconds: How often to resend the action.
+            rate_limiter: Optional outbound limiter shared with real sends.
+        """
+        self.sender = sender
+        self.interval_seconds = interval_seconds
+        self.rate_limiter = rate_limiter
+        self._chats: dict[int, _ChatPresence] = {}
+
+    def refcount(self, chat_id: int) -> int:
+        """Return the number of jobs holding the indicator for ``chat_id``."""
+        state = self._chats.get(chat_id)
+        return state.refcount if state else 0
+
+    async def acquire(
+        self, chat_id: int, action: str = TypingIndicatorLoop.ACTION_TYPING
+    ) -> None:
+        """Register a job in ``chat_id``; starts the loop for the first one."""
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = _ChatPresence(action=action)
+            self._chats[chat_id] = state
+        state.action = action
+        state.refcount += 1
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self._loop(chat_id, state))
+
+    async def release(self, chat_id: int) -> None:
+        """Unregister a job; the last one for the chat stops the loop."""
+        state = self._chats.get(chat_id)
+        if state is None:
+            return
+        state.refcount -= 1
+        if state.refcount > 0:
+            return
+        self._chats.pop(chat_id, None)
+        await _cancel(state.task)
+        logger.debug("Typing indicator stopped for chat %s", chat_id)
+
+    @asynccontextmanager
+    async def active(
+        self, chat_id: int, action: str = TypingIndicatorLoop.ACTION_TYPING
+    ) -> AsyncIterator[None]:
+        """Hold the indicator for ``chat_id`` for the duration of the block."""
+        await self.acquire(chat_id, action)
+        try:
+            yield
+        finally:
+            await self.release(chat_id)
+
+    @asynccontextmanager
+    async def sending(self, chat_id: int) -> AsyncIterator[None]:
+        """Pause the indicator for ``chat_id`` while a real message is sent."""
+        state = self._chats.get(chat_id)
+        if state is not None:
+            state.paused += 1
+        try:
+            yield
+        finally:
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(chat_id)
+            if state is not None:
+                state.paused -= 1
+                if state.paused == 0:
+                    state.wake.set()
+
+    async def close(self) -> None:
+        """Stop every loop (e.g. on shutdown)."""
+        chats, self._chats = self._chats, {}
+        for state in chats.values():
+            await _cancel(state.task)
+
+    async def _loop(self, chat_id: int, state: _ChatPresence) -> None:
+        try:
+            while True:
+                # Clear before sending so a send finishing meanwhile still wakes us.
+                state.wake.clear()
+                timeout = self.interval_seconds
+                if state.paused == 0:
+                    delay = self.rate_limiter.delay_for(chat_id) if self.rate_limiter else 0.0
+                    if delay > 0:
+                        # A real message just went out: refresh once the slot frees up.
+                        timeout = delay
+                    else:
+                        await self._send_action(chat_id, state.action)
+                try:
+                    await asyncio.wait_for(state.wake.wait(), timeout=timeout)
+                except TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            logger.debug("Typing indicator loop cancelled for chat %s", chat_id)
+        except Exception as e:
+            logger.warning("Typing indicator loop error: %s", e)
+
+    async def _send_action(self, chat_id: int, action: str) -> None:
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire(chat_id):
+            logger.debug("Skipping %s action to chat %s (rate limited)", action, chat_id)
+            return
+        try:
+            await self.sender.send_chat_action(chat_id, action)
+        except Exception as e:
+            logger.warning("Failed to send %s action to chat %s: %s", action, chat_id, e)
+
+
+async def _cancel(task: asyncio.Task | None) -> None:
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 class ProgressUpdateSender:
     """Sender for progress updates during agent execution.
 
@@ -217,7 +433,7 @@ class ProgressUpdateLoop:
                             timeout=self.interval_seconds,
                         )
                         break  # Stop event was set
-                    except asyncio.TimeoutError:
+                    except TimeoutError:
                         # Timeout elapsed, check for more updates
                         continue
             except asyncio.CancelledError:
@@ -56,6 +56,7 @@ except Exception:  # pragma: no cover
 
 if TYPE_CHECKING:
     from app.services.agent_service import AgentService
+    from app.services.transcription_service import TranscriptionService
     from app.sqs.queue_manager import SQSQueueManager
 
 logger = logging.getLogger(__name__)
@@ -86,6 +87,7 @@ class TelegramBotInterface:
         user_dao: UserDAO | None = None,
         onboarding_service: OnboardingService | None = None,
         conversation_service: Any | None = None,
+        transcription_service: TranscriptionService | None = None,
     ) -> None:
         """Initialize the Telegram bot interface.
 
@@ -100,6 +102,7 @@ class TelegramBotInterface:
             command_parser: Optional command parser (creates default if None).
             user_dao: User DAO for user management operations.
             onboarding_service: Service for handling user onboarding.
+            transcription_service: Optional voice/audio transcription service.
         """
         self.config = config
         self.agent_service = agent_service
@@ -140,6 +143,9 @@ class TelegramBotInterface:
             send_response_callback=self._send_response_via_sender,
             conversation_service=conversation_service,
             get_allowed_users=self._get_allowed_users_live,
+            admin_users=(
+                config.admin_users if isinstance(getattr(config, "admin_users", None), list) else []
+            ),
         )
 
         # Initialize message handlers
@@ -153,6 +159,7 @@ class TelegramBotInterface:
             get_allowed_users=self._get_allowed_users_live,
             user_dao=user_dao,
             onboarding_service=onboarding_service,
+            transcription_service=transcription_service,
         )
 
         # Setup handlers
@@ -181,6 +188,11 @@ class TelegramBotInterface:
         self.application.add_handler(CommandHandler("new", self._handle_new_command))
         self.application.add_handler(CommandHandler("cancel", self._handle_cancel_command))
         self.application.add_handler(CommandHandler("logs", self._handle_logs_command))
+        self.application.add_handler(
+            CommandHandler("toolstats", self._handle_tool_stats_command)
+        )
+        self.application.add_handler(CommandHandler("profile", self._handle_profile_command))
+        self.application.add_handler(CommandHandler("usage", self._handle_usage_command))
         self.application.add_handler(CommandHandler("skills", self._handle_skills_command))
         self.application.add_handler(CommandHandler("add_skill", self._handle_add_skill_command))
         self.application.add_handler(
@@ -237,6 +249,33 @@ class TelegramBotInterface:
             update, context, execute_logs=self._command_executor.execute_logs_command
         )
 
+    async def _handle_tool_stats_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        await self._message_handlers.handle_tool_stats_command(
+            update,
+            context,
+            execute_tool_stats=self._command_executor.execute_tool_stats_command,
+        )
+
+    async def _handle_profile_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        await self._message_handlers.handle_profile_command(
+            update,
+            context,
+            execute_command=self._command_executor.execute_command,
+        )
+
+    async def _handle_usage_command(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        await self._message_handlers.handle_usage_command(
+            update,
+            context,
+            execute_command=self._command_executor.execute_command,
+        )
+
     async def _handle_skills_command(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
@@ -301,6 +340,13 @@ class TelegramBotInterface:
             onboarding_context: Optional onboarding context (soul.md, id.md content)
                 if this is the user's first interaction.
         """
+        # Keep chat order behind a voice/audio message that is still being transcribed.
+        if self._message_handlers.defer_enqueue(
+            chat_id,
+            lambda: self._enqueue_message(user_id, chat_id, message, onboarding_context),
+        ):
+            return
+
         self._queue_handler.enqueue_message(user_id, chat_id, message, onboarding_context)
 
         # Send typing action immediately when message is enqueued
@@ -330,6 +376,13 @@ class TelegramBotInterface:
         attachments: list[Any],
     ) -> None:
         """Enqueue a message with file attachments to SQS queue."""
+        # Keep chat order behind a voice/audio message that is still being transcribed.
+        if self._message_handlers.defer_enqueue(
+            chat_id,
+            lambda: self._enqueue_message_with_attachments(user_id, chat_id, message, attachments),
+        ):
+            return
+
         self._queue_handler.enqueue_message_with_attachments(user_id, chat_id, message, attachments)
 
         # Send typing action immediately when message is enqueued
@@ -523,6 +576,10 @@ class TelegramBotInterface:
         if updater is not None and updater.running:
             await updater.stop()
 
+        # Voice/audio still being transcribed (and messages queued behind it)
+        # is enqueued before shutdown.
+        await self._message_handlers.wait_background_tasks()
+
         await self.application.stop()
         await self.application.shutdown()
 
@@ -5,12 +5,22 @@ This module handles execution of parsed commands for the Telegram bot.
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
 from app.enums import CommandType, LogSeverity
 from app.models.agent import ForgetMemoryResult
+from app.observability.profiler import (
+    MAX_PROFILE_SECONDS,
+    ProfilerBusyError,
+    latest_job_profile,
+    profile_for,
+    request_job_profile,
+)
+from app.observability.tool_stats import format_slow_tools_report
+from app.services.usage_ledger import get_usage_ledger
 
 from app.services.conversation_service import ConversationService
 
@@ -40,6 +50,7 @@ class CommandExecutor:
         send_response_callback: Callable,
         conversation_service: ConversationService | None = None,
         get_allowed_users: Callable | None = None,
+        admin_users: list[str] | None = None,
     ):
         """Initialize the command executor.
 
@@ -52,6 +63,7 @@ class CommandExecutor:
             send_response_callback: Callback to send responses to user.
             conversation_service: Optional conversation service for multi-agent conversations.
             get_allowed_users: Optional callable returning allowed usernames (for agent listing).
+            admin_users: Usernames allowed to run admin commands (e.g. profile).
         """
         self.agent_service = agent_service
         self.skill_service = skill_service
@@ -61,6 +73,8 @@ class CommandExecutor:
         self._send_response = send_response_callback
         self._conversation_service = conversation_service
         self._get_allowed_users = get_allowed_users
+        self._admin_users = {u.strip().lstrip("@").lower() for u in admin_users or [] if u}
+        self._background_tasks: set[asyncio.Task] = set()
 
     async def execute_command(
         self,
@@ -93,6 +107,16 @@ class CommandExecutor:
             case CommandType.LOGS:
                 await self.execute_logs_command(user_id, chat_id)
 
+            case CommandType.TOOL_STATS:
+                await self.execute_tool_stats_command(user_id, chat_id)
+
+            case CommandType.PROFILE:
+                await self.execute_profile_command(user_id, chat_id, parsed.args)
+
+            case CommandType.USAGE:
+                days = int(parsed.args[0]) if parsed.args else 1
+                await self.execute_usage_command(user_id, chat_id, days=days)
+
             case CommandType.HELP:
                 help_text = self.command_parser.get_help_text()
                 await self._send_response(chat_id, help_text)
@@ -680,6 +704,102 @@ class CommandExecutor:
 
         await self._send_response(chat_id, "\n".join(log_lines))
 
+    async def execute_tool_stats_command(self, user_id: str, chat_id: int) -> None:
+        """Execute the admin-only 'toolstats' command: slowest tools/skills since restart.
+
+        The report aggregates tool and skill names across all users, so it is
+        restricted like 'profile'.
+
+        Args:
+            user_id: Telegram user ID.
+            chat_id: Telegram chat ID for responses.
+        """
+        if user_id.lower() not in self._admin_users:
+            await self._send_response(chat_id, "The toolstats command is restricted to admins.")
+            return
+
+        logger.debug("Building tool stats report for user %s", user_id)
+        await self._send_response(chat_id, format_slow_tools_report(limit=10))
+
+    async def execute_profile_command(self, user_id: str, chat_id: int, args: list[str]) -> None:
+        """Execute the admin-only 'profile' command.
+
+        - ``profile [seconds]``: sample all threads (default 10s) and reply
+          with the hottest functions.
+        - ``profile next``: profile the caller's next message; the profile is
+          stored under that message's trace_id.
+        - ``profile last``: summary of the most recent per-message profile.
+
+        Args:
+            user_id: Telegram user ID.
+            chat_id: Telegram chat ID for responses.
+            args: Command arguments.
+        """
+        if user_id.lower() not in self._admin_users:
+            await self._send_response(chat_id, "The profile command is restricted to admins.")
+            return
+
+        arg = args[0] if args else ""
+        if arg == "next":
+            request_job_profile(user_id)
+            await self._send_response(
+                chat_id, "🔬 Your next message will be profiled. Use 'profile last' afterwards."
+            )
+            return
+
+        if arg == "last":
+            latest = latest_job_profile()
+            if latest is None:
+                await self._send_response(chat_id, "No per-message profile captured yet.")
+                return
+            trace_id, profile = latest
+            await self._send_response(
+                chat_id,
+                f"{profile.summary(limit=8)}\n\nFull profile: GET /admin/profile/{trace_id}",
+            )
+            return
+
+        seconds = min(MAX_PROFILE_SECONDS, float(arg)) if arg else 10.0
+        await self._send_response(chat_id, f"🔬 Profiling all threads for {seconds:g}s...")
+        # Sampling takes up to MAX_PROFILE_SECONDS; don't hold the update
+        # handler for that long. The summary is sent when the profile is done.
+        task = asyncio.create_task(self._send_profile(chat_id, seconds))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _send_profile(self, chat_id: int, seconds: float) -> None:
+        """Profile all threads for ``seconds`` and send the summary to ``chat_id``."""
+        try:
+            profile = await asyncio.to_thread(profile_for, seconds)
+        except ProfilerBusyError:
+            await self._send_response(chat_id, "Another profile is already running.")
+            return
+        except Exception:
+            logger.exception("Profiling failed")
+            await self._send_response(chat_id, "❌ Profiling failed.")
+            return
+        await self._send_response(chat_id, profile.summary(limit=8))
+
+    async def execute_usage_command(self, user_id: str, chat_id: int, days: int = 1) -> None:
+        """Execute the 'usage' command: the user's model token usage per day.
+
+        Args:
+            user_id: Telegram user ID.
+            chat_id: Telegram chat ID for responses.
+            days: Number of days to report, counting today.
+        """
+        ledger = get_usage_ledger()
+        if ledger is None:
+            await self._send_response(chat_id, "Usage accounting is disabled.")
+            return
+        try:
+            report = await ledger.format_report(user_id, days=max(1, min(days, 31)))
+        except Exception as e:
+            logger.error("Failed to build usage report for %s: %s", user_id, e)
+            await self._send_response(chat_id, "❌ Failed to load usage.")
+            return
+        await self._send_response(chat_id, f"📊 Model usage\n\n{report}")
+
     def _get_severity_emoji(self, severity: LogSeverity) -> str:
         """Get emoji for log severity level.
 
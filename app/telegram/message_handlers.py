@@ -1,20 +1,24 @@
 """Telegram message handlers.
 
 This module handles incoming Telegram updates including:
-- Command handlers (start, help, new, logs, skills, add_skill, delete_skill)
+- Command handlers (start, help, new, logs, toolstats, profile, usage, skills,
+  add_skill, delete_skill)
 - Text message handler
 - Document and photo attachment handlers
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from telegram import Update, PhotoSize
 from telegram.error import TelegramError
 
-from app.enums import LogSeverity
+from app.enums import CommandType, LogSeverity
 from app.security.whitelist import DEFAULT_FORBIDDEN_DETAIL, is_whitelisted, live_allowed_users
 
 if TYPE_CHECKING:
@@ -24,6 +28,7 @@ if TYPE_CHECKING:
     from app.services.logging_service import LoggingService
     from app.services.file_service import FileService
     from app.services.skill_service import SkillService
+    from app.services.transcription_service import TranscriptionService
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +50,7 @@ class TelegramMessageHandlers:
         get_allowed_users: callable,
         user_dao: "UserDAO | None" = None,
         onboarding_service: "OnboardingService | None" = None,
+        transcription_service: TranscriptionService | None = None,
     ):
         """Initialize the message handlers.
 
@@ -58,6 +64,8 @@ class TelegramMessageHandlers:
             get_allowed_users: Function to get live allowed users.
             user_dao: User DAO for user management operations.
             onboarding_service: Service for handling user onboarding.
+            transcription_service: Optional service transcribing voice/audio
+                before enqueue.
         """
         self.config = config
         self.logging_service = logging_service
@@ -68,6 +76,12 @@ class TelegramMessageHandlers:
         self._get_allowed_users_live = get_allowed_users
         self.user_dao = user_dao
         self.onboarding_service = onboarding_service
+        self.transcription_service = transcription_service
+        # Transcribe-then-enqueue jobs running outside the update handler.
+        self._background_tasks: set[asyncio.Task] = set()
+        # Last deferred enqueue per chat. Later enqueues for the chat line up
+        # behind it so the queue keeps the order the user sent messages in.
+        self._chat_tails: dict[int, asyncio.Task] = {}
 
     def extract_telegram_identity(self, update: Update) -> tuple:
         """Extract user identity from a Telegram update.
@@ -360,6 +374,92 @@ class TelegramMessageHandlers:
             return
         await execute_logs(user_id, chat_id)
 
+    async def handle_tool_stats_command(
+        self, update: Update, context: Any, execute_tool_stats: callable
+    ) -> None:
+        """Handle /toolstats command (admin-only; checked by the executor).
+
+        Shows the slowest tools/skills by p95 latency.
+
+        Args:
+            update: Telegram update object.
+            context: Callback context.
+            execute_tool_stats: Callback to execute the toolstats command.
+        """
+        chat = update.effective_chat
+        if chat is None:
+            logger.warning("Telegram update missing effective_chat for /toolstats")
+            return
+        chat_id = chat.id
+
+        user_id, telegram_user_id, username, _ = self.extract_telegram_identity(update)
+        if await self.reject_if_not_whitelisted(telegram_user_id or "unknown", username, chat_id):
+            return
+        if not user_id:
+            await self.reject_if_missing_username(chat_id)
+            return
+        await execute_tool_stats(user_id, chat_id)
+
+    async def handle_profile_command(
+        self, update: Update, context: Any, execute_command: callable
+    ) -> None:
+        """Handle /profile command (admin-only; checked by the executor).
+
+        Args:
+            update: Telegram update object.
+            context: Callback context (``context.args`` holds the arguments).
+            execute_command: Callback to execute a parsed command.
+        """
+        chat = update.effective_chat
+        if chat is None:
+            logger.warning("Telegram update missing effective_chat for /profile")
+            return
+        chat_id = chat.id
+
+        user_id, telegram_user_id, username, _ = self.extract_telegram_identity(update)
+        if await self.reject_if_not_whitelisted(telegram_user_id or "unknown", username, chat_id):
+            return
+        if not user_id:
+            await self.reject_if_missing_username(chat_id)
+            return
+
+        text = " ".join(["profile", *(getattr(context, "args", None) or [])])
+        parsed = self.command_parser.parse(text)
+        if parsed.command_type != CommandType.PROFILE:
+            await self._send_response(chat_id, "Usage: /profile [seconds|next|last]")
+            return
+        await execute_command(parsed, user_id, chat_id, text)
+
+    async def handle_usage_command(
+        self, update: Update, context: Any, execute_command: callable
+    ) -> None:
+        """Handle /usage command.
+
+        Args:
+            update: Telegram update object.
+            context: Callback context (``context.args`` holds the arguments).
+            execute_command: Callback to execute a parsed command.
+        """
+        chat = update.effective_chat
+        if chat is None:
+            logger.warning("Telegram update missing effective_chat for /usage")
+            return
+        chat_id = chat.id
+
+        user_id, telegram_user_id, username, _ = self.extract_telegram_identity(update)
+        if await self.reject_if_not_whitelisted(telegram_user_id or "unknown", username, chat_id):
+            return
+        if not user_id:
+            await self.reject_if_missing_username(chat_id)
+            return
+
+        text = " ".join(["usage", *(getattr(context, "args", None) or [])])
+        parsed = self.command_parser.parse(text)
+        if parsed.command_type != CommandType.USAGE:
+            await self._send_response(chat_id, "Usage: /usage [days]")
+            return
+        await execute_command(parsed, user_id, chat_id, text)
+
     async def handle_skills_command(self, update: Update, context: Any) -> None:
         """Handle /skills command - list all installed skills."""
         chat = update.effective_chat
@@ -629,6 +729,7 @@ class TelegramMessageHandlers:
                 user_id=user_id,
                 file_name=(validation.sanitized_name or document.file_name or "unnamed_file"),
                 mime_type=document.mime_type,
+                file_unique_id=getattr(document, "file_unique_id", None),
             )
 
             # Convert to TelegramAttachment
@@ -771,6 +872,7 @@ class TelegramMessageHandlers:
                 user_id=user_id,
                 file_name=file_name,
                 mime_type="image/jpeg",
+                file_unique_id=photo.file_unique_id,
             )
 
             # Convert to TelegramAttachment
@@ -824,8 +926,8 @@ class TelegramMessageHandlers:
         """Handle incoming Telegram voice messages.
 
         Telegram voice notes arrive as `message.voice` (typically OGG/OPUS).
-        We download the file and enqueue it as an attachment so the agent
-        worker can process/transcribe it.
+        We download the file, transcribe it when a transcription service is
+        configured, and enqueue it as an attachment for the agent worker.
         """
         if not update.message or not update.message.voice:
             return
@@ -877,6 +979,7 @@ class TelegramMessageHandlers:
                 user_id=user_id,
                 file_name=file_name,
                 mime_type=mime_type,
+                file_unique_id=getattr(voice, "file_unique_id", None),
             )
 
             attachment = TelegramAttachment(
@@ -890,19 +993,14 @@ class TelegramMessageHandlers:
 
             duration = getattr(voice, "duration", None)
             duration_text = f" duration={duration}s" if duration is not None else ""
-            message_text = f"[Voice message]{duration_text}"
-
-            await enqueue_with_attachments(
+            await self._transcribe_and_enqueue(
                 user_id=user_id,
                 chat_id=chat_id,
-                message=message_text,
-                attachments=[attachment],
-            )
-
-            await self.logging_service.log_action(
-                user_id=user_id,
+                message_text=f"[Voice message]{duration_text}",
+                attachment=attachment,
+                duration=duration,
+                enqueue_with_attachments=enqueue_with_attachments,
                 action="Voice message received",
-                severity=LogSeverity.INFO,
                 details={
                     "file_name": metadata.file_name,
                     "file_size": metadata.file_size,
@@ -921,6 +1019,191 @@ class TelegramMessageHandlers:
                 chat_id, "❌ An error occurred processing your voice message."
             )
 
+    async def _transcribe_and_enqueue(
+        self,
+        *,
+        user_id: str,
+        chat_id: int,
+        message_text: str,
+        attachment: Any,
+        duration: int | None,
+        enqueue_with_attachments: callable,
+        action: str,
+        details: dict[str, Any],
+    ) -> None:
+        """Enqueue a downloaded voice/audio attachment, transcribed if possible.
+
+        Updates are handled sequentially, so with a transcription service the
+        transcript is produced in a background task and the handler returns
+        right away. The enqueue itself takes the chat's next place in line:
+        messages the user sends meanwhile are enqueued after this one.
+        """
+        if self.transcription_service is None:
+            await self._enqueue_audio(
+                user_id=user_id,
+                chat_id=chat_id,
+                message_text=message_text,
+                attachment=attachment,
+                transcript=None,
+                enqueue_with_attachments=enqueue_with_attachments,
+                action=action,
+                details=details,
+            )
+            return
+
+        transcription = self._track(
+            asyncio.create_task(
+                self._transcribe_attachment(user_id, attachment.file_path, duration)
+            )
+        )
+
+        async def _enqueue() -> None:
+            await self._enqueue_audio(
+                user_id=user_id,
+                chat_id=chat_id,
+                message_text=message_text,
+                attachment=attachment,
+                transcript=await transcription,
+                enqueue_with_attachments=enqueue_with_attachments,
+                action=action,
+                details=details,
+            )
+
+        self._chain(chat_id, _enqueue)
+
+    async def _enqueue_audio(
+        self,
+        *,
+        user_id: str,
+        chat_id: int,
+        message_text: str,
+        attachment: Any,
+        transcript: str | None,
+        enqueue_with_attachments: callable,
+        action: str,
+        details: dict[str, Any],
+    ) -> None:
+        if transcript:
+            message_text = self._with_transcript(message_text, transcript)
+        try:
+            await enqueue_with_attachments(
+                user_id=user_id,
+                chat_id=chat_id,
+                message=message_text,
+                attachments=[attachment],
+            )
+            await self.logging_service.log_action(
+                user_id=user_id,
+                action=action,
+                severity=LogSeverity.INFO,
+                details={**details, "transcribed": transcript is not None},
+            )
+        except Exception as e:
+            # May run detached from the update handler: report the failure here.
+            logger.error("Audio enqueue error: %s", e)
+            await self._send_response(
+                chat_id, "❌ An error occurred processing your audio message."
+            )
+
+    def defer_enqueue(self, chat_id: int, enqueue: Callable[[], Awaitable[None]]) -> bool:
+        """Line ``enqueue`` up behind a voice/audio message still being transcribed.
+
+        Args:
+            chat_id: Telegram chat ID the message belongs to.
+            enqueue: Performs the enqueue; called once earlier messages are queued.
+
+        Returns:
+            True if the enqueue was deferred; False if the chat has nothing
+            pending (or this is the deferred call itself) and the caller
+            should enqueue right away.
+        """
+        tail = self._chat_tails.get(chat_id)
+        if tail is None or tail.done() or tail is asyncio.current_task():
+            return False
+        self._chain(chat_id, enqueue)
+        return True
+
+    def _chain(self, chat_id: int, enqueue: Callable[[], Awaitable[None]]) -> None:
+        """Run ``enqueue`` after the chat's previous deferred enqueue finishes."""
+        previous = self._chat_tails.get(chat_id)
+
+        async def _run() -> None:
+            if previous is not None:
+                await asyncio.wait([previous])
+            try:
+                await enqueue()
+            except Exception:
+                logger.exception("Deferred enqueue failed for chat %s", chat_id)
+                await self._send_response(
+                    chat_id, "❌ An error occurred processing your message."
+                )
+
+        task = self._track(asyncio.create_task(_run()))
+        self._chat_tails[chat_id] = task
+
+        def _release(done: asyncio.Task) -> None:
+            if self._chat_tails.get(chat_id) is done:
+                del self._chat_tails[chat_id]
+
+        task.add_done_callback(_release)
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def wait_background_tasks(self) -> None:
+        """Wait for transcriptions and deferred enqueues (e.g. on shutdown)."""
+        while self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _transcribe_attachment(
+        self,
+        user_id: str,
+        file_path: str,
+        duration: int | None,
+    ) -> str | None:
+        """Transcribe a downloaded voice/audio file, or return None.
+
+        Transcription is bounded by ``voice_transcription_timeout_seconds``.
+        On timeout or error the audio is still enqueued and the agent can fall
+        back to its transcription skill.
+        """
+        if self.transcription_service is None:
+            return None
+
+        timeout = getattr(self.config, "voice_transcription_timeout_seconds", None)
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            timeout = None
+
+        if not isinstance(duration, (int, float)):
+            duration = None
+
+        try:
+            transcript = await asyncio.wait_for(
+                self.transcription_service.transcribe_file(
+                    Path(file_path), duration_hint=duration
+                ),
+                timeout=timeout,
+            )
+        except TimeoutError:
+            logger.warning("Transcription timed out for user %s: %s", user_id, file_path)
+            return None
+        except Exception as e:
+            logger.warning("Transcription failed for user %s: %s", user_id, e)
+            return None
+
+        text = transcript.render().strip()
+        return text or None
+
+    @staticmethod
+    def _with_transcript(message_text: str, transcript: str) -> str:
+        return (
+            f"{message_text}\n\n"
+            "Transcript (already transcribed; no need to run a transcription skill):\n"
+            f"{transcript}"
+        )
+
     async def handle_audio(
         self,
         update: Update,
@@ -995,6 +1278,7 @@ class TelegramMessageHandlers:
                 user_id=user_id,
                 file_name=file_name,
                 mime_type=mime_type,
+                file_unique_id=getattr(audio, "file_unique_id", None),
             )
 
             attachment = TelegramAttachment(
@@ -1006,19 +1290,14 @@ class TelegramMessageHandlers:
                 is_image=False,
             )
 
-            message_text = caption or "[Audio message]"
-
-            await enqueue_with_attachments(
+            await self._transcribe_and_enqueue(
                 user_id=user_id,
                 chat_id=chat_id,
-                message=message_text,
-                attachments=[attachment],
-            )
-
-            await self.logging_service.log_action(
-                user_id=user_id,
+                message_text=caption or "[Audio message]",
+                attachment=attachment,
+                duration=getattr(audio, "duration", None),
+                enqueue_with_attachments=enqueue_with_attachments,
                 action="Audio received",
-                severity=LogSeverity.INFO,
                 details={
                     "file_name": metadata.file_name,
                     "file_size": metadata.file_size,
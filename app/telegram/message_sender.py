@@ -12,6 +12,8 @@ from typing import Any, Protocol
 from telegram import InputFile
 from telegram.error import TelegramError
 
+from app.observability.metrics import record_outbound_error
+
 logger = logging.getLogger(__name__)
 
 
@@ -134,6 +136,7 @@ class TelegramMessageSender:
                     parse_mode=ParseMode.HTML,
                 )
             except Exception as e:
+                record_outbound_error(e, target="telegram", method="send_message")
                 logger.warning(
                     "Failed to send formatted chunk to chat %s (falling back to plain text): %s",
                     chat_id,
@@ -142,6 +145,7 @@ class TelegramMessageSender:
                 try:
                     await self.bot.send_message(chat_id=chat_id, text=raw)
                 except Exception as fallback_error:
+                    record_outbound_error(fallback_error, target="telegram", method="send_message")
                     logger.error(
                         "Fallback plain-text send failed for chat %s: %s",
                         chat_id,
@@ -206,6 +210,7 @@ class TelegramMessageSender:
                 return True
 
             except (TelegramError, OSError, ValueError, TypeError) as e:
+                record_outbound_error(e, target="telegram", method="send_document")
                 logger.warning(
                     "File send attempt %d failed: %s",
                     attempt + 1,
@@ -269,6 +274,7 @@ class TelegramMessageSender:
                 return True
 
             except (TelegramError, OSError, ValueError, TypeError) as e:
+                record_outbound_error(e, target="telegram", method="send_photo")
                 logger.warning(
                     "Photo send attempt %d failed: %s",
                     attempt + 1,
@@ -332,5 +338,6 @@ class TelegramMessageSender:
             logger.debug("Sent chat action '%s' to chat %s", action, chat_id)
             return True
         except Exception as e:
+            record_outbound_error(e, target="telegram", method="send_chat_action")
             logger.warning("Failed to send chat action to chat %s: %s", chat_id, e)
             return False
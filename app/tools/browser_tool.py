@@ -12,6 +12,8 @@ from datetime import datetime
 from typing import TYPE_CHECKING, Any
 from urllib.parse import urlparse
 
+from app.services.user_state_registry import BoundedUserRegistry
+
 if TYPE_CHECKING:
     from app.config import AgentConfig
     from app.dao.browser_cookie_dao import BrowserCookieDAO
@@ -130,8 +132,9 @@ def _notify_user_live_view(url: str) -> None:
 # MordecaiBrowser — AgentCoreBrowser subclass with cookie persistence
 # ---------------------------------------------------------------------------
 
-# Per-user browser instance cache
-_browser_cache: dict[str, "MordecaiBrowser"] = {}
+# Per-user browser instance cache. Idle instances are dropped; the upstream
+# browser tool closes its sessions and Playwright in its destructor.
+_browser_cache: BoundedUserRegistry["MordecaiBrowser"] = BoundedUserRegistry("browsers")
 
 
 class _LiveViewAgentCoreBrowser:
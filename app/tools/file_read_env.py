@@ -5,6 +5,10 @@ Why this exists:
 - Models sometimes omit it, causing a tool-schema error and potential retry loops.
 
 We keep the public tool name as `file_read` so prompts/skills remain compatible.
+
+`mode="page"` is handled here rather than upstream: it reads a bounded page of
+lines (``start_line``, ``max_lines``) from files of any size, which is how the
+agent reads spooled shell output (see `app.services.output_spool`).
 """
 
 from __future__ import annotations
@@ -17,6 +21,7 @@ from typing import Any
 from app.config import resolve_user_skills_dir
 from app.observability.trace_context import get_trace_id
 from app.observability.trace_logging import trace_event
+from app.services.output_spool import SPOOL_DIRNAME, read_page
 
 try:
     from strands import tool  # type: ignore[import-not-found]
@@ -84,6 +89,37 @@ def _call_base_file_read(**kwargs: Any):
     raise TypeError("strands_tools file_read implementation is not callable")
 
 
+# Spooled shell output larger than this is paged even for mode="view".
+_SPOOL_VIEW_LIMIT = 200_000
+
+
+def _page_read(path: str, **kwargs: Any) -> dict[str, Any]:
+    """Read one page of lines from ``path`` (``mode="page"``)."""
+    page = read_page(
+        path,
+        start_line=int(kwargs.get("start_line") or 1),
+        max_lines=int(kwargs.get("max_lines") or 200),
+    )
+    if page["end_line"] < page["start_line"]:
+        header = f"[{path}: no lines from {page['start_line']} ({page['size']} bytes)]"
+    else:
+        header = f"[{path}: lines {page['start_line']}-{page['end_line']}"
+        if page["truncated_line"]:
+            header += f" (line {page['end_line']} cut)"
+        if page["next_start_line"] is not None:
+            header += f"; next page: start_line={page['next_start_line']}"
+        header += "]"
+    return {"status": "success", "content": [{"text": f"{header}\n{page['text']}"}]}
+
+
+def _is_large_spool_file(path: str) -> bool:
+    p = Path(path)
+    try:
+        return SPOOL_DIRNAME in p.parts and p.stat().st_size > _SPOOL_VIEW_LIMIT
+    except OSError:
+        return False
+
+
 def _find_repo_root(*, start: Path) -> Path:
     """Best-effort repository root discovery (pyproject.toml heuristic)."""
 
@@ -167,7 +203,9 @@ def _ensure_allowed_path(path_raw: str) -> Path:
 @tool(
     name="file_read",
     description=(
-        "Read files from disk. Defaults mode='view' if omitted to prevent tool-schema errors."
+        "Read files from disk. Defaults mode='view' if omitted to prevent tool-schema errors. "
+        "mode='page' reads max_lines (default 200) lines from start_line (1-based) "
+        "and works for files of any size, e.g. spooled shell output."
     ),
 )
 def file_read(
@@ -191,7 +229,10 @@ def file_read(
     safe_path = str(_ensure_allowed_path(path))
 
     try:
-        result = _call_base_file_read(path=safe_path, mode=mode, **kwargs)
+        if mode == "page" or (mode == "view" and _is_large_spool_file(safe_path)):
+            result = _page_read(safe_path, **kwargs)
+        else:
+            result = _call_base_file_read(path=safe_path, mode=mode, **kwargs)
         if get_trace_id() is not None:
             # Avoid emitting huge payloads; keep a preview and size.
             preview = None
@@ -10,9 +10,13 @@ Context is injected by AgentService.
 
 from __future__ import annotations
 
+import contextvars
 import json
 from typing import Literal
 
+from app.services.skill_onboarding_jobs import get_onboarding_engine
+from app.tools import send_progress as send_progress_module
+
 try:
     from strands import tool  # type: ignore[import-not-found]
 except Exception:  # pragma: no cover
@@ -88,22 +92,29 @@ def onboard_pending_skills(
         return "User context not available."
 
     if not dry_run and not ai_review_completed:
-        return (
-            "AI review is required before onboarding.\n\n"
-            "Please:\n"
-            "1) Call list_pending_skills(scope=\"all\")\n"
-            "2) Review each pending skill's SKILL.md and scripts (file_read), make any fixes\n"
-            "3) If runtime dependencies are missing, use dependency_installer.install_package(...)\n"
-            "4) Re-run onboarding with ai_review_completed=true\n\n"
-            "Example: onboard_pending_skills(scope=\"all\", dry_run=false, ai_review_completed=true)"
-        )
+        return _ai_review_required("onboard_pending_skills")
 
     result = _pending_skill_service.onboard_pending(
         user_id=_current_user_id,
         scope=scope,
         dry_run=dry_run,
     )
+    return _format_onboarding_result(result)
+
+
+def _ai_review_required(tool_name: str) -> str:
+    return (
+        "AI review is required before onboarding.\n\n"
+        "Please:\n"
+        "1) Call list_pending_skills(scope=\"all\")\n"
+        "2) Review each pending skill's SKILL.md and scripts (file_read), make any fixes\n"
+        "3) If runtime dependencies are missing, use dependency_installer.install_package(...)\n"
+        "4) Re-run onboarding with ai_review_completed=true\n\n"
+        f"Example: {tool_name}(scope=\"all\", dry_run=false, ai_review_completed=true)"
+    )
+
 
+def _format_onboarding_result(result: dict) -> str:
     # Human-friendly summary first
     summary_lines = [
         "Pending skill onboarding results:",
@@ -137,6 +148,96 @@ def onboard_pending_skills(
     return "\n".join(summary_lines)
 
 
+def _progress_forwarder():
+    """Forward job progress to send_progress in the calling message's context.
+
+    Jobs run on worker threads; the copied context carries the per-message
+    progress callback that send_progress queues against.
+    """
+    ctx = contextvars.copy_context()
+
+    def forward(message: str) -> None:
+        ctx.run(send_progress_module.send_progress, message)
+
+    return forward
+
+
+@tool(
+    name="start_pending_skill_onboarding",
+    description=(
+        "Start onboarding pending skills in the background and return a job id immediately. "
+        "Runs the same validation, dependency install, smoke test and promotion as "
+        "onboard_pending_skills, for several skills in parallel, and sends progress updates. "
+        "Check the outcome with pending_skill_onboarding_status(job_id). "
+        "Pass resume_job_id to resume an interrupted job (unchanged failed skills are not retried). "
+        "AI review is required before real onboarding: pass ai_review_completed=true."
+    ),
+)
+def start_pending_skill_onboarding(
+    scope: Literal["user", "shared", "all"] = "all",
+    dry_run: bool = False,
+    ai_review_completed: bool = False,
+    resume_job_id: str = "",
+) -> str:
+    if _pending_skill_service is None:
+        return "Pending skill service not available."
+    if _current_user_id is None:
+        return "User context not available."
+
+    engine = get_onboarding_engine(_pending_skill_service)
+    if resume_job_id.strip():
+        snapshot = engine.status(resume_job_id.strip())
+        if snapshot is None or snapshot.get("user_id") != _current_user_id:
+            return f"Onboarding job not found: {resume_job_id}"
+        job = engine.resume(resume_job_id.strip(), on_progress=_progress_forwarder())
+    else:
+        if not dry_run and not ai_review_completed:
+            return _ai_review_required("start_pending_skill_onboarding")
+        job = engine.start(
+            user_id=_current_user_id,
+            scope=scope,
+            dry_run=dry_run,
+            on_progress=_progress_forwarder(),
+        )
+
+    return (
+        f"Onboarding job {job.job_id} is running in the background.\n"
+        f'Check progress with pending_skill_onboarding_status(job_id="{job.job_id}").'
+    )
+
+
+@tool(
+    name="pending_skill_onboarding_status",
+    description=(
+        "Show the status of a background onboarding job started with "
+        "start_pending_skill_onboarding: per-skill progress while running, full results when done."
+    ),
+)
+def pending_skill_onboarding_status(job_id: str) -> str:
+    if _pending_skill_service is None:
+        return "Pending skill service not available."
+    if _current_user_id is None:
+        return "User context not available."
+
+    snapshot = get_onboarding_engine(_pending_skill_service).status(job_id.strip())
+    if snapshot is None or snapshot.get("user_id") != _current_user_id:
+        return f"Onboarding job not found: {job_id}"
+
+    status = snapshot.get("status")
+    if status == "done" and isinstance(snapshot.get("summary"), dict):
+        return f"Onboarding job {job_id}: done\n\n" + _format_onboarding_result(snapshot["summary"])
+
+    lines = [f"Onboarding job {job_id}: {status}"]
+    if snapshot.get("error"):
+        lines.append(f"- error: {snapshot['error']}")
+    for state in (snapshot.get("skills") or {}).values():
+        lines.append(f"- {state.get('skill')}: {state.get('status')}")
+    if status == "interrupted":
+        lines.append("")
+        lines.append(f'Resume with start_pending_skill_onboarding(resume_job_id="{job_id}").')
+    return "\n".join(lines)
+
+
 @tool(
     name="repair_skill_dependencies",
     description=(
@@ -10,11 +10,12 @@ We keep the public tool name as `shell` so skills continue to work.
 
 from __future__ import annotations
 
+import codecs
+import logging
 import os
 import re
-import signal
-import subprocess
 import sys
+import tempfile
 import threading
 import time
 from contextvars import ContextVar
@@ -23,8 +24,19 @@ from typing import Any
 
 from app.config import refresh_runtime_env_from_secrets, resolve_user_skills_dir
 from app.observability.health_state import mark_progress
+from app.observability.redaction import StreamRedactor
 from app.observability.trace_context import get_trace_id
 from app.observability.trace_logging import trace_event
+from app.services.output_spool import SPOOL_DIRNAME, SpoolJob, open_job
+from app.services.shell_reactor import ShellBusy, get_shell_reactor, rlimits_from_config
+from app.services.skill_script_runner import (
+    PythonInvocation,
+    ResidentRunnerUnavailable,
+    get_resident_runner,
+    parse_python_invocation,
+)
+
+logger = logging.getLogger(__name__)
 
 # Progress marker patterns for parsing stderr
 _PROGRESS_MARKER_PREFIX = ">>>PROGRESS:"
@@ -69,17 +81,14 @@ _secrets_path_var: ContextVar[Path] = ContextVar(
 _config_var: ContextVar[object | None] = ContextVar("shell_env_config", default=None)
 
 
-# Best-effort cancellation support (used by Telegram /cancel).
-#
-# We only track the *current* running shell process per user because:
-# - per-user SQS queue processing is serialized
-# - cancelling "the current thing" is the common UX
-_RUNNING_SHELL_LOCK = threading.Lock()
-_RUNNING_SHELL_PGID_BY_USER: dict[str, int] = {}
+_STREAMS = ("stdout", "stderr")
 
 
 def cancel_running_shell(*, user_id: str) -> bool:
-    """Attempt to cancel a currently-running shell command for a user.
+    """Attempt to cancel the user's running shell commands.
+
+    Sends SIGTERM to each of the user's process groups and returns; the shell
+    reactor follows up with SIGKILL for groups that survive the grace period.
 
     Returns True if a running shell process was found and a kill signal was sent.
     """
@@ -87,37 +96,7 @@ def cancel_running_shell(*, user_id: str) -> bool:
     uid = (user_id or "").strip()
     if not uid:
         return False
-
-    with _RUNNING_SHELL_LOCK:
-        pgid = _RUNNING_SHELL_PGID_BY_USER.get(uid)
-
-    if pgid is None:
-        return False
-
-    # Best-effort: send SIGTERM, then SIGKILL if the process group survives.
-    try:
-        os.killpg(int(pgid), signal.SIGTERM)
-    except Exception:
-        # If we can't signal, treat as not cancelled.
-        return False
-
-    # Give it a short grace period.
-    deadline = time.monotonic() + 2.0
-    while time.monotonic() < deadline:
-        try:
-            os.killpg(int(pgid), 0)
-            # Still alive.
-            time.sleep(0.05)
-        except Exception:
-            # Process group is gone.
-            return True
-
-    # Escalate.
-    try:
-        os.killpg(int(pgid), signal.SIGKILL)
-    except Exception:
-        pass
-    return True
+    return get_shell_reactor().cancel_user(uid)
 
 
 def _derive_skills_base_dir_from_template(template: str) -> str | None:
@@ -408,6 +387,167 @@ def _parse_and_forward_progress_markers(stderr_line: str) -> str:
     return stderr_line
 
 
+def _subprocess_env() -> dict[str, str]:
+    # Make tools non-interactive by default.
+    env = os.environ.copy()
+    env.setdefault("BYPASS_TOOL_CONSENT", "true")
+    env.setdefault("STRANDS_NON_INTERACTIVE", "true")
+    return env
+
+
+def _output_spool_root() -> Path:
+    """Directory for spooled shell output.
+
+    Lives in the user's workspace so ``file_read`` can page through it;
+    falls back to the system temp dir when no user context is set.
+    """
+    cfg = _config_var.get()
+    uid = _current_user_id_var.get()
+    base = getattr(cfg, "working_folder_base_dir", None) if cfg is not None else None
+    if isinstance(base, str) and base.strip() and uid:
+        return (Path(base).expanduser() / str(uid) / SPOOL_DIRNAME).resolve()
+    return Path(tempfile.gettempdir()) / "mordecai-shell-output"
+
+
+def _open_output_job(*, external_stdout: bool = False) -> SpoolJob:
+    cfg = _config_var.get()
+
+    def _setting(name: str, default: int) -> int:
+        value = getattr(cfg, name, None)
+        return value if isinstance(value, int) and not isinstance(value, bool) else default
+
+    return open_job(
+        _output_spool_root(),
+        inline_chars=_setting("shell_output_inline_chars", 16_000),
+        head_chars=_setting("shell_output_head_chars", 4_000),
+        tail_chars=_setting("shell_output_tail_chars", 8_000),
+        retention_seconds=_setting("shell_output_retention_seconds", 86_400),
+        external_stdout=external_stdout,
+    )
+
+
+def _resident_shell_run(
+    *,
+    command: str,
+    work_dir: str | None,
+    timeout_seconds: int,
+    stream_output: bool = False,
+) -> dict[str, Any] | None:
+    """Run a plain ``python script.py ...`` command in the resident runner.
+
+    Takes the same per-user slot and resource limits as :func:`_safe_shell_run`.
+    Returns None when the command is not a plain Python script invocation, or
+    when the resident runner cannot start it; the caller then runs it through
+    the shell as usual.
+    """
+
+    env = _subprocess_env()
+    inv = parse_python_invocation(command, cwd=work_dir, env=env)
+    if inv is None:
+        return None
+
+    cfg = _config_var.get()
+    uid = _current_user_id_var.get()
+    reactor = get_shell_reactor()
+    if uid:
+        max_per_user = getattr(cfg, "shell_max_concurrent_per_user", 0)
+        t0 = time.perf_counter()
+        try:
+            reactor.acquire_slot(
+                str(uid),
+                max_per_user if isinstance(max_per_user, int) else 0,
+                float(max(1, int(timeout_seconds))),
+            )
+        except ShellBusy as e:
+            return _shell_busy_result(e, timeout_seconds=timeout_seconds, t0=t0)
+    try:
+        return _resident_shell_run_in_slot(
+            inv,
+            env=env,
+            timeout_seconds=timeout_seconds,
+            stream_output=stream_output,
+            rlimits=rlimits_from_config(cfg),
+        )
+    finally:
+        if uid:
+            reactor.release_slot(str(uid))
+
+
+def _resident_shell_run_in_slot(
+    inv: PythonInvocation,
+    *,
+    env: dict[str, str],
+    timeout_seconds: int,
+    stream_output: bool,
+    rlimits: dict[int, int],
+) -> dict[str, Any] | None:
+    trace_id = get_trace_id()
+    # The script writes stdout straight into the spool file; lines are only
+    # observed here for the in-memory head/tail summary.
+    job = _open_output_job(external_stdout=True)
+    redactors = {w: StreamRedactor() for w in _STREAMS}
+    uid = _current_user_id_var.get()
+    pgid: int | None = None
+
+    def _on_line(which: str, line: str) -> None:
+        if which == "stderr":
+            # Same marker handling as the safe runner: forward, then drop.
+            job.stderr.write(_parse_and_forward_progress_markers(line))
+        else:
+            job.stdout.write(line)
+        mark_progress("tool.shell.output")
+        if stream_output and trace_id is not None:
+            safe = redactors[which].feed(line)
+            if safe:
+                trace_event("tool.shell.output", stream=which, text=safe, max_chars=400)
+
+    def _on_start(pid: int) -> None:
+        nonlocal pgid
+        pgid = pid
+        if uid:
+            # Register the process group for user-initiated cancellation.
+            get_shell_reactor().track(str(uid), pid)
+
+    try:
+        res = get_resident_runner(_config_var.get()).run(
+            inv,
+            env=env,
+            timeout_seconds=timeout_seconds,
+            on_start=_on_start,
+            on_stdout=lambda line: _on_line("stdout", line),
+            on_stderr=lambda line: _on_line("stderr", line),
+            stdout_path=job.stdout.path,
+            keep_output=False,
+            rlimits=rlimits,
+        )
+    except ResidentRunnerUnavailable as e:
+        logger.debug("Resident runner unavailable for %s: %s", inv.python, e)
+        job.discard()
+        return None
+    finally:
+        if uid and pgid is not None:
+            get_shell_reactor().untrack(str(uid), pgid)
+
+    if stream_output and trace_id is not None:
+        for which, redactor in redactors.items():
+            rest = redactor.flush()
+            if rest:
+                trace_event("tool.shell.output", stream=which, text=rest, max_chars=400)
+
+    # With keep_output=False this only carries the runner's own error note.
+    job.stderr.write(res.stderr)
+    output = job.finish()
+    return _shell_result(
+        stdout=job.stdout.render(),
+        stderr=job.stderr.render(),
+        returncode=res.returncode,
+        timed_out=res.timed_out,
+        timeout_seconds=timeout_seconds,
+        duration_ms=res.duration_ms,
+        output=output,
+    )
+
+
 def _safe_shell_run(
     *,
     command: str,
@@ -427,222 +567,120 @@ def _safe_shell_run(
 
     cwd = work_dir or None
     shell_exe = _choose_shell_executable()
-
-    # Make tools non-interactive by default.
-    env = os.environ.copy()
-    env.setdefault("BYPASS_TOOL_CONSENT", "true")
-    env.setdefault("STRANDS_NON_INTERACTIVE", "true")
+    env = _subprocess_env()
+    cfg = _config_var.get()
 
     t0 = time.perf_counter()
-    timed_out = False
-    stdout = ""
-    stderr = ""
-    returncode: int | None = None
-
-    proc: subprocess.Popen[str] | None = None
-
-    # IMPORTANT: trace context does not automatically propagate into new threads.
-    # Capture it here so output streaming can log under the correct trace.
+    # Callbacks run on the reactor thread in a copy of this context, so trace
+    # events still correlate to the originating tool call.
     trace_id = get_trace_id()
-    from app.observability.trace_context import get_actor_id, set_trace
-
-    actor_id = get_actor_id()
-
-    stdout_chunks: list[str] = []
-    stderr_chunks: list[str] = []
-    stdout_len = 0
-    stderr_len = 0
-    chunk_limit = 60_000  # keep only tail; consistent with _truncate
-
-    def _append_tail(*, chunks: list[str], cur_len: int, text: str) -> int:
-        if not text:
-            return cur_len
-        chunks.append(text)
-        cur_len += len(text)
-        # Drop from the front until we're within the limit.
-        while chunks and cur_len > chunk_limit:
-            removed = chunks.pop(0)
-            cur_len -= len(removed)
-        return cur_len
-
-    def _stream_reader(*, which: str, stream) -> None:
-        # Ensure logs correlate to the originating tool call.
-        set_trace(trace_id=trace_id, actor_id=actor_id)
-        try:
-            for line in iter(stream.readline, ""):
-                if not line:
-                    break
-
-                nonlocal stdout_len, stderr_len
-
-                # For stderr, parse and forward progress markers
-                # This strips the markers from output while sending to user
-                if which == "stderr":
-                    processed_line = _parse_and_forward_progress_markers(line)
-                    # Only append if not stripped (marker was found and removed)
-                    if processed_line:
-                        stderr_len = _append_tail(chunks=stderr_chunks, cur_len=stderr_len, text=processed_line)
-                    # Continue to mark progress even if line was stripped
-                elif which == "stdout":
-                    stdout_len = _append_tail(chunks=stdout_chunks, cur_len=stdout_len, text=line)
-                else:
-                    stderr_len = _append_tail(chunks=stderr_chunks, cur_len=stderr_len, text=line)
-
-                # Mark progress on actual output as well; helps stall detection.
-                mark_progress("tool.shell.output")
-
-                # Best-effort live logging. Keep it bounded and sanitized.
-                if trace_id is not None:
-                    trace_event(
-                        "tool.shell.output",
-                        stream=which,
-                        text=line,
-                        max_chars=400,
-                    )
-        except Exception:
-            # Never let streaming break command execution.
-            return
 
+    job = _open_output_job()
+    # Partial stderr lines are capped so a newline-free stream cannot grow memory.
+    partial_limit = 65_536
+    decoders = {w: codecs.getincrementaldecoder("utf-8")(errors="replace") for w in _STREAMS}
+    # Redact across chunk boundaries so "password:\n<value>" is still caught.
+    redactors = {w: StreamRedactor() for w in _STREAMS}
+    stderr_partial = ""
+
+    def _on_output(which: str, data: bytes) -> None:
+        nonlocal stderr_partial
+        text = decoders[which].decode(data, final=not data)
+        if which == "stdout":
+            job.stdout.write(text)
+        elif text:
+            # For stderr, parse and forward progress markers line by line.
+            # This strips the markers from output while sending to user.
+            stderr_partial += text
+            *lines, stderr_partial = stderr_partial.split("\n")
+            pieces = [line + "\n" for line in lines]
+            if stderr_partial and (not data or len(stderr_partial) > partial_limit):
+                pieces.append(stderr_partial)
+                stderr_partial = ""
+            for piece in pieces:
+                job.stderr.write(_parse_and_forward_progress_markers(piece))
+
+        if text:
+            # Mark progress on actual output as well; helps stall detection.
+            mark_progress("tool.shell.output")
+        if stream_output and trace_id is not None:
+            # Best-effort live logging. Keep it bounded and sanitized.
+            safe = redactors[which].feed(text) + ("" if data else redactors[which].flush())
+            if safe:
+                trace_event("tool.shell.output", stream=which, text=safe, max_chars=400)
+
+    max_per_user = getattr(cfg, "shell_max_concurrent_per_user", 0)
     try:
-        proc = subprocess.Popen(
+        handle = get_shell_reactor().spawn(
             command,
-            shell=True,
+            on_output=_on_output,
+            timeout_seconds=max(1, int(timeout_seconds)),
             executable=shell_exe,
             cwd=cwd,
             env=env,
-            stdin=subprocess.DEVNULL,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            start_new_session=True,  # allows killing the whole process group
+            user_id=_current_user_id_var.get(),
+            max_per_user=max_per_user if isinstance(max_per_user, int) else 0,
+            slot_timeout=float(max(1, int(timeout_seconds))),
+            rlimits=rlimits_from_config(cfg),
         )
+    except ShellBusy as e:
+        job.discard()
+        return _shell_busy_result(e, timeout_seconds=timeout_seconds, t0=t0)
+
+    # The reactor enforces the deadline; this thread only reports liveness.
+    hb = float(max(1, int(heartbeat_seconds)))
+    while not handle.wait(hb):
+        mark_progress("tool.shell.heartbeat")
+    if handle.error:
+        job.stderr.write(f"\n{handle.error}\n")
+
+    output = job.finish()
+    dt_ms = int((time.perf_counter() - t0) * 1000)
+    return _shell_result(
+        stdout=job.stdout.render(),
+        stderr=job.stderr.render(),
+        returncode=handle.returncode,
+        timed_out=handle.timed_out,
+        timeout_seconds=timeout_seconds,
+        duration_ms=dt_ms,
+        output=output,
+    )
 
-        # Register the process group for user-initiated cancellation.
-        uid = _current_user_id_var.get()
-        if uid:
-            with _RUNNING_SHELL_LOCK:
-                _RUNNING_SHELL_PGID_BY_USER[str(uid)] = int(proc.pid)
-
-        deadline = time.monotonic() + float(max(1, int(timeout_seconds)))
-        hb = float(max(1, int(heartbeat_seconds)))
-
-        t_out: threading.Thread | None = None
-        t_err: threading.Thread | None = None
-        if stream_output and proc.stdout is not None and proc.stderr is not None:
-            t_out = threading.Thread(
-                target=_stream_reader,
-                kwargs={"which": "stdout", "stream": proc.stdout},
-                name="tool-shell-stdout",
-                daemon=True,
-            )
-            t_err = threading.Thread(
-                target=_stream_reader,
-                kwargs={"which": "stderr", "stream": proc.stderr},
-                name="tool-shell-stderr",
-                daemon=True,
-            )
-            t_out.start()
-            t_err.start()
-
-        last_hb = time.monotonic()
-        while True:
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                timed_out = True
-                break
-
-            rc = proc.poll()
-            if rc is not None:
-                returncode = int(rc)
-                break
-
-            # Still running.
-            now = time.monotonic()
-            if (now - last_hb) >= hb:
-                mark_progress("tool.shell.heartbeat")
-                last_hb = now
-
-            time.sleep(min(0.2, remaining))
-
-        if timed_out:
-            # Kill the full process group to avoid orphaned children.
-            try:
-                os.killpg(proc.pid, signal.SIGTERM)
-            except Exception:
-                try:
-                    proc.terminate()
-                except Exception:
-                    pass
-
-            # Give it a brief grace period, then SIGKILL.
-            try:
-                proc.wait(timeout=2)
-            except Exception:
-                try:
-                    os.killpg(proc.pid, signal.SIGKILL)
-                except Exception:
-                    try:
-                        proc.kill()
-                    except Exception:
-                        pass
-                try:
-                    proc.wait(timeout=2)
-                except Exception:
-                    pass
-
-            # Use a standard timeout exit code regardless of actual return.
-            returncode = 124
-
-        # Ensure reader threads drain remaining output.
-        if stream_output:
-            try:
-                if t_out is not None:
-                    t_out.join(timeout=1)
-                if t_err is not None:
-                    t_err.join(timeout=1)
-            except Exception:
-                pass
-
-        # If streaming is disabled, fall back to a final communicate() to collect output.
-        if not stream_output:
-            try:
-                out, err = proc.communicate(timeout=1)
-                stdout = out or ""
-                stderr = err or ""
-            except Exception:
-                pass
 
-        # Combine streamed output buffers into strings.
-        if stdout_chunks:
-            stdout = "".join(stdout_chunks)
-        if stderr_chunks:
-            stderr = "".join(stderr_chunks)
+def _shell_busy_result(e: ShellBusy, *, timeout_seconds: int, t0: float) -> dict[str, Any]:
+    """Result for a command refused because the user has no free slot."""
+    return _shell_result(
+        stdout="",
+        stderr=f"{e}; wait for one to finish or cancel it.",
+        returncode=1,
+        timed_out=False,
+        timeout_seconds=timeout_seconds,
+        duration_ms=int((time.perf_counter() - t0) * 1000),
+    )
 
-    finally:
-        # Always unregister on exit.
-        try:
-            uid = _current_user_id_var.get()
-            if uid and proc is not None:
-                with _RUNNING_SHELL_LOCK:
-                    if _RUNNING_SHELL_PGID_BY_USER.get(str(uid)) == int(proc.pid):
-                        _RUNNING_SHELL_PGID_BY_USER.pop(str(uid), None)
-        except Exception:
-            pass
 
-        # Best-effort: ensure returncode is populated.
-        if proc is not None and returncode is None:
-            try:
-                returncode = int(proc.poll() or 0)
-            except Exception:
-                returncode = 0
+def _shell_result(
+    *,
+    stdout: str,
+    stderr: str,
+    returncode: int | None,
+    timed_out: bool,
+    timeout_seconds: int,
+    duration_ms: int,
+    output: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Build the strands_tools-compatible result dict for a finished command.
 
-    dt_ms = int((time.perf_counter() - t0) * 1000)
+    ``output`` is the spool handle (see :func:`app.services.output_spool.open_job`)
+    when stdout/stderr were too large to return whole; it is passed through so
+    the agent can page through the full output with ``file_read``.
+    """
     stdout_t = _truncate(stdout)
     stderr_t = _truncate(stderr)
+    extra = {"output": output} if output else {}
 
     if timed_out:
-        stdout_len = len(stdout_t or "")
+        stdout_len = output["stdout"]["chars"] if output else len(stdout_t or "")
         msg = (
             f"Command timed out after {timeout_seconds}s. "
             f"Partial output ({stdout_len} chars) is available in stdout. "
@@ -661,7 +699,8 @@ def _safe_shell_run(
             "timed_out": True,
             "partial_stdout_available": bool(stdout_t),  # Flag for agent to check
             "partial_stdout_length": stdout_len,
-            "duration_ms": dt_ms,
+            "duration_ms": duration_ms,
+            **extra,
             "content": [{"text": content_text}],
         }
 
@@ -676,7 +715,8 @@ def _safe_shell_run(
         "stdout": stdout_t,
         "stderr": stderr_t,
         "timed_out": False,
-        "duration_ms": dt_ms,
+        "duration_ms": duration_ms,
+        **extra,
         "content": [{"text": combined}],
     }
 
@@ -855,7 +895,19 @@ def shell(
         # Start the heartbeat only while the underlying runner executes.
         hb_thread.start()
 
-        if use_safe_runner:
+        # Plain `python script.py ...` commands can skip the shell and the
+        # interpreter startup entirely (opt-in); anything else falls through.
+        # Only alongside the safe runner, whose slot and rlimit controls it shares.
+        result = None
+        if use_safe_runner and bool(getattr(cfg, "shell_resident_runner_enabled", False)):
+            result = _resident_shell_run(
+                command=effective_command,
+                work_dir=work_dir,
+                timeout_seconds=effective_timeout,
+                stream_output=stream_output,
+            )
+
+        if result is None and use_safe_runner:
             result = _safe_shell_run(
                 command=effective_command,
                 work_dir=work_dir,
@@ -863,7 +915,7 @@ def shell(
                 heartbeat_seconds=heartbeat_s,
                 stream_output=stream_output,
             )
-        else:
+        elif result is None:
             forwarded["command"] = effective_command
             result = _call_base_shell(**forwarded)
 
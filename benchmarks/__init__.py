@@ -0,0 +1,4 @@
+"""Offline load-test harness for the full message pipeline.
+
+Run with ``python -m benchmarks.load_test --help``. See ``benchmarks/README.md``.
+"""
@@ -0,0 +1,339 @@
+"""In-process stand-ins for the external services the pipeline talks to.
+
+- :class:`FakeSQSClient`: the boto3 SQS subset used by the app (create/send/
+  receive/delete/visibility) with long polling and visibility timeouts.
+- :class:`FakeTelegramBot`: records every outbound Telegram call; installed as
+  ``TelegramBotInterface.application.bot`` so the real sender/formatter runs.
+- :class:`FakeModel`: a deterministic Strands model with configurable latency
+  and tool calls, returned by :class:`FakeModelFactory`.
+
+None of these touch the network, so a load test needs no AWS account, model
+credentials or Telegram token.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from typing import Any
+
+from strands.models.model import Model
+
+MARKER_RE = re.compile(r"bench-[\w-]+-m\d+")
+
+
+@dataclass
+class _SQSMessage:
+    message_id: str
+    body: str
+    sent_ms: int
+    visible_at: float = 0.0
+    receipt_handle: str | None = None
+    receive_count: int = 0
+
+
+@dataclass
+class _SQSQueue:
+    url: str
+    visibility_timeout: float
+    messages: list[_SQSMessage] = field(default_factory=list)
+
+
+class FakeSQSClient:
+    """Thread-safe in-memory SQS with long polling.
+
+    ``receive_message`` is called from executor threads by the message
+    processor, so waiting uses a condition variable. :meth:`close` wakes every
+    waiter so executor shutdown does not block for ``WaitTimeSeconds``.
+    """
+
+    def __init__(self, *, region: str = "us-east-1", account: str = "000000000000") -> None:
+        self._base = f"https://sqs.{region}.amazonaws.com/{account}"
+        self._queues: dict[str, _SQSQueue] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.sent = 0
+        self.deleted = 0
+
+    def create_queue(self, *, QueueName: str, Attributes: dict[str, str] | None = None) -> dict:
+        url = f"{self._base}/{QueueName}"
+        with self._cond:
+            if url not in self._queues:
+                timeout = float((Attributes or {}).get("VisibilityTimeout", 30))
+                self._queues[url] = _SQSQueue(url=url, visibility_timeout=timeout)
+        return {"QueueUrl": url}
+
+    def get_queue_url(self, *, QueueName: str) -> dict:
+        url = f"{self._base}/{QueueName}"
+        if url not in self._queues:
+            raise KeyError(QueueName)
+        return {"QueueUrl": url}
+
+    def delete_queue(self, *, QueueUrl: str) -> dict:
+        with self._cond:
+            self._queues.pop(QueueUrl, None)
+        return {}
+
+    def send_message(self, *, QueueUrl: str, MessageBody: str, **_: Any) -> dict:
+        msg = _SQSMessage(
+            message_id=str(uuid.uuid4()),
+            body=MessageBody,
+            sent_ms=int(time.time() * 1000),
+        )
+        with self._cond:
+            self._queues[QueueUrl].messages.append(msg)
+            self.sent += 1
+            self._cond.notify_all()
+        return {"MessageId": msg.message_id}
+
+    def receive_message(
+        self,
+        *,
+        QueueUrl: str,
+        MaxNumberOfMessages: int = 1,
+        WaitTimeSeconds: int = 0,
+        **_: Any,
+    ) -> dict:
+        deadline = time.monotonic() + float(WaitTimeSeconds)
+        with self._cond:
+            while True:
+                queue = self._queues.get(QueueUrl)
+                if queue is None or self._closed:
+                    return {}
+                now = time.monotonic()
+                ready = [m for m in queue.messages if m.visible_at <= now]
+                if ready:
+                    out = []
+                    for msg in ready[: max(1, MaxNumberOfMessages)]:
+                        msg.visible_at = now + queue.visibility_timeout
+                        msg.receipt_handle = uuid.uuid4().hex
+                        msg.receive_count += 1
+                        out.append(
+                            {
+                                "MessageId": msg.message_id,
+                                "ReceiptHandle": msg.receipt_handle,
+                                "Body": msg.body,
+                                "Attributes": {
+                                    "SentTimestamp": str(msg.sent_ms),
+                                    "ApproximateReceiveCount": str(msg.receive_count),
+                                },
+                            }
+                        )
+                    return {"Messages": out}
+                remaining = deadline - now
+                if remaining <= 0:
+                    return {}
+                self._cond.wait(remaining)
+
+    def delete_message(self, *, QueueUrl: str, ReceiptHandle: str) -> dict:
+        with self._cond:
+            queue = self._queues.get(QueueUrl)
+            if queue is not None:
+                before = len(queue.messages)
+                queue.messages = [m for m in queue.messages if m.receipt_handle != ReceiptHandle]
+                self.deleted += before - len(queue.messages)
+        return {}
+
+    def change_message_visibility(
+        self, *, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int
+    ) -> dict:
+        with self._cond:
+            queue = self._queues.get(QueueUrl)
+            for msg in queue.messages if queue else []:
+                if msg.receipt_handle == ReceiptHandle:
+                    msg.visible_at = time.monotonic() + float(VisibilityTimeout)
+            self._cond.notify_all()
+        return {}
+
+    def pending(self) -> int:
+        """Messages not yet deleted, across all queues."""
+        with self._cond:
+            return sum(len(q.messages) for q in self._queues.values())
+
+    def close(self) -> None:
+        """Release all long-polling receivers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+@dataclass(frozen=True, slots=True)
+class SentMessage:
+    at: float
+    method: str
+    chat_id: int | str
+    text: str
+
+
+class FakeTelegramBot:
+    """Records outbound Telegram API calls, optionally with latency and 429s.
+
+    Args:
+        latency_seconds: Simulated round-trip time per call.
+        rate_limit_ratio: Fraction of calls that raise ``RetryAfter``.
+        seed: Seed for the rate-limit coin flips.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_seconds: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency_seconds = latency_seconds
+        self.rate_limit_ratio = rate_limit_ratio
+        self._rng = random.Random(seed)
+        self.sent: list[SentMessage] = []
+        self.rate_limited = 0
+        self._new_message = asyncio.Event()
+
+    async def _call(self, method: str, chat_id: int | str, text: str) -> Any:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.rate_limit_ratio and self._rng.random() < self.rate_limit_ratio:
+            from telegram.error import RetryAfter
+
+            self.rate_limited += 1
+            raise RetryAfter(1)
+        self.sent.append(SentMessage(time.monotonic(), method, chat_id, text))
+        self._new_message.set()
+        return True
+
+    async def send_message(self, chat_id: int | str, text: str, **_: Any) -> Any:
+        return await self._call("send_message", chat_id, text)
+
+    async def send_document(self, chat_id: int | str, document: Any, **kwargs: Any) -> Any:
+        return await self._call("send_document", chat_id, kwargs.get("caption") or "")
+
+    async def send_photo(self, chat_id: int | str, photo: Any, **kwargs: Any) -> Any:
+        return await self._call("send_photo", chat_id, kwargs.get("caption") or "")
+
+    async def send_chat_action(self, chat_id: int | str, action: Any, **_: Any) -> Any:
+        return await self._call("send_chat_action", chat_id, str(action))
+
+    async def wait_for_messages(self) -> None:
+        """Block until at least one new message has been recorded."""
+        await self._new_message.wait()
+        self._new_message.clear()
+
+
+class FakeModel(Model):
+    """Deterministic Strands model for load tests.
+
+    Each agent turn performs ``tool_calls`` calls to ``tool_name`` (when the
+    tool is offered), sleeping ``latency_seconds`` per model round-trip, then
+    answers with a reply that echoes the benchmark marker from the prompt so
+    the harness can match responses to requests.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_seconds: float = 0.05,
+        tool_calls: int = 1,
+        tool_name: str = "send_progress",
+        response_chars: int = 400,
+    ) -> None:
+        self.config: dict[str, Any] = {
+            "model_id": "fake-benchmark-model",
+            "latency_seconds": latency_seconds,
+            "tool_calls": tool_calls,
+            "tool_name": tool_name,
+            "response_chars": response_chars,
+        }
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> dict[str, Any]:
+        return dict(self.config)
+
+    async def structured_output(
+        self, output_model: Any, prompt: Any, system_prompt: str | None = None, **kwargs: Any
+    ) -> AsyncGenerator[dict[str, Any]]:
+        raise NotImplementedError("FakeModel does not support structured output")
+        yield {}  # pragma: no cover
+
+    async def stream(
+        self,
+        messages: list[Any],
+        tool_specs: list[Any] | None = None,
+        system_prompt: str | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[dict[str, Any]]:
+        latency = float(self.config["latency_seconds"])
+        if latency:
+            await asyncio.sleep(latency)
+
+        marker, tool_uses = _current_turn(messages)
+        tool_name = self.config["tool_name"]
+        offered = {
+            (spec.get("name") if isinstance(spec, dict) else None) for spec in tool_specs or []
+        }
+        input_tokens = sum(len(json.dumps(m, default=str)) for m in messages) // 4
+
+        yield {"messageStart": {"role": "assistant"}}
+        if tool_uses < int(self.config["tool_calls"]) and tool_name in offered:
+            tool_input = {"message": f"Step {tool_uses + 1} for {marker}"}
+            yield {
+                "contentBlockStart": {
+                    "start": {
+                        "toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}", "name": tool_name}
+                    }
+                }
+            }
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = 20
+        else:
+            filler = "lorem ipsum " * (int(self.config["response_chars"]) // 12)
+            text = f"ack {marker}. {filler}".strip()
+            yield {"contentBlockDelta": {"delta": {"text": text}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output_tokens = len(text) // 4
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "totalTokens": input_tokens + output_tokens,
+                },
+                "metrics": {"latencyMs": int(latency * 1000)},
+            }
+        }
+
+
+def _current_turn(messages: list[Any]) -> tuple[str, int]:
+    """Return (benchmark marker, tool uses so far) for the latest user turn."""
+    tool_uses = 0
+    for msg in reversed(messages):
+        content = msg.get("content") if isinstance(msg, dict) else None
+        blocks = content if isinstance(content, list) else []
+        if msg.get("role") == "assistant":
+            tool_uses += sum(1 for b in blocks if isinstance(b, dict) and "toolUse" in b)
+            continue
+        texts = [b["text"] for b in blocks if isinstance(b, dict) and isinstance(b.get("text"), str)]
+        if texts:
+            match = MARKER_RE.search(" ".join(texts))
+            return (match.group(0) if match else "unknown"), tool_uses
+    return "unknown", tool_uses
+
+
+class FakeModelFactory:
+    """Drop-in for :class:`app.services.agent.model_factory.ModelFactory`."""
+
+    def __init__(self, **model_kwargs: Any) -> None:
+        self.model_kwargs = model_kwargs
+
+    def create(self, *, use_vision: bool = False, model_id: str | None = None) -> Model:
+        return FakeModel(**self.model_kwargs)
@@ -0,0 +1,116 @@
+"""Benchmark: skill directory fingerprints, legacy vs incremental Merkle tree.
+
+Builds a synthetic skill with many small source files and a few large
+binary assets. It then times the old whole-file ``read_bytes`` fingerprint
+against :func:`app.services.skill_fingerprint.fingerprint_tree`, cold (empty
+digest cache) and warm (nothing changed), and records peak Python heap
+usage::
+
+    uv run python -m benchmarks.fingerprint_bench
+    uv run python -m benchmarks.fingerprint_bench --files 5000 --large-mb 256 --json fp.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.skill_fingerprint import FileDigestCache, fingerprint_tree
+
+_IGNORE = {".venv", "__pycache__", "FAILED.json", "onboarding_report.json"}
+
+
+def legacy_fingerprint(root: Path) -> str:
+    """The pre-Merkle implementation: rglob + read_bytes of every file."""
+    h = hashlib.sha256()
+    for p in sorted(root.rglob("*")):
+        rel = p.relative_to(root)
+        if any(part in _IGNORE for part in rel.parts):
+            continue
+        if p.is_file():
+            h.update(str(rel).encode("utf-8"))
+            h.update(p.read_bytes())
+        elif p.is_dir():
+            h.update((str(rel) + "/").encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_skill(root: Path, *, files: int, large_files: int, large_mb: int) -> int:
+    total = 0
+    for i in range(files):
+        d = root / "node_modules" / f"pkg{i // 100:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        payload = f"module.exports = {i};\n".encode() * 40
+        (d / f"m{i}.js").write_bytes(payload)
+        total += len(payload)
+    chunk = os.urandom(1 << 20)
+    for i in range(large_files):
+        models = root / "models"
+        models.mkdir(exist_ok=True)
+        with open(models / f"model{i}.bin", "wb") as fh:
+            for _ in range(large_mb):
+                fh.write(chunk)
+        total += large_mb << 20
+    (root / "SKILL.md").write_text("---\nname: bench\n---\n", encoding="utf-8")
+    return total
+
+
+def _measure(fn: Callable[[], Any]) -> dict[str, float]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / 1e6, 1)}
+
+
+def run(*, files: int, large_files: int, large_mb: int) -> dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="fingerprint-bench-"))
+    try:
+        total = build_skill(root, files=files, large_files=large_files, large_mb=large_mb)
+        cache = FileDigestCache()
+        results = {
+            "legacy": _measure(lambda: legacy_fingerprint(root)),
+            "merkle_cold": _measure(lambda: fingerprint_tree(root, ignore=_IGNORE, cache=cache)),
+            "merkle_warm": _measure(lambda: fingerprint_tree(root, ignore=_IGNORE, cache=cache)),
+        }
+        touched = root / "node_modules" / "pkg000" / "m0.js"
+        touched.write_bytes(b"module.exports = 'changed';\n")
+        results["merkle_one_change"] = _measure(
+            lambda: fingerprint_tree(root, ignore=_IGNORE, cache=cache)
+        )
+        return {"files": files + large_files + 1, "total_mb": round(total / 1e6, 1), **results}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="small source files")
+    parser.add_argument("--large-files", type=int, default=2)
+    parser.add_argument("--large-mb", type=int, default=128, help="size of each large file")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(files=args.files, large_files=args.large_files, large_mb=args.large_mb)
+    print(f"{result['files']} files, {result['total_mb']} MB")
+    print(f"{'variant':<20}{'seconds':>10}{'peak MB':>10}")
+    for name in ("legacy", "merkle_cold", "merkle_warm", "merkle_one_change"):
+        print(f"{name:<20}{result[name]['seconds']:>10}{result[name]['peak_mb']:>10}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""Benchmark: skill import analysis, legacy per-call parsing vs cached analyzer.
+
+Builds a synthetic skill with many Python modules and times the old
+parse-every-file scan against
+:class:`app.services.import_analysis.ImportAnalyzer`: cold (empty cache),
+warm (same process) and restarted (fresh analyzer reading the on-disk
+cache)::
+
+    uv run python -m benchmarks.import_analysis_bench
+    uv run python -m benchmarks.import_analysis_bench --files 5000 --json imports.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.import_analysis import ImportAnalyzer
+
+_THIRD_PARTY = ("requests", "yaml", "numpy", "pandas", "bs4", "PIL")
+
+
+def legacy_scan(root: Path) -> set[str]:
+    """The pre-cache implementation: rglob, read and ``ast.parse`` every file."""
+    stdlib = set(sys.stdlib_module_names)
+    roots: set[str] = set()
+    for py_file in root.rglob("*.py"):
+        try:
+            tree = ast.parse(py_file.read_text(encoding="utf-8"))
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                roots.update(a.name.split(".")[0] for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                roots.add(node.module.split(".")[0])
+    return {r for r in roots if r not in stdlib}
+
+
+def build_skill(root: Path, *, files: int, lines: int) -> None:
+    body = "\n".join(
+        f"def f{i}(x):\n    return [x * {i} for _ in range(3)]\n" for i in range(lines)
+    )
+    for i in range(files):
+        d = root / "scripts" / f"pkg{i // 100:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        header = f"import os\nimport {_THIRD_PARTY[i % len(_THIRD_PARTY)]}\n"
+        (d / f"mod{i}.py").write_text(header + body, encoding="utf-8")
+    (root / "SKILL.md").write_text("---\nname: bench\n---\n", encoding="utf-8")
+
+
+def _time(fn: Callable[[], Any]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - t0, 4)
+
+
+def run(*, files: int, lines: int) -> dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="import-bench-"))
+    try:
+        skill = root / "skill"
+        build_skill(skill, files=files, lines=lines)
+        cache_dir = root / "cache"
+        analyzer = ImportAnalyzer(cache_dir)
+        return {
+            "files": files,
+            "legacy": _time(lambda: legacy_scan(skill)),
+            "cold": _time(lambda: analyzer.analyze(skill)),
+            "warm": _time(lambda: analyzer.analyze(skill)),
+            "restarted": _time(lambda: ImportAnalyzer(cache_dir).analyze(skill)),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="Python modules in the skill")
+    parser.add_argument("--lines", type=int, default=50, help="functions per module")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(files=args.files, lines=args.lines)
+    print(f"{result['files']} files")
+    print(f"{'variant':<12}{'seconds':>10}")
+    for name in ("legacy", "cold", "warm", "restarted"):
+        print(f"{name:<12}{result[name]:>10}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,154 @@
+"""Import-time report: runs ``python -X importtime`` and summarizes it.
+
+Cold start is dominated by module imports (Strands, boto3, FastAPI, the
+Telegram stack, model SDKs). This runs ``import <module>`` in a fresh
+interpreter, parses the ``-X importtime`` trace and prints the total, the
+slowest direct imports of the target (cumulative) and the modules with the
+highest self time::
+
+    uv run python -m benchmarks.import_time
+    uv run python -m benchmarks.import_time --module app.main --top 25 --json imports.json
+
+``--forbid`` fails (exit 1) when any listed module was imported, e.g. to
+check that optional provider SDKs stay lazy::
+
+    uv run python -m benchmarks.import_time --forbid openai --forbid google.genai
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)\s*$")
+
+# Optional model-provider SDKs: only imported when that provider is configured.
+LAZY_MODULES = ("openai", "google.genai", "strands.models.openai", "strands.models.gemini")
+
+
+@dataclass
+class ImportEntry:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportTimeReport:
+    target: str
+    total_us: int
+    module_count: int
+    top_level: list[ImportEntry] = field(default_factory=list)
+    top_self: list[ImportEntry] = field(default_factory=list)
+    modules: dict[str, ImportEntry] = field(default_factory=dict)
+
+    def imported(self, module: str) -> bool:
+        return module in self.modules
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data.pop("modules")
+        return data
+
+    def format(self) -> str:
+        lines = [
+            f"import {self.target}: {self.total_us / 1000:.1f} ms "
+            f"({self.module_count} modules)",
+            "",
+            f"{'direct imports (cumulative ms)':<52}{'ms':>10}",
+        ]
+        lines += [f"  {e.module:<50}{e.cumulative_us / 1000:>10.1f}" for e in self.top_level]
+        lines += ["", f"{'self time (ms)':<52}{'ms':>10}"]
+        lines += [f"  {e.module:<50}{e.self_us / 1000:>10.1f}" for e in self.top_self]
+        return "\n".join(lines)
+
+
+def parse_importtime(stderr: str, *, target: str, top: int = 15) -> ImportTimeReport:
+    """Parse ``-X importtime`` output into a report for ``target``."""
+    entries: list[ImportEntry] = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append(
+            ImportEntry(
+                module=module,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(indent) - 1) // 2,
+            )
+        )
+
+    modules = {e.module: e for e in entries}
+    root = modules.get(target)
+    total = root.cumulative_us if root is not None else sum(e.self_us for e in entries)
+    # Children are printed before their parent: the direct imports of the
+    # target are the depth-1 lines between the previous root-level line and it.
+    direct: list[ImportEntry] = []
+    for entry in entries:
+        if entry.depth == 0:
+            if entry.module == target:
+                break
+            direct = []
+        elif entry.depth == 1:
+            direct.append(entry)
+
+    return ImportTimeReport(
+        target=target,
+        total_us=total,
+        module_count=len(entries),
+        top_level=sorted(direct, key=lambda e: e.cumulative_us, reverse=True)[:top],
+        top_self=sorted(entries, key=lambda e: e.self_us, reverse=True)[:top],
+        modules=modules,
+    )
+
+
+def measure(module: str = "app.main", *, top: int = 15, cwd: Path | None = None) -> ImportTimeReport:
+    """Import ``module`` in a fresh interpreter and return its report."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr, target=module, top=top)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--runs", type=int, default=1, help="report the fastest of N runs")
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON")
+    parser.add_argument(
+        "--forbid", action="append", default=[], help="fail if this module gets imported"
+    )
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module, top=args.top) for _ in range(max(1, args.runs))]
+    report = min(runs, key=lambda r: r.total_us)
+    print(report.format())
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report.to_dict(), indent=2))
+
+    leaked = [m for m in args.forbid if report.imported(m)]
+    if leaked:
+        print(f"\nforbidden modules imported: {', '.join(leaked)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
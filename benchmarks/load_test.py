@@ -0,0 +1,351 @@
+"""End-to-end offline load test: N simulated users x M messages.
+
+Wires the real :class:`app.main.Application` (DAOs, agent service, SQS message
+processor, Telegram sender) against the stand-ins in :mod:`benchmarks.fakes`
+and SQLite on tmpfs, then reports throughput, per-stage p50/p95/p99 (from the
+``mordecai_stage_duration_seconds`` instrumentation) and RSS.
+
+Usage::
+
+    python -m benchmarks.load_test --users 20 --messages 5 --model-latency 0.2
+    python -m benchmarks.load_test --json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.config import AgentConfig
+from app.enums import ModelProvider
+from app.main import Application
+from app.observability import metrics
+from app.telegram.message_queue import MessageQueueHandler
+from benchmarks.fakes import MARKER_RE, FakeModelFactory, FakeSQSClient, FakeTelegramBot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoadTestOptions:
+    users: int = 10
+    messages: int = 5
+    model_latency: float = 0.05
+    tool_calls: int = 1
+    response_chars: int = 400
+    telegram_latency: float = 0.0
+    telegram_429_ratio: float = 0.0
+    interarrival: float = 0.0
+    max_concurrent_per_user: int = 5
+    timeout: float = 300.0
+    polling_interval: float = 0.05
+
+
+@dataclass
+class StageStats:
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+@dataclass
+class LoadTestReport:
+    options: dict[str, Any]
+    completed: int
+    expected: int
+    wall_seconds: float
+    throughput_per_second: float
+    end_to_end: StageStats | None
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    telegram_calls: dict[str, int] = field(default_factory=dict)
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    model_tokens: int = 0
+    tokens_per_second: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    def format(self) -> str:
+        lines = [
+            f"completed {self.completed}/{self.expected} messages in {self.wall_seconds:.2f}s "
+            f"({self.throughput_per_second:.2f} msg/s)",
+            f"rss {self.rss_mb:.1f} MB (peak {self.peak_rss_mb:.1f} MB)",
+            f"model tokens {self.model_tokens} ({self.tokens_per_second:.0f} tokens/s)",
+            "",
+            f"{'stage (ms)':<20}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+        ]
+        rows = dict(self.stages)
+        if self.end_to_end is not None:
+            rows = {"end_to_end": self.end_to_end, **rows}
+        for name, s in rows.items():
+            lines.append(
+                f"{name:<20}{s.count:>8}{s.p50 * 1000:>10.1f}{s.p95 * 1000:>10.1f}"
+                f"{s.p99 * 1000:>10.1f}{s.max * 1000:>10.1f}"
+            )
+        lines.append("")
+        lines.append(
+            "telegram calls: "
+            + ", ".join(f"{k}={v}" for k, v in sorted(self.telegram_calls.items()))
+        )
+        return "\n".join(lines)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: list[float]) -> StageStats:
+    return StageStats(
+        count=len(samples),
+        p50=percentile(samples, 50),
+        p95=percentile(samples, 95),
+        p99=percentile(samples, 99),
+        max=max(samples) if samples else 0.0,
+    )
+
+
+def _rss_mb() -> tuple[float, float]:
+    """Return (current, peak) resident set size in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    if sys.platform == "darwin":
+        peak /= 1024.0
+    current = peak
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        current = pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except Exception:
+        pass
+    return current, peak
+
+
+def _tmpfs_root() -> str | None:
+    shm = Path("/dev/shm")
+    return str(shm) if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+def build_config(root: Path, opts: LoadTestOptions) -> AgentConfig:
+    """AgentConfig isolated under ``root`` with every external integration off."""
+    return AgentConfig(
+        _env_file=None,  # type: ignore[call-arg]
+        telegram_bot_token="0:benchmark",
+        model_provider=ModelProvider.BEDROCK,
+        database_url=f"sqlite+aiosqlite:///{root / 'bench.db'}",
+        auto_create_tables=True,
+        session_storage_dir=str(root / "sessions"),
+        secrets_path=str(root / "secrets.yml"),
+        skills_base_dir=str(root / "skills"),
+        shared_skills_dir=str(root / "skills" / "shared"),
+        working_folder_base_dir=str(root / "workspace"),
+        error_log_file_enabled=False,
+        memory_enabled=False,
+        browser_enabled=False,
+        onepassword_enabled=False,
+        pending_skills_preflight_enabled=False,
+        trace_enabled=False,
+        max_concurrent_tasks_per_user=opts.max_concurrent_per_user,
+    )
+
+
+class _StageRecorder:
+    """Captures raw stage samples alongside the histogram for exact percentiles."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self._original = metrics.STAGE_SECONDS.observe
+
+    def __enter__(self) -> _StageRecorder:
+        def observe(value: float, **labels: Any) -> None:
+            self.samples[str(labels.get("stage"))].append(float(value))
+            self._original(value, **labels)
+
+        metrics.STAGE_SECONDS.observe = observe  # type: ignore[method-assign]
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        metrics.STAGE_SECONDS.observe = self._original  # type: ignore[method-assign]
+
+
+async def run_load_test(opts: LoadTestOptions) -> LoadTestReport:
+    """Run one load test and return its report."""
+    with tempfile.TemporaryDirectory(prefix="mordecai-bench-", dir=_tmpfs_root()) as tmp:
+        root = Path(tmp)
+        (root / "skills" / "shared").mkdir(parents=True)
+        config = build_config(root, opts)
+
+        sqs = FakeSQSClient()
+        app = Application(config)
+        app._create_sqs_client = lambda: sqs  # type: ignore[method-assign]
+        await app.setup()
+
+        bot = FakeTelegramBot(
+            latency_seconds=opts.telegram_latency,
+            rate_limit_ratio=opts.telegram_429_ratio,
+        )
+        assert app.telegram_bot is not None and app.agent_service is not None
+        assert app.message_processor is not None and app.queue_manager is not None
+        app.telegram_bot.application.bot = bot
+        creator = app.agent_service._agent_creator
+        creator._model_factory = FakeModelFactory(
+            latency_seconds=opts.model_latency,
+            tool_calls=opts.tool_calls,
+            response_chars=opts.response_chars,
+        )
+        processor = app.message_processor
+        processor.polling_interval = opts.polling_interval
+        enqueuer = MessageQueueHandler(sqs, app.queue_manager)
+
+        expected = opts.users * opts.messages
+        sent_at: dict[str, float] = {}
+        done_at: dict[str, float] = {}
+
+        with _StageRecorder() as recorder:
+            poller = processor.start_background()
+            started = time.monotonic()
+
+            async def user_session(u: int) -> None:
+                for m in range(opts.messages):
+                    marker = f"bench-u{u}-m{m}"
+                    sent_at[marker] = time.monotonic()
+                    enqueuer.enqueue_message(
+                        user_id=f"bench_user_{u}",
+                        chat_id=100_000 + u,
+                        message=f"Hello from {marker}, please help.",
+                    )
+                    if opts.interarrival:
+                        await asyncio.sleep(opts.interarrival)
+
+            await asyncio.gather(*(user_session(u) for u in range(opts.users)))
+
+            deadline = started + opts.timeout
+            seen = 0
+            while len(done_at) < expected and time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(bot.wait_for_messages(), timeout=1.0)
+                except TimeoutError:
+                    pass
+                for sent in bot.sent[seen:]:
+                    if sent.method != "send_message" or not sent.text.startswith("ack "):
+                        continue
+                    match = MARKER_RE.search(sent.text)
+                    if match and match.group(0) not in done_at:
+                        done_at[match.group(0)] = sent.at
+                seen = len(bot.sent)
+            wall = time.monotonic() - started
+
+            await processor.stop()
+            sqs.close()
+            poller.cancel()
+            try:
+                await poller
+            except BaseException:
+                pass
+            processor.executor.shutdown(wait=False, cancel_futures=True)
+            model_tokens = 0
+            if app.usage_ledger is not None:
+                model_tokens = sum(app.usage_ledger.tokens_by_user().values())
+                await app.usage_ledger.stop()
+            if app.database is not None:
+                await app.database.close()
+
+        calls: dict[str, int] = defaultdict(int)
+        for sent in bot.sent:
+            calls[sent.method] += 1
+        if bot.rate_limited:
+            calls["rate_limited"] = bot.rate_limited
+
+        latencies = [done_at[k] - sent_at[k] for k in done_at if k in sent_at]
+        rss, peak = _rss_mb()
+        return LoadTestReport(
+            options=asdict(opts),
+            completed=len(done_at),
+            expected=expected,
+            wall_seconds=wall,
+            throughput_per_second=len(done_at) / wall if wall > 0 else 0.0,
+            end_to_end=summarize(latencies) if latencies else None,
+            stages={k: summarize(v) for k, v in sorted(recorder.samples.items())},
+            telegram_calls=dict(calls),
+            rss_mb=rss,
+            peak_rss_mb=peak,
+            model_tokens=model_tokens,
+            tokens_per_second=model_tokens / wall if wall > 0 else 0.0,
+        )
+
+
+def _parse_args(argv: list[str] | None) -> tuple[LoadTestOptions, argparse.Namespace]:
+    defaults = LoadTestOptions()
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Offline end-to-end load test (fake model, in-process SQS, fake Telegram).",
+    )
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--messages", type=int, default=defaults.messages, help="per user")
+    parser.add_argument("--model-latency", type=float, default=defaults.model_latency,
+                        help="seconds per fake model round-trip")
+    parser.add_argument("--tool-calls", type=int, default=defaults.tool_calls,
+                        help="send_progress tool calls per agent turn")
+    parser.add_argument("--response-chars", type=int, default=defaults.response_chars)
+    parser.add_argument("--telegram-latency", type=float, default=defaults.telegram_latency)
+    parser.add_argument("--telegram-429-ratio", type=float, default=defaults.telegram_429_ratio,
+                        help="fraction of Telegram calls rejected with RetryAfter")
+    parser.add_argument("--interarrival", type=float, default=defaults.interarrival,
+                        help="seconds between a user's messages")
+    parser.add_argument("--max-concurrent-per-user", type=int,
+                        default=defaults.max_concurrent_per_user)
+    parser.add_argument("--timeout", type=float, default=defaults.timeout)
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--verbose", action="store_true",
+                        help="keep the agent's streamed stdout output")
+    args = parser.parse_args(argv)
+    opts = LoadTestOptions(
+        users=args.users,
+        messages=args.messages,
+        model_latency=args.model_latency,
+        tool_calls=args.tool_calls,
+        response_chars=args.response_chars,
+        telegram_latency=args.telegram_latency,
+        telegram_429_ratio=args.telegram_429_ratio,
+        interarrival=args.interarrival,
+        max_concurrent_per_user=args.max_concurrent_per_user,
+        timeout=args.timeout,
+    )
+    return opts, args
+
+
+def main(argv: list[str] | None = None) -> int:
+    opts, args = _parse_args(argv)
+    logging.getLogger().setLevel(args.log_level.upper())
+    # Strands' default callback handler echoes every streamed token to stdout.
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(open(os.devnull, "w")))
+        report = asyncio.run(run_load_test(opts))
+    print(report.format())
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report.to_dict(), indent=2))
+    return 0 if report.completed == report.expected else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""Benchmark: skill script invocations, fresh interpreter vs resident runner.
+
+Creates a workbook and then reads it N times with the excel skill's
+``scripts/excel.py to-markdown``. It times the shell tool's old path (bash, then a
+new interpreter, then openpyxl imported again on every call) against
+:class:`app.services.skill_script_runner.ResidentScriptRunner` (a fork of a
+warm interpreter per call). ``--python`` must have openpyxl installed,
+e.g. the excel skill's venv::
+
+    uv run python -m benchmarks.resident_runner_bench --python skills/shared/excel/.venv/bin/python
+    uv run python -m benchmarks.resident_runner_bench --python /path/to/python --runs 100 --json rr.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from app.services.skill_script_runner import ResidentScriptRunner, parse_python_invocation
+
+EXCEL_SCRIPT = Path(__file__).resolve().parents[1] / "skills" / "shared" / "excel" / "scripts"
+EXCEL_SCRIPT = EXCEL_SCRIPT / "excel.py"
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "total_s": round(sum(samples), 3),
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def run(*, python: str, runs: int, rows: int) -> dict[str, Any]:
+    work = Path(tempfile.mkdtemp(prefix="resident-bench-"))
+    try:
+        data = json.dumps([[f"r{r}c{c}" for c in range(8)] for r in range(rows)])
+        (work / "data.json").write_text(data, encoding="utf-8")
+        setup = (
+            f"{shlex.quote(python)} {shlex.quote(str(EXCEL_SCRIPT))} from-json data.json book.xlsx"
+        )
+        subprocess.run(setup, shell=True, cwd=work, check=True, capture_output=True)
+
+        command = f"{shlex.quote(python)} {shlex.quote(str(EXCEL_SCRIPT))} to-markdown book.xlsx"
+        env = dict(os.environ)
+
+        fresh = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            proc = subprocess.run(
+                command, shell=True, executable="/bin/bash", cwd=work, env=env, capture_output=True
+            )
+            fresh.append(time.perf_counter() - t0)
+            assert proc.returncode == 0, proc.stderr
+
+        inv = parse_python_invocation(command, cwd=str(work), env=env)
+        assert inv is not None
+        runner = ResidentScriptRunner()
+        resident = []
+        try:
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                result = runner.run(inv, env=env, timeout_seconds=60)
+                resident.append(time.perf_counter() - t0)
+                assert result.returncode == 0, result.stderr
+        finally:
+            runner.shutdown()
+
+        return {
+            "runs": runs,
+            "rows": rows,
+            "fresh_interpreter": _summary(fresh),
+            "resident": _summary(resident),
+            "resident_first_ms": round(resident[0] * 1000, 1),
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--python", default=sys.executable, help="interpreter with openpyxl")
+    parser.add_argument("--runs", type=int, default=100, help="sequential reads")
+    parser.add_argument("--rows", type=int, default=200, help="rows in the workbook")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(python=args.python, runs=args.runs, rows=args.rows)
+    print(f"{result['runs']} sequential reads of a {result['rows']}-row workbook")
+    print(f"{'variant':<20}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in ("fresh_interpreter", "resident"):
+        r = result[name]
+        print(f"{name:<20}{r['total_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+    print(f"resident first call (includes fork server start): {result['resident_first_ms']} ms")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
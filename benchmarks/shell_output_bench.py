@@ -0,0 +1,74 @@
+"""Benchmark: shell tool memory and returned text size vs command output size.
+
+Runs ``seq 1 N`` through ``app.tools.shell_env._safe_shell_run`` for growing
+N. Output streams into a spool file and only a bounded head + tail stays in
+memory, so peak Python heap and the text returned to the model should stay
+flat while the spooled file grows::
+
+    uv run python -m benchmarks.shell_output_bench
+    uv run python -m benchmarks.shell_output_bench --lines 100000 1000000 10000000 --json so.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from app.tools import shell_env
+
+
+def run(*, lines: list[int]) -> list[dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="shell-output-bench-") as work:
+        for n in lines:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            result = shell_env._safe_shell_run(
+                command=f"seq 1 {n}", work_dir=work, timeout_seconds=600, stream_output=False
+            )
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert result["status"] == "success", result
+            spooled = (result.get("output") or {}).get("stdout") or {}
+            results.append(
+                {
+                    "lines": n,
+                    "output_mb": round(spooled.get("chars", len(result["stdout"])) / 2**20, 1),
+                    "seconds": round(elapsed, 2),
+                    "peak_heap_mb": round(peak / 2**20, 2),
+                    "returned_chars": len(result["content"][0]["text"]),
+                }
+            )
+            if spooled.get("path"):
+                Path(spooled["path"]).unlink(missing_ok=True)
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--lines", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000], help="seq sizes"
+    )
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(lines=args.lines)
+    print(f"{'lines':>10}{'output MB':>11}{'seconds':>9}{'peak heap MB':>14}{'returned':>10}")
+    for r in results:
+        print(
+            f"{r['lines']:>10}{r['output_mb']:>11}{r['seconds']:>9}"
+            f"{r['peak_heap_mb']:>14}{r['returned_chars']:>10}"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
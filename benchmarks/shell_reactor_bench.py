@@ -0,0 +1,125 @@
+"""Benchmark: concurrent shell commands, thread-per-pipe runner vs shell reactor.
+
+Starts N commands at once (each prints a little output for a few seconds),
+first the way ``_safe_shell_run`` used to (two reader threads per command
+plus a ``proc.poll()``/``sleep(0.2)`` loop), then through
+:class:`app.services.shell_reactor.ShellReactor`. It reports wall time, CPU
+time of this process and peak thread count::
+
+    uv run python -m benchmarks.shell_reactor_bench
+    uv run python -m benchmarks.shell_reactor_bench --commands 50 --seconds 5 --json sr.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.shell_reactor import ShellReactor
+
+
+def _legacy_run(command: str, timeout_seconds: float) -> int:
+    proc = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        start_new_session=True,
+    )
+    chunks: list[str] = []
+
+    def _reader(stream) -> None:
+        for line in iter(stream.readline, ""):
+            chunks.append(line)
+
+    readers = [
+        threading.Thread(target=_reader, args=(s,), daemon=True) for s in (proc.stdout, proc.stderr)
+    ]
+    for t in readers:
+        t.start()
+    deadline = time.monotonic() + timeout_seconds
+    while proc.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.2)
+    for t in readers:
+        t.join(timeout=1)
+    return proc.returncode or 0
+
+
+def _reactor_run(reactor: ShellReactor, command: str, timeout_seconds: float) -> int:
+    chunks: list[bytes] = []
+    job = reactor.spawn(
+        command, on_output=lambda _w, data: chunks.append(data), timeout_seconds=timeout_seconds
+    )
+    job.wait()
+    return job.returncode or 0
+
+
+def _measure(run_one: Callable[[], int], commands: int) -> dict[str, Any]:
+    peak = threading.active_count()
+    stop = threading.Event()
+
+    def _sample() -> None:
+        nonlocal peak
+        while not stop.wait(0.05):
+            peak = max(peak, threading.active_count())
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    callers = [threading.Thread(target=run_one) for _ in range(commands)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join()
+    wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    stop.set()
+    sampler.join()
+    return {
+        "wall_s": round(wall, 2),
+        "cpu_s": round(cpu, 3),
+        # Minus the sampler, the main thread and the per-command caller threads.
+        "peak_extra_threads": peak - 2 - commands,
+    }
+
+
+def run(*, commands: int, seconds: int) -> dict[str, Any]:
+    command = f"for i in $(seq {seconds * 10}); do echo line $i; sleep 0.1; done"
+    timeout = seconds + 30.0
+    reactor = ShellReactor()
+    return {
+        "commands": commands,
+        "seconds": seconds,
+        "thread_per_pipe": _measure(lambda: _legacy_run(command, timeout), commands),
+        "reactor": _measure(lambda: _reactor_run(reactor, command, timeout), commands),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=50, help="concurrent commands")
+    parser.add_argument("--seconds", type=int, default=5, help="runtime of each command")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(commands=args.commands, seconds=args.seconds)
+    print(f"{result['commands']} concurrent commands, {result['seconds']}s each")
+    print(f"{'variant':<18}{'wall s':>9}{'cpu s':>9}{'extra threads':>15}")
+    for name in ("thread_per_pipe", "reactor"):
+        r = result[name]
+        print(f"{name:<18}{r['wall_s']:>9}{r['cpu_s']:>9}{r['peak_extra_threads']:>15}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+"""Benchmark: onboard the same dependency-bearing skill for many users.
+
+Runs the real ``PendingSkillService.onboard_pending`` pipeline (including
+venv creation and ``uv pip``/``pip`` installs, no mocks) for N users who all
+install the same skill. It compares private per-skill venvs
+(``skill_venv_store_enabled=False``) with the shared, content-addressed venv
+store::
+
+    uv run python -m benchmarks.skill_onboarding_bench
+    uv run python -m benchmarks.skill_onboarding_bench --users 20 --requirement "rich==13.7.1"
+    uv run python -m benchmarks.skill_onboarding_bench --mode store --json onboarding.json
+
+The first install of a requirement needs network access (or a warm uv/pip
+cache). Re-running with ``--keep-store DIR`` measures a warm, offline
+store.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from app.config import AgentConfig
+from app.services.pending_skill_service import PendingSkillService
+
+
+def _du(path: Path) -> int:
+    total = 0
+    for p in path.rglob("*"):
+        try:
+            if p.is_file() and not p.is_symlink():
+                total += p.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def run(
+    *, users: int, requirement: str, shared_store: bool, store_dir: Path | None
+) -> dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="skill-onboard-bench-"))
+    try:
+        config = AgentConfig(
+            telegram_bot_token="bench-token",
+            skills_base_dir=str(root / "skills"),
+            shared_skills_dir=str(root / "skills" / "shared"),
+            session_storage_dir=str(root / "sessions"),
+            working_folder_base_dir=str(root / "workspace"),
+            pending_skills_preflight_enabled=False,
+            pending_skills_generate_requirements=False,
+            skill_venv_store_enabled=shared_store,
+            skill_venv_store_dir=str(store_dir) if store_dir else None,
+        )
+        svc = PendingSkillService(config)
+
+        per_user: list[float] = []
+        failures = 0
+        started = time.perf_counter()
+        for i in range(users):
+            user = f"user{i:02d}"
+            pending = root / "skills" / user / "pending" / "bench-skill"
+            pending.mkdir(parents=True)
+            (pending / "SKILL.md").write_text(
+                "---\nname: bench-skill\ndescription: benchmark skill\n---\n", encoding="utf-8"
+            )
+            (pending / "requirements.txt").write_text(f"{requirement}\n", encoding="utf-8")
+            t0 = time.perf_counter()
+            result = svc.onboard_pending(user_id=user, scope="user", run_scripts=False)
+            per_user.append(time.perf_counter() - t0)
+            if result.get("onboarded") != 1:
+                failures += 1
+                if failures == 1:
+                    print(json.dumps(result, indent=2, default=str)[:3000])
+        total = time.perf_counter() - started
+
+        return {
+            "mode": "store" if shared_store else "private",
+            "users": users,
+            "failures": failures,
+            "total_seconds": round(total, 2),
+            "first_seconds": round(per_user[0], 2) if per_user else 0.0,
+            "rest_mean_seconds": round(sum(per_user[1:]) / max(1, len(per_user) - 1), 3),
+            "disk_mb": round(_du(root) / 1e6, 1),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requirement", default="six==1.16.0")
+    parser.add_argument("--mode", choices=("both", "store", "private"), default="both")
+    parser.add_argument(
+        "--keep-store", type=Path, default=None, help="reuse this store dir across runs"
+    )
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    modes = ("private", "store") if args.mode == "both" else (args.mode,)
+    results = [
+        run(
+            users=args.users,
+            requirement=args.requirement,
+            shared_store=(mode == "store"),
+            store_dir=args.keep_store if mode == "store" else None,
+        )
+        for mode in modes
+    ]
+
+    print(f"{'mode':<10}{'users':>6}{'fail':>6}{'total s':>10}{'first s':>10}{'rest avg s':>12}{'disk MB':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['users']:>6}{r['failures']:>6}{r['total_seconds']:>10}"
+            f"{r['first_seconds']:>10}{r['rest_mean_seconds']:>12}{r['disk_mb']:>10}"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+    return 1 if any(r["failures"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+"""Benchmark: skill template materialization per shell call, legacy vs cached.
+
+Builds a user skills dir with N skills. Each skill has a template plus a
+``.venv`` with many files, like installed skills have. It times the refresh
+that runs before every shell command: the legacy path (``rglob`` every skill
+for ``*_example``/``*.example``, then read, render and compare every
+template) against :class:`app.services.skill_templates.TemplateMaterializer`
+in steady state (manifest current, stat calls only)::
+
+    uv run python -m benchmarks.skill_templates_bench
+    uv run python -m benchmarks.skill_templates_bench --skills 30 --venv-files 2000 --json st.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from app.services.skill_templates import TemplateMaterializer, output_name, render
+
+
+def _legacy(user_dir: Path, out: Path, skills: list[str], block: dict[str, Any]) -> None:
+    for skill in skills:
+        replacements = {k.upper(): str(v) for k, v in block[skill].items()}
+        skill_dir = user_dir / skill
+        templates = [p for p in skill_dir.rglob("*_example") if p.is_file()]
+        templates += [p for p in skill_dir.rglob("*.example") if p.is_file()]
+        for tpl in templates:
+            dest = out / str(output_name(skill, tpl.name))
+            rendered = render(tpl.read_text(encoding="utf-8"), replacements)
+            if not dest.exists() or dest.read_text(encoding="utf-8") != rendered:
+                dest.write_text(rendered, encoding="utf-8")
+
+
+def _time(fn, runs: int) -> dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"p50_ms": round(statistics.median(samples) * 1000, 3)}
+
+
+def run(*, skills: int, venv_files: int, runs: int) -> dict[str, Any]:
+    root = Path(tempfile.mkdtemp(prefix="skill-templates-bench-"))
+    try:
+        user_dir, out = root / "skills" / "u1", root / "workspace" / "u1" / "tmp"
+        out.mkdir(parents=True)
+        names = [f"skill{i}" for i in range(skills)]
+        block = {name: {"TOKEN": f"secret-{name}"} for name in names}
+        old = time.time() - 60
+        for name in names:
+            site = user_dir / name / ".venv" / "lib" / "site-packages"
+            site.mkdir(parents=True)
+            for j in range(venv_files):
+                (site / f"mod{j}.py").write_text("x = 1\n")
+            (user_dir / name / "config.toml_example").write_text('token = "[TOKEN]"\n')
+            for path in (user_dir / name).rglob("*"):
+                os.utime(path, (old, old))
+            os.utime(user_dir / name, (old, old))
+
+        materializer = TemplateMaterializer(user_dir, out)
+        t0 = time.perf_counter()
+        materializer.materialize(names, block, user_id="u1")
+        cold_ms = round((time.perf_counter() - t0) * 1000, 3)
+        return {
+            "skills": skills,
+            "venv_files": venv_files,
+            "legacy": _time(lambda: _legacy(user_dir, out, names, block), runs),
+            "cached_cold_ms": cold_ms,
+            "cached_steady": _time(
+                lambda: materializer.materialize(names, block, user_id="u1"), runs
+            ),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skills", type=int, default=20, help="skills in the user dir")
+    parser.add_argument("--venv-files", type=int, default=1000, help="files per skill .venv")
+    parser.add_argument("--runs", type=int, default=20, help="refreshes timed per variant")
+    parser.add_argument("--json", dest="json_path", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(skills=args.skills, venv_files=args.venv_files, runs=args.runs)
+    print(f"{result['skills']} skills, {result['venv_files']} .venv files each")
+    print(f"legacy refresh p50:        {result['legacy']['p50_ms']} ms")
+    print(f"cached first refresh:      {result['cached_cold_ms']} ms")
+    print(f"cached steady-state p50:   {result['cached_steady']['p50_ms']} ms")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,6 +16,8 @@ if TYPE_CHECKING:
 
     from strands_evals import Case, Experiment, Evaluator
 
+    from tests.evaluation.eval_runner import EvalRunReport, ResponseCassette
+
 logger = logging.getLogger(__name__)
 
 
@@ -177,6 +179,62 @@ class AgentEvaluator:
 
         return reports
 
+    def evaluate_parallel(
+        self,
+        agent_factory: Callable[[], Any],
+        cases: list[Case],
+        evaluators: list[str] | list[Evaluator],
+        *,
+        cassette: ResponseCassette | None = None,
+        max_workers: int = 4,
+        test_pass_score: float = 0.7,
+        region: str | None = None,
+    ) -> tuple[list[Any], EvalRunReport]:
+        """Evaluate cases concurrently, replaying recorded model responses.
+
+        The agent calls run on a bounded pool via
+        :class:`~tests.evaluation.eval_runner.ParallelEvalRunner` (with the
+        cassette, if given), then the evaluators score the collected
+        outputs. Traces are not attributed per case when running
+        concurrently, so ``trajectory`` is empty.
+
+        Args:
+            agent_factory: Zero-argument callable returning a fresh agent.
+            cases: List of test cases (strands_evals.Case).
+            evaluators: List of evaluator names or Evaluator instances.
+            cassette: Response store for record/replay; None always calls the model.
+            max_workers: Upper bound on concurrently running cases.
+            test_pass_score: Default minimum score for evaluators created from names.
+            region: AWS region for evaluators.
+
+        Returns:
+            Tuple of (evaluation reports, run report with per-case prompt tokens).
+        """
+        from strands_evals import Experiment
+
+        from tests.evaluation.eval_runner import ParallelEvalRunner
+
+        run_report = ParallelEvalRunner(
+            agent_factory, cassette=cassette, max_workers=max_workers
+        ).run(cases)
+        outputs = {run.input: run.output for run in run_report.runs}
+
+        evaluator_instances: list[Evaluator] = [
+            self.create_evaluator(e, test_pass_score=test_pass_score, region=region)
+            if isinstance(e, str)
+            else e
+            for e in evaluators
+        ]
+
+        def task_fn(case: Case) -> dict[str, Any]:
+            return {"output": outputs.get(str(case.input), ""), "trajectory": []}
+
+        experiment = Experiment(cases=cases, evaluators=evaluator_instances)
+        reports = experiment.run_evaluations(task_fn)
+        for report in reports:
+            logger.info(EvaluationMetrics.format_report(report).replace("\n", ";"))
+        return reports, run_report
+
     def evaluate_single(
         self,
         agent: Any,
@@ -0,0 +1,302 @@
+"""Parallel, cached runner for agent evaluation cases.
+
+``AgentEvaluator`` calls the agent once per case, serially, against a live
+model. This module runs the cases concurrently on a bounded thread pool and
+records each model response in a content-addressed *cassette*, keyed by the
+model id, system prompt and messages sent. A later run with the same prompt
+replays from the cassette without touching the model. When the prompt
+changes (e.g. a ``SystemPromptBuilder`` edit), the key changes and the case
+is recorded again.
+
+Every case reports its prompt token count so prompt-size regressions show up
+offline. The count comes from measured model usage when the response was
+recorded live, and from a character-based estimate otherwise.
+
+Example:
+    cassette = ResponseCassette("tests/evaluation/cassettes")
+    runner = ParallelEvalRunner(make_agent, cassette=cassette, max_workers=8)
+    report = runner.run(QUICK_EVAL_CASES)
+    print(report.format())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.services.usage_ledger import extract_usage, model_id_of
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("auto", "replay", "record")
+
+# Rough chars-per-token ratio for English prompts; only used when no measured
+# usage is available for a case.
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` (about 4 characters per token)."""
+    return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def _message_text(messages: Sequence[Any]) -> str:
+    return json.dumps(list(messages), sort_keys=True, default=str)
+
+
+class CassetteMiss(LookupError):
+    """Raised in ``replay`` mode when a request has no recorded response."""
+
+
+class ResponseCassette:
+    """Content-addressed store of recorded model responses.
+
+    Entries are JSON files at ``<directory>/<key[:2]>/<key>.json``. The key
+    is the SHA-256 of the model id, system prompt and messages, so an entry
+    is only replayed for exactly the request it was recorded from. Writes go
+    to a temp file and are renamed into place, so concurrent workers never
+    see a partial entry.
+
+    Modes:
+        ``auto``: replay when recorded, otherwise call the model and record.
+        ``replay``: never call the model; a miss raises :class:`CassetteMiss`.
+        ``record``: always call the model and overwrite the entry.
+    """
+
+    def __init__(self, directory: str | Path, *, mode: str = "auto"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"mode must be one of {CASSETTE_MODES}, got {mode!r}")
+        self.directory = Path(directory)
+        self.mode = mode
+
+    @staticmethod
+    def key(system_prompt: str, messages: Sequence[Any], model_id: str | None = None) -> str:
+        """Content hash identifying one model request."""
+        payload = json.dumps(
+            {"model_id": model_id, "system_prompt": system_prompt, "messages": list(messages)},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the recorded entry for ``key``, or None."""
+        if self.mode == "record":
+            return None
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cassette entry %s: %s", key, e)
+            return None
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        """Atomically store ``entry`` under ``key``."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, indent=2, sort_keys=True)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+@dataclass
+class CaseRun:
+    """Outcome of running one case."""
+
+    input: str
+    output: str
+    key: str
+    prompt_tokens: int
+    system_prompt_tokens: int
+    output_tokens: int = 0
+    latency_ms: float = 0.0
+    cached: bool = False
+    measured: bool = False
+    error: str | None = None
+
+
+@dataclass
+class EvalRunReport:
+    """All case runs from one :meth:`ParallelEvalRunner.run` call."""
+
+    runs: list[CaseRun] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for r in self.runs if r.cached)
+
+    @property
+    def errors(self) -> list[CaseRun]:
+        return [r for r in self.runs if r.error]
+
+    @property
+    def max_prompt_tokens(self) -> int:
+        return max((r.prompt_tokens for r in self.runs), default=0)
+
+    def over_budget(self, max_prompt_tokens: int) -> list[CaseRun]:
+        """Cases whose prompt exceeds ``max_prompt_tokens``."""
+        return [r for r in self.runs if r.prompt_tokens > max_prompt_tokens]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"wall_seconds": self.wall_seconds, "runs": [asdict(r) for r in self.runs]}
+
+    def format(self) -> str:
+        """Render a per-case table plus totals."""
+        lines = [f"{'case':<48}{'prompt tok':>12}{'out tok':>9}{'ms':>9}  src"]
+        for r in self.runs:
+            label = r.input if len(r.input) <= 46 else r.input[:43] + "..."
+            source = "ERR" if r.error else ("cache" if r.cached else "live")
+            estimated = "" if r.measured else "~"
+            lines.append(
+                f"{label:<48}{estimated + str(r.prompt_tokens):>12}{r.output_tokens:>9}"
+                f"{r.latency_ms:>9.0f}  {source}"
+            )
+        lines.append(
+            f"{len(self.runs)} cases in {self.wall_seconds:.2f}s, "
+            f"{self.cache_hits} replayed, {len(self.errors)} errors, "
+            f"max prompt {self.max_prompt_tokens} tokens"
+        )
+        return "\n".join(lines)
+
+
+class ParallelEvalRunner:
+    """Runs evaluation cases concurrently with cassette record/replay.
+
+    Strands agents keep conversation state and are not safe to call from
+    several threads, so ``agent_factory`` is called once per case to build
+    a fresh agent. On a cache hit the agent is built but never invoked;
+    only its ``system_prompt``, ``messages`` and model id are read to
+    compute the cassette key.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], Any],
+        *,
+        cassette: ResponseCassette | None = None,
+        max_workers: int = 4,
+    ):
+        """Initialize the runner.
+
+        Args:
+            agent_factory: Zero-argument callable returning a fresh agent.
+            cassette: Response store; None always calls the model.
+            max_workers: Upper bound on concurrently running cases.
+        """
+        self._agent_factory = agent_factory
+        self._cassette = cassette
+        self._max_workers = max(1, max_workers)
+
+    def run(self, cases: Sequence[Any]) -> EvalRunReport:
+        """Run ``cases`` (anything with an ``input`` attribute) concurrently.
+
+        Per-case failures (including :class:`CassetteMiss`) are recorded on
+        the :class:`CaseRun` instead of aborting the whole run.
+
+        Returns:
+            Report with runs in the same order as ``cases``.
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=min(self._max_workers, max(1, len(cases))),
+            thread_name_prefix="eval-case",
+        ) as pool:
+            runs = list(pool.map(self.run_case, cases))
+        report = EvalRunReport(runs=runs, wall_seconds=time.perf_counter() - started)
+        logger.info(
+            "Ran %d eval cases in %.2fs (%d replayed, %d errors)",
+            len(runs),
+            report.wall_seconds,
+            report.cache_hits,
+            len(report.errors),
+        )
+        return report
+
+    def run_case(self, case: Any) -> CaseRun:
+        """Run a single case, replaying from the cassette when possible."""
+        input_text = str(case.input)
+        agent = self._agent_factory()
+        system_prompt = str(getattr(agent, "system_prompt", None) or "")
+        messages = [
+            *list(getattr(agent, "messages", None) or []),
+            {"role": "user", "content": [{"text": input_text}]},
+        ]
+        key = ResponseCassette.key(system_prompt, messages, model_id_of(agent))
+        system_tokens = estimate_tokens(system_prompt)
+        estimated_prompt = system_tokens + estimate_tokens(_message_text(messages))
+
+        entry = self._cassette.get(key) if self._cassette is not None else None
+        if entry is not None:
+            return CaseRun(
+                input=input_text,
+                output=entry.get("output", ""),
+                key=key,
+                prompt_tokens=int(entry.get("input_tokens") or estimated_prompt),
+                system_prompt_tokens=system_tokens,
+                output_tokens=int(entry.get("output_tokens") or 0),
+                latency_ms=float(entry.get("latency_ms") or 0.0),
+                cached=True,
+                measured=bool(entry.get("input_tokens")),
+            )
+
+        run = CaseRun(
+            input=input_text,
+            output="",
+            key=key,
+            prompt_tokens=estimated_prompt,
+            system_prompt_tokens=system_tokens,
+        )
+        if self._cassette is not None and self._cassette.mode == "replay":
+            run.error = f"{CassetteMiss.__name__}: no recorded response for {key[:12]}"
+            return run
+
+        started = time.perf_counter()
+        try:
+            result = agent(input_text)
+        except Exception as e:
+            logger.warning("Eval case %r failed: %s", input_text[:60], e)
+            run.error = f"{type(e).__name__}: {e}"
+            return run
+        run.latency_ms = (time.perf_counter() - started) * 1000
+        run.output = str(result)
+
+        usage = extract_usage(result)
+        if usage and usage["input_tokens"]:
+            # Cached prompt tokens are still part of the prompt size.
+            run.prompt_tokens = (
+                usage["input_tokens"] + usage["cache_read_tokens"] + usage["cache_write_tokens"]
+            )
+            run.output_tokens = usage["output_tokens"]
+            run.measured = True
+
+        if self._cassette is not None:
+            self._cassette.put(
+                key,
+                {
+                    "input": input_text,
+                    "output": run.output,
+                    "input_tokens": run.prompt_tokens if run.measured else None,
+                    "output_tokens": run.output_tokens,
+                    "latency_ms": round(run.latency_ms, 1),
+                },
+            )
+        return run
@@ -11,6 +11,9 @@ Run with:
 
 Run quick evaluation only:
     pytest tests/evaluation/test_agent_evaluations.py::test_prompt_helpfulness_quick -v
+
+For concurrent runs with recorded model responses and per-case prompt token
+counts, see ``AgentEvaluator.evaluate_parallel`` and ``eval_runner.py``.
 """
 
 from __future__ import annotations
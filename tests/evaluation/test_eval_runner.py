@@ -0,0 +1,135 @@
+"""Offline tests for the parallel, cached evaluation runner.
+
+These run without AWS or a model: agents are stubs that expose the same
+``system_prompt``/``messages``/``model`` attributes as a Strands agent.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.agent.prompt_builder import SystemPromptBuilder
+from app.services.agent.skills import SkillRepository
+from tests.evaluation.eval_runner import (
+    ParallelEvalRunner,
+    ResponseCassette,
+    estimate_tokens,
+)
+from tests.evaluation.test_cases import QUICK_EVAL_CASES
+
+# Default system prompt (no memory, personality or skills) in estimated
+# tokens. Raise deliberately when a prompt change is meant to grow it.
+BASE_PROMPT_TOKEN_BUDGET = 4000
+
+
+class StubResult(str):
+    """``str(result)`` is the reply; ``metrics`` mimics ``AgentResult.metrics``."""
+
+    metrics = SimpleNamespace(
+        accumulated_usage={"inputTokens": 1200, "outputTokens": 30, "totalTokens": 1230},
+        accumulated_metrics={"latencyMs": 10},
+    )
+
+
+class StubAgent:
+    """Minimal stand-in for a Strands agent that counts model calls."""
+
+    calls = 0
+    lock = threading.Lock()
+
+    def __init__(self, system_prompt: str, *, delay: float = 0.0):
+        self.system_prompt = system_prompt
+        self.messages: list[dict] = []
+        self.model = SimpleNamespace(config={"model_id": "stub-model"})
+        self._delay = delay
+
+    def __call__(self, prompt: str) -> StubResult:
+        with StubAgent.lock:
+            StubAgent.calls += 1
+        time.sleep(self._delay)
+        return StubResult(f"reply to {prompt}")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    StubAgent.calls = 0
+
+
+def test_runs_cases_concurrently_and_reports_measured_tokens():
+    runner = ParallelEvalRunner(lambda: StubAgent("sys", delay=0.2), max_workers=4)
+
+    report = runner.run(QUICK_EVAL_CASES[:4])
+
+    assert StubAgent.calls == 4
+    assert report.wall_seconds < 0.6  # 4 x 0.2s serially
+    assert [r.input for r in report.runs] == [c.input for c in QUICK_EVAL_CASES[:4]]
+    assert all(r.measured and r.prompt_tokens == 1200 for r in report.runs)
+    assert report.runs[0].output == f"reply to {QUICK_EVAL_CASES[0].input}"
+    assert "4 cases" in report.format()
+
+
+def test_cassette_replays_until_system_prompt_changes(tmp_path):
+    cases = QUICK_EVAL_CASES[:2]
+    cassette = ResponseCassette(tmp_path)
+
+    first = ParallelEvalRunner(lambda: StubAgent("v1"), cassette=cassette).run(cases)
+    assert StubAgent.calls == 2 and first.cache_hits == 0
+
+    again = ParallelEvalRunner(lambda: StubAgent("v1"), cassette=cassette).run(cases)
+    assert StubAgent.calls == 2 and again.cache_hits == 2
+    assert [r.output for r in again.runs] == [r.output for r in first.runs]
+    assert again.runs[0].prompt_tokens == 1200
+
+    changed = ParallelEvalRunner(lambda: StubAgent("v2"), cassette=cassette).run(cases)
+    assert StubAgent.calls == 4 and changed.cache_hits == 0
+
+
+def test_replay_mode_reports_misses_without_calling_model(tmp_path):
+    runner = ParallelEvalRunner(
+        lambda: StubAgent("x" * 400), cassette=ResponseCassette(tmp_path, mode="replay")
+    )
+
+    report = runner.run(QUICK_EVAL_CASES[:1])
+
+    assert StubAgent.calls == 0
+    assert report.runs[0].error.startswith("CassetteMiss")
+    assert report.runs[0].system_prompt_tokens == 100
+    assert not report.runs[0].measured
+
+
+def test_default_system_prompt_stays_within_token_budget(tmp_path):
+    config = MagicMock()
+    config.timezone = "UTC"
+    config.memory_enabled = False
+    config.personality_enabled = False
+    config.obsidian_vault_root = None
+    config.personality_max_chars = 20000
+    config.agent_commands = None
+    personality_service = MagicMock()
+    personality_service.is_enabled.return_value = False
+    builder = SystemPromptBuilder(
+        config=config,
+        skill_repo=MagicMock(spec=SkillRepository),
+        personality_service=personality_service,
+        working_dir_resolver=lambda user_id: Path(f"/work/{user_id}"),
+        obsidian_stm_cache={},
+        user_agent_names={},
+        has_cron=True,
+    )
+
+    runner = ParallelEvalRunner(
+        lambda: StubAgent(builder.build("eval-user")),
+        cassette=ResponseCassette(tmp_path, mode="replay"),
+        max_workers=8,
+    )
+    report = runner.run(QUICK_EVAL_CASES)
+
+    assert StubAgent.calls == 0
+    assert estimate_tokens(builder.build("eval-user")) == report.runs[0].system_prompt_tokens
+    assert not report.over_budget(BASE_PROMPT_TOKEN_BUDGET), report.format()
@@ -0,0 +1,39 @@
+"""End-to-end smoke test for the offline load-test harness in benchmarks/."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_pipeline_completes_with_fakes(tmp_path):
+    # Subprocess: the harness drives the real Application (event loop, agent
+    # threads, module-level tool contexts), which must not share a process
+    # with other tests.
+    out = tmp_path / "report.json"
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--users=2",
+            "--messages=1",
+            "--model-latency=0",
+            "--timeout=60",
+            f"--json={out}",
+        ],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    report = json.loads(out.read_text())
+    assert report["completed"] == report["expected"] == 2
+    assert report["stages"]["model_invoke"]["count"] == 2
+    assert {"sqs_pickup", "agent_create", "telegram_send"} <= set(report["stages"])
@@ -0,0 +1,97 @@
+import logging
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.observability import async_logging
+from app.observability.async_logging import (
+    LOG_RECORDS_DROPPED_TOTAL,
+    _BoundedQueueHandler,
+    setup_async_logging,
+    stop_async_logging,
+)
+from app.observability.trace_logging import trace_event
+
+
+class _ThreadRecordingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+
+@pytest.fixture
+def isolated_logger():
+    logger = logging.getLogger("tests.async_logging")
+    handler = _ThreadRecordingHandler()
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger, handler
+    stop_async_logging()
+    logger.removeHandler(handler)
+    logger.propagate = True
+
+
+def _config(**overrides):
+    config = MagicMock()
+    config.log_async_enabled = True
+    config.log_queue_max_records = 100
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_disabled_by_default():
+    assert setup_async_logging(MagicMock()) is None
+
+
+def test_handlers_run_on_listener_thread_and_are_restored(isolated_logger):
+    logger, handler = isolated_logger
+
+    assert setup_async_logging(_config()) is not None
+    assert not any(h is handler for h in logger.handlers)
+
+    logger.info("hello %s", "world")
+    stop_async_logging()
+
+    assert handler.messages == ["hello world"]
+    assert threading.current_thread().name not in handler.threads
+    assert handler in logger.handlers
+
+
+def test_trace_event_json_is_serialized_lazily(isolated_logger):
+    _, handler = isolated_logger
+    trace_logger = logging.getLogger("mordecai.trace")
+    trace_logger.addHandler(handler)
+    previous_level = trace_logger.level
+    trace_logger.setLevel(logging.INFO)
+    try:
+        setup_async_logging(_config())
+        trace_event("unit.test", value="ok")
+        stop_async_logging()
+    finally:
+        trace_logger.removeHandler(handler)
+        trace_logger.setLevel(previous_level)
+
+    assert any('"event":"unit.test"' in m and '"value":"ok"' in m for m in handler.messages)
+
+
+def test_full_queue_drops_and_counts():
+    import queue
+
+    handler = _BoundedQueueHandler(queue.Queue(maxsize=1), [])
+    record = logging.makeLogRecord({"msg": "x"})
+    before = LOG_RECORDS_DROPPED_TOTAL.value()
+
+    handler.handle(record)
+    handler.handle(record)
+
+    assert handler.dropped == 1
+    assert LOG_RECORDS_DROPPED_TOTAL.value() == before + 1
+    assert async_logging._listener is None
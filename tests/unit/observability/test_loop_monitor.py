@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.observability.loop_monitor import (
+    executor_stats,
+    health_payload,
+    register_executor,
+    start_loop_monitor,
+    stop_loop_monitor,
+)
+from app.observability.metrics import render_metrics
+
+
+def _block_the_loop_for(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_is_detected_with_stack():
+    monitor = start_loop_monitor(interval=0.02, warn_seconds=0.1)
+    try:
+        await asyncio.sleep(0.05)
+        _block_the_loop_for(0.4)
+        await asyncio.sleep(0.05)
+
+        snap = monitor.snapshot()
+        assert snap["max_lag_s"] >= 0.2
+        assert snap["blocked_episodes"] >= 1
+        assert any("_block_the_loop_for" in line for line in snap["last_blocked"]["stack"])
+        assert health_payload()["event_loop"]["blocked_episodes"] >= 1
+        assert "mordecai_event_loop_lag_seconds_bucket" in render_metrics()
+    finally:
+        await stop_loop_monitor()
+
+    assert health_payload()["event_loop"] is None
+
+
+def test_executor_stats_report_busy_and_queued():
+    executor = ThreadPoolExecutor(max_workers=1)
+    register_executor("unit_test_pool", executor)
+    release = threading.Event()
+    try:
+        executor.submit(release.wait)
+        executor.submit(release.wait)
+        time.sleep(0.05)
+
+        stats = executor_stats(executor)
+        assert stats == {"max": 1, "threads": 1, "busy": 1, "queued": 1}
+        assert health_payload()["executors"]["unit_test_pool"]["queued"] == 1
+        assert 'mordecai_executor_threads{executor="unit_test_pool",state="busy"} 1' in render_metrics()
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
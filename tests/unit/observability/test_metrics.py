@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from app.observability.metrics import (
+    MetricsRegistry,
+    is_rate_limited,
+    render_metrics,
+    stage_timer,
+    timed_stage,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("t_seconds", "Test.", ["stage"], buckets=[0.1, 1.0])
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5.0, stage="a")
+
+    text = registry.render()
+
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+    assert 't_seconds_sum{stage="a"} 5.55' in text
+
+
+def test_labels_are_validated_and_escaped():
+    registry = MetricsRegistry()
+    counter = registry.counter("t_total", "Test.", ["method"])
+    counter.inc(method='say "hi"\n')
+
+    assert 't_total{method="say \\"hi\\"\\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+
+
+def test_gauge_function_evaluated_at_scrape():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("t_depth", "Test.", ["state"])
+    depth = {"inflight": 1}
+    gauge.set_function(lambda: {("inflight",): depth["inflight"]})
+
+    depth["inflight"] = 4
+
+    assert 't_depth{state="inflight"} 4' in registry.render()
+
+
+def test_factories_are_idempotent_by_name():
+    registry = MetricsRegistry()
+    assert registry.counter("t_x", "Test.") is registry.counter("t_x", "Test.")
+    with pytest.raises(ValueError):
+        registry.gauge("t_x", "Test.")
+
+
+def test_stage_timer_and_timed_stage_record_into_global_registry():
+    with stage_timer("unit_test_stage"):
+        time.sleep(0.001)
+
+    wrapped = timed_stage("unit_test_wrapped", lambda x: x * 2)
+    assert wrapped(21) == 42
+
+    text = render_metrics()
+    assert 'mordecai_stage_duration_seconds_count{stage="unit_test_stage"}' in text
+    assert 'mordecai_stage_duration_seconds_count{stage="unit_test_wrapped"} ' in text
+
+
+@pytest.mark.asyncio
+async def test_stage_timer_measures_awaited_work():
+    registry = MetricsRegistry()
+    hist = registry.histogram("t_async", "Test.", ["stage"])
+
+    with hist.time(stage="x"):
+        await asyncio.sleep(0.02)
+
+    assert hist.count(stage="x") == 1
+    assert "t_async_bucket" in registry.render()
+
+
+def test_rate_limit_detection():
+    class RetryAfter(Exception):
+        retry_after = 3
+
+    class HttpError(Exception):
+        status_code = 429
+
+    assert is_rate_limited(RetryAfter())
+    assert is_rate_limited(HttpError())
+    assert not is_rate_limited(RuntimeError("boom"))
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from app.observability.profiler import (
+    ProfilerBusyError,
+    SamplingProfiler,
+    begin_job_profile,
+    end_job_profile,
+    get_job_profile,
+    profile_for,
+    request_job_profile,
+)
+
+
+def _spin_until(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_profile_captures_busy_thread_in_both_formats():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin_until, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        profile = profile_for(0.3, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profile.sample_count > 0
+    collapsed = profile.collapsed()
+    assert any(
+        line.startswith("busy-worker;") and "_spin_until" in line for line in collapsed.splitlines()
+    )
+
+    doc = profile.speedscope()
+    names = {p["name"] for p in doc["profiles"]}
+    assert "busy-worker" in names
+    assert any(f["name"] == "_spin_until" for f in doc["shared"]["frames"])
+    assert "_spin_until" in profile.summary()
+
+
+def test_only_one_profile_at_a_time():
+    profiler = SamplingProfiler().start()
+    try:
+        with pytest.raises(ProfilerBusyError):
+            SamplingProfiler().start()
+    finally:
+        profiler.stop()
+
+
+def test_job_profile_is_consumed_once_and_stored_by_trace_id():
+    assert begin_job_profile("alice") is None
+
+    request_job_profile("alice")
+    profiler = begin_job_profile("alice")
+    assert profiler is not None
+    time.sleep(0.05)
+    end_job_profile(profiler, trace_id="trace-123")
+
+    assert begin_job_profile("alice") is None
+    assert get_job_profile("trace-123") is not None
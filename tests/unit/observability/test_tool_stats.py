@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from app.observability.metrics import render_metrics
+from app.observability.tool_stats import (
+    OUTCOME_ERROR,
+    OUTCOME_TIMEOUT,
+    TOOL_STATS,
+    ToolStatsRegistry,
+    format_slow_tools_report,
+)
+from app.services.agent.tool_instrumentation import ToolInstrumentationHook
+
+
+def test_registry_percentiles_and_counters():
+    stats = ToolStatsRegistry(window=100)
+    for i in range(1, 101):
+        stats.record("shell", seconds=i / 100, skill="excel", bytes_in=10, bytes_out=5)
+    stats.record("shell", seconds=0.2, skill="excel", outcome=OUTCOME_ERROR)
+    stats.record("file_read", seconds=0.001)
+
+    slowest = stats.slowest(5)
+
+    assert [r.tool for r in slowest] == ["shell", "file_read"]
+    row = slowest[0]
+    assert row.calls == 101 and row.errors == 1
+    assert row.bytes_in == 1000 and row.bytes_out == 500
+    assert 0.9 <= row.p95 <= 1.0
+    assert row.label == "excel (shell)"
+
+
+def test_registry_caps_distinct_keys():
+    stats = ToolStatsRegistry(max_keys=1)
+    stats.record("a", seconds=1)
+    stats.record("b", seconds=1)
+    assert [r.tool for r in stats.snapshot()] == ["a"]
+
+
+def _events(hook, *, name, tool_input, result):
+    tool_use = {"toolUseId": "t1", "name": name, "input": tool_input}
+    hook._before(SimpleNamespace(tool_use=tool_use))
+    hook._after(SimpleNamespace(tool_use=tool_use, result=result, exception=None))
+
+
+def test_hook_attributes_skill_and_detects_timeout(tmp_path):
+    TOOL_STATS.reset()
+    hook = ToolInstrumentationHook([tmp_path])
+
+    _events(
+        hook,
+        name="shell",
+        tool_input={"command": f"python {tmp_path}/nano-pdf/run.py in.pdf"},
+        result={"status": "error", "content": [{"text": "Command timed out after 5s."}]},
+    )
+    _events(
+        hook,
+        name="file_read",
+        tool_input={"path": "/etc/hosts"},
+        result={"status": "success", "content": [{"text": "127.0.0.1 localhost"}]},
+    )
+
+    rows = {(r.tool, r.skill): r for r in TOOL_STATS.snapshot()}
+    assert rows[("shell", "nano-pdf")].timeouts == 1
+    assert rows[("file_read", "")].bytes_out == len("127.0.0.1 localhost")
+    assert 'mordecai_tool_calls_total{tool="shell",skill="nano-pdf",outcome="timeout"}' in render_metrics()
+    assert OUTCOME_TIMEOUT == "timeout"
+    assert "nano-pdf (shell)" in format_slow_tools_report()
+    TOOL_STATS.reset()
+
+
+def test_report_when_empty():
+    TOOL_STATS.reset()
+    assert "No tool calls" in format_slow_tools_report()
@@ -0,0 +1,42 @@
+"""Unit tests for the admin diagnostics router."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers.admin_router import create_admin_router
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(create_admin_router(admin_token="s3cret"))
+    return TestClient(app)
+
+
+AUTH = {"Authorization": "Bearer s3cret"}
+
+
+def test_requires_admin_token(client):
+    assert client.get("/admin/profile?seconds=0.1").status_code == 403
+    assert (
+        client.get("/admin/profile?seconds=0.1", headers={"Authorization": "Bearer nope"}).status_code
+        == 403
+    )
+
+
+def test_profile_returns_speedscope_and_collapsed(client):
+    response = client.get("/admin/profile?seconds=0.2&interval_ms=5", headers=AUTH)
+    assert response.status_code == 200
+    assert response.json()["$schema"].startswith("https://www.speedscope.app/")
+    assert "speedscope.json" in response.headers["content-disposition"]
+
+    response = client.get("/admin/profile?seconds=0.1&format=collapsed", headers=AUTH)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+def test_job_profile_flow(client):
+    response = client.post("/admin/profile/next/bob", headers=AUTH)
+    assert response.json()["status"] == "armed"
+    assert client.get("/admin/profile/unknown-trace", headers=AUTH).status_code == 404
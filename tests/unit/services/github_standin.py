@@ -0,0 +1,119 @@
+"""Local HTTP stand-in for the GitHub endpoints used by skill downloads.
+
+Serves ``commits/{ref}`` (with ETag / ``If-None-Match``), recursive
+``git/trees/{sha}`` and raw file contents for one in-memory repository, and
+records requests and client connections so tests can assert on API usage
+and connection reuse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from app.services.github_downloader import git_blob_sha
+
+
+class GitHubStandIn:
+    """In-memory repository ``owner/repo`` with one branch."""
+
+    def __init__(self, files: dict[str, bytes], *, owner: str = "owner", repo: str = "repo"):
+        self.owner = owner
+        self.repo = repo
+        self.requests: list[tuple[str, int]] = []
+        self.connections: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self.set_files(files)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def set_files(self, files: dict[str, bytes]) -> None:
+        """Replace the branch contents (creates a new commit)."""
+        self.files = dict(files)
+        h = hashlib.sha1()
+        for path in sorted(files):
+            h.update(path.encode() + b"\0" + files[path])
+        self.commit_sha = h.hexdigest()
+        self.tree_sha = hashlib.sha1(b"tree" + self.commit_sha.encode()).hexdigest()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, prefix: str, status: int | None = None) -> int:
+        with self._lock:
+            return sum(
+                1
+                for path, code in self.requests
+                if path.startswith(prefix) and (status is None or code == status)
+            )
+
+    def __enter__(self) -> GitHubStandIn:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _tree(self) -> list[dict]:
+        entries: dict[str, dict] = {}
+        for path, data in self.files.items():
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                d = "/".join(parts[:i])
+                entries[d] = {"path": d, "mode": "040000", "type": "tree", "sha": "0" * 40}
+            entries[path] = {
+                "path": path,
+                "mode": "100644",
+                "type": "blob",
+                "sha": git_blob_sha(data),
+                "size": len(data),
+            }
+        return sorted(entries.values(), key=lambda e: e["path"])
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+                with standin._lock:
+                    standin.requests.append((urlsplit(self.path).path, status))
+                    standin.connections.add(self.client_address)
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                path = unquote(urlsplit(self.path).path)
+                api = f"/repos/{standin.owner}/{standin.repo}"
+                if path.startswith(f"{api}/commits/"):
+                    etag = f'"{standin.commit_sha}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        return self._send(304, headers={"ETag": etag})
+                    body = {
+                        "sha": standin.commit_sha,
+                        "commit": {"tree": {"sha": standin.tree_sha}},
+                    }
+                    return self._send(200, json.dumps(body).encode(), {"ETag": etag})
+                if path == f"{api}/git/trees/{standin.tree_sha}":
+                    body = {"sha": standin.tree_sha, "tree": standin._tree(), "truncated": False}
+                    return self._send(200, json.dumps(body).encode())
+                raw = f"/{standin.owner}/{standin.repo}/{standin.commit_sha}/"
+                if path.startswith(raw) and path[len(raw) :] in standin.files:
+                    return self._send(200, standin.files[path[len(raw) :]])
+                return self._send(404, b"not found")
+
+        return Handler
@@ -0,0 +1,89 @@
+"""Unit tests for applying the usage budget downgrade at agent creation."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import AgentConfig
+from app.enums import ModelProvider
+from app.models.agent import AttachmentInfo
+from app.models.domain import ModelUsage
+from app.services.agent.agent_creation import AgentCreator
+from app.services.usage_ledger import (
+    USAGE_BUDGET_DOWNGRADES_TOTAL,
+    UsageLedger,
+    get_usage_ledger,
+    set_usage_ledger,
+)
+
+
+@pytest.fixture
+def over_budget_user():
+    previous = get_usage_ledger()
+    ledger = UsageLedger(daily_budget=100, fallback_model_id="cheap-model")
+    ledger.record(ModelUsage(user_id="alice", stage="message", input_tokens=150))
+    set_usage_ledger(ledger)
+    yield "alice"
+    set_usage_ledger(previous)
+
+
+def _creator(tmp_path, model_factory) -> AgentCreator:
+    config = AgentConfig(
+        model_provider=ModelProvider.BEDROCK,
+        bedrock_model_id="main-model",
+        vision_model_id="vision-model",
+        telegram_bot_token="test-token",
+        session_storage_dir=str(tmp_path),
+        skills_base_dir=str(tmp_path),
+        working_folder_base_dir=str(tmp_path),
+        memory_enabled=False,
+        personality_enabled=False,
+    )
+    prompt_builder = MagicMock()
+    prompt_builder.build = MagicMock(return_value="Test system prompt")
+    return AgentCreator(
+        config=config,
+        memory_service=None,
+        cron_service=None,
+        file_service=None,
+        pending_skill_service=None,
+        skill_service=None,
+        session_manager=MagicMock(),
+        skill_repo=MagicMock(),
+        model_factory=model_factory,
+        prompt_builder=prompt_builder,
+        user_conversation_managers={},
+        user_agents={},
+        get_session_id=MagicMock(return_value="test-session"),
+        on_agent_name_changed=MagicMock(),
+    )
+
+
+def test_downgrade_is_counted_only_when_the_fallback_model_is_used(tmp_path, over_budget_user):
+    model_factory = MagicMock()
+    creator = _creator(tmp_path, model_factory)
+    image = tmp_path / "photo.jpg"
+    image.write_bytes(b"\xff\xd8\xff\xe0\x00\x10JFIF")
+    attachments = [
+        AttachmentInfo(
+            file_id="f1",
+            file_name="photo.jpg",
+            file_path=str(image),
+            mime_type="image/jpeg",
+            file_size=10,
+            is_image=True,
+        )
+    ]
+    before = USAGE_BUDGET_DOWNGRADES_TOTAL.value()
+
+    with patch("app.services.agent.agent_creation.Agent"):
+        creator.create_agent(user_id=over_budget_user, attachments=attachments)
+        assert model_factory.create.call_args.kwargs == {"use_vision": True}
+        assert USAGE_BUDGET_DOWNGRADES_TOTAL.value() == before
+
+        creator.create_agent(user_id=over_budget_user)
+        assert model_factory.create.call_args.kwargs == {
+            "use_vision": False,
+            "model_id": "cheap-model",
+        }
+        assert USAGE_BUDGET_DOWNGRADES_TOTAL.value() == before + 1
@@ -0,0 +1,49 @@
+"""Unit tests for preloading skill secrets before agent creation."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.agent.agent_creation import AgentCreator
+from app.tools import skill_secrets
+
+
+def _creator(dao) -> AgentCreator:
+    return AgentCreator(
+        config=MagicMock(),
+        memory_service=None,
+        cron_service=None,
+        file_service=None,
+        pending_skill_service=None,
+        skill_service=None,
+        session_manager=MagicMock(),
+        skill_repo=MagicMock(),
+        model_factory=MagicMock(),
+        prompt_builder=MagicMock(),
+        user_conversation_managers={},
+        user_agents={},
+        get_session_id=MagicMock(return_value="s1"),
+        on_agent_name_changed=MagicMock(),
+        skill_secret_dao=dao,
+    )
+
+
+async def test_preload_awaits_the_dao_and_fills_the_cache():
+    dao = MagicMock()
+    dao.get_secrets_data = AsyncMock(return_value={"himalaya": {"GMAIL": "a@b.com"}})
+    skill_secrets.set_cached_skill_secrets({})
+
+    await _creator(dao).preload_skill_secrets("u1")
+
+    dao.get_secrets_data.assert_awaited_once_with("u1")
+    assert skill_secrets.get_cached_skill_secrets() == {"himalaya": {"GMAIL": "a@b.com"}}
+    skill_secrets.set_cached_skill_secrets({})
+
+
+async def test_preload_failure_keeps_the_cache():
+    dao = MagicMock()
+    dao.get_secrets_data = AsyncMock(side_effect=RuntimeError("db down"))
+    skill_secrets.set_cached_skill_secrets({"foo": {"TOKEN": "t"}})
+
+    await _creator(dao).preload_skill_secrets("u1")
+
+    assert skill_secrets.get_cached_skill_secrets() == {"foo": {"TOKEN": "t"}}
+    skill_secrets.set_cached_skill_secrets({})
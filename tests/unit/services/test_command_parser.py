@@ -167,3 +167,18 @@ class TestCommandParser:
         result = parser.parse("/forget! himalaya config")
         assert result.command_type == CommandType.FORGET_DELETE
         assert result.args == ["himalaya config"]
+
+
+def test_profile_command_only_matches_admin_forms():
+    parser = CommandParser()
+    assert parser.parse("profile").command_type == CommandType.PROFILE
+    assert parser.parse("/profile 15").args == ["15"]
+    assert parser.parse("profile next").args == ["next"]
+    assert parser.parse("profile my company website").command_type == CommandType.MESSAGE
+
+
+def test_usage_command_accepts_optional_days():
+    parser = CommandParser()
+    assert parser.parse("usage").command_type == CommandType.USAGE
+    assert parser.parse("/usage 7").args == ["7"]
+    assert parser.parse("usage of numpy arrays").command_type == CommandType.MESSAGE
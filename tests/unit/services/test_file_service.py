@@ -9,11 +9,12 @@ import os
 import tempfile
 import time
 from pathlib import Path
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from app.config import AgentConfig
+from app.services import file_index as file_index_module
 from app.services.file_service import FileService, FileValidationResult
 
 
@@ -345,6 +346,202 @@ class TestFileCleanupByAge:
         assert not work_dir.exists()
 
 
+def _fail_scan(user_dir):
+    raise AssertionError(f"unexpected tree walk: {user_dir}")
+
+
+class TestIncrementalCleanupIndex:
+    """Cleanup walks only users whose trees changed since the last pass."""
+
+    @staticmethod
+    def _age(path: Path, hours: float) -> None:
+        old_time = time.time() - hours * 3600
+        os.utime(path, (old_time, old_time))
+
+    @pytest.mark.asyncio
+    async def test_unchanged_user_is_not_rewalked(self, file_service: FileService):
+        work_dir = file_service.get_user_working_dir("alice")
+        (work_dir / "scratchpad").mkdir()
+        (work_dir / "fresh.txt").write_text("fresh")
+        await file_service.cleanup_old_files(max_age_hours=1)
+
+        # Written behind the index's back: invisible until the user is marked dirty.
+        stale = work_dir / "stale.txt"
+        stale.write_text("stale")
+        self._age(stale, 2)
+        await file_service.cleanup_old_files(max_age_hours=1)
+        assert stale.exists()
+
+        file_service.file_index.mark_dirty("alice")
+        deleted = await file_service.cleanup_old_files(max_age_hours=1)
+        assert deleted == 1
+        assert not stale.exists()
+        assert (work_dir / "fresh.txt").exists()
+
+    @pytest.mark.asyncio
+    async def test_recorded_download_expires_without_rescan(
+        self, file_service: FileService, monkeypatch
+    ):
+        work_dir = file_service.get_user_working_dir("alice")
+        (work_dir / "scratchpad").mkdir()
+        await file_service.cleanup_old_files(max_age_hours=1)
+
+        bot = _fake_bot(b"doc")
+        meta = await file_service.download_file(bot, "fid", "alice", "doc.txt", None)
+
+        real_time = time.time
+        monkeypatch.setattr(time, "time", lambda: real_time() + 2 * 3600)
+        monkeypatch.setattr(file_index_module, "scan_tree", _fail_scan)
+
+        deleted = await file_service.cleanup_old_files(max_age_hours=1)
+        assert deleted == 1
+        assert not Path(meta.file_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_rewritten_file_is_not_deleted(self, file_service: FileService):
+        work_dir = file_service.get_user_working_dir("alice")
+        (work_dir / "scratchpad").mkdir()
+        report = work_dir / "report.txt"
+        report.write_text("v1")
+        self._age(report, 0.5)
+        await file_service.cleanup_old_files(max_age_hours=1)
+
+        # Indexed mtime is 30 minutes old; pretend an hour passed, then the file
+        # was rewritten. The re-stat must keep it.
+        index = file_service.file_index._cache["alice"]
+        index.files["report.txt"] -= 3600
+        report.write_text("v2")
+
+        await file_service.cleanup_old_files(max_age_hours=1)
+        assert report.exists()
+
+    @pytest.mark.asyncio
+    async def test_time_budget_defers_remaining_users(self, file_service: FileService):
+        stale_files = []
+        for user_id in ("u1", "u2", "u3"):
+            f = file_service.get_user_working_dir(user_id) / "old.txt"
+            f.write_text("x")
+            self._age(f, 2)
+            stale_files.append(f)
+
+        # A tiny budget expires after the first user; the rest are deferred.
+        file_service._cleanup_old_files_sync(1, time_budget_seconds=1e-9)
+        assert sum(f.exists() for f in stale_files) == 2
+
+        file_service._cleanup_old_files_sync(1, time_budget_seconds=0)
+        assert not any(f.exists() for f in stale_files)
+
+
+# ============================================================================
+# Content-addressed attachment store
+# ============================================================================
+
+
+def _fake_bot(content: bytes) -> MagicMock:
+    """Bot whose get_file() returns a file that writes ``content`` on download."""
+
+    async def _download_to_drive(path):
+        Path(path).write_bytes(content)
+
+    tg_file = MagicMock()
+    tg_file.download_to_drive = AsyncMock(side_effect=_download_to_drive)
+    bot = MagicMock()
+    bot.get_file = AsyncMock(return_value=tg_file)
+    return bot
+
+
+class TestAttachmentStore:
+    """Attachments are stored once by content hash and copied per user."""
+
+    @pytest.mark.asyncio
+    async def test_known_file_unique_id_skips_download(self, file_service: FileService):
+        bot = _fake_bot(b"forwarded media")
+
+        first = await file_service.download_file(
+            bot, "fid-1", "alice", "clip.ogg", "audio/ogg", file_unique_id="uniq-1"
+        )
+        second = await file_service.download_file(
+            bot, "fid-2", "bob", "clip.ogg", "audio/ogg", file_unique_id="uniq-1"
+        )
+
+        bot.get_file.assert_awaited_once_with("fid-1")
+        assert Path(second.file_path).read_bytes() == b"forwarded media"
+        assert second.file_size == first.file_size
+        assert os.stat(first.file_path).st_ino != os.stat(second.file_path).st_ino
+
+    @pytest.mark.asyncio
+    async def test_user_copies_are_independent(self, file_service: FileService):
+        bot = _fake_bot(b"shared media")
+        first = await file_service.download_file(
+            bot, "fid", "alice", "doc.txt", None, file_unique_id="uniq-4"
+        )
+        second = await file_service.download_file(
+            bot, "fid", "bob", "doc.txt", None, file_unique_id="uniq-4"
+        )
+
+        with open(first.file_path, "r+b") as f:
+            f.write(b"tampered")
+
+        assert Path(second.file_path).read_bytes() == b"shared media"
+        store = file_service.attachment_store
+        assert store is not None
+        assert store.root.stat().st_mode & 0o077 == 0
+
+    @pytest.mark.asyncio
+    async def test_modified_blob_is_not_reused(self, file_service: FileService):
+        bot = _fake_bot(b"original")
+        await file_service.download_file(
+            bot, "fid", "alice", "doc.txt", None, file_unique_id="uniq-2"
+        )
+
+        # A blob changed behind the store's back is evicted, not served.
+        store = file_service.attachment_store
+        assert store is not None
+        (blob,) = [p for p in (store.root / "blobs").rglob("*") if p.is_file()]
+        blob.chmod(0o600)
+        blob.write_bytes(b"tampered")
+
+        second = await file_service.download_file(
+            bot, "fid", "bob", "doc.txt", None, file_unique_id="uniq-2"
+        )
+
+        assert bot.get_file.await_count == 2
+        assert Path(second.file_path).read_bytes() == b"original"
+
+    @pytest.mark.asyncio
+    async def test_cleanup_gcs_unused_blobs(self, file_service: FileService):
+        bot = _fake_bot(b"payload")
+        meta = await file_service.download_file(
+            bot, "fid", "alice", "a.txt", None, file_unique_id="uniq-3"
+        )
+        store = file_service.attachment_store
+        assert store is not None
+        blobs = [p for p in (store.root / "blobs").rglob("*") if p.is_file()]
+        assert len(blobs) == 1
+
+        # Recently used: kept within the grace period.
+        assert store.gc(max_age_seconds=3600) == 0
+
+        assert store.gc(max_age_seconds=-1) == 1
+        assert not blobs[0].exists()
+        assert not any((store.root / "ids").iterdir())
+        # The user's copy does not depend on the blob.
+        assert Path(meta.file_path).read_bytes() == b"payload"
+
+    @pytest.mark.asyncio
+    async def test_cleanup_skips_store_directory(self, file_service: FileService):
+        store = file_service.attachment_store
+        assert store is not None
+        stale = store.staging_path()
+        stale.write_bytes(b"partial")
+        old_time = time.time() - (2 * 3600)
+        os.utime(store.root, (old_time, old_time))
+
+        await file_service.cleanup_old_files(max_age_hours=1)
+
+        assert store.root.is_dir()
+
+
 # ============================================================================
 # Property 16: Working folder cleared on new session
 # ============================================================================
@@ -0,0 +1,110 @@
+"""Unit tests for the parallel, cached GitHub skill downloader.
+
+All HTTP goes to a local stand-in server (see ``github_standin``).
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from app.config import AgentConfig
+from app.services.github_downloader import GitHubDownloader, GitHubDownloadError
+from app.services.skill_service import SkillInstallError, SkillService
+from tests.unit.services.github_standin import GitHubStandIn
+
+
+def _skill_files(n: int) -> dict[str, bytes]:
+    files = {"skills/demo/SKILL.md": b"---\nname: demo\ndescription: demo skill\n---\n"}
+    for i in range(n):
+        files[f"skills/demo/scripts/pkg{i % 5}/mod{i}.py"] = f"VALUE = {i}\n".encode()
+    files["skills/other/SKILL.md"] = b"---\nname: other\n---\n"
+    return files
+
+
+@pytest.fixture
+def standin():
+    with GitHubStandIn(_skill_files(40)) as server:
+        yield server
+
+
+def _downloader(standin: GitHubStandIn, tmp_path) -> GitHubDownloader:
+    return GitHubDownloader(
+        tmp_path / "cache", api_base=standin.base_url, raw_base=standin.base_url, max_workers=4
+    )
+
+
+def test_downloads_directory_with_two_api_calls_over_reused_connections(standin, tmp_path):
+    downloader = _downloader(standin, tmp_path)
+    try:
+        result = downloader.download_directory(
+            "owner", "repo", "main", "skills/demo", tmp_path / "a"
+        )
+    finally:
+        downloader.close()
+
+    assert (result.files, result.fetched, result.cached) == (41, 41, 0)
+    assert result.commit_sha == standin.commit_sha
+    assert (tmp_path / "a" / "scripts" / "pkg3" / "mod8.py").read_bytes() == b"VALUE = 8\n"
+    assert not (tmp_path / "a" / "other").exists()
+    assert standin.count("/repos/") == 2
+    assert standin.count("/owner/repo/") == 41
+    # Four workers plus the API calls, not one connection per file.
+    assert len(standin.connections) <= 6
+
+
+def test_redownload_uses_etag_and_blob_cache(standin, tmp_path):
+    downloader = _downloader(standin, tmp_path)
+    try:
+        downloader.download_directory("owner", "repo", "main", "skills/demo", tmp_path / "a")
+        standin.requests.clear()
+
+        again = downloader.download_directory(
+            "owner", "repo", "main", "skills/demo", tmp_path / "b"
+        )
+        assert (again.fetched, again.cached) == (0, 41)
+        assert standin.requests == [("/repos/owner/repo/commits/main", 304)]
+
+        files = _skill_files(40)
+        files["skills/demo/scripts/pkg0/mod0.py"] = b"VALUE = 'changed'\n"
+        standin.set_files(files)
+        standin.requests.clear()
+        update = downloader.download_directory(
+            "owner", "repo", "main", "skills/demo", tmp_path / "c"
+        )
+    finally:
+        downloader.close()
+
+    assert (update.fetched, update.cached) == (1, 40)
+    assert standin.count("/owner/repo/") == 1
+    assert (tmp_path / "c" / "scripts" / "pkg0" / "mod0.py").read_bytes() == b"VALUE = 'changed'\n"
+
+
+def test_skill_service_installs_from_standin_and_maps_errors(standin, tmp_path):
+    config = AgentConfig(
+        telegram_bot_token="test-token",
+        skills_base_dir=str(tmp_path / "skills"),
+        session_storage_dir=str(tmp_path / "sessions"),
+        pending_skills_preflight_enabled=False,
+        github_api_base_url=standin.base_url,
+        github_raw_base_url=standin.base_url,
+    )
+    svc = SkillService(config)
+
+    res = svc.download_skill_to_pending(
+        "https://github.com/owner/repo/tree/main/skills/demo", "u1", scope="user"
+    )
+    assert res["metadata"].name == "demo"
+
+    with pytest.raises(SkillInstallError, match="No files found"):
+        svc.download_skill_to_pending(
+            "https://github.com/owner/repo/tree/main/skills/missing", "u1", scope="user"
+        )
+    with pytest.raises(SkillInstallError, match="not found"):
+        svc.download_skill_to_pending(
+            "https://github.com/owner/nope/tree/main/skills/demo", "u1", scope="user"
+        )
+
+    with pytest.raises(GitHubDownloadError):
+        GitHubDownloader(tmp_path / "c", api_base="http://127.0.0.1:9").resolve_commit(
+            "owner", "repo", "main"
+        )
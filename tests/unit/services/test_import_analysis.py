@@ -0,0 +1,80 @@
+"""Unit tests for cached import analysis used by requirement generation."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.services import import_analysis
+from app.services.import_analysis import ImportAnalyzer, ImportIndex, parse_import_roots
+
+
+def _write(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def skill(tmp_path: Path) -> Path:
+    root = tmp_path / "skill"
+    _write(root / "main.py", "import os, json\nimport requests\nfrom helpers import util\n")
+    _write(root / "helpers" / "__init__.py", "")
+    _write(root / "helpers" / "util.py", "from . import sibling\nimport yaml.loader\n")
+    _write(root / "broken.py", "def nope(:\n")
+    _write(root / ".venv" / "lib" / "site.py", "import numpy\n")
+    return root
+
+
+def test_analyze_filters_stdlib_local_and_venv(skill: Path):
+    imports, warnings = ImportAnalyzer().analyze(skill)
+
+    assert imports == {"requests", "yaml"}
+    assert warnings == []
+    assert parse_import_roots("from __future__ import annotations\nimport a.b as c\n") == {
+        "__future__",
+        "a",
+    }
+
+
+def test_cache_hits_skip_parsing_and_survive_restart(skill: Path, tmp_path: Path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    parsed: list[str] = []
+    real = import_analysis._parse_paths
+
+    def counting(paths):
+        parsed.extend(paths)
+        return real(paths)
+
+    monkeypatch.setattr(import_analysis, "_parse_paths", counting)
+
+    analyzer = ImportAnalyzer(cache_dir)
+    first, _ = analyzer.analyze(skill)
+    assert len(parsed) == 4
+
+    parsed.clear()
+    assert analyzer.analyze(skill)[0] == first
+    assert parsed == []
+
+    # A fresh analyzer (e.g. after a restart) reads the on-disk entries.
+    assert ImportAnalyzer(cache_dir).analyze(skill)[0] == first
+    assert parsed == []
+
+    _write(skill / "main.py", "import requests\nimport bs4\n")
+    imports, _ = analyzer.analyze(skill)
+    assert parsed == [str(skill / "main.py")]
+    assert imports == {"requests", "bs4", "yaml"}
+
+
+def test_import_index_maps_installed_and_bundled_names(tmp_path: Path):
+    index = ImportIndex.load(tmp_path)
+
+    assert index.distribution_for("yaml") == "PyYAML"
+    assert index.distribution_for("jwt") == "PyJWT"
+    assert index.distribution_for("pydantic_settings") == "pydantic-settings"
+    assert index.distribution_for("not_a_real_module") == "not_a_real_module"
+
+    persisted = list(tmp_path.glob("import-index-*.json"))
+    assert len(persisted) == 1
+    assert ImportIndex.load(tmp_path).distribution_for("pydantic_settings") == "pydantic-settings"
@@ -462,6 +462,71 @@ class TestMemoryServiceStoreAgentName:
         assert result is False
 
 
+class TestMemoryServiceBackgroundResolution:
+    """Tests for background memory id resolution and readiness gating."""
+
+    @pytest.fixture
+    def mock_config(self):
+        """Create a mock config."""
+        config = MagicMock(spec=AgentConfig)
+        config.aws_region = "us-east-1"
+        config.aws_access_key_id = None
+        config.aws_secret_access_key = None
+        config.memory_id = None
+        config.memory_name = "TestMemory"
+        config.memory_description = "Test memory"
+        config.memory_retrieval_top_k = 10
+        config.memory_retrieval_relevance_score = 0.5
+        config.memory_ready_timeout_seconds = 0.05
+        return config
+
+    @patch("app.services.memory_service.MemoryClient")
+    def test_background_resolution_sets_memory_id(self, mock_client_class, mock_config):
+        """Test the resolver thread finds the memory and reports ready."""
+        from app.services.memory_service import MemoryService
+
+        mock_client = MagicMock()
+        mock_client.list_memories.return_value = [{"id": "TestMemory-abc", "status": "ACTIVE"}]
+        mock_client_class.return_value = mock_client
+
+        service = MemoryService(mock_config)
+        assert service.memory_status == "pending"
+
+        thread = service.start_memory_id_resolution()
+        thread.join(timeout=5)
+
+        assert service.memory_status == "ready"
+        assert service.get_or_create_memory_id() == "TestMemory-abc"
+        assert service.start_memory_id_resolution() is None
+
+    @patch("app.services.memory_service.MemoryClient")
+    def test_callers_get_not_ready_while_resolving(self, mock_client_class, mock_config):
+        """Test callers wait a bounded time, then degrade, while resolution runs."""
+        import threading
+
+        from app.services.memory_service import MemoryNotReadyError, MemoryService
+
+        release = threading.Event()
+        mock_client = MagicMock()
+        mock_client.list_memories.side_effect = lambda: release.wait(5) and []
+        mock_client.create_memory_and_wait.return_value = {"id": "new-memory-id"}
+        mock_client_class.return_value = mock_client
+
+        service = MemoryService(mock_config)
+        thread = service.start_memory_id_resolution()
+        try:
+            assert service.memory_status == "resolving"
+            with pytest.raises(MemoryNotReadyError):
+                service.get_or_create_memory_id()
+            assert service.search_memory(user_id="u", query="q") == {"facts": [], "preferences": []}
+        finally:
+            release.set()
+            thread.join(timeout=5)
+
+        assert service.memory_status == "ready"
+        assert service.get_or_create_memory_id() == "new-memory-id"
+
+
 class TestMemoryServiceNameExtraction:
     """Tests for agent name extraction from memory text."""
 
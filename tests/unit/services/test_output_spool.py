@@ -0,0 +1,103 @@
+"""Unit tests for spooled shell output."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.output_spool import SPOOL_DIRNAME, open_job, read_page
+from app.tools import file_read_env, shell_env
+
+
+@pytest.fixture
+def workspace(tmp_path: Path):
+    cfg = SimpleNamespace(
+        skills_base_dir=str(tmp_path / "skills"),
+        shared_skills_dir=str(tmp_path / "shared"),
+        working_folder_base_dir=str(tmp_path / "workspace"),
+        shell_output_inline_chars=1_000,
+        shell_output_head_chars=200,
+        shell_output_tail_chars=300,
+    )
+    (tmp_path / "workspace" / "u1").mkdir(parents=True)
+    tokens = [
+        (shell_env._config_var, shell_env._config_var.set(cfg)),
+        (shell_env._current_user_id_var, shell_env._current_user_id_var.set("u1")),
+    ]
+    file_read_env.set_file_read_context(user_id="u1", config=cfg)
+    yield tmp_path / "workspace" / "u1"
+    for var, token in tokens:
+        var.reset(token)
+    file_read_env._current_user_id_var.set(None)
+    file_read_env._config_var.set(None)
+
+
+def test_small_output_is_inline_and_large_output_is_head_tail(tmp_path: Path):
+    small = open_job(tmp_path, inline_chars=100, head_chars=20, tail_chars=30)
+    small.stdout.write("hello\n")
+    assert small.finish() is None
+    assert small.stdout.render() == "hello\n"
+    assert not small.directory.exists()
+
+    job = open_job(tmp_path, inline_chars=100, head_chars=20, tail_chars=30)
+    for i in range(1, 10_001):
+        job.stdout.write(f"line {i}\n")
+    handle = job.finish()
+
+    assert handle is not None
+    assert handle["stdout"]["lines"] == 10_000 and not handle["stdout"]["complete"]
+    text = job.stdout.render()
+    assert text.startswith("line 1\nline 2\n")
+    assert text.endswith("line 9999\nline 10000\n")
+    assert "chars omitted (lines 3-9998)" in text
+    assert f'file_read(path="{job.stdout.path}", mode="page", start_line=3)' in text
+    assert len(text) < 400
+    assert Path(handle["stdout"]["path"]).read_text().count("\n") == 10_000
+
+
+def test_read_page_walks_lines_and_cuts_overlong_lines(tmp_path: Path):
+    path = tmp_path / "out.log"
+    path.write_text("".join(f"{i}\n" for i in range(1, 5_001)) + "x" * 50 + "\nlast")
+
+    page = read_page(path, start_line=2_500, max_lines=3)
+    assert (page["text"], page["end_line"], page["next_start_line"]) == (
+        "2500\n2501\n2502\n",
+        2_502,
+        2_503,
+    )
+
+    long_line = read_page(path, start_line=5_001, max_chars=10)
+    assert (long_line["text"], long_line["truncated_line"]) == ("x" * 10, True)
+    assert long_line["next_start_line"] == 5_002
+
+    tail = read_page(path, start_line=5_002)
+    assert (tail["text"], tail["next_start_line"]) == ("last", None)
+    assert read_page(path, start_line=9_999)["text"] == ""
+
+
+def test_safe_runner_spools_large_output_for_paging(workspace: Path, monkeypatch):
+    monkeypatch.setattr(shell_env, "_parse_and_forward_progress_markers", lambda line: line)
+
+    result = shell_env._safe_shell_run(
+        command="seq 1 200000; echo done >&2",
+        work_dir=str(workspace),
+        timeout_seconds=30,
+        stream_output=False,
+    )
+
+    assert result["status"] == "success"
+    assert result["stderr"] == "done\n"
+    assert len(result["stdout"]) < 1_000
+    assert result["stdout"].endswith("199999\n200000\n")
+    stdout = result["output"]["stdout"]
+    assert stdout["lines"] == 200_000
+    assert Path(stdout["path"]).parent.parent == workspace / SPOOL_DIRNAME
+
+    page = file_read_env.file_read(
+        path=stdout["path"], mode="page", start_line=150_000, max_lines=2
+    )
+    text = page["content"][0]["text"]
+    assert text.endswith("150000\n150001\n")
+    assert "next page: start_line=150002" in text
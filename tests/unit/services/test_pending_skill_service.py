@@ -245,3 +245,54 @@ def test_onboard_updates_existing_skill_when_pending_changes(temp_skills_root: P
     assert failed_dir.exists()
     backups = list(failed_dir.glob("hello.*.bak"))
     assert backups, "Expected a backup directory for the replaced skill"
+
+
+def test_concurrent_onboarding_keeps_secrets_per_user(temp_skills_root: Path, monkeypatch):
+    import os
+    from concurrent.futures import ThreadPoolExecutor
+
+    import yaml
+
+    config = _config_for(temp_skills_root)
+    config.pending_skills_onboarding_workers = 4
+    pending_service = PendingSkillService(config)
+    monkeypatch.delenv("TENANT_TOKEN", raising=False)
+
+    users = ["user1", "user2", "user3"]
+    for user_id in users:
+        for i in range(3):
+            pending_skill = temp_skills_root / user_id / "pending" / f"tenant-{i}"
+            pending_skill.mkdir(parents=True)
+            (pending_skill / "SKILL.md").write_text(
+                f"---\nname: tenant-{i}\nrequires:\n  env:\n    - TENANT_TOKEN\n---\n\n# T\n",
+                encoding="utf-8",
+            )
+            (pending_skill / "skill.py").write_text(
+                "import os, pathlib\n"
+                "pathlib.Path(__file__).with_name('seen.txt')"
+                ".write_text(os.environ.get('TENANT_TOKEN', ''))\n",
+                encoding="utf-8",
+            )
+    # user3 has no token and must not see another user's.
+    per_user = {u: {"env": {"TENANT_TOKEN": f"token-{u}"}} for u in users[:2]}
+    Path(config.secrets_path).write_text(
+        yaml.safe_dump({"skills": {f"tenant-{i}": {"users": per_user} for i in range(3)}}),
+        encoding="utf-8",
+    )
+
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        results = dict(
+            zip(
+                users,
+                pool.map(lambda u: pending_service.onboard_pending(user_id=u, scope="user"), users),
+                strict=True,
+            )
+        )
+
+    for user_id in users[:2]:
+        assert results[user_id]["onboarded"] == 3
+        for i in range(3):
+            seen = temp_skills_root / user_id / f"tenant-{i}" / "seen.txt"
+            assert seen.read_text() == f"token-{user_id}"
+    assert results["user3"]["failed"] == 3
+    assert "TENANT_TOKEN" not in os.environ
@@ -0,0 +1,154 @@
+"""Unit tests for the shared shell subprocess reactor."""
+
+from __future__ import annotations
+
+import os
+import resource
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+
+from app.services.shell_reactor import ShellBusy, ShellReactor
+
+
+@pytest.fixture
+def reactor():
+    return ShellReactor(kill_grace_seconds=0.5, drain_seconds=0.2)
+
+
+def _collect():
+    out: dict[str, bytearray] = defaultdict(bytearray)
+    eof: list[str] = []
+
+    def _on_output(which: str, data: bytes) -> None:
+        if data:
+            out[which] += data
+        else:
+            eof.append(which)
+
+    return out, eof, _on_output
+
+
+def test_many_commands_share_one_reactor_thread(reactor):
+    threads_before = threading.active_count()
+    jobs = []
+    for i in range(20):
+        out, eof, on_output = _collect()
+        command = f"sleep 0.2; echo out{i}; echo err{i} >&2; exit {i % 3}"
+        jobs.append((i, out, eof, reactor.spawn(command, on_output=on_output, timeout_seconds=30)))
+
+    assert threading.active_count() <= threads_before + 1
+    for i, out, eof, job in jobs:
+        assert job.wait(10)
+        assert (job.returncode, job.timed_out) == (i % 3, False)
+        assert (bytes(out["stdout"]), bytes(out["stderr"])) == (
+            f"out{i}\n".encode(),
+            f"err{i}\n".encode(),
+        )
+        assert sorted(eof) == ["stderr", "stdout"]
+
+
+def test_timeout_kills_the_process_group(reactor):
+    out, _, on_output = _collect()
+
+    job = reactor.spawn("sleep 60 & echo $!; wait", on_output=on_output, timeout_seconds=0.5)
+
+    assert job.wait(10)
+    assert (job.returncode, job.timed_out) == (124, True)
+    background = int(out["stdout"].split()[0])
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            os.kill(background, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("background child survived the timeout")
+
+
+def test_cancel_user_and_per_user_slots(reactor):
+    _, _, on_output = _collect()
+    job = reactor.spawn(
+        "sleep 60", on_output=on_output, timeout_seconds=60, user_id="u1", max_per_user=1
+    )
+
+    with pytest.raises(ShellBusy):
+        reactor.spawn(
+            "true",
+            on_output=on_output,
+            timeout_seconds=5,
+            user_id="u1",
+            max_per_user=1,
+            slot_timeout=0.1,
+        )
+    other = reactor.spawn(
+        "true", on_output=on_output, timeout_seconds=5, user_id="u2", max_per_user=1
+    )
+    assert other.wait(5) and other.returncode == 0
+
+    t0 = time.monotonic()
+    assert reactor.cancel_user("u1") is True
+    assert time.monotonic() - t0 < 0.5
+    assert job.wait(5) and job.returncode != 0
+    assert reactor.cancel_user("u1") is False
+
+    # The slot is free again once the cancelled command is gone.
+    again = reactor.spawn(
+        "true", on_output=on_output, timeout_seconds=5, user_id="u1", max_per_user=1, slot_timeout=1
+    )
+    assert again.wait(5) and again.returncode == 0
+
+
+def test_rlimits_apply_to_the_command(reactor):
+    out, _, on_output = _collect()
+    limits = {resource.RLIMIT_CPU: 7, resource.RLIMIT_AS: 512 * 1024 * 1024}
+
+    job = reactor.spawn(
+        "sleep 0.2; ulimit -t; ulimit -v", on_output=on_output, timeout_seconds=10, rlimits=limits
+    )
+
+    assert job.wait(10) and job.returncode == 0
+    assert out["stdout"].split() == [b"7", str(512 * 1024).encode()]
+
+
+def test_failed_registration_kills_the_job_and_frees_the_slot(reactor, monkeypatch):
+    _, eof, on_output = _collect()
+    register = reactor._register
+    calls = 0
+
+    def _register_once_broken(job):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise OSError("selector is gone")
+        register(job)
+
+    monkeypatch.setattr(reactor, "_register", _register_once_broken)
+
+    job = reactor.spawn(
+        "sleep 60", on_output=on_output, timeout_seconds=60, user_id="u1", max_per_user=1
+    )
+
+    assert job.wait(5)
+    assert job.returncode == 1 and "selector is gone" in job.error
+    assert job.proc.poll() is not None
+    again = reactor.spawn(
+        "true", on_output=on_output, timeout_seconds=5, user_id="u1", max_per_user=1, slot_timeout=1
+    )
+    assert again.wait(5) and again.returncode == 0 and again.error is None
+
+
+def test_failing_callback_does_not_drop_the_rest_of_the_batch(reactor):
+    ran: list[str] = []
+
+    def _boom() -> None:
+        raise RuntimeError("boom")
+
+    reactor._pending.extend([_boom, lambda: ran.append("after")])
+    os.write(reactor._wake_w, b"\0")
+    reactor._tick()
+
+    assert ran == ["after"]
@@ -0,0 +1,92 @@
+"""Unit tests for the in-memory skill catalog."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.services.agent.skill_catalog import SkillCatalog
+
+
+def _write_skill(skills_dir: Path, name: str, body: str = "") -> Path:
+    skill_dir = skills_dir / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {name} skill\n{body}---\n\n# {name}\n",
+        encoding="utf-8",
+    )
+    return skill_dir
+
+
+@pytest.fixture
+def catalog():
+    cat = SkillCatalog()
+    yield cat
+    cat.stop_watcher()
+
+
+def test_entries_parse_requirements_and_templates(tmp_path, catalog):
+    skill_dir = _write_skill(
+        tmp_path, "mail", "requires:\n  env:\n    - MAIL_TOKEN\n  bins:\n    - himalaya\n"
+    )
+    (skill_dir / "conf").mkdir()
+    (skill_dir / "conf" / "mail.toml_example").write_text("x", encoding="utf-8")
+    _write_skill(tmp_path, "plain")
+    (tmp_path / "pending").mkdir()
+    (tmp_path / "no-skill-md").mkdir()
+
+    entries = {e.info.name: e for e in catalog.entries(tmp_path)}
+
+    assert set(entries) == {"mail", "plain"}
+    assert [r.name for r in entries["mail"].env] == ["MAIL_TOKEN"]
+    assert [r.name for r in entries["mail"].bins] == ["himalaya"]
+    assert entries["mail"].templates == ("mail.toml_example",)
+    assert not entries["plain"].has_requirements
+
+
+def test_only_changed_skill_md_is_reparsed(tmp_path, catalog, monkeypatch):
+    import app.services.agent.skill_catalog as mod
+
+    _write_skill(tmp_path, "a")
+    _write_skill(tmp_path, "b")
+    parsed: list[str] = []
+    real_parse = mod._parse_entry
+    monkeypatch.setattr(
+        mod, "_parse_entry", lambda item, md: parsed.append(item.name) or real_parse(item, md)
+    )
+
+    catalog.entries(tmp_path)
+    catalog.entries(tmp_path)
+    assert sorted(parsed) == ["a", "b"]
+
+    _write_skill(tmp_path, "b", "requires:\n  env:\n    - B_KEY\n")
+    entries = {e.info.name: e for e in catalog.entries(tmp_path)}
+    assert parsed[2:] == ["b"]
+    assert [r.name for r in entries["b"].env] == ["B_KEY"]
+
+
+def test_watching_serves_cached_listing_until_invalidated(tmp_path, catalog):
+    _write_skill(tmp_path, "a")
+    assert catalog.start_watcher(3600)
+    assert [e.info.name for e in catalog.entries(tmp_path)] == ["a"]
+
+    _write_skill(tmp_path, "b")
+    assert [e.info.name for e in catalog.entries(tmp_path)] == ["a"]
+
+    catalog.invalidate(tmp_path / "b")
+    assert [e.info.name for e in catalog.entries(tmp_path)] == ["a", "b"]
+
+    _write_skill(tmp_path, "c")
+    catalog.refresh()
+    assert len(catalog.entries(tmp_path)) == 3
+
+
+def test_bin_available_prefers_skill_venv(tmp_path, catalog):
+    venv_bin = tmp_path / ".venv" / "bin"
+    venv_bin.mkdir(parents=True)
+    (venv_bin / "only-in-venv").write_text("", encoding="utf-8")
+
+    assert catalog.bin_available("only-in-venv", tmp_path)
+    assert catalog.bin_available("sh", tmp_path)
+    assert not catalog.bin_available("definitely-not-a-real-binary-xyz", tmp_path)
@@ -0,0 +1,85 @@
+"""Unit tests for incremental Merkle fingerprints of skill directories."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import app.services.skill_fingerprint as fp_mod
+from app.services.pending_skill_service import dir_fingerprint
+from app.services.skill_fingerprint import (
+    FileDigestCache,
+    diff_trees,
+    fingerprint_tree,
+    hash_file,
+)
+
+
+def _make_skill(root: Path) -> Path:
+    (root / "scripts").mkdir(parents=True)
+    (root / "SKILL.md").write_text("---\nname: demo\n---\n", encoding="utf-8")
+    (root / "scripts" / "run.py").write_text("print('hi')\n", encoding="utf-8")
+    (root / "models").mkdir()
+    (root / "models" / "weights.bin").write_bytes(os.urandom(3 * 1024 + 7))
+    return root
+
+
+def test_identical_trees_match_and_diff_names_changed_subtree(tmp_path):
+    a = _make_skill(tmp_path / "a")
+    b = tmp_path / "b"
+    b.mkdir()
+    for p in a.rglob("*"):
+        target = b / p.relative_to(a)
+        if p.is_dir():
+            target.mkdir(exist_ok=True)
+        else:
+            target.write_bytes(p.read_bytes())
+    (b / ".venv").mkdir()
+    (b / ".venv" / "noise").write_text("x", encoding="utf-8")
+
+    cache = FileDigestCache()
+    ta = fingerprint_tree(a, ignore={".venv"}, cache=cache)
+    tb = fingerprint_tree(b, ignore={".venv"}, cache=cache)
+    assert ta.digest == tb.digest
+    assert dir_fingerprint(a) == dir_fingerprint(b)
+
+    (b / "scripts" / "run.py").write_text("print('bye')\n", encoding="utf-8")
+    (b / "scripts" / "new.py").write_text("", encoding="utf-8")
+    tb2 = fingerprint_tree(b, ignore={".venv"}, cache=cache)
+
+    assert tb2.digest != ta.digest
+    assert tb2.children["models"].digest == ta.children["models"].digest
+    assert diff_trees(ta, tb2) == ["scripts/new.py", "scripts/run.py"]
+    assert tb2.summary()["children"]["SKILL.md"] == ta.children["SKILL.md"].digest
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path, monkeypatch):
+    skill = _make_skill(tmp_path / "skill")
+    hashed: list[str] = []
+    real = fp_mod.hash_file
+    monkeypatch.setattr(fp_mod, "hash_file", lambda p, **kw: hashed.append(p) or real(p, **kw))
+    cache = FileDigestCache()
+
+    first = fingerprint_tree(skill, cache=cache)
+    assert len(hashed) == 3
+    assert fingerprint_tree(skill, cache=cache) == first
+    assert len(hashed) == 3
+
+    run_py = skill / "scripts" / "run.py"
+    run_py.write_text("print('changed!')\n", encoding="utf-8")
+    os.utime(run_py, ns=(1, 1))
+    fingerprint_tree(skill, cache=cache)
+    assert hashed[3:] == [str(run_py)]
+
+
+def test_mmap_and_streamed_digests_agree(tmp_path):
+    data = os.urandom(2 * fp_mod.BLOCK_SIZE + 123)
+    big = tmp_path / "big.bin"
+    big.write_bytes(data)
+    expected = hashlib.sha256(data).hexdigest()
+
+    assert hash_file(big, mmap_threshold=1) == expected
+    assert hash_file(big, mmap_threshold=len(data) + 1) == expected
+    (tmp_path / "empty").write_bytes(b"")
+    assert hash_file(tmp_path / "empty", mmap_threshold=0) == hashlib.sha256().hexdigest()
@@ -0,0 +1,151 @@
+"""Unit tests for background pending-skill onboarding jobs.
+
+Fixture skills are local and dependency-free (install_deps=False), so no
+network or package installers are involved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.config import AgentConfig
+from app.services.pending_skill_service import PendingSkillService
+from app.services.skill_onboarding_jobs import JOB_FILE, SkillOnboardingEngine
+
+
+def _write_pending(root: Path, user: str, name: str, script: str = "print('ok')\n") -> Path:
+    skill_dir = root / user / "pending" / name
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {name} skill\n---\n# {name}\n", encoding="utf-8"
+    )
+    (skill_dir / "main.py").write_text(script, encoding="utf-8")
+    return skill_dir
+
+
+@pytest.fixture
+def service(tmp_path):
+    config = AgentConfig(
+        telegram_bot_token="test-token",
+        skills_base_dir=str(tmp_path),
+        shared_skills_dir=str(tmp_path / "shared"),
+        session_storage_dir=str(tmp_path / "sessions"),
+        secrets_path=str(tmp_path / "secrets.yml"),
+        pending_skills_preflight_enabled=False,
+        pending_skills_generate_requirements=False,
+    )
+    return PendingSkillService(config)
+
+
+@pytest.fixture
+def make_engine(service):
+    engines: list[SkillOnboardingEngine] = []
+
+    def _make(**kwargs) -> SkillOnboardingEngine:
+        kwargs.setdefault("workers", 2)
+        kwargs.setdefault("scan_processes", 0)
+        engine = SkillOnboardingEngine(service, **kwargs)
+        engines.append(engine)
+        return engine
+
+    yield _make
+    for engine in engines:
+        engine.shutdown(wait=True)
+
+
+def test_job_onboards_skills_concurrently_and_reports_progress(
+    tmp_path, service, make_engine, monkeypatch
+):
+    for name in ("alpha", "beta"):
+        _write_pending(tmp_path, "u1", name, "import requests\n")
+
+    # Both skills must be in flight at once to get past the barrier.
+    barrier = threading.Barrier(2, timeout=10)
+    real = service.onboard_candidate
+
+    def onboard(candidate, **kwargs):
+        assert kwargs["scan"] is not None and kwargs["scan"].imports == {"requests"}
+        barrier.wait()
+        return real(candidate, **kwargs)
+
+    monkeypatch.setattr(service, "onboard_candidate", onboard)
+    engine = make_engine(scan_processes=1)
+    messages: list[str] = []
+
+    job = engine.start(
+        user_id="u1",
+        scope="user",
+        install_deps=False,
+        run_scripts=False,
+        on_progress=messages.append,
+    )
+    summary = job.future.result(timeout=60)
+
+    assert summary["onboarded"] == 2 and summary["failed"] == 0
+    assert (tmp_path / "u1" / "alpha" / "SKILL.md").exists()
+    assert messages[0] == "Scanning 2 pending skill(s)..."
+    assert sum("Onboarding skills" in m for m in messages) == 2
+    assert messages[-1].startswith("Skill onboarding done: 2 onboarded")
+
+    state = json.loads((job.state_dir / JOB_FILE).read_text(encoding="utf-8"))
+    assert state["status"] == "done"
+    assert state["counts"] == {"onboarded": 2}
+    skill_state = json.loads(
+        (job.state_dir / "skills" / "user--u1--alpha.json").read_text(encoding="utf-8")
+    )
+    assert skill_state["status"] == "onboarded"
+
+
+def test_resume_reuses_unchanged_failures(tmp_path, service, make_engine, monkeypatch):
+    broken = _write_pending(tmp_path, "u1", "broken", "def oops(:\n")
+    _write_pending(tmp_path, "u1", "fine")
+
+    first = make_engine()
+    job = first.start(user_id="u1", scope="user", install_deps=False, run_scripts=False)
+    summary = job.future.result(timeout=60)
+    assert (summary["onboarded"], summary["failed"]) == (1, 1)
+
+    # Simulate a restart while the job was still running.
+    state_file = job.state_dir / JOB_FILE
+    data = json.loads(state_file.read_text(encoding="utf-8"))
+    state_file.write_text(json.dumps({**data, "status": "running"}), encoding="utf-8")
+    engine = make_engine()
+    assert engine.status(job.job_id)["status"] == "interrupted"
+
+    calls: list[str] = []
+    real = service.onboard_candidate
+    monkeypatch.setattr(
+        service, "onboard_candidate", lambda c, **kw: calls.append(c.skill_name) or real(c, **kw)
+    )
+
+    resumed = engine.resume(job.job_id).future.result(timeout=60)
+    assert calls == []
+    assert resumed["failed"] == 1 and resumed["results"][0]["resumed"] is True
+
+    (broken / "main.py").write_text("def oops():\n    pass\n", encoding="utf-8")
+    fixed = engine.resume(job.job_id).future.result(timeout=60)
+    assert calls == ["broken"]
+    assert fixed["onboarded"] == 1 and fixed["failed"] == 0
+    assert engine.status(job.job_id)["status"] == "done"
+
+
+def test_run_awaits_summary_and_dedupes_running_jobs(tmp_path, make_engine, monkeypatch):
+    _write_pending(tmp_path, "u1", "gamma")
+    engine = make_engine()
+
+    summary = asyncio.run(engine.run(user_id="u1", scope="user", dry_run=True))
+
+    assert summary["results"][0]["status"] == "dry-run"
+    assert (tmp_path / "u1" / "pending" / "gamma").exists()
+
+    gate = threading.Event()
+    monkeypatch.setattr(engine.service, "select_pending", lambda **_kw: gate.wait(10) and [])
+    job = engine.start(user_id="u1")
+    assert engine.start(user_id="u1") is job
+    gate.set()
+    assert job.future.result(timeout=10)["total"] == 0
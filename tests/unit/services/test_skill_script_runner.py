@@ -0,0 +1,248 @@
+"""Unit tests for the resident skill script runner."""
+
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import textwrap
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.shell_reactor import get_shell_reactor
+from app.services.skill_script_runner import ResidentScriptRunner, parse_python_invocation
+from app.tools import shell_env
+
+
+@pytest.fixture
+def skill(tmp_path: Path) -> Path:
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "helper.py").write_text("VALUE = 'local'\n", encoding="utf-8")
+    (scripts / "tool.py").write_text(
+        textwrap.dedent(
+            """
+            import decimal
+            import os
+            import sys
+
+            import helper
+
+            print(sys.argv, os.getcwd(), os.environ.get("RUN_NO"), helper.VALUE, __name__)
+            print(">>>PROGRESS: working", file=sys.stderr)
+            print("warning: careful", file=sys.stderr)
+            sys.exit(int(sys.argv[1]))
+            """
+        ),
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def runner(tmp_path: Path):
+    r = ResidentScriptRunner(spool_dir=tmp_path / "spool")
+    (tmp_path / "spool").mkdir()
+    yield r
+    r.shutdown()
+
+
+def test_parse_python_invocation_accepts_only_plain_script_commands(skill: Path):
+    py = sys.executable
+    inv = parse_python_invocation(f"{py} -u scripts/tool.py 3 'a b?'", cwd=str(skill))
+    assert inv is not None
+    assert (inv.script, inv.argv0, inv.argv) == (
+        str(skill / "scripts" / "tool.py"),
+        "scripts/tool.py",
+        ("3", "a b?"),
+    )
+
+    env = {"PATH": os.path.dirname(py)}
+    bare = parse_python_invocation("python3 scripts/tool.py", cwd=str(skill), env=env)
+    assert bare is not None and os.path.dirname(bare.python) == os.path.dirname(py)
+
+    for command in (
+        f"{py} scripts/tool.py 0 | head",
+        f"{py} scripts/tool.py $HOME",
+        f'{py} scripts/tool.py "$HOME"',
+        f"{py} scripts/tool.py *.xlsx",
+        f"{py} scripts/tool.py 0 > out.txt",
+        f"cd scripts && {py} tool.py 0",
+        f"{py} -c 'print(1)'",
+        f"{py} scripts/missing.py",
+        "node scripts/tool.py",
+    ):
+        assert parse_python_invocation(command, cwd=str(skill)) is None, command
+
+
+def test_runs_reuse_one_fork_server_with_fresh_process_state(skill: Path, runner):
+    inv = parse_python_invocation(f"{sys.executable} scripts/tool.py 3", cwd=str(skill))
+    assert inv is not None
+
+    seen = []
+    first = runner.run(
+        inv, env={**os.environ, "RUN_NO": "1"}, timeout_seconds=30, on_stderr=seen.append
+    )
+    zygote = runner._zygotes[sys.executable]
+    second = runner.run(inv, env={**os.environ, "RUN_NO": "2"}, timeout_seconds=30)
+
+    assert first.returncode == 3
+    assert first.stdout == f"['scripts/tool.py', '3'] {skill} 1 local __main__\n"
+    assert second.stdout == f"['scripts/tool.py', '3'] {skill} 2 local __main__\n"
+    assert seen == [">>>PROGRESS: working\n", "warning: careful\n"]
+    assert runner._zygotes[sys.executable] is zygote
+    # Third-party/stdlib imports are learned for preloading; skill modules are not.
+    assert "decimal" in runner._learned[sys.executable]
+    assert "helper" not in runner._learned[sys.executable]
+
+    # Edited scripts are picked up on the next run.
+    (skill / "scripts" / "helper.py").write_text("VALUE = 'edited'\n", encoding="utf-8")
+    assert "edited" in runner.run(inv, env=dict(os.environ), timeout_seconds=30).stdout
+
+
+def test_learned_modules_are_preloaded_without_shadowing_local_ones(skill: Path, runner):
+    (skill / "scripts" / "probe.py").write_text(
+        "import sys\n"
+        "print('fractions' in sys.modules)\n"
+        "import fractions\n"
+        "print(getattr(fractions, 'VALUE', 'stdlib'))\n",
+        encoding="utf-8",
+    )
+    other = skill / "other"
+    other.mkdir()
+    (other / "probe.py").write_text((skill / "scripts" / "probe.py").read_text(), encoding="utf-8")
+    (other / "fractions.py").write_text("VALUE = 'local'\n", encoding="utf-8")
+
+    def run(script: str) -> str:
+        inv = parse_python_invocation(f"{sys.executable} {script}", cwd=str(skill))
+        assert inv is not None
+        return runner.run(inv, env=dict(os.environ), timeout_seconds=30).stdout
+
+    assert run("scripts/probe.py") == "False\nstdlib\n"
+    zygote = runner._zygotes[sys.executable]
+    # Preloaded by the same fork server after the first run reported it.
+    assert run("scripts/probe.py") == "True\nstdlib\n"
+    # A skill's own module of the same name still wins.
+    assert run("other/probe.py") == "False\nlocal\n"
+    assert runner._zygotes[sys.executable] is zygote
+
+
+def test_timeout_kills_the_whole_process_group(skill: Path, runner):
+    (skill / "scripts" / "hang.py").write_text(
+        textwrap.dedent(
+            """
+            import subprocess, sys, time
+            child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+            print(child.pid, flush=True)
+            time.sleep(60)
+            """
+        ),
+        encoding="utf-8",
+    )
+    inv = parse_python_invocation(f"{sys.executable} scripts/hang.py", cwd=str(skill))
+    assert inv is not None
+
+    result = runner.run(inv, env=dict(os.environ), timeout_seconds=1)
+
+    assert (result.returncode, result.timed_out) == (124, True)
+    grandchild = int(result.stdout.split()[0])
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            os.kill(grandchild, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("grandchild survived the timeout")
+
+
+def test_shell_routes_plain_python_commands_and_strips_markers(skill: Path, monkeypatch):
+    forwarded = []
+    monkeypatch.setattr(shell_env, "_parse_and_forward_progress_markers", _marker_filter(forwarded))
+    command = f"{sys.executable} scripts/tool.py 0"
+
+    result = shell_env._resident_shell_run(command=command, work_dir=str(skill), timeout_seconds=30)
+
+    assert result is not None
+    assert result["status"] == "success"
+    assert result["stderr"] == "warning: careful\n"
+    assert forwarded == ["working"]
+    assert (
+        shell_env._resident_shell_run(
+            command=command + " | cat", work_dir=str(skill), timeout_seconds=30
+        )
+        is None
+    )
+
+
+@pytest.fixture
+def shell_user():
+    cfg = SimpleNamespace(shell_max_concurrent_per_user=1, shell_cpu_limit_seconds=77)
+    tokens = [
+        (shell_env._config_var, shell_env._config_var.set(cfg)),
+        (shell_env._current_user_id_var, shell_env._current_user_id_var.set("u-resident")),
+    ]
+    yield "u-resident"
+    for var, token in tokens:
+        var.reset(token)
+
+
+def test_rlimits_apply_to_the_run_with_the_lower_memory_cap(skill: Path, tmp_path: Path):
+    (skill / "scripts" / "limits.py").write_text(
+        "import resource\n"
+        "print(resource.getrlimit(resource.RLIMIT_CPU)[0], resource.getrlimit(resource.RLIMIT_AS)[0])\n",
+        encoding="utf-8",
+    )
+    inv = parse_python_invocation(f"{sys.executable} scripts/limits.py", cwd=str(skill))
+    assert inv is not None
+    runner = ResidentScriptRunner(memory_limit_mb=4096, spool_dir=tmp_path / "spool")
+    (tmp_path / "spool").mkdir()
+    try:
+        result = runner.run(
+            inv,
+            env=dict(os.environ),
+            timeout_seconds=30,
+            rlimits={resource.RLIMIT_CPU: 77, resource.RLIMIT_AS: 8192 << 20},
+        )
+    finally:
+        runner.shutdown()
+
+    assert result.stdout.split() == ["77", str(4096 << 20)]
+
+
+def test_shell_resident_run_uses_the_users_slot_and_rlimits(skill: Path, shell_user: str):
+    (skill / "scripts" / "cpu.py").write_text(
+        "import resource\nprint(resource.getrlimit(resource.RLIMIT_CPU)[0])\n", encoding="utf-8"
+    )
+    command = f"{sys.executable} scripts/cpu.py"
+    reactor = get_shell_reactor()
+
+    reactor.acquire_slot(shell_user, 1, None)
+    try:
+        busy = shell_env._resident_shell_run(
+            command=command, work_dir=str(skill), timeout_seconds=1
+        )
+    finally:
+        reactor.release_slot(shell_user)
+    result = shell_env._resident_shell_run(command=command, work_dir=str(skill), timeout_seconds=30)
+
+    assert busy is not None
+    assert busy["status"] == "error"
+    assert "already running" in busy["stderr"]
+    assert result is not None
+    assert result["stdout"].strip() == "77"
+    assert reactor._active.get(shell_user) is None  # slot released
+
+
+def _marker_filter(sink: list[str]):
+    def _filter(line: str) -> str:
+        if line.startswith(">>>PROGRESS:"):
+            sink.append(line.split(":", 1)[1].strip())
+            return ""
+        return line
+
+    return _filter
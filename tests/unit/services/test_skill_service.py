@@ -1,23 +1,23 @@
 """Unit tests for per-user skill service.
 
 Tests skill installation, uninstallation, and GitHub URL parsing
-with mocked HTTP requests to avoid rate limiting.
+against a local GitHub stand-in server to avoid network access.
 """
 
-import json
 import shutil
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
 
 import pytest
 
 from app.config import AgentConfig
+from app.services.github_downloader import GitHubDownloader
 from app.services.skill_service import (
     SkillInstallError,
     SkillNotFoundError,
     SkillService,
 )
+from tests.unit.services.github_standin import GitHubStandIn
 
 
 TEST_USER_ID = "testuser"
@@ -143,18 +143,9 @@ class TestPerUserSkillInstallation:
         assert user2_dir.name == "user2"
 
     def test_install_skill_from_github_success(self, skill_service, temp_skills_dir):
-        """Test successful skill installation from GitHub."""
+        """Test successful skill installation from GitHub (local stand-in server)."""
         url = "https://github.com/owner/repo/tree/main/skills/test-skill"
 
-        api_response = [
-            {
-                "name": "SKILL.md",
-                "type": "file",
-                "path": "skills/test-skill/SKILL.md",
-                "download_url": "https://raw.githubusercontent.com/...",
-            },
-        ]
-
         skill_md_content = b"""---
 name: test-skill
 description: A test skill
@@ -162,19 +153,13 @@ description: A test skill
 # Test Skill
 """
 
-        def mock_urlopen(req, timeout=None):
-            mock_resp = MagicMock()
-            mock_resp.read.return_value = json.dumps(api_response).encode()
-            mock_resp.__enter__ = lambda s: s
-            mock_resp.__exit__ = MagicMock(return_value=False)
-            return mock_resp
-
-        def mock_urlretrieve(url, dest):
-            Path(dest).write_bytes(skill_md_content)
-
-        with patch("urllib.request.urlopen", mock_urlopen):
-            with patch("urllib.request.urlretrieve", mock_urlretrieve):
-                metadata = skill_service.install_skill(url, TEST_USER_ID)
+        with GitHubStandIn({"skills/test-skill/SKILL.md": skill_md_content}) as standin:
+            skill_service.github = GitHubDownloader(
+                Path(temp_skills_dir) / ".cache",
+                api_base=standin.base_url,
+                raw_base=standin.base_url,
+            )
+            metadata = skill_service.install_skill(url, TEST_USER_ID)
 
         assert metadata.name == "test-skill"
         assert metadata.source_url == url
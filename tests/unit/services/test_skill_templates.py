@@ -0,0 +1,89 @@
+"""Unit tests for cached skill template materialization."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services import skill_templates
+from app.services.skill_templates import MANIFEST_NAME, TemplateMaterializer
+
+
+def _age(*paths: Path) -> None:
+    """Backdate mtimes so stamps are not considered racy."""
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+@pytest.fixture
+def skills(tmp_path: Path):
+    user_dir = tmp_path / "skills" / "u1"
+    (user_dir / "himalaya").mkdir(parents=True)
+    (user_dir / "foo" / "conf").mkdir(parents=True)
+    (user_dir / "foo" / ".venv").mkdir()
+    (user_dir / "himalaya" / "himalaya.toml_example").write_text('email = "[GMAIL]"\n')
+    (user_dir / "foo" / "conf" / "config.example").write_text("token=[TOKEN] [UNKNOWN]\n")
+    (user_dir / "foo" / ".venv" / "ignored.example").write_text("[TOKEN]\n")
+    _age(*user_dir.rglob("*"))
+    return user_dir, tmp_path / "workspace" / "u1" / "tmp"
+
+
+def _no_refresh(*_args, **_kwargs):
+    raise AssertionError("templates were rescanned")
+
+
+def test_steady_state_does_no_template_io(skills, monkeypatch):
+    user_dir, out = skills
+    block = {"himalaya": {"GMAIL": "a@b.com"}, "foo": {"env": {"TOKEN": "t1"}}}
+
+    env = TemplateMaterializer(user_dir, out).materialize(["himalaya", "foo"], block, user_id="u1")
+
+    assert env == {"HIMALAYA_CONFIG": str((out / "himalaya.toml").resolve())}
+    assert (out / "himalaya.toml").read_text() == 'email = "a@b.com"\n'
+    assert (out / "foo__config").read_text() == "token=t1 [UNKNOWN]\n"
+    assert not (out / "foo__ignored").exists()
+    assert (out / ".env").read_text().endswith(f"HIMALAYA_CONFIG={env['HIMALAYA_CONFIG']}\n")
+
+    # A fresh instance (e.g. after a restart) trusts the on-disk manifest.
+    monkeypatch.setattr(TemplateMaterializer, "_refresh", _no_refresh)
+    materializer = TemplateMaterializer(user_dir, out)
+    assert materializer.materialize(["himalaya", "foo"], block, user_id="u1") == env
+    monkeypatch.setattr(Path, "read_text", _no_refresh)
+    assert materializer.materialize(["himalaya", "foo"], block, user_id="u1") == env
+
+
+def test_only_changed_outputs_are_rewritten(skills, monkeypatch):
+    user_dir, out = skills
+    block = {"himalaya": {"GMAIL": "a@b.com"}, "foo": {"TOKEN": "t1"}}
+    materializer = TemplateMaterializer(user_dir, out)
+    materializer.materialize(["himalaya", "foo"], block, user_id="u1")
+
+    writes: list[str] = []
+    write_atomic = skill_templates._write_atomic
+
+    def _record(path: Path, text: str) -> None:
+        writes.append(path.name)
+        write_atomic(path, text)
+
+    monkeypatch.setattr(skill_templates, "_write_atomic", _record)
+
+    # New secrets for one skill re-render only that skill's output.
+    block["foo"] = {"TOKEN": "t2"}
+    materializer.materialize(["himalaya", "foo"], block, user_id="u1")
+    assert (out / "foo__config").read_text() == "token=t2 [UNKNOWN]\n"
+    assert writes == ["foo__config", MANIFEST_NAME]
+
+    # Edited templates and deleted outputs are picked up too.
+    writes.clear()
+    (user_dir / "himalaya" / "himalaya.toml_example").write_text('email = "[GMAIL]" # v2\n')
+    (out / "foo__config").unlink()
+    materializer.materialize(["himalaya", "foo"], block, user_id="u1")
+    assert (out / "himalaya.toml").read_text() == 'email = "a@b.com" # v2\n'
+    assert (out / "foo__config").read_text() == "token=t2 [UNKNOWN]\n"
+    assert sorted(writes) == sorted(["himalaya.toml", "foo__config", MANIFEST_NAME])
+    # The .env header is not repeated when the file is rewritten.
+    assert (out / ".env").read_text().count("Auto-generated") == 1
@@ -0,0 +1,163 @@
+"""Unit tests for the shared, content-addressed skill venv store.
+
+Subprocess calls are faked so the tests do not require uv/pip/network.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.config import AgentConfig
+from app.services.pending_skill_service import PendingSkillService
+from app.services.skill_venv_store import MARKER_NAME, SkillVenvStore, normalize_requirements
+
+
+class _Proc:
+    def __init__(self, returncode: int = 0, stdout: str = "", stderr: str = ""):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class _FakeUv:
+    """Records uv invocations and materializes a minimal venv."""
+
+    def __init__(self, *, offline_ok: bool = True):
+        self.calls: list[list[str]] = []
+        self.offline_ok = offline_ok
+
+    def __call__(self, cmd, cwd=None, env=None, capture_output=None, text=None, timeout=None):
+        self.calls.append(list(cmd))
+        if cmd[:2] == ["uv", "venv"]:
+            venv_bin = Path(cmd[2]) / "bin"
+            venv_bin.mkdir(parents=True, exist_ok=True)
+            (venv_bin / "python").write_text("#!/bin/sh\n", encoding="utf-8")
+            return _Proc(0)
+        if cmd[:3] == ["uv", "pip", "install"]:
+            if "--offline" in cmd and not self.offline_ok:
+                return _Proc(1, stderr="not in cache")
+            return _Proc(0)
+        raise AssertionError(f"Unexpected subprocess command: {cmd}")
+
+    def count(self, *prefix: str) -> int:
+        return sum(1 for c in self.calls if c[: len(prefix)] == list(prefix))
+
+
+def test_normalized_requirements_share_a_key(tmp_path):
+    store = SkillVenvStore(tmp_path)
+    a = "# AUTO-GENERATED\nRequests>=2.0\nPyYAML\n\n"
+    b = "pyyaml\nrequests >= 2.0  # http\nrequests>=2.0\n"
+
+    assert normalize_requirements(a) == ["pyyaml", "requests>=2.0"]
+    assert store.key_for(a) == store.key_for(b)
+    assert store.key_for(a) != store.key_for("requests>=3.0\npyyaml\n")
+
+
+def test_same_skill_for_many_users_builds_one_venv(monkeypatch, tmp_path):
+    fake = _FakeUv()
+    monkeypatch.setattr("subprocess.run", fake)
+    config = AgentConfig(
+        telegram_bot_token="test-token",
+        skills_base_dir=str(tmp_path),
+        shared_skills_dir=str(tmp_path / "shared"),
+        session_storage_dir=str(tmp_path / "sessions"),
+        pending_skills_preflight_enabled=False,
+        pending_skills_generate_requirements=False,
+    )
+    svc = PendingSkillService(config)
+
+    users = ["u1", "u2", "u3"]
+    for user in users:
+        pending = tmp_path / user / "pending" / "fetch"
+        pending.mkdir(parents=True)
+        (pending / "requirements.txt").write_text("requests\n", encoding="utf-8")
+        result = svc.onboard_pending(user_id=user, scope="user", run_scripts=False)
+        assert result["onboarded"] == 1, result
+
+    links = [tmp_path / user / "fetch" / ".venv" for user in users]
+    assert all(link.is_symlink() for link in links)
+    targets = {link.resolve() for link in links}
+    assert len(targets) == 1
+    shared = targets.pop()
+    assert shared.parent == (tmp_path / ".venvs").resolve()
+    assert (shared / MARKER_NAME).exists()
+    assert (links[0] / "bin" / "python").exists()
+
+    assert fake.count("uv", "venv") == 1
+    assert fake.count("uv", "pip", "install") == 1  # served offline on first try
+
+
+def test_falls_back_to_index_and_rebuilds_incomplete_venv(monkeypatch, tmp_path):
+    fake = _FakeUv(offline_ok=False)
+    monkeypatch.setattr("subprocess.run", fake)
+    store = SkillVenvStore(tmp_path / "store")
+    req = tmp_path / "requirements.txt"
+    req.write_text("rich\n", encoding="utf-8")
+
+    # Leftover from a crashed build: directory without completion marker.
+    stale = store.venv_path(store.key_for("rich\n"))
+    stale.mkdir(parents=True)
+    (stale / "junk").write_text("x", encoding="utf-8")
+
+    rep = store.acquire(req)
+
+    assert rep["ok"] and not rep["reused"] and rep["offline"] is False
+    assert not (stale / "junk").exists()
+    installs = [c for c in fake.calls if c[:3] == ["uv", "pip", "install"]]
+    assert ["--offline" in c for c in installs] == [True, False]
+    assert all(str(store.wheelhouse) in c for c in installs)
+
+    assert store.acquire(req)["reused"] is True
+
+    link = tmp_path / "skill" / ".venv"
+    link.mkdir(parents=True)  # legacy private venv is replaced by the link
+    SkillVenvStore.link(link, Path(rep["venv_dir"]))
+    assert link.is_symlink() and link.resolve() == Path(rep["venv_dir"]).resolve()
+
+
+def test_includes_are_hashed_and_local_paths_are_not_shared(tmp_path):
+    store = SkillVenvStore(tmp_path / "store")
+    skill = tmp_path / "skill"
+    (skill / "reqs").mkdir(parents=True)
+    req = skill / "requirements.txt"
+    base = skill / "reqs" / "base.txt"
+    req.write_text("-r reqs/base.txt\nrich\n", encoding="utf-8")
+    base.write_text("-c pins.txt\nrequests\n", encoding="utf-8")
+    (skill / "reqs" / "pins.txt").write_text("urllib3<3\n", encoding="utf-8")
+
+    key = store.key_for_file(req)
+    assert key == store.key_for_file(req)
+    (skill / "reqs" / "pins.txt").write_text("urllib3<2\n", encoding="utf-8")
+    assert store.key_for_file(req) not in (None, key)
+
+    local_refs = [
+        "-e .",
+        "./vendor/pkg",
+        "vendor/pkg.whl",
+        "pkg @ file:///tmp/pkg",
+        "--find-links ./w",
+    ]
+    for local in local_refs:
+        base.write_text(f"{local}\nrequests\n", encoding="utf-8")
+        assert store.key_for_file(req) is None, local
+        rep = store.acquire(req)
+        assert rep["ok"] is False and rep["shareable"] is False
+
+
+def test_built_venv_is_read_only(monkeypatch, tmp_path):
+    monkeypatch.setattr("subprocess.run", _FakeUv())
+    store = SkillVenvStore(tmp_path / "store")
+    req = tmp_path / "requirements.txt"
+    req.write_text("rich\n", encoding="utf-8")
+
+    venv_dir = Path(store.acquire(req)["venv_dir"])
+
+    for path in [venv_dir, *venv_dir.rglob("*")]:
+        assert path.stat().st_mode & 0o222 == 0, path
+    # An incomplete read-only build can still be replaced.
+    (venv_dir / MARKER_NAME).chmod(0o600)
+    venv_dir.chmod(0o700)
+    (venv_dir / MARKER_NAME).unlink()
+    venv_dir.chmod(0o500)
+    rep = store.acquire(req)
+    assert rep["ok"] and rep["reused"] is False
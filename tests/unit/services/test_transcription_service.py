@@ -0,0 +1,145 @@
+"""Unit tests for the chunked voice/audio transcription service."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.config import AgentConfig
+from app.services.transcription_service import (
+    TranscriptionError,
+    TranscriptionService,
+    build_transcription_service,
+    parse_silencedetect,
+    plan_chunks,
+)
+
+
+class _StubBackend:
+    """Backend returning the file name, tracking peak concurrency."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def transcribe(self, audio_path: Path) -> str:
+        self.calls.append(audio_path.name)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("backend down")
+            return f"text of {audio_path.stem}"
+        finally:
+            self.active -= 1
+
+
+def _audio(tmp_path: Path, content: bytes = b"fake-audio") -> Path:
+    path = tmp_path / "voice.ogg"
+    path.write_bytes(content)
+    return path
+
+
+class TestPlanChunks:
+    def test_short_audio_is_single_chunk(self):
+        assert plan_chunks(30.0, [], max_chunk_seconds=60) == [(0.0, 30.0)]
+
+    def test_cuts_at_latest_silence_within_window(self):
+        chunks = plan_chunks(
+            150.0,
+            [(20.0, 22.0), (50.0, 52.0), (70.0, 72.0), (110.0, 112.0)],
+            max_chunk_seconds=60,
+        )
+        assert chunks == [(0.0, 51.0), (51.0, 111.0), (111.0, 150.0)]
+
+    def test_hard_cut_without_silence(self):
+        chunks = plan_chunks(130.0, [], max_chunk_seconds=60)
+        assert chunks == [(0.0, 60.0), (60.0, 120.0), (120.0, 130.0)]
+        assert all(end - start <= 60 for start, end in chunks)
+
+
+def test_parse_silencedetect():
+    stderr = (
+        "  Duration: 00:02:05.50, start: 0.000000, bitrate: 32 kb/s\n"
+        "[silencedetect @ 0x1] silence_start: 40.1\n"
+        "[silencedetect @ 0x1] silence_end: 41.3 | silence_duration: 1.2\n"
+        "[silencedetect @ 0x1] silence_start: -0.01\n"
+        "[silencedetect @ 0x1] silence_end: 0.5 | silence_duration: 0.51\n"
+    )
+    duration, silences = parse_silencedetect(stderr)
+    assert duration == pytest.approx(125.5)
+    assert silences == [(40.1, 41.3), (0.0, 0.5)]
+
+
+class TestTranscriptionService:
+    @pytest.mark.asyncio
+    async def test_short_audio_single_call_and_cached(self, tmp_path):
+        backend = _StubBackend()
+        service = TranscriptionService(backend, tmp_path / "cache", max_chunk_seconds=60)
+        audio = _audio(tmp_path)
+
+        first = await service.transcribe_file(audio, duration_hint=5)
+        second = await service.transcribe_file(audio, duration_hint=5)
+
+        assert first.render() == "text of voice"
+        assert not first.cached
+        assert second.cached
+        assert second.render() == "text of voice"
+        assert backend.calls == ["voice.ogg"]
+
+    @pytest.mark.asyncio
+    async def test_long_audio_is_chunked_in_parallel(self, tmp_path, monkeypatch):
+        backend = _StubBackend(delay=0.01)
+        service = TranscriptionService(
+            backend, tmp_path / "cache", max_chunk_seconds=60, max_parallel=2
+        )
+        audio = _audio(tmp_path)
+
+        async def _probe(path):
+            return 200.0, [(58.0, 60.0), (118.0, 120.0)]
+
+        extracted: list[tuple[float, float]] = []
+
+        async def _extract(src, dest, start, end):
+            extracted.append((start, end))
+            dest.write_bytes(b"chunk")
+
+        monkeypatch.setattr("shutil.which", lambda _bin: "/usr/bin/ffmpeg")
+        monkeypatch.setattr(service, "_probe", _probe)
+        monkeypatch.setattr(service, "_extract_chunk", _extract)
+
+        transcript = await service.transcribe_file(audio)
+
+        assert len(extracted) == 4
+        assert backend.peak == 2
+        assert transcript.duration == 200.0
+        lines = transcript.render().splitlines()
+        assert lines[0] == "[00:00] text of chunk_0000"
+        assert lines[1] == "[00:59] text of chunk_0001"
+        assert lines[-1] == "[02:59] text of chunk_0003"
+
+    @pytest.mark.asyncio
+    async def test_backend_failure_raises_and_is_not_cached(self, tmp_path):
+        backend = _StubBackend(fail=True)
+        service = TranscriptionService(backend, tmp_path / "cache")
+        audio = _audio(tmp_path)
+
+        with pytest.raises(TranscriptionError):
+            await service.transcribe_file(audio, duration_hint=3)
+
+        assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_transcription_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    config = AgentConfig(
+        telegram_bot_token="test-token", working_folder_base_dir=str(tmp_path)
+    )
+    assert build_transcription_service(config) is None
+
+    config.voice_transcription_enabled = True
+    assert isinstance(build_transcription_service(config), TranscriptionService)
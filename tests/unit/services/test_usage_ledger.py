@@ -0,0 +1,136 @@
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from app.dao.usage_dao import UsageDAO
+from app.database import Database
+from app.models.domain import ModelUsage
+from app.services.usage_ledger import (
+    STAGE_CONVERSATION_TURN,
+    STAGE_EXTRACTION,
+    UsageLedger,
+    extract_usage,
+    get_usage_ledger,
+    record_agent_usage,
+    set_usage_ledger,
+    usage_budget,
+    usage_stage,
+)
+
+
+def _result(inp: int, out: int, *, cache_read: int = 0, latency_ms: int = 0):
+    usage = {"inputTokens": inp, "outputTokens": out, "totalTokens": inp + out}
+    if cache_read:
+        usage["cacheReadInputTokens"] = cache_read
+    return SimpleNamespace(
+        metrics=SimpleNamespace(
+            accumulated_usage=usage, accumulated_metrics={"latencyMs": latency_ms}
+        )
+    )
+
+
+@pytest_asyncio.fixture
+async def usage_dao():
+    db = Database("sqlite+aiosqlite:///:memory:")
+    await db.init_db()
+    yield UsageDAO(db)
+    await db.close()
+
+
+@pytest.fixture
+def installed_ledger():
+    previous = get_usage_ledger()
+    yield
+    set_usage_ledger(previous)
+
+
+def test_extract_usage_reads_strands_metrics():
+    assert extract_usage(_result(100, 20, cache_read=50, latency_ms=1500)) == {
+        "input_tokens": 100,
+        "output_tokens": 20,
+        "cache_read_tokens": 50,
+        "cache_write_tokens": 0,
+        "latency_ms": 1500,
+    }
+    assert extract_usage(SimpleNamespace()) is None
+
+
+def test_budget_downgrades_model_and_window():
+    ledger = UsageLedger(
+        daily_budget=100,
+        budget_overrides={"vip": 10_000},
+        fallback_model_id="cheap-model",
+        budget_window_size=6,
+    )
+    ledger.record_result(_result(60, 10), user_id="alice", stage="message")
+
+    decision = ledger.budget_decision("alice")
+    assert decision is not None and not decision.over_budget
+    assert decision.model_id is None and decision.window_size is None
+
+    ledger.record_result(_result(30, 5), user_id="alice", stage="message")
+    ledger.record_result(_result(30, 5), user_id="vip", stage="message")
+
+    decision = ledger.budget_decision("alice")
+    assert decision.over_budget and decision.tokens_today == 105
+    assert decision.model_id == "cheap-model" and decision.window_size == 6
+    assert not ledger.budget_decision("vip").over_budget
+    assert UsageLedger().budget_decision("alice") is None
+
+
+def test_usage_stage_tags_unlabelled_calls(installed_ledger):
+    ledger = UsageLedger()
+    set_usage_ledger(ledger)
+
+    with usage_stage(STAGE_CONVERSATION_TURN):
+        turn = record_agent_usage(_result(5, 5), user_id="bob")
+        extraction = record_agent_usage(_result(5, 5), user_id="bob", stage=STAGE_EXTRACTION)
+    plain = record_agent_usage(_result(5, 5), user_id="bob")
+
+    assert turn.stage == STAGE_CONVERSATION_TURN
+    assert extraction.stage == STAGE_EXTRACTION
+    assert plain.stage == "message"
+    assert usage_budget("bob") is None
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batches_and_aggregates_per_day(usage_dao):
+    ledger = UsageLedger(usage_dao, batch_size=1000)
+    for _ in range(3):
+        ledger.record_result(
+            _result(100, 10, cache_read=40, latency_ms=250),
+            user_id="carol",
+            stage="message",
+            model_id="m1",
+            trace_id="t1",
+        )
+    ledger.record(ModelUsage(user_id="carol", stage="summary", input_tokens=7, output_tokens=3))
+    assert ledger.pending == 4
+
+    assert await ledger.flush() == 4
+    assert ledger.pending == 0
+
+    aggregates = {a.stage: a for a in await usage_dao.daily_aggregates("carol")}
+    assert aggregates["message"].calls == 3
+    assert aggregates["message"].total_tokens == 330
+    assert aggregates["message"].cache_read_tokens == 120
+    assert aggregates["message"].latency_ms == 750
+    assert aggregates["summary"].total_tokens == 10
+
+    report = await ledger.format_report("carol")
+    assert "340 tokens" in report and "message [m1]: 3 calls" in report
+
+
+@pytest.mark.asyncio
+async def test_start_seeds_todays_totals_for_budgets(usage_dao):
+    await usage_dao.insert_many(
+        [ModelUsage(user_id="dave", stage="message", input_tokens=900, output_tokens=200)]
+    )
+    ledger = UsageLedger(usage_dao, daily_budget=1000)
+    await ledger.start()
+    try:
+        assert ledger.tokens_today("dave") == 1100
+        assert ledger.budget_decision("dave").over_budget
+    finally:
+        await ledger.stop()
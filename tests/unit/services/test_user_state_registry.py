@@ -0,0 +1,157 @@
+"""Unit tests for bounded per-user state registries."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.agent.session_management import SessionLifecycleManager
+from app.services.agent.state import ConversationHistory
+from app.services.user_state_registry import (
+    BoundedUserRegistry,
+    registry_sizes,
+    sweep_registries,
+)
+from app.sqs.message_processor import _SlotSemaphore
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBoundedUserRegistry:
+    def test_idle_entries_evicted_after_ttl(self):
+        clock = _Clock()
+        evicted: list[str] = []
+        reg: BoundedUserRegistry[int] = BoundedUserRegistry(
+            "test_ttl",
+            idle_ttl_seconds=60,
+            sweep_interval_seconds=0,
+            on_evict=lambda k, _v: evicted.append(k),
+            clock=clock,
+        )
+        reg["a"] = 1
+        reg["b"] = 2
+        clock.now += 50
+        assert reg["a"] == 1  # refreshes "a"
+        clock.now += 20
+
+        reg["c"] = 3
+
+        assert set(reg) == {"a", "c"}
+        assert evicted == ["b"]
+
+    def test_lru_beyond_max_entries(self):
+        reg: BoundedUserRegistry[int] = BoundedUserRegistry(
+            "test_lru", idle_ttl_seconds=None, max_entries=2
+        )
+        reg["a"] = 1
+        reg["b"] = 2
+        reg.get("a")
+        reg["c"] = 3
+
+        assert set(reg) == {"a", "c"}
+
+    def test_pinned_entries_survive(self):
+        clock = _Clock()
+        reg: BoundedUserRegistry[int] = BoundedUserRegistry(
+            "test_pinned",
+            idle_ttl_seconds=10,
+            can_evict=lambda _k, v: v == 0,
+            clock=clock,
+        )
+        reg["busy"] = 1
+        reg["idle"] = 0
+        clock.now += 100
+
+        assert reg.sweep() == 1
+        assert list(reg) == ["busy"]
+
+    def test_registry_sizes_and_global_sweep(self):
+        clock = _Clock()
+        reg: BoundedUserRegistry[int] = BoundedUserRegistry(
+            "test_gauge", idle_ttl_seconds=10, clock=clock
+        )
+        reg["a"] = 1
+        assert registry_sizes()["test_gauge"] == 1
+
+        clock.now += 11
+        assert sweep_registries() >= 1
+        assert registry_sizes()["test_gauge"] == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_semaphore_evicted_but_held_one_kept():
+    clock = _Clock()
+    reg: BoundedUserRegistry[_SlotSemaphore] = BoundedUserRegistry(
+        "test_semaphores",
+        idle_ttl_seconds=10,
+        can_evict=lambda _k, sem: sem.idle,
+        clock=clock,
+    )
+    reg["idle"] = _SlotSemaphore(2)
+    reg["busy"] = _SlotSemaphore(2)
+    await reg["busy"].acquire()
+    clock.now += 11
+
+    reg.sweep()
+
+    assert list(reg) == ["busy"]
+
+
+class TestConversationHistorySpill:
+    def test_without_spill_history_is_not_trimmed(self):
+        history = ConversationHistory(max_messages_per_user=2, spill_enabled=False)
+        for i in range(5):
+            history.add_message("u1", "user", f"m{i}")
+
+        assert len(history.get("u1")) == 5
+        assert not history.is_spilled("u1")
+
+    def test_spill_keeps_tail_and_marks_user(self):
+        history = ConversationHistory(max_messages_per_user=2, spill_enabled=True)
+        for i in range(5):
+            history.add_message("u1", "user", f"m{i}")
+
+        assert [m.content for m in history.get("u1")] == ["m3", "m4"]
+        assert history.is_spilled("u1")
+
+        history.clear("u1")
+        assert history.get("u1") == []
+        assert not history.is_spilled("u1")
+
+    def test_spilled_flag_outlives_registry_eviction(self):
+        history = ConversationHistory(max_messages_per_user=1, spill_enabled=True, max_entries=1)
+        for user_id in ("u1", "u2", "u3"):
+            history.add_message(user_id, "user", "first")
+            history.add_message(user_id, "assistant", "second")
+
+        # Only one user's tail stays in memory; every user still reloads from the DB.
+        assert all(history.is_spilled(u) for u in ("u1", "u2", "u3"))
+
+    @pytest.mark.asyncio
+    async def test_extraction_reloads_spilled_history_from_db(self):
+        history = ConversationHistory(max_messages_per_user=1, spill_enabled=True)
+        history.add_message("u1", "user", "first")
+        history.add_message("u1", "assistant", "second")
+
+        dao = MagicMock()
+        persisted = [
+            {"role": "user", "content": "first"},
+            {"role": "assistant", "content": "second"},
+        ]
+        dao.get_conversation = AsyncMock(return_value=persisted)
+
+        manager = SessionLifecycleManager.__new__(SessionLifecycleManager)
+        manager._conversation_history = history
+        manager.conversation_dao = dao
+
+        result = await manager._history_for_extraction("u1", "s1")
+
+        assert result == persisted
+        dao.get_conversation.assert_awaited_once_with(
+            user_id="u1", session_id="s1", exclude_cron=True
+        )
@@ -0,0 +1,110 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.sqs.message_processor import MessageProcessor
+from app.sqs.typing_indicator import (
+    ChatPresenceManager,
+    ChatRateLimiter,
+    TypingIndicatorSender,
+)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.actions: list[tuple[int, str]] = []
+
+    async def __call__(self, chat_id: int, action: str) -> None:
+        self.actions.append((chat_id, action))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs_share_one_loop_per_chat() -> None:
+    recorder = _Recorder()
+    manager = ChatPresenceManager(TypingIndicatorSender(recorder), interval_seconds=0.05)
+
+    for _ in range(5):
+        await manager.acquire(1)
+    await asyncio.sleep(0.12)
+
+    assert manager.refcount(1) == 5
+    # One immediate send plus ~2 interval ticks, not 5x that.
+    assert 2 <= len(recorder.actions) <= 4
+
+    for _ in range(4):
+        await manager.release(1)
+    assert manager.refcount(1) == 1
+
+    await manager.release(1)
+    assert manager.refcount(1) == 0
+    sent = len(recorder.actions)
+    await asyncio.sleep(0.1)
+    assert len(recorder.actions) == sent
+
+
+@pytest.mark.asyncio
+async def test_indicator_paused_while_sending_and_resent_after() -> None:
+    recorder = _Recorder()
+    manager = ChatPresenceManager(TypingIndicatorSender(recorder), interval_seconds=0.03)
+
+    async with manager.active(7):
+        await asyncio.sleep(0)
+        async with manager.sending(7):
+            during = len(recorder.actions)
+            await asyncio.sleep(0.1)
+            assert len(recorder.actions) == during
+        await asyncio.sleep(0.01)
+        # Telegram clears the indicator on send; it is restored right away.
+        assert len(recorder.actions) == during + 1
+
+    assert manager.refcount(7) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_skips_chat_actions_after_real_send() -> None:
+    recorder = _Recorder()
+    limiter = ChatRateLimiter(per_chat_interval_seconds=10.0)
+    manager = ChatPresenceManager(
+        TypingIndicatorSender(recorder), interval_seconds=0.02, rate_limiter=limiter
+    )
+
+    async with manager.sending(3):
+        pass
+    async with manager.active(3):
+        await asyncio.sleep(0.07)
+
+    assert recorder.actions == []
+
+
+def test_rate_limiter_global_budget() -> None:
+    limiter = ChatRateLimiter(per_chat_interval_seconds=0.0, global_per_second=2)
+
+    assert limiter.try_acquire(1)
+    assert limiter.try_acquire(2)
+    assert not limiter.try_acquire(3)
+
+
+@pytest.mark.asyncio
+async def test_indicator_restored_after_send_once_chat_slot_frees() -> None:
+    recorder = _Recorder()
+    processor = MessageProcessor(
+        sqs_client=MagicMock(),
+        queue_manager=MagicMock(),
+        agent_service=MagicMock(),
+        typing_action_callback=recorder,
+    )
+    processor._rate_limiter.per_chat_interval_seconds = 0.05
+    presence = processor._get_presence()
+    assert presence is not None
+    presence.interval_seconds = 10.0
+
+    async with presence.active(5):
+        await asyncio.sleep(0.01)
+        assert recorder.actions == [(5, "typing")]
+        await processor._send_outbound(5, AsyncMock())
+        await asyncio.sleep(0.02)
+        assert len(recorder.actions) == 1  # the chat's slot is still taken
+        await asyncio.sleep(0.06)
+        # Re-sent once the per-chat interval expired, not a full interval later.
+        assert recorder.actions == [(5, "typing"), (5, "typing")]
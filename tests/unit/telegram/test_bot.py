@@ -9,9 +9,11 @@ Tests Telegram bot functionality including:
 Requirements: 11.5, 11.6, 11.2, 12.2
 """
 
+import asyncio
 import json
 import shutil
 import tempfile
+import threading
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -315,6 +317,7 @@ class TestCommandExecutor:
             command_parser=command_parser,
             enqueue_callback=enqueue_callback,
             send_response_callback=send_response_callback,
+            admin_users=["@Admin"],
         )
 
     @pytest.mark.asyncio
@@ -423,6 +426,46 @@ class TestCommandExecutor:
         executor._send_response.assert_called_once()
         mock_agent_service.memory_service.delete_similar_records.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_tool_stats_is_restricted_to_admins(self, executor):
+        parsed = ParsedCommand(CommandType.TOOL_STATS)
+
+        with patch(
+            "app.telegram.command_executor.format_slow_tools_report", return_value="report"
+        ) as report:
+            await executor.execute_command(parsed, "user-1", 123, "toolstats")
+            report.assert_not_called()
+            executor._send_response.assert_called_once_with(
+                123, "The toolstats command is restricted to admins."
+            )
+
+            executor._send_response.reset_mock()
+            await executor.execute_command(parsed, "admin", 123, "toolstats")
+            executor._send_response.assert_called_once_with(123, "report")
+
+    @pytest.mark.asyncio
+    async def test_profile_runs_in_the_background(self, executor):
+        started, release = threading.Event(), threading.Event()
+        profile = MagicMock()
+        profile.summary.return_value = "hot functions"
+
+        def _profile_for(seconds):
+            started.set()
+            release.wait(5)
+            return profile
+
+        with patch("app.telegram.command_executor.profile_for", side_effect=_profile_for):
+            await asyncio.wait_for(executor.execute_profile_command("admin", 123, ["60"]), 1)
+            assert await asyncio.to_thread(started.wait, 5)
+            executor._send_response.assert_called_once_with(
+                123, "🔬 Profiling all threads for 60s..."
+            )
+
+            release.set()
+            await asyncio.gather(*executor._background_tasks)
+
+        executor._send_response.assert_called_with(123, "hot functions")
+
 
 class TestTelegramMessageHandlers:
     """Tests for TelegramMessageHandlers module.
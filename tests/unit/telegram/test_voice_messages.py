@@ -6,6 +6,7 @@ as attachments (not silently ignored).
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -170,3 +171,160 @@ async def test_bot_registers_voice_handler(config):
                     voice_handler_calls.append(call_args)
 
         assert voice_handler_calls, "VOICE handler was not registered"
+
+
+@pytest.mark.asyncio
+async def test_handle_voice_includes_transcript(handlers):
+    from app.services.transcription_service import Transcript, TranscriptSegment
+
+    transcription_service = MagicMock()
+    transcription_service.transcribe_file = AsyncMock(
+        return_value=Transcript(segments=[TranscriptSegment(0.0, 7.0, "hello there")])
+    )
+    handlers.transcription_service = transcription_service
+
+    update = MagicMock()
+    update.effective_chat.id = 123
+    update.effective_user.id = 111
+    update.effective_user.username = "testuser"
+    update.effective_user.first_name = "Test"
+    update.message = MagicMock()
+    update.message.voice = MagicMock()
+    update.message.voice.file_id = "voice-file-id"
+    update.message.voice.file_unique_id = "uniq"
+    update.message.voice.file_size = 2048
+    update.message.voice.duration = 7
+    update.message.voice.mime_type = "audio/ogg"
+
+    handlers.reject_if_not_whitelisted = AsyncMock(return_value=False)
+    enqueue = AsyncMock()
+
+    await handlers.handle_voice(update, MagicMock(), enqueue_with_attachments=enqueue)
+    await handlers.wait_background_tasks()
+
+    transcription_service.transcribe_file.assert_awaited_once()
+    assert transcription_service.transcribe_file.await_args.kwargs["duration_hint"] == 7
+    call_kwargs = enqueue.await_args_list[0].kwargs
+    assert "hello there" in call_kwargs["message"]
+    assert len(call_kwargs["attachments"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_handle_voice_enqueues_without_transcript_on_failure(handlers):
+    transcription_service = MagicMock()
+    transcription_service.transcribe_file = AsyncMock(side_effect=RuntimeError("boom"))
+    handlers.transcription_service = transcription_service
+
+    update = MagicMock()
+    update.effective_chat.id = 123
+    update.effective_user.id = 111
+    update.effective_user.username = "testuser"
+    update.effective_user.first_name = "Test"
+    update.message = MagicMock()
+    update.message.voice = MagicMock()
+    update.message.voice.file_id = "voice-file-id"
+    update.message.voice.file_unique_id = "uniq"
+    update.message.voice.file_size = 2048
+    update.message.voice.duration = 7
+    update.message.voice.mime_type = "audio/ogg"
+
+    handlers.reject_if_not_whitelisted = AsyncMock(return_value=False)
+    enqueue = AsyncMock()
+
+    await handlers.handle_voice(update, MagicMock(), enqueue_with_attachments=enqueue)
+    await handlers.wait_background_tasks()
+
+    call_kwargs = enqueue.await_args_list[0].kwargs
+    assert call_kwargs["message"] == "[Voice message] duration=7s"
+
+
+@pytest.mark.asyncio
+async def test_handle_voice_does_not_wait_for_transcription(handlers):
+    from app.services.transcription_service import Transcript, TranscriptSegment
+
+    release = asyncio.Event()
+
+    async def _slow_transcribe(*_args, **_kwargs):
+        await release.wait()
+        return Transcript(segments=[TranscriptSegment(0.0, 1.0, "later")])
+
+    transcription_service = MagicMock()
+    transcription_service.transcribe_file = _slow_transcribe
+    handlers.transcription_service = transcription_service
+
+    update = MagicMock()
+    update.effective_chat.id = 123
+    update.effective_user.id = 111
+    update.effective_user.username = "testuser"
+    update.effective_user.first_name = "Test"
+    update.message = MagicMock()
+    update.message.voice = MagicMock()
+    update.message.voice.file_id = "voice-file-id"
+    update.message.voice.file_unique_id = "uniq"
+    update.message.voice.file_size = 2048
+    update.message.voice.duration = 1
+    update.message.voice.mime_type = "audio/ogg"
+
+    handlers.reject_if_not_whitelisted = AsyncMock(return_value=False)
+    enqueue = AsyncMock()
+
+    # The update handler returns while transcription is still running.
+    await asyncio.wait_for(
+        handlers.handle_voice(update, MagicMock(), enqueue_with_attachments=enqueue), timeout=1
+    )
+    enqueue.assert_not_awaited()
+
+    release.set()
+    await handlers.wait_background_tasks()
+    assert "later" in enqueue.await_args_list[0].kwargs["message"]
+
+
+@pytest.mark.asyncio
+async def test_messages_sent_during_transcription_keep_chat_order(handlers):
+    from app.services.transcription_service import Transcript, TranscriptSegment
+
+    release = asyncio.Event()
+
+    async def _slow_transcribe(*_args, **_kwargs):
+        await release.wait()
+        return Transcript(segments=[TranscriptSegment(0.0, 1.0, "first")])
+
+    transcription_service = MagicMock()
+    transcription_service.transcribe_file = _slow_transcribe
+    handlers.transcription_service = transcription_service
+
+    update = MagicMock()
+    update.effective_chat.id = 123
+    update.effective_user.id = 111
+    update.effective_user.username = "testuser"
+    update.effective_user.first_name = "Test"
+    update.message = MagicMock()
+    update.message.voice = MagicMock()
+    update.message.voice.file_id = "voice-file-id"
+    update.message.voice.file_unique_id = "uniq"
+    update.message.voice.file_size = 2048
+    update.message.voice.duration = 1
+    update.message.voice.mime_type = "audio/ogg"
+
+    handlers.reject_if_not_whitelisted = AsyncMock(return_value=False)
+    queued: list[str] = []
+
+    async def _enqueue_voice(**kwargs):
+        queued.append(kwargs["message"])
+
+    async def _enqueue_text(text):
+        queued.append(text)
+
+    await handlers.handle_voice(update, MagicMock(), enqueue_with_attachments=_enqueue_voice)
+
+    # A text sent right after the voice note waits for it; other chats don't.
+    assert handlers.defer_enqueue(123, lambda: _enqueue_text("second"))
+    assert not handlers.defer_enqueue(456, lambda: _enqueue_text("other chat"))
+    await asyncio.sleep(0)
+    assert queued == []
+
+    release.set()
+    await handlers.wait_background_tasks()
+    assert len(queued) == 2
+    assert "first" in queued[0] and queued[1] == "second"
+    assert not handlers.defer_enqueue(123, lambda: _enqueue_text("third"))
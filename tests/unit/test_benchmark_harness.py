@@ -0,0 +1,60 @@
+"""Smoke tests for the offline benchmark harnesses in benchmarks/."""
+
+from pathlib import Path
+
+from benchmarks.fakes import FakeSQSClient
+from benchmarks.import_time import LAZY_MODULES, measure, parse_importtime
+from benchmarks.load_test import percentile
+
+
+def test_fake_sqs_visibility_and_delete():
+    sqs = FakeSQSClient()
+    url = sqs.create_queue(QueueName="q", Attributes={"VisibilityTimeout": "60"})["QueueUrl"]
+    sqs.send_message(QueueUrl=url, MessageBody="{}")
+
+    first = sqs.receive_message(QueueUrl=url, WaitTimeSeconds=0)["Messages"][0]
+    assert "SentTimestamp" in first["Attributes"]
+    # In flight: invisible to a second receiver.
+    assert sqs.receive_message(QueueUrl=url, WaitTimeSeconds=0) == {}
+
+    sqs.change_message_visibility(
+        QueueUrl=url, ReceiptHandle=first["ReceiptHandle"], VisibilityTimeout=0
+    )
+    again = sqs.receive_message(QueueUrl=url, WaitTimeSeconds=0)["Messages"][0]
+    sqs.delete_message(QueueUrl=url, ReceiptHandle=again["ReceiptHandle"])
+    assert sqs.pending() == 0
+
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+_IMPORTTIME_SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   encodings.utf_8
+import time:       300 |        300 |     fastapi.routing
+import time:       200 |        500 |   fastapi
+import time:        50 |        650 | app.main
+import time:        10 |         10 | json
+"""
+
+
+def test_parse_importtime_builds_tree_summary():
+    report = parse_importtime(_IMPORTTIME_SAMPLE, target="app.main", top=5)
+
+    assert report.total_us == 650
+    assert report.module_count == 5
+    assert [e.module for e in report.top_level] == ["fastapi", "encodings.utf_8"]
+    assert report.top_self[0].module == "fastapi.routing"
+    assert report.modules["fastapi.routing"].depth == 2
+    assert report.imported("fastapi") and not report.imported("openai")
+
+
+def test_app_import_keeps_optional_providers_lazy():
+    # Subprocess: -X importtime needs a fresh interpreter with nothing cached.
+    report = measure("app.main", cwd=Path(__file__).resolve().parents[2])
+    leaked = [m for m in LAZY_MODULES if report.imported(m)]
+    assert not leaked, f"app.main eagerly imports {leaked}"
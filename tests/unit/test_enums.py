@@ -105,8 +105,8 @@ class TestCommandType:
         assert CommandType.MESSAGE == "message"
 
     def test_all_members(self):
-        """CommandType should have exactly 9 members."""
-        assert len(CommandType) == 9
+        """CommandType should have exactly 12 members."""
+        assert len(CommandType) == 12
         assert set(CommandType) == {
             CommandType.NEW,
             CommandType.LOGS,
@@ -117,6 +117,9 @@ class TestCommandType:
             CommandType.HELP,
             CommandType.MESSAGE,
             CommandType.CONVERSATION,
+            CommandType.TOOL_STATS,
+            CommandType.PROFILE,
+            CommandType.USAGE,
         }
 
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 import os
 from pathlib import Path
 
@@ -10,6 +11,7 @@ from app.config import (
     refresh_runtime_env_from_secrets,
     resolve_user_skills_dir,
 )
+from app.services.skill_templates import TemplateMaterializer
 from app.tools.skill_secrets import set_cached_skill_secrets
 
 
@@ -60,3 +62,40 @@ def test_example_template_is_materialized_and_exports_skill_config_env(tmp_path:
     finally:
         # Clean up module-level cache
         set_cached_skill_secrets({})
+
+
+def test_materialize_failure_is_logged_and_keeps_last_rendered_env(
+    tmp_path: Path, monkeypatch, caplog
+):
+    monkeypatch.setenv("AGENT_TELEGRAM_BOT_TOKEN", "test-token")
+    cfg = AgentConfig(
+        telegram_bot_token="test-token",
+        skills_base_dir=str(tmp_path / "skills"),
+        working_folder_base_dir=str(tmp_path / "workspace"),
+    )
+    user_dir = resolve_user_skills_dir(cfg, "user1", create=True)
+    (user_dir / "demo").mkdir(parents=True, exist_ok=True)
+    (user_dir / "demo" / "demo.toml_example").write_text('token = "[TOKEN]"\n', encoding="utf-8")
+    secrets_path = tmp_path / "secrets.yml"
+    secrets_path.write_text(yaml.safe_dump({"skills": {"demo": {}}}), encoding="utf-8")
+    monkeypatch.delenv("DEMO_CONFIG", raising=False)
+
+    try:
+        set_cached_skill_secrets({"demo": {"TOKEN": "abc123"}})
+        refresh_runtime_env_from_secrets(secrets_path=secrets_path, user_id="user1", config=cfg)
+        rendered = os.environ["DEMO_CONFIG"]
+
+        def _broken(*_args, **_kwargs):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(TemplateMaterializer, "_refresh", _broken)
+        monkeypatch.delenv("DEMO_CONFIG")
+        set_cached_skill_secrets({"demo": {"TOKEN": "rotated"}})
+        with caplog.at_level(logging.WARNING, logger="app.config"):
+            refresh_runtime_env_from_secrets(secrets_path=secrets_path, user_id="user1", config=cfg)
+
+        assert os.environ.get("DEMO_CONFIG") == rendered
+        assert "Cannot materialize skill templates" in caplog.text
+        assert "disk full" in caplog.text
+    finally:
+        set_cached_skill_secrets({})
@@ -9,8 +9,8 @@ from app.tools import shell_env as shell_env_module
 
 def test_cancel_running_shell_sends_sigterm_and_returns_true(monkeypatch):
     # Arrange: register a fake running pgid
-    shell_env_module._RUNNING_SHELL_PGID_BY_USER.clear()
-    shell_env_module._RUNNING_SHELL_PGID_BY_USER["u1"] = 12345
+    reactor = shell_env_module.get_shell_reactor()
+    reactor.track("u1", 12345)
 
     calls: list[tuple[int, int]] = []
 
@@ -23,7 +23,10 @@ def test_cancel_running_shell_sends_sigterm_and_returns_true(monkeypatch):
     monkeypatch.setattr(shell_env_module.os, "killpg", _fake_killpg)
 
     # Act
-    ok = shell_env_module.cancel_running_shell(user_id="u1")
+    try:
+        ok = shell_env_module.cancel_running_shell(user_id="u1")
+    finally:
+        reactor.untrack("u1", 12345)
 
     # Assert
     assert ok is True